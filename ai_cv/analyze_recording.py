@@ -0,0 +1,198 @@
+# ai_cv/analyze_recording.py
+"""
+Offline analysis of a recorded video, split across worker processes.
+
+The recording is cut into keyframe-aligned segments that are decoded,
+detected, tracked and sessionized in parallel. Each segment starts decoding
+--overlap seconds early so its tracker has settled at the boundary, and the
+sessions of neighbouring segments are stitched by matching tracks in that
+overlap. Timestamps are absolute: the recording's start time (a lot's
+video_start_time) plus the frame's offset.
+
+    python analyze_recording.py day.mp4 --start-time 1718000000 --output sessions.ndjson
+    python analyze_recording.py --lot-id 3 --api http://localhost:8000 --workers 8
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+import urllib.request
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+
+import cv2 as cv
+from recognition.session_logic import SessionManager
+from recognition.stitching import stitch_sessions
+from recognition.tracker import VehicleTracker
+from utilities.segments import plan_segments, scan_keyframes
+
+logger = logging.getLogger("parkvision.offline")
+
+
+def yolo_detector(model_path="yolov8n.pt"):
+    from detection.detect import VehicleDetector
+    return VehicleDetector(model_path)
+
+
+def stub_detector(detections_path):
+    from benchmarks.scenes import StubDetector
+    return StubDetector.from_file(detections_path)
+
+
+"""
+Run one segment in a worker process: decode from its warm-up keyframe to
+its end and return its sessions plus the boxes needed for stitching.
+"""
+def analyze_segment(video_path, segment, fps, start_time, make_detector):
+    started = time.perf_counter()
+    detector = make_detector()
+    if hasattr(detector, "seek"):
+        detector.seek(segment.warmup)
+    tracker = VehicleTracker()
+    sess_mgr = SessionManager()
+
+    cap = cv.VideoCapture(video_path)
+    if segment.warmup:
+        cap.set(cv.CAP_PROP_POS_FRAMES, segment.warmup)
+    sessions = []
+    head = defaultdict(dict)
+    tail = defaultdict(dict)
+    timestamp = start_time + segment.warmup / fps
+    try:
+        for index in range(segment.warmup, segment.end):
+            ret, frame = cap.read()
+            if not ret:
+                break
+            timestamp = start_time + index / fps
+            tracks = tracker.update(detector.detect(frame))
+            for c in sess_mgr.update(tracks, timestamp=timestamp):
+                sessions.append(dict(c, open=False))
+            if index < segment.start or index >= segment.tail:
+                for t in tracks:
+                    bbox = [float(v) for v in t["bbox"]]
+                    if index < segment.start:
+                        head[t["track_id"]][index] = bbox
+                    if index >= segment.tail:
+                        tail[t["track_id"]][index] = bbox
+    finally:
+        cap.release()
+
+    # Sessions still active at the end of the segment
+    for tid, sess in sess_mgr.sessions.items():
+        sessions.append({
+            "track_id": tid,
+            "start_time": sess["start_time"],
+            "end_time": sess["last_seen"],
+            "duration": sess["last_seen"] - sess["start_time"],
+            "bbox": sess["bbox"],
+            "cls": sess["cls"],
+            "name": sess["name"],
+            "open": True,
+        })
+
+    return {
+        "index": segment.index,
+        "boundary": start_time + segment.start / fps,
+        "sessions": sessions,
+        "head": dict(head),
+        "tail": dict(tail),
+        "frames": segment.end - segment.warmup,
+        "seconds": time.perf_counter() - started,
+    }
+
+
+def _run_segment(args):
+    return analyze_segment(*args)
+
+
+"""
+Analyze `video_path` with `workers` processes and return the stitched
+sessions. `make_detector` is a picklable factory called once per worker.
+"""
+def analyze(video_path, start_time=0.0, workers=None, segments=None, overlap=10.0,
+            make_detector=yolo_detector, fps=None):
+    workers = workers or os.cpu_count() or 1
+    cap = cv.VideoCapture(video_path)
+    fps = fps or cap.get(cv.CAP_PROP_FPS) or 30.0
+    cap.release()
+
+    frames, keyframes = scan_keyframes(video_path)
+    plan = plan_segments(frames, segments or workers, round(overlap * fps), keyframes)
+    logger.info(f"{frames} frames ({frames / fps:.0f}s) in {len(plan)} segments, {len(keyframes)} keyframes")
+
+    started = time.perf_counter()
+    tasks = [(video_path, seg, fps, start_time, make_detector) for seg in plan]
+    if workers == 1 or len(plan) == 1:
+        results = [_run_segment(task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(workers, len(plan))) as pool:
+            results = list(pool.map(_run_segment, tasks))
+    for r in results:
+        logger.info(f"segment {r['index']}: {r['frames']} frames in {r['seconds']:.1f}s")
+
+    sessions = stitch_sessions(results)
+    elapsed = time.perf_counter() - started
+    logger.info(f"{len(sessions)} sessions, {frames / fps:.0f}s of video in {elapsed:.1f}s "
+                f"({frames / fps / max(elapsed, 1e-9):.1f}x real time)")
+    return sessions
+
+
+def fetch_lot(api, lot_id, timeout=10):
+    with urllib.request.urlopen(f"{api.rstrip('/')}/lots/{lot_id}", timeout=timeout) as response:
+        return json.load(response)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Analyze a recorded video in parallel segments")
+    parser.add_argument("video_path", nargs="?", help="Video file (default: the lot's video_path)")
+    parser.add_argument("--lot-id", type=int, help="Take video_path and video_start_time from this lot")
+    parser.add_argument("--api", default=os.getenv("PARKVISION_API", "http://localhost:8000"), help="Backend URL for --lot-id")
+    parser.add_argument("--start-time", type=float, help="Unix time of the first frame (default: the lot's video_start_time, else 0)")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--segments", type=int, help="Number of segments (default: one per worker)")
+    parser.add_argument("--overlap", type=float, default=10.0, help="Seconds each segment re-decodes before its boundary")
+    parser.add_argument("--fps", type=float, help="Override the video's frame rate")
+    parser.add_argument("--detector", choices=("yolo", "stub"), default="yolo")
+    parser.add_argument("--model", default="yolov8n.pt", help="YOLO weights for --detector yolo")
+    parser.add_argument("--detections", help="Recorded detections for --detector stub (JSON, one list per frame)")
+    parser.add_argument("--output", help="Write sessions here as JSON lines (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    video_path, start_time = args.video_path, args.start_time
+    if args.lot_id is not None:
+        lot = fetch_lot(args.api, args.lot_id)
+        video_path = video_path or lot.get("video_path")
+        if start_time is None:
+            start_time = lot.get("video_start_time")
+    if not video_path:
+        parser.error("a video path or a lot with a video_path is required")
+    if start_time is None:
+        logger.warning("No start time given, timestamps are relative to the start of the video")
+        start_time = 0.0
+
+    if args.detector == "stub":
+        if not args.detections:
+            parser.error("--detector stub needs --detections")
+        make_detector = partial(stub_detector, args.detections)
+    else:
+        make_detector = partial(yolo_detector, args.model)
+
+    sessions = analyze(video_path, start_time, workers=args.workers, segments=args.segments,
+                       overlap=args.overlap, make_detector=make_detector, fps=args.fps)
+
+    out = open(args.output, "w") if args.output else sys.stdout
+    try:
+        for sess in sessions:
+            out.write(json.dumps(sess) + "\n")
+    finally:
+        if args.output:
+            out.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,232 @@
+# ai_cv/autotune.py
+"""
+Tune a camera's detector settings on its own sample frames.
+
+Takes frames with ground-truth spot polygons and occupancy (a CVAT folder
+as built by build_lot_test_data.py). It sweeps inference size, confidence
+and NMS IoU, and writes a CameraProfile with the cheapest setting whose
+spot occupancy F1 reaches the target.
+
+The model runs once per (frame, imgsz). Detections are cached at a low
+confidence floor with almost no NMS (see detection/detection_cache.py), so
+every conf threshold is a filter and every NMS IoU is a re-run of NMS over
+the cached boxes. Polygon/box overlaps are computed once per frame and
+imgsz, and each setting only redoes LotDetector's greedy matching.
+
+    python autotune.py --camera north-lot --frames tests/lot_test_data --model best.pt --target-f1 0.95
+"""
+import argparse
+import itertools
+import logging
+import sys
+import time
+
+import cv2 as cv
+import numpy as np
+from detection.camera_profile import DEFAULT_PROFILE_DIR, CameraProfile
+from detection.detection_cache import CachedDetector, DetectionCache, model_hash
+from detection.lot_detector import LotDetector
+
+logger = logging.getLogger(__name__)
+
+IMGSZ = (320, 416, 512, 640, 800, 960)
+CONF = (0.01, 0.02, 0.05, 0.1, 0.15, 0.2, 0.25, 0.3, 0.4, 0.5)
+IOU = (0.01, 0.1, 0.3, 0.5, 0.7)
+# NMS IoU the cached detections are produced at; lower thresholds are re-applied on top
+RAW_IOU = 0.95
+# LotDetector._match_detections_to_lots threshold
+MATCH_IOU = 0.3
+
+
+"""
+Greedy per-class NMS over detections sorted by confidence, like the
+model's own. Returns the indexes of the kept detections, in order.
+"""
+def nms(boxes, scores, classes, iou_thresh):
+    order = np.argsort(-scores, kind="stable")
+    boxes, classes = boxes[order], classes[order]
+    areas = (boxes[:, 2] - boxes[:, 0]) * (boxes[:, 3] - boxes[:, 1])
+    suppressed = np.zeros(len(order), dtype=bool)
+    keep = []
+    for i in range(len(order)):
+        if suppressed[i]:
+            continue
+        keep.append(order[i])
+        rest = np.arange(i + 1, len(order))
+        rest = rest[~suppressed[rest] & (classes[rest] == classes[i])]
+        if not len(rest):
+            continue
+        x1 = np.maximum(boxes[i, 0], boxes[rest, 0])
+        y1 = np.maximum(boxes[i, 1], boxes[rest, 1])
+        x2 = np.minimum(boxes[i, 2], boxes[rest, 2])
+        y2 = np.minimum(boxes[i, 3], boxes[rest, 3])
+        inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+        suppressed[rest[inter / (areas[i] + areas[rest] - inter + 1e-9) > iou_thresh]] = True
+    return np.asarray(keep, dtype=int)
+
+
+"""
+(detections x spots) matrix of the polygon/box IoU LotDetector matches on.
+Convex spots are intersected exactly; others fall back to
+LotDetector._poly_rect_iou.
+"""
+def spot_iou_matrix(boxes, polygons):
+    out = np.zeros((len(boxes), len(polygons)), dtype=np.float32)
+    for j, poly in enumerate(polygons):
+        poly = np.asarray(poly, dtype=np.float32).reshape(-1, 2)
+        if len(poly) < 3:
+            continue
+        area = cv.contourArea(poly)
+        if area <= 0:
+            continue
+        (px1, py1), (px2, py2) = poly.min(axis=0), poly.max(axis=0)
+        # Only boxes that overlap the spot's bounding box can score
+        near = np.flatnonzero((boxes[:, 0] < px2) & (boxes[:, 2] > px1) & (boxes[:, 1] < py2) & (boxes[:, 3] > py1))
+        convex = cv.isContourConvex(poly)
+        for i in near:
+            x1, y1, x2, y2 = boxes[i]
+            if convex:
+                rect = np.array([[x1, y1], [x2, y1], [x2, y2], [x1, y2]], dtype=np.float32)
+                inter, _ = cv.intersectConvexConvex(poly, rect)
+                union = area + (x2 - x1) * (y2 - y1) - inter
+                out[i, j] = inter / union if union > 0 else 0.0
+            else:
+                out[i, j] = LotDetector._poly_rect_iou(poly.tolist(), boxes[i])
+    return out
+
+
+"""
+Occupied flag per spot from LotDetector's greedy matching: each detection,
+in order, takes the free spot it overlaps most above MATCH_IOU.
+"""
+def match_spots(ious):
+    occupied = np.zeros(ious.shape[1], dtype=bool)
+    for row in ious:
+        candidates = np.where(occupied, 0.0, row)
+        best = int(np.argmax(candidates)) if len(candidates) else 0
+        if len(candidates) and candidates[best] > MATCH_IOU:
+            occupied[best] = True
+    return occupied
+
+
+def f1_score(tp, fp, fn):
+    return 2 * tp / (2 * tp + fp + fn) if tp + fp + fn else 1.0
+
+
+class FrameDetections:
+    # One frame's cached detections at one imgsz, with their spot overlaps
+    def __init__(self, detections, polygons, labels):
+        detections = sorted(detections, key=lambda d: -d["conf"])
+        self.boxes = np.array([d["xyxy"] for d in detections], dtype=np.float32).reshape(-1, 4)
+        self.scores = np.array([d["conf"] for d in detections], dtype=np.float32)
+        self.classes = np.array([d["cls"] for d in detections], dtype=np.int64)
+        self.ious = spot_iou_matrix(self.boxes, polygons)
+        self.labels = np.asarray(labels, dtype=bool)
+
+    def counts(self, conf, iou):
+        above = np.flatnonzero(self.scores >= conf)
+        keep = above[nms(self.boxes[above], self.scores[above], self.classes[above], iou)] if len(above) else above
+        # NMS returns confidence order, the order LotDetector matches in
+        predicted = match_spots(self.ious[keep])
+        tp = int((predicted & self.labels).sum())
+        return tp, int((predicted & ~self.labels).sum()), int((~predicted & self.labels).sum())
+
+
+def measure_latency(detector, image, runs=3):
+    detector.detect(image)
+    start = time.perf_counter()
+    for _ in range(runs):
+        detector.detect(image)
+    return (time.perf_counter() - start) / runs * 1000
+
+
+"""
+Sweep imgsz x conf x iou over `samples` ([(image or path, polygons,
+labels)]). `make_detector(imgsz)` returns a VehicleDetector-like detector.
+Returns one row per setting with its F1 and the imgsz's latency.
+"""
+def sweep(make_detector, samples, cache, imgszs=IMGSZ, confs=CONF, ious=IOU):
+    images = [(cv.imread(s) if isinstance(s, str) else s, polygons, labels) for s, polygons, labels in samples]
+    images = [sample for sample in images if sample[0] is not None]
+    if not images:
+        raise ValueError("No readable sample frames")
+    rows = []
+    for imgsz in imgszs:
+        detector = make_detector(imgsz)
+        latency = measure_latency(detector, images[0][0])
+        detector.iou_thresh = RAW_IOU
+        cached = CachedDetector(detector, cache, conf_floor=min(confs))
+        frames = [FrameDetections(cached.raw_detections(image), polygons, labels) for image, polygons, labels in images]
+        for conf, iou in itertools.product(confs, ious):
+            tp = fp = fn = 0
+            for frame in frames:
+                t, f, n = frame.counts(conf, iou)
+                tp, fp, fn = tp + t, fp + f, fn + n
+            rows.append({"imgsz": imgsz, "conf": conf, "iou": iou, "f1": f1_score(tp, fp, fn),
+                         "tp": tp, "fp": fp, "fn": fn, "latency_ms": latency})
+    return rows
+
+
+"""
+The cheapest row with f1 >= target (ties: higher F1, then higher conf, so
+fewer boxes to match). If none gets there, the best F1 overall.
+"""
+def pick(rows, target_f1):
+    passing = [r for r in rows if r["f1"] >= target_f1]
+    if passing:
+        return min(passing, key=lambda r: (r["latency_ms"], -r["f1"], -r["conf"])), True
+    return max(rows, key=lambda r: (r["f1"], -r["latency_ms"])), False
+
+
+def autotune(camera, samples, model_path="best.pt", target_f1=0.95, cache=None, make_detector=None, **grid):
+    if make_detector is None:
+        from detection.detect import VehicleDetector
+
+        def make_detector(imgsz):
+            return VehicleDetector(model_path, conf_thresh=min(grid.get("confs", CONF)), iou_thresh=RAW_IOU, imgsz=imgsz)
+
+    cache = cache if cache is not None else DetectionCache()
+    rows = sweep(make_detector, samples, cache, **grid)
+    best, met = pick(rows, target_f1)
+    if not met:
+        logger.warning("No setting reached F1 %.3f for %s; best was %.3f", target_f1, camera, best["f1"])
+    profile = CameraProfile(camera=camera, imgsz=best["imgsz"], conf_thresh=best["conf"], iou_thresh=best["iou"],
+                            f1=best["f1"], latency_ms=best["latency_ms"], target_f1=target_f1, meets_target=met,
+                            model_hash=model_hash(model_path))
+    return profile, rows
+
+
+def main(argv=None):
+    from training.train_spot_classifier import load_cvat_dataset
+
+    parser = argparse.ArgumentParser(description="Pick per-camera imgsz and thresholds for a target occupancy F1")
+    parser.add_argument("--camera", required=True, help="Camera name the profile is saved and loaded under")
+    parser.add_argument("--frames", required=True, help="Folder with annotations.xml and the camera's sample frames")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--target-f1", type=float, default=0.95)
+    parser.add_argument("--imgsz", type=int, nargs="+", default=list(IMGSZ))
+    parser.add_argument("--conf", type=float, nargs="+", default=list(CONF))
+    parser.add_argument("--iou", type=float, nargs="+", default=list(IOU))
+    parser.add_argument("--limit", type=int, help="Use only the first N frames")
+    parser.add_argument("--profile-dir", default=DEFAULT_PROFILE_DIR)
+    parser.add_argument("--output", help="Write the profile here instead of PROFILE_DIR/<camera>.json")
+    parser.add_argument("--top", type=int, default=10, help="Print this many of the cheapest passing settings")
+    args = parser.parse_args(argv)
+
+    samples = load_cvat_dataset(args.frames)[:args.limit]
+    profile, rows = autotune(args.camera, samples, args.model, args.target_f1,
+                             imgszs=args.imgsz, confs=args.conf, ious=args.iou)
+    passing = sorted((r for r in rows if r["f1"] >= args.target_f1), key=lambda r: (r["latency_ms"], -r["f1"]))
+    print(f"{'imgsz':>5} {'conf':>5} {'iou':>5} {'f1':>6} {'latency ms':>10}")
+    for r in passing[:args.top]:
+        print(f"{r['imgsz']:>5} {r['conf']:>5g} {r['iou']:>5g} {r['f1']:>6.3f} {r['latency_ms']:>10.1f}")
+    path = profile.save(args.output, args.profile_dir)
+    print(f"{args.camera}: imgsz {profile.imgsz}, conf {profile.conf_thresh:g}, iou {profile.iou_thresh:g} "
+          f"-> F1 {profile.f1:.3f} at {profile.latency_ms:.1f}ms{'' if profile.meets_target else ' (below target)'}; "
+          f"saved {path}")
+    return 0 if profile.meets_target else 1
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    sys.exit(main())
@@ -0,0 +1,235 @@
+# ai_cv/benchmarks/load_test.py
+"""
+Scale test for a synthetic multi-camera deployment.
+
+Generates a lot per camera (--spots split over --cameras) with cars arriving,
+leaving, jittering and getting occluded, and drives one component with it:
+
+    lot_match  LotDetector._match_tracks_to_lots against each camera's spots
+    track      VehicleTracker.update
+    session    SessionManager.update
+    pipeline   track + session + lot_match, one set per camera
+    render     synthetic frame rendering (what a decoder would hand over)
+    ingest     POST /lots/{id}/occupancy on the backend with the occupancy
+               changes, at --rate requests per second
+
+For the CV components the ceiling is how many camera-frames per second one
+process can handle, and so how many cameras at --fps it can keep up with.
+For ingest, --sweep doubles the request rate until the backend falls behind.
+
+    python benchmarks/load_test.py --component pipeline --cameras 100 --spots 5000
+    python benchmarks/load_test.py --component ingest --lot-id 1 --rate 50 --sweep
+"""
+import argparse
+import json
+import sys
+import tempfile
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from benchmarks.run_benchmarks import summarize
+from benchmarks.scenes import SyntheticCamera, render_frame, synthetic_deployment
+
+CV_COMPONENTS = ("lot_match", "track", "session", "pipeline", "render")
+
+
+def build_cameras(args):
+    layouts = synthetic_deployment(args.spots, args.cameras, args.width, args.height)
+    cameras = [
+        SyntheticCamera(lots, fps=args.fps, occupancy=args.occupancy, mean_stay=args.mean_stay,
+                        moving=args.moving, jitter=args.jitter, miss_rate=args.miss_rate,
+                        occluders=args.occluders, width=args.width, height=args.height, seed=args.seed + i)
+        for i, lots in enumerate(layouts)
+    ]
+    return layouts, cameras
+
+
+def run_cv(args):
+    from detection.lot_detector import LotDetector
+    from recognition.session_logic import SessionManager
+    from recognition.tracker import VehicleTracker
+
+    layouts, cameras = build_cameras(args)
+    frames_per_camera = max(1, int(args.duration * args.fps))
+    # Pre-generate so the generator itself is not timed
+    streams = [[cam.next() for _ in range(frames_per_camera)] for cam in cameras]
+    polys = [[{"bbox": lot["points"], "conf": 0} for lot in lots] for lots in layouts]
+    trackers = [VehicleTracker(min_hits=1, use_embeddings=False) for _ in cameras]
+    sessions = [SessionManager() for _ in cameras]
+    matcher = LotDetector(detector=object(), tracker=object())
+    canvas = np.empty((args.height, args.width, 3), dtype=np.uint8)
+
+    samples = []
+    clock = time.perf_counter_ns
+    for f in range(frames_per_camera):
+        timestamp = f / args.fps
+        # Round-robin like a single worker serving every camera
+        for c, stream in enumerate(streams):
+            dets = stream[f]
+            t0 = clock()
+            if args.component == "render":
+                render_frame(dets, args.width, args.height, frame=canvas)
+            elif args.component == "lot_match":
+                matcher._match_tracks_to_lots([{"bbox": d["xyxy"], "track_id": i} for i, d in enumerate(dets)], polys[c])
+            else:
+                tracks = trackers[c].update(dets) if args.component in ("track", "pipeline") else \
+                    [{"track_id": i, "bbox": d["xyxy"], "cls": d["cls"], "name": d["name"]} for i, d in enumerate(dets)]
+                if args.component in ("session", "pipeline"):
+                    sessions[c].update(tracks, timestamp=timestamp)
+                if args.component == "pipeline":
+                    matcher._match_tracks_to_lots(tracks, polys[c])
+            samples.append(clock() - t0)
+
+    stats = summarize(samples)
+    busy_s = sum(samples) / 1e9
+    per_s = len(samples) / busy_s if busy_s else float("inf")
+    return {
+        "component": args.component,
+        "cameras": args.cameras,
+        "spots": args.spots,
+        "camera_frames": len(samples),
+        "latency": stats,
+        "camera_frames_per_s": per_s,
+        # Cameras one process keeps up with at --fps
+        "max_cameras": per_s / args.fps,
+        "arrivals": sum(cam.arrivals for cam in cameras),
+        "departures": sum(cam.departures for cam in cameras),
+    }
+
+
+def fetch_spot_ids(api, lot_id):
+    from detection.layout_client import LayoutClient
+    with tempfile.TemporaryDirectory() as cache_dir:
+        return [int(i) for i in LayoutClient(api, cache_dir=cache_dir).get(lot_id).spot_ids]
+
+
+"""
+POST occupancy changes at `rate` requests per second for `duration` seconds
+and report what the backend actually sustained.
+"""
+def run_ingest_at(args, spot_ids, rate):
+    url = f"{args.api.rstrip('/')}/lots/{args.lot_id}/occupancy"
+    lots = [{"points": [[0, 0], [1, 0], [1, 1], [0, 1]]}] * len(spot_ids)
+    camera = SyntheticCamera(lots, fps=rate, occupancy=args.occupancy, mean_stay=args.mean_stay, seed=args.seed)
+    latencies, errors = [], []
+    lock = threading.Lock()
+
+    def post(statuses):
+        body = json.dumps({"statuses": statuses}).encode()
+        request = urllib.request.Request(url, data=body, method="POST", headers={"Content-Type": "application/json"})
+        start = time.perf_counter_ns()
+        try:
+            with urllib.request.urlopen(request, timeout=args.timeout) as response:
+                response.read()
+            ok = True
+        except (urllib.error.URLError, OSError) as e:
+            ok = False
+            with lock:
+                errors.append(str(e))
+        if ok:
+            with lock:
+                latencies.append(time.perf_counter_ns() - start)
+
+    requests = max(1, int(rate * args.duration))
+    previous = camera.occupied.copy()
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+        for n in range(requests):
+            camera._step_spots()
+            changed = np.flatnonzero(camera.occupied != previous)
+            if not len(changed):
+                # Keep the request rate honest even when nothing changed
+                changed = camera.rng.integers(0, len(spot_ids), 1)
+            previous = camera.occupied.copy()
+            statuses = [{"parking_spot_id": spot_ids[i], "status": "occupied" if camera.occupied[i] else "empty",
+                         "detection_method": "load_test"} for i in changed[:args.batch]]
+            delay = start + n / rate - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            pool.submit(post, statuses)
+    elapsed = time.perf_counter() - start
+
+    return {
+        "offered_per_s": rate,
+        "achieved_per_s": len(latencies) / elapsed,
+        "errors": len(errors),
+        "latency": summarize(latencies),
+    }
+
+
+def run_ingest(args):
+    spot_ids = fetch_spot_ids(args.api, args.lot_id)
+    if not spot_ids:
+        raise SystemExit(f"Lot {args.lot_id} has no spots to update")
+    rate = args.rate
+    steps = []
+    while True:
+        step = run_ingest_at(args, spot_ids, rate)
+        steps.append(step)
+        print(f"offered {rate:8.1f}/s  achieved {step['achieved_per_s']:8.1f}/s  "
+              f"p99 {step['latency'].get('p99_ms', float('nan')):8.1f}ms  errors {step['errors']}")
+        saturated = step["achieved_per_s"] < 0.9 * rate or step["errors"] or \
+            step["latency"].get("p99_ms", 0) > args.slo_ms
+        if not args.sweep or saturated:
+            break
+        rate *= 2
+
+    sustained = [s["offered_per_s"] for s in steps if s["achieved_per_s"] >= 0.9 * s["offered_per_s"]
+                 and not s["errors"] and s["latency"].get("p99_ms", 0) <= args.slo_ms]
+    return {"component": "ingest", "spots": len(spot_ids), "steps": steps,
+            "max_rate_per_s": max(sustained) if sustained else None}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Drive ai_cv components and the backend with a synthetic deployment")
+    parser.add_argument("--component", choices=CV_COMPONENTS + ("ingest",), default="pipeline")
+    parser.add_argument("--cameras", type=int, default=10)
+    parser.add_argument("--spots", type=int, default=500, help="Total spots, split over the cameras")
+    parser.add_argument("--fps", type=float, default=10.0, help="Frame rate of each camera")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds of synthetic video (or of load per ingest step)")
+    parser.add_argument("--occupancy", type=float, default=0.6)
+    parser.add_argument("--mean-stay", type=float, default=600.0, help="Mean seconds a car stays parked")
+    parser.add_argument("--moving", type=int, default=2, help="Cars driving through each camera's view")
+    parser.add_argument("--jitter", type=float, default=1.0, help="Box jitter in pixels")
+    parser.add_argument("--miss-rate", type=float, default=0.02, help="Probability a detection is dropped")
+    parser.add_argument("--occluders", type=int, default=1, help="Occluding bands sweeping across each view")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--api", default="http://localhost:8000", help="Backend URL for --component ingest")
+    parser.add_argument("--lot-id", type=int, default=1)
+    parser.add_argument("--rate", type=float, default=20.0, help="Ingest requests per second")
+    parser.add_argument("--batch", type=int, default=50, help="Max statuses per ingest request")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--timeout", type=float, default=10.0)
+    parser.add_argument("--slo-ms", type=float, default=500.0, help="p99 latency above which ingest counts as saturated")
+    parser.add_argument("--sweep", action="store_true", help="Double the ingest rate until the backend saturates")
+    parser.add_argument("--output", help="Write the result JSON to this file")
+    args = parser.parse_args(argv)
+
+    if args.component == "ingest":
+        result = run_ingest(args)
+        print(f"max sustained ingest rate: {result['max_rate_per_s']} requests/s")
+    else:
+        result = run_cv(args)
+        lat = result["latency"]
+        print(f"{args.component}: {result['camera_frames']} camera-frames, p50 {lat['p50_ms']:.3f}ms "
+              f"p99 {lat['p99_ms']:.3f}ms, {result['camera_frames_per_s']:.0f} camera-frames/s "
+              f"= {result['max_cameras']:.1f} cameras at {args.fps:g} fps per process")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,216 @@
+# ai_cv/benchmarks/run_benchmarks.py
+"""
+Per-stage latency benchmark for the ai_cv pipeline.
+
+Times detection, tracking, session logic and lot matching frame by frame
+and reports p50/p95/p99 latency and throughput for each stage as JSON.
+
+    python benchmarks/run_benchmarks.py                                  # synthetic lot, stub detector
+    python benchmarks/run_benchmarks.py --detections dets.json --lots lot.json
+    python benchmarks/run_benchmarks.py --video clip.mp4 --lots lot.json --detector yolo --model best.pt
+    python benchmarks/run_benchmarks.py --baseline benchmarks/baseline.json   # exit 1 on regressions
+"""
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from benchmarks.scenes import StubDetector, synthetic_scene
+
+STAGES = ("detect", "track", "session", "lot_match")
+COMPARED_METRICS = ("p50_ms", "p95_ms", "p99_ms")
+
+
+def summarize(samples_ns):
+    samples = np.asarray(samples_ns, dtype=np.float64) / 1e6
+    if samples.size == 0:
+        return {"count": 0}
+    p50, p95, p99 = np.percentile(samples, [50, 95, 99])
+    total_s = samples.sum() / 1000
+    return {
+        "count": int(samples.size),
+        "mean_ms": float(samples.mean()),
+        "p50_ms": float(p50),
+        "p95_ms": float(p95),
+        "p99_ms": float(p99),
+        "max_ms": float(samples.max()),
+        "throughput_per_s": float(samples.size / total_s) if total_s > 0 else None,
+    }
+
+
+def load_frames(video_path, limit):
+    import cv2 as cv
+
+    # Decode up front so the benchmark does not time the video decoder
+    cap = cv.VideoCapture(video_path)
+    frames = []
+    while len(frames) < limit:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        frames.append(frame)
+    cap.release()
+    if not frames:
+        raise SystemExit(f"Could not read any frames from {video_path}")
+    return frames
+
+
+def build_pipeline(args):
+    from detection.lot_detector import LotDetector
+    from recognition.session_logic import SessionManager
+    from recognition.tracker import VehicleTracker
+
+    lots = None
+    if args.detector == "yolo":
+        from detection.detect import VehicleDetector
+        detector = VehicleDetector(args.model)
+    elif args.detections:
+        detector = StubDetector.from_file(args.detections)
+    else:
+        lots, scene = synthetic_scene(frames=args.frames + args.warmup, seed=args.seed)
+        detector = StubDetector(scene)
+
+    if args.video:
+        frames = load_frames(args.video, args.frames + args.warmup)
+    else:
+        frames = [np.zeros((args.height, args.width, 3), dtype=np.uint8)]
+
+    if args.lots:
+        with open(args.lots, "r") as f:
+            lots = json.load(f)
+
+    tracker = VehicleTracker(min_hits=1, use_embeddings=args.embeddings)
+    lot_detector = LotDetector(detector=detector, tracker=tracker)
+    natural_poly = [{"bbox": lot["points"], "conf": 0} for lot in lots or []]
+    return detector, tracker, SessionManager(), lot_detector, natural_poly, frames
+
+
+def run(args):
+    detector, tracker, sessions, lot_detector, natural_poly, frames = build_pipeline(args)
+    samples = {stage: [] for stage in STAGES + ("frame",)}
+    clock = time.perf_counter_ns
+
+    for i in range(args.warmup + args.frames):
+        frame = frames[i % len(frames)]
+        t0 = clock()
+        dets = detector.detect(frame)
+        t1 = clock()
+        tracks = tracker.update(dets, frame=frame)
+        t2 = clock()
+        sessions.update(tracks, timestamp=i / args.fps)
+        t3 = clock()
+        if natural_poly:
+            lot_detector._match_detections_to_lots(dets, natural_poly)
+        t4 = clock()
+
+        if i < args.warmup:
+            continue
+        samples["detect"].append(t1 - t0)
+        samples["track"].append(t2 - t1)
+        samples["session"].append(t3 - t2)
+        if natural_poly:
+            samples["lot_match"].append(t4 - t3)
+        samples["frame"].append(t4 - t0)
+
+    return {
+        "meta": {
+            "detector": args.detector,
+            "input": args.video or args.detections or "synthetic",
+            "frames": args.frames,
+            "warmup": args.warmup,
+            "spots": len(natural_poly),
+            "embeddings": args.embeddings,
+            "python": platform.python_version(),
+            "machine": platform.machine(),
+            "cpu_count": os.cpu_count(),
+        },
+        "stages": {stage: summarize(values) for stage, values in samples.items()},
+    }
+
+
+"""
+Compare a result against a baseline. A metric regresses when it is more
+than `tolerance` (relative) and `min_delta_ms` (absolute) slower, so
+sub-millisecond stages do not flag on timer noise.
+"""
+def compare(result, baseline, tolerance=0.2, min_delta_ms=0.05):
+    regressions = []
+    for stage, base in baseline.get("stages", {}).items():
+        current = result["stages"].get(stage)
+        if not current or not current.get("count") or not base.get("count"):
+            continue
+        for metric in COMPARED_METRICS:
+            before, after = base[metric], current[metric]
+            if after > before * (1 + tolerance) and after - before > min_delta_ms:
+                regressions.append({
+                    "stage": stage,
+                    "metric": metric,
+                    "baseline": before,
+                    "current": after,
+                    "change": after / before - 1 if before else None,
+                })
+    return regressions
+
+
+def print_table(result, baseline=None):
+    print(f"{'stage':<10} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'per s':>10}  {'baseline p95':>12}")
+    for stage, s in result["stages"].items():
+        if not s.get("count"):
+            continue
+        base = (baseline or {}).get("stages", {}).get(stage, {})
+        base_p95 = f"{base['p95_ms']:.3f}" if base.get("count") else "-"
+        print(f"{stage:<10} {s['p50_ms']:>9.3f} {s['p95_ms']:>9.3f} {s['p99_ms']:>9.3f} "
+              f"{s['throughput_per_s']:>10.1f}  {base_p95:>12}")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark each stage of the ai_cv pipeline")
+    parser.add_argument("--detector", choices=("stub", "yolo"), default="stub")
+    parser.add_argument("--model", default="best.pt", help="YOLO weights for --detector yolo")
+    parser.add_argument("--detections", help="Recorded detections to replay with the stub detector (JSON, one list per frame)")
+    parser.add_argument("--video", help="Recorded video to feed the pipeline instead of blank frames")
+    parser.add_argument("--lots", help="Parking lot JSON to match against (default: the synthetic lot)")
+    parser.add_argument("--frames", type=int, default=60)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--fps", type=float, default=30.0, help="Frame rate used for session timestamps")
+    parser.add_argument("--width", type=int, default=1280)
+    parser.add_argument("--height", type=int, default=720)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--embeddings", action="store_true", help="Run the tracker with appearance embeddings")
+    parser.add_argument("--output", help="Write the result JSON to this file")
+    parser.add_argument("--baseline", help="Baseline JSON to compare against; exits 1 on regressions")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed relative slowdown per metric")
+    parser.add_argument("--save-baseline", help="Write this run as the new baseline")
+    args = parser.parse_args(argv)
+
+    result = run(args)
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+        result["regressions"] = compare(result, baseline, args.tolerance)
+
+    print_table(result, baseline)
+    for path in (args.output, args.save_baseline):
+        if path:
+            with open(path, "w") as f:
+                json.dump(result, f, indent=4)
+
+    if baseline is not None:
+        if result["regressions"]:
+            for r in result["regressions"]:
+                print(f"REGRESSION {r['stage']} {r['metric']}: {r['baseline']:.3f}ms -> {r['current']:.3f}ms")
+            return 1
+        print(f"No regressions against {args.baseline}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
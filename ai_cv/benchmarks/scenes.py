@@ -0,0 +1,227 @@
+# ai_cv/benchmarks/scenes.py
+
+import json
+import math
+
+import cv2 as cv
+import numpy as np
+
+
+class StubDetector:
+    """
+    Drop-in for VehicleDetector that replays precomputed detections instead
+    of running a model, so the rest of the pipeline can be benchmarked on a
+    CPU-only box without weights. Each detect() call returns the next frame's
+    detections, looping at the end.
+    """
+
+    def __init__(self, frames):
+        self.frames = frames
+        self.index = 0
+
+    @classmethod
+    def from_file(cls, path):
+        # JSON list with one list of {"xyxy", "conf", "cls", "name"} per frame
+        with open(path, "r") as f:
+            return cls(json.load(f))
+
+    # Replay from a given frame, e.g. the first frame of a video segment
+    def seek(self, frame_index):
+        self.index = frame_index
+
+    def detect(self, frame):
+        dets = self.frames[self.index % len(self.frames)]
+        self.index += 1
+        return dets
+
+
+"""
+Build a synthetic lot: a grid of spots, some parked cars and some cars
+driving down the aisles, for `frames` frames.
+
+Returns (lots, detections_per_frame) where lots is in the parking lot JSON
+format and detections match VehicleDetector.detect output.
+"""
+def synthetic_scene(frames=300, rows=4, cols=12, occupancy=0.6, moving=4,
+                    width=1280, height=720, seed=0):
+    rng = np.random.default_rng(seed)
+    spot_w, spot_h = width / (cols + 1), height / (rows * 2 + 1)
+
+    lots = []
+    parked = []
+    for r in range(rows):
+        y = (2 * r + 0.5) * spot_h
+        for c in range(cols):
+            x = (c + 0.5) * spot_w
+            lots.append({"points": [[x, y], [x + spot_w, y], [x + spot_w, y + spot_h], [x, y + spot_h]]})
+            if rng.random() < occupancy:
+                # Cars sit roughly, not exactly, inside their spot
+                dx, dy = rng.uniform(-0.1, 0.1, 2) * (spot_w, spot_h)
+                parked.append([x + dx + 4, y + dy + 4, x + dx + spot_w - 4, y + dy + spot_h - 4])
+
+    car_w, car_h = spot_w * 0.8, spot_h * 0.6
+    lanes = [(2 * (r % rows) + 1.5) * spot_h for r in range(moving)]
+    speeds = rng.uniform(4, 12, moving)
+    starts = rng.uniform(0, width, moving)
+
+    detections = []
+    for f in range(frames):
+        dets = []
+        for box in parked:
+            jitter = rng.normal(0, 1.0, 4)
+            dets.append({"xyxy": [float(v) for v in np.add(box, jitter)], "conf": float(rng.uniform(0.6, 0.95)),
+                         "cls": 2, "name": "car"})
+        for lane, speed, start in zip(lanes, speeds, starts):
+            x = (start + speed * f) % (width - car_w)
+            dets.append({"xyxy": [float(x), float(lane), float(x + car_w), float(lane + car_h)],
+                         "conf": float(rng.uniform(0.5, 0.9)), "cls": 2, "name": "car"})
+        detections.append(dets)
+    return lots, detections
+
+
+"""
+Lay out `spots` spots in rows separated by aisles, in the parking lot JSON
+format LotDetector reads. Rows are as wide as needed to keep spots roughly
+square in a width x height frame.
+"""
+def synthetic_layout(spots, width=1280, height=720, per_row=None):
+    per_row = per_row or max(1, math.ceil(math.sqrt(spots * width / height / 2)))
+    rows = math.ceil(spots / per_row)
+    spot_w, spot_h = width / (per_row + 1), height / (rows * 2 + 1)
+    lots = []
+    for i in range(spots):
+        r, c = divmod(i, per_row)
+        x, y = (c + 0.5) * spot_w, (2 * r + 0.5) * spot_h
+        lots.append({"points": [[x, y], [x + spot_w, y], [x + spot_w, y + spot_h], [x, y + spot_h]]})
+    return lots
+
+
+"""
+Split a deployment of `spots` spots over `cameras` cameras, returning one
+layout per camera.
+"""
+def synthetic_deployment(spots, cameras, width=1280, height=720):
+    base, extra = divmod(spots, cameras)
+    return [synthetic_layout(base + (1 if i < extra else 0), width, height) for i in range(cameras)]
+
+
+class SyntheticCamera:
+    """
+    Endless detection stream for one camera watching a lot layout.
+
+    Spots fill and empty at random so that on average `occupancy` of them
+    are taken and a car stays `mean_stay` seconds. Arriving and leaving cars
+    drive between the aisle and their spot over `maneuver` seconds, `moving`
+    cars keep driving down the aisles, boxes jitter by `jitter` pixels, each
+    detection is missed with probability `miss_rate` and `occluders` vertical
+    bands (trucks, trees) sweep across the frame hiding what is behind them.
+
+    next() returns the next frame's detections in VehicleDetector format;
+    `occupied` is the ground truth per spot.
+    """
+
+    def __init__(self, lots, fps=10.0, occupancy=0.6, mean_stay=600.0, maneuver=3.0, moving=2,
+                 jitter=1.0, miss_rate=0.02, occluders=1, width=1280, height=720, seed=0):
+        self.rng = np.random.default_rng(seed)
+        self.fps = fps
+        self.width, self.height = width, height
+        self.jitter = jitter
+        self.miss_rate = miss_rate
+        self.frame = 0
+
+        pts = np.array([lot["points"] for lot in lots], dtype=np.float64).reshape(len(lots), -1, 2)
+        self.spots = np.concatenate([pts.min(axis=1), pts.max(axis=1)], axis=1)
+        n = len(self.spots)
+        spot_h = float(np.median(self.spots[:, 3] - self.spots[:, 1])) if n else height / 10
+        # The aisle below each spot, where cars drive in from
+        self.aisle = self.spots + [0, spot_h, 0, spot_h]
+
+        stay_frames = max(mean_stay * fps, 1.0)
+        vacant_frames = stay_frames * (1 - occupancy) / max(occupancy, 1e-6)
+        self.p_depart = 1.0 / stay_frames
+        self.p_arrive = 1.0 / max(vacant_frames, 1.0)
+        self.maneuver = max(1, int(maneuver * fps))
+
+        self.occupied = self.rng.random(n) < occupancy
+        # Frames left in an arrival (> 0) or departure (< 0) maneuver
+        self.moving_in = np.zeros(n, dtype=np.int64)
+        self.arrivals = 0
+        self.departures = 0
+
+        car_w, car_h = width / 16, height / 14
+        self.cars = [
+            (float(self.rng.uniform(0, height - car_h)), float(self.rng.uniform(3, 10) * 30 / fps), float(self.rng.uniform(0, width)))
+            for _ in range(moving)
+        ]
+        self.car_size = (car_w, car_h)
+        self.occluders = [(float(self.rng.uniform(width / 20, width / 8)), float(self.rng.uniform(0.5, 3) * 30 / fps),
+                           float(self.rng.uniform(0, width))) for _ in range(occluders)]
+
+    def _step_spots(self):
+        n = len(self.spots)
+        rolls = self.rng.random(n)
+        idle = self.moving_in == 0
+        arrive = idle & ~self.occupied & (rolls < self.p_arrive)
+        depart = idle & self.occupied & (rolls < self.p_depart)
+        self.occupied |= arrive
+        self.moving_in[arrive] = self.maneuver
+        self.moving_in[depart] = -self.maneuver
+        self.arrivals += int(arrive.sum())
+        self.departures += int(depart.sum())
+
+        # Departing cars leave their spot once the maneuver finishes
+        finishing = self.moving_in == -1
+        self.occupied[finishing] = False
+        self.moving_in -= np.sign(self.moving_in)
+
+    def _det(self, box):
+        box = np.add(box, self.rng.normal(0, self.jitter, 4)) if self.jitter else box
+        return {"xyxy": [float(v) for v in box], "conf": float(self.rng.uniform(0.5, 0.95)), "cls": 2, "name": "car"}
+
+    def next(self):
+        self._step_spots()
+        t = self.frame
+        self.frame += 1
+
+        boxes = []
+        inset = 0.1 * np.array([1, 1, -1, -1]) * (self.spots[:, 2:] - self.spots[:, :2]).repeat(2, axis=1)
+        for i in np.flatnonzero(self.occupied):
+            box = self.spots[i] + inset[i]
+            left = self.moving_in[i]
+            if left:
+                # Fraction of the way out of the spot
+                frac = left / self.maneuver if left > 0 else 1 + left / self.maneuver
+                box = box + (self.aisle[i] - self.spots[i]) * frac
+            boxes.append(box)
+        car_w, car_h = self.car_size
+        for lane, speed, start in self.cars:
+            x = (start + speed * t) % (self.width - car_w)
+            boxes.append((x, lane, x + car_w, lane + car_h))
+
+        bands = [((start + speed * t) % self.width, band) for band, speed, start in self.occluders]
+        dets = []
+        for box in boxes:
+            cx = (box[0] + box[2]) / 2
+            if any(x <= cx <= x + band for x, band in bands):
+                continue
+            if self.miss_rate and self.rng.random() < self.miss_rate:
+                continue
+            dets.append(self._det(box))
+        return dets
+
+
+"""
+Draw detections (and optionally the lot) as flat boxes on a grey frame, for
+feeding components that need pixels, such as decoders, embedders or sinks.
+"""
+def render_frame(detections, width=1280, height=720, lots=None, frame=None):
+    if frame is None:
+        frame = np.full((height, width, 3), 90, dtype=np.uint8)
+    else:
+        frame[:] = 90
+    for lot in lots or ():
+        cv.polylines(frame, [np.int32(lot["points"])], True, (200, 200, 200), 1)
+    for d in detections:
+        x1, y1, x2, y2 = map(int, d["xyxy"])
+        cv.rectangle(frame, (x1, y1), (x2, y2), (40, 40, 160), -1)
+    return frame
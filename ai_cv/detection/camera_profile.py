@@ -0,0 +1,73 @@
+# ai_cv/detection/camera_profile.py
+"""
+Per-camera detector settings picked by autotune.py.
+
+A profile holds the inference size and confidence/NMS thresholds that
+reached the target occupancy F1 most cheaply on that camera's sample
+frames. VehicleDetector(profile=...) applies it at startup. Profiles live
+as JSON in PARKVISION_CAMERA_PROFILES (default ~/.config/parkvision/cameras),
+one file per camera.
+"""
+import json
+import logging
+import os
+import re
+import time
+from dataclasses import asdict, dataclass, fields
+from pathlib import Path
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PROFILE_DIR = os.getenv("PARKVISION_CAMERA_PROFILES", os.path.expanduser("~/.config/parkvision/cameras"))
+
+
+def profile_path(camera, profile_dir=DEFAULT_PROFILE_DIR):
+    # Camera names can be indexes or stream URLs
+    return Path(profile_dir) / (re.sub(r"[^A-Za-z0-9_.-]+", "_", str(camera)) + ".json")
+
+
+@dataclass
+class CameraProfile:
+    camera: str
+    imgsz: int
+    conf_thresh: float
+    iou_thresh: float
+    # What the tuner measured, for the record
+    f1: float = None
+    latency_ms: float = None
+    target_f1: float = None
+    meets_target: bool = True
+    model_hash: str = None
+    tuned_at: float = None
+
+    def save(self, path=None, profile_dir=DEFAULT_PROFILE_DIR):
+        path = Path(path) if path else profile_path(self.camera, profile_dir)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if self.tuned_at is None:
+            self.tuned_at = time.time()
+        tmp = path.with_name(path.name + ".tmp")
+        tmp.write_text(json.dumps(asdict(self), indent=4))
+        os.replace(tmp, path)
+        return path
+
+    """
+    Load a profile from a JSON file, or by camera name from `profile_dir`.
+    """
+    @classmethod
+    def load(cls, camera_or_path, profile_dir=DEFAULT_PROFILE_DIR):
+        path = Path(camera_or_path)
+        if not (path.suffix == ".json" and path.exists()):
+            path = profile_path(camera_or_path, profile_dir)
+        data = json.loads(path.read_text())
+        known = {f.name for f in fields(cls)}
+        return cls(**{k: v for k, v in data.items() if k in known})
+
+    # Warns when the profile was tuned for other weights; thresholds don't carry over between models
+    def check_model(self, model_path):
+        if not self.model_hash:
+            return True
+        from detection.detection_cache import model_hash
+        if model_hash(model_path) != self.model_hash:
+            logger.warning("Camera profile %s was tuned for different weights than %s", self.camera, model_path)
+            return False
+        return True
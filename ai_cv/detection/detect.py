@@ -2,16 +2,34 @@
 
 from ultralytics import YOLO
 import cv2 as cv
+from detection.camera_profile import CameraProfile
 
 class VehicleDetector:
-    def __init__(self, model_path = "yolov8n.pt", conf_thresh = 0.4, iou_thresh = 0.5):
+    # profile: a CameraProfile, its JSON path or a camera name (see autotune.py); overrides imgsz and thresholds
+    def __init__(self, model_path = "yolov8n.pt", conf_thresh = 0.4, iou_thresh = 0.5, imgsz = None, profile = None):
+        self.model_path = model_path
         self.model = YOLO(model_path)
         self.conf_thresh = conf_thresh
         self.iou_thresh = iou_thresh
+        self.imgsz = imgsz
+        self.profile = None
+        if profile is not None:
+            self.apply_profile(profile)
+
+    def apply_profile(self, profile):
+        if not isinstance(profile, CameraProfile):
+            profile = CameraProfile.load(profile)
+        profile.check_model(self.model_path)
+        self.profile = profile
+        self.imgsz = profile.imgsz
+        self.conf_thresh = profile.conf_thresh
+        self.iou_thresh = profile.iou_thresh
 
     def detect(self, frame):
         # run inference
-        results = self.model.predict(frame, conf=self.conf_thresh, iou=self.iou_thresh)
+        # imgsz None leaves the size to the one the weights were trained at
+        kwargs = {"imgsz": self.imgsz} if self.imgsz is not None else {}
+        results = self.model.predict(frame, conf=self.conf_thresh, iou=self.iou_thresh, **kwargs)
         res = results[0]
 
         detections = []
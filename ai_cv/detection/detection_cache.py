@@ -0,0 +1,206 @@
+# ai_cv/detection/detection_cache.py
+"""
+On-disk cache of raw detections for repeated images.
+
+Entries are keyed by the image content, the model weights, the NMS IoU
+threshold and the inference size. Detections are stored at a low
+confidence floor, so asking for the same image at any higher confidence
+threshold is a filter over the cached result rather than a new inference.
+The cache is capped in bytes and evicts the least recently used entries.
+"""
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+import numpy as np
+
+DEFAULT_CACHE_DIR = os.getenv("PARKVISION_DETECTION_CACHE", os.path.expanduser("~/.cache/parkvision/detections"))
+
+_model_hashes = {}
+
+
+"""
+Hash of a model's weights, memoized per (path, size, mtime). Falls back to
+the name itself for models that aren't a local file.
+"""
+def model_hash(model_path):
+    path = Path(str(model_path))
+    try:
+        stat = path.stat()
+    except OSError:
+        return hashlib.sha256(str(model_path).encode()).hexdigest()
+    key = (str(path.resolve()), stat.st_size, stat.st_mtime_ns)
+    digest = _model_hashes.get(key)
+    if digest is None:
+        h = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        digest = _model_hashes[key] = h.hexdigest()
+    return digest
+
+
+"""
+Hash of an image: the file's bytes for a path, or the pixels (and shape)
+of a decoded frame.
+"""
+def image_hash(image):
+    h = hashlib.blake2b(digest_size=20)
+    if isinstance(image, (str, Path)):
+        with open(image, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+    else:
+        image = np.ascontiguousarray(image)
+        h.update(f"{image.shape}{image.dtype}".encode())
+        h.update(image.data)
+    return h.hexdigest()
+
+
+class DetectionCache:
+    def __init__(self, cache_dir=DEFAULT_CACHE_DIR, max_bytes=256 * 1024 * 1024):
+        self.cache_dir = Path(cache_dir)
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # key -> entry size, least recently used first
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._scan()
+
+    def _scan(self):
+        files = []
+        for path in self.cache_dir.glob("*/*.json"):
+            try:
+                stat = path.stat()
+            except OSError:
+                continue
+            files.append((stat.st_mtime_ns, path.stem, stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._bytes += size
+
+    def _path(self, key):
+        return self.cache_dir / key[:2] / f"{key}.json"
+
+    @staticmethod
+    def key(image_digest, model_digest, conf_floor, iou, imgsz):
+        raw = f"{image_digest}:{model_digest}:{conf_floor:g}:{iou:g}:{imgsz}"
+        return hashlib.sha256(raw.encode()).hexdigest()
+
+    def get(self, key):
+        path = self._path(key)
+        try:
+            with open(path, "r") as f:
+                detections = json.load(f)
+        except (OSError, ValueError):
+            with self._lock:
+                self.misses += 1
+                size = self._entries.pop(key, None)
+                if size is not None:
+                    self._bytes -= size
+            return None
+        # Touch for LRU order across processes sharing the directory
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        with self._lock:
+            self.hits += 1
+            if key in self._entries:
+                self._entries.move_to_end(key)
+            else:
+                self._entries[key] = path.stat().st_size
+                self._bytes += self._entries[key]
+        return detections
+
+    def put(self, key, detections):
+        path = self._path(key)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        data = json.dumps(detections).encode()
+        # Write then rename so a reader never sees a partial entry
+        tmp = path.with_name(f"{path.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+        with self._lock:
+            self._bytes += len(data) - self._entries.pop(key, 0)
+            self._entries[key] = len(data)
+            self._evict()
+
+    def _evict(self):
+        while self._bytes > self.max_bytes and len(self._entries) > 1:
+            key, size = self._entries.popitem(last=False)
+            self._bytes -= size
+            try:
+                os.remove(self._path(key))
+            except OSError:
+                pass
+
+    @property
+    def size_bytes(self):
+        return self._bytes
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            for key in list(self._entries):
+                try:
+                    os.remove(self._path(key))
+                except OSError:
+                    pass
+            self._entries.clear()
+            self._bytes = 0
+
+
+class CachedDetector:
+    """
+    Wraps a VehicleDetector so repeated images skip inference.
+
+    The model runs once per image at `conf_floor`; detect() then returns the
+    cached detections at or above the wrapped detector's conf_thresh, or at
+    `conf` if given, so a threshold sweep costs one inference per image.
+    """
+
+    def __init__(self, detector, cache=None, conf_floor=0.01):
+        self.detector = detector
+        self.cache = cache if cache is not None else DetectionCache()
+        self.conf_floor = conf_floor
+        self._model_digest = model_hash(getattr(detector, "model_path", type(detector).__name__))
+
+    @property
+    def conf_thresh(self):
+        return self.detector.conf_thresh
+
+    @conf_thresh.setter
+    def conf_thresh(self, value):
+        self.detector.conf_thresh = value
+
+    def _run(self, image, conf):
+        previous = self.detector.conf_thresh
+        self.detector.conf_thresh = conf
+        try:
+            return self.detector.detect(image)
+        finally:
+            self.detector.conf_thresh = previous
+
+    def raw_detections(self, image):
+        key = DetectionCache.key(image_hash(image), self._model_digest, self.conf_floor,
+                                 self.detector.iou_thresh, getattr(self.detector, "imgsz", None))
+        detections = self.cache.get(key)
+        if detections is None:
+            detections = self._run(image, self.conf_floor)
+            self.cache.put(key, detections)
+        return detections
+
+    def detect(self, image, conf=None):
+        conf = self.detector.conf_thresh if conf is None else conf
+        if conf < self.conf_floor:
+            # Below what the cache holds, only the model can answer
+            return self._run(image, conf)
+        return [d for d in self.raw_detections(image) if d["conf"] >= conf]
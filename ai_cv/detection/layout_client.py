@@ -0,0 +1,126 @@
+# ai_cv/detection/layout_client.py
+import os
+import struct
+import threading
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+import numpy as np
+
+# Must match backend/app/services/layout_codec.py
+LAYOUT_MAGIC = b"PVLY"
+LAYOUT_FORMAT = 1
+_HEADER = struct.Struct("<4sHHII")
+
+DEFAULT_CACHE_DIR = os.getenv("PARKVISION_LAYOUT_CACHE", os.path.expanduser("~/.cache/parkvision/layouts"))
+
+
+class LotLayout:
+    """
+    Spot polygons of one lot as flat arrays, decoded without copying.
+
+    spot_ids[i] is the backend ParkingSpot id of polygon i, whose vertices
+    are vertices[offsets[i]:offsets[i + 1]] (an (k, 2) float32 view).
+    """
+
+    def __init__(self, data):
+        magic, fmt, _, self.version, count = _HEADER.unpack_from(data)
+        if magic != LAYOUT_MAGIC or fmt != LAYOUT_FORMAT:
+            raise ValueError("Not a ParkVision layout in a known format")
+        pos = _HEADER.size
+        self.spot_ids = np.frombuffer(data, dtype="<i4", count=count, offset=pos)
+        pos += 4 * count
+        self.offsets = np.frombuffer(data, dtype="<u4", count=count + 1, offset=pos)
+        pos += 4 * (count + 1)
+        self.vertices = np.frombuffer(data, dtype="<f4", count=2 * int(self.offsets[-1]), offset=pos).reshape(-1, 2)
+
+    def __len__(self):
+        return len(self.spot_ids)
+
+    def polygon(self, i):
+        return self.vertices[self.offsets[i]:self.offsets[i + 1]]
+
+    def polygons(self):
+        return [self.polygon(i) for i in range(len(self))]
+
+    """
+    Lots in the format LotDetector matches against, tagged with spot ids.
+    """
+    def natural_poly(self):
+        return [
+            {"bbox": self.polygon(i).tolist(), "conf": 0, "spot_id": int(spot_id)}
+            for i, spot_id in enumerate(self.spot_ids)
+        ]
+
+
+class LayoutClient:
+    """
+    Fetches lot layouts from the backend and keeps them on disk and in memory.
+
+    Each lot is revalidated with If-None-Match at most once per process
+    (until refresh() is called), so many cameras watching the same lot
+    share one decoded layout. If the backend is unreachable the last
+    downloaded copy is used.
+    """
+
+    def __init__(self, base_url, cache_dir=DEFAULT_CACHE_DIR, timeout=10):
+        self.base_url = base_url.rstrip("/")
+        self.cache_dir = Path(cache_dir)
+        self.timeout = timeout
+        self._layouts = {}
+        self._lock = threading.Lock()
+
+    def _paths(self, lot_id):
+        return self.cache_dir / f"lot_{lot_id}.bin", self.cache_dir / f"lot_{lot_id}.etag"
+
+    def _read_cached(self, lot_id):
+        body_path, etag_path = self._paths(lot_id)
+        try:
+            return body_path.read_bytes(), etag_path.read_text().strip()
+        except OSError:
+            return None, None
+
+    def _write_cached(self, lot_id, body, etag):
+        body_path, etag_path = self._paths(lot_id)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        # Write then rename so a crash never leaves a torn layout behind
+        for path, data in ((body_path, body), (etag_path, (etag or "").encode())):
+            tmp = path.with_suffix(path.suffix + ".tmp")
+            tmp.write_bytes(data)
+            os.replace(tmp, path)
+
+    def _fetch(self, lot_id):
+        cached_body, cached_etag = self._read_cached(lot_id)
+        request = urllib.request.Request(f"{self.base_url}/lots/{lot_id}/layout")
+        if cached_body is not None and cached_etag:
+            request.add_header("If-None-Match", cached_etag)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                body = response.read()
+                self._write_cached(lot_id, body, response.headers.get("ETag"))
+                return LotLayout(body)
+        except urllib.error.HTTPError as e:
+            if e.code == 304 and cached_body is not None:
+                return LotLayout(cached_body)
+            raise
+        except (urllib.error.URLError, OSError) as e:
+            if cached_body is None:
+                raise
+            print(f"Layout server unreachable ({e}), using cached layout for lot {lot_id}")
+            return LotLayout(cached_body)
+
+    def get(self, lot_id):
+        with self._lock:
+            layout = self._layouts.get(lot_id)
+            if layout is None:
+                layout = self._layouts[lot_id] = self._fetch(lot_id)
+            return layout
+
+    """
+    Revalidate a lot's layout; only downloads it again if its version changed.
+    """
+    def refresh(self, lot_id):
+        with self._lock:
+            layout = self._layouts[lot_id] = self._fetch(lot_id)
+            return layout
@@ -6,16 +6,30 @@ import numpy as np
 from ultralytics import solutions
 import json
 from detection.detect import VehicleDetector
+from detection.detection_cache import CachedDetector
 from recognition.tracker import VehicleTracker
+from utilities.events import PipelineEvents
+from utilities.frame_reader import FrameReader
+from utilities.metrics import registry
+from utilities.profiler import install_signal_handler
+from utilities.sinks import AnnotatedOutput
+from utilities.visualize import lot_renderer
 
 class LotDetector:
-    def __init__(self, model_path = "best.pt", iou_thresh=.01, conf_thresh = 0.05):
+    # detector/tracker can be swapped for anything with the same detect()/update() interface
+    # detection_cache (a DetectionCache) skips inference on images seen before
+    # profile (a CameraProfile, its path or a camera name) replaces the thresholds with tuned ones
+    def __init__(self, model_path = "best.pt", iou_thresh=.01, conf_thresh = 0.05, detector=None, tracker=None,
+                 detection_cache=None, profile=None):
         self.model_path = model_path
         self.detected = None
         
-        self.vehicledetector = VehicleDetector(model_path, conf_thresh = conf_thresh, iou_thresh = iou_thresh)
+        self.vehicledetector = detector or VehicleDetector(model_path, conf_thresh = conf_thresh, iou_thresh = iou_thresh,
+                                                           profile = profile)
+        if detection_cache is not None:
+            self.vehicledetector = CachedDetector(self.vehicledetector, detection_cache)
         
-        self.vehicletracker = VehicleTracker()
+        self.vehicletracker = tracker or VehicleTracker()
 
 
     def detect(self, frame, json_path):
@@ -24,8 +38,26 @@ class LotDetector:
         #get detections
         self.detected = self.vehicledetector.detect(frame)
         
+        natural_poly = self._load_lots(json_path)
+        
+        # Use improved matching logic
+        occupied, unoccupied = self._match_detections_to_lots(self.detected, natural_poly)
+        
+        print(f"Unoccupied lots: {len(unoccupied)}")
+        return occupied, unoccupied, self.detected
+
+
+    """
+    Read lot polygons from a JSON annotation file or a LotLayout fetched
+    from the backend (see detection/layout_client.py).
+    """
+    @staticmethod
+    def _load_lots(lots):
+        if hasattr(lots, "natural_poly"):
+            return lots.natural_poly()
+
         #imort json data
-        with open(json_path, 'r') as file:
+        with open(lots, 'r') as file:
             data = json.load(file)
             
         #Read json file and turn into bbox
@@ -37,17 +69,12 @@ class LotDetector:
                 # Ensure points are in correct format
                 if isinstance(pts[0], (int, float)):
                     # If it's flat, reshape
-                    pts = [[pts[i], pts[i+1]] for i in range(0, len(pts, 2))]
+                    pts = [[pts[i], pts[i+1]] for i in range(0, len(pts), 2)]
                 natural_poly.append({
                     "bbox": pts,
                     "conf": 0,
                 })
-        
-        # Use improved matching logic
-        occupied, unoccupied = self._match_detections_to_lots(self.detected, natural_poly)
-        
-        print(f"Unoccupied lots: {len(unoccupied)}")
-        return occupied, unoccupied, self.detected
+        return natural_poly
 
 
     """
@@ -78,7 +105,8 @@ class LotDetector:
                     "bbox": lot_box["bbox"],
                     "conf": best_iou,
                     "cls": det["cls"],
-                    "name": det["name"]
+                    "name": det["name"],
+                    "spot_id": lot_box.get("spot_id")
                 })
 
         # Find unoccupied lots
@@ -90,6 +118,20 @@ class LotDetector:
         return occupied, unoccupied
 
 
+    """
+    Occupied/free per spot polygon, in the order given, as a boolean array.
+    Same matching as _match_detections_to_lots; used to score against labels.
+    """
+    def spot_occupancy(self, detections, polygons):
+        lots = [{"bbox": poly, "conf": 0} for poly in polygons]
+        occupied, _ = self._match_detections_to_lots(detections, lots)
+        # Matched lots carry their polygon object, which identifies the spot
+        index = {id(poly): i for i, poly in enumerate(polygons)}
+        predicted = np.zeros(len(polygons), dtype=bool)
+        predicted[[index[id(spot["bbox"])] for spot in occupied]] = True
+        return predicted
+
+
     """
     Calculate IoU between a polygon and a rectangle.
     Uses a more robust method for polygon-rectangle intersection.
@@ -149,39 +191,61 @@ class LotDetector:
     
     Args:
         video_path: Path to video file or camera index (0 for webcam)
-        json_path: Path to JSON file containing lot annotations
+        json_path: Path to JSON file containing lot annotations, or a LotLayout
         callback_fn: Optional callback function(frame, occupied, unoccupied, tracks)
+        camera: Name to record stage timings under (default: video_path)
+        drop_frames: Process only the newest frame when falling behind (default: for cameras and streams)
+        events: Optional EventStream for track births/deaths and spot transitions
+        sinks: Optional annotated output sinks (VideoFileSink, MjpegSink); the lot overlay
+            is rendered off the inference thread at most render_fps times a second
+        profile_dir: Write a profile_seconds sampling profile here on kill -USR1 <pid>;
+            only takes effect when called from the main thread
     """
-    def detect_from_video(self, video_path, json_path, callback_fn=None): 
-        cap = cv.VideoCapture(video_path)
+    def detect_from_video(self, video_path, json_path, callback_fn=None, camera=None, drop_frames=None, events=None,
+                          sinks=None, render_fps=5.0, render_scale=1.0, profile_dir=None, profile_seconds=10.0):
+        metrics = registry.camera(camera if camera is not None else video_path)
+        reader = FrameReader(video_path, drop=drop_frames, metrics=metrics)
+        pipeline_events = PipelineEvents(events) if events is not None else None
+        if profile_dir:
+            install_signal_handler(profile_dir, profile_seconds)
 
         # Load lot annotations
-        with open(json_path, 'r') as file:
-            data = json.load(file)
+        natural_poly = self._load_lots(json_path)
+        occupied, unoccupied = [], natural_poly
+        output = None
+        if sinks:
+            output = AnnotatedOutput(sinks, render_fn=lot_renderer([lot["bbox"] for lot in natural_poly], render_scale),
+                                     fps=render_fps, metrics=metrics)
+            # Occupied lots carry their polygon object, which identifies the spot
+            spot_index = {id(lot["bbox"]): i for i, lot in enumerate(natural_poly)}
 
-        natural_poly = []
-        for lot in data:
-            pts = lot['points']
-            natural_poly.append({
-                "bbox": pts,
-                "conf": 0,
-            })
+        for item in reader:
+            frame = item.image
 
-        while True:
-            ret, frame = cap.read()
-            if not ret:
-                break
+            with metrics.stage("detect"):
+                detections = self.vehicledetector.detect(frame)
 
-            detections = self.vehicledetector.detect(frame)
+            with metrics.stage("track"):
+                tracks = self.vehicletracker.update(detections, frame=frame)
 
-            tracks = self.vehicletracker.update(detections, frame=frame)
+            with metrics.stage("match"):
+                occupied, unoccupied = self._match_tracks_to_lots(tracks, natural_poly)
 
-            occupied, unoccupied = self._match_tracks_to_lots(tracks, natural_poly)
+            if pipeline_events:
+                pipeline_events.update_tracks(tracks, item.timestamp)
+                pipeline_events.update_spots(natural_poly, occupied, item.timestamp)
 
+            if output:
+                output.publish(frame, ([spot_index[id(lot["bbox"])] for lot in occupied], tracks))
             if callback_fn:
                 callback_fn(frame, occupied, unoccupied, tracks)
+            metrics.frame_done()
 
-        cap.release()
+        reader.close()
+        if output:
+            output.close()
+        if pipeline_events:
+            pipeline_events.close()
         return occupied, unoccupied
 
     
@@ -205,25 +269,26 @@ class LotDetector:
             best_iou = 0
             best_lot_idx = None
 
-        for idx, lot_box in enumerate(natural_poly):
-            if idx in matched_lot_indices:
-                continue
-
-            iou = self._poly_rect_iou(lot_box["bbox"], track["bbox"])
-            if iou > 0.3 and iou > best_iou: # IOU thresh
-                best_iou = iou
-                best_lot_idx = idx
-
-        if best_lot_idx is not None:
-            matched_lot_indices.add(best_lot_idx)
-            lot_box = natural_poly[best_lot_idx]
-            occupied.append({
-                "bbox": lot_box["bbox"],
-                "conf": best_iou,
-                "cls": track.get("cls", 0)
-                "name": track.get("name", "vehicle"),
-                "track_id": track.get("track_id")
-            })
+            for idx, lot_box in enumerate(natural_poly):
+                if idx in matched_lot_indices:
+                    continue
+
+                iou = self._poly_rect_iou(lot_box["bbox"], track["bbox"])
+                if iou > 0.3 and iou > best_iou: # IOU thresh
+                    best_iou = iou
+                    best_lot_idx = idx
+
+            if best_lot_idx is not None:
+                matched_lot_indices.add(best_lot_idx)
+                lot_box = natural_poly[best_lot_idx]
+                occupied.append({
+                    "bbox": lot_box["bbox"],
+                    "conf": best_iou,
+                    "cls": track.get("cls", 0),
+                    "name": track.get("name", "vehicle"),
+                    "track_id": track.get("track_id"),
+                    "spot_id": lot_box.get("spot_id")
+                })
 
         # Find unoccupied lots
         unoccupied = []
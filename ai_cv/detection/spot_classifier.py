@@ -0,0 +1,100 @@
+# ai_cv/detection/spot_classifier.py
+"""
+Per-spot occupancy for fixed cameras without a vehicle detector.
+
+A SpotWarper (utilities/spot_warp.py) rectifies every spot into an
+(N, size, size, 3) batch with a single cv.remap per frame. SpotNet,
+a three-layer CNN, classifies the whole batch as occupied/empty in one
+forward pass. Train it with training/train_spot_classifier.py.
+"""
+import numpy as np
+import torch
+from torch import nn
+from torch.nn.utils.fusion import fuse_conv_bn_eval
+from utilities.spot_warp import SpotWarper
+
+CROP_SIZE = 32
+
+
+class SpotNet(nn.Module):
+    def __init__(self, width=8):
+        super().__init__()
+        self.features = nn.Sequential(
+            nn.Conv2d(3, width, 3, stride=2, padding=1), nn.BatchNorm2d(width), nn.ReLU(inplace=True),
+            nn.Conv2d(width, 2 * width, 3, stride=2, padding=1), nn.BatchNorm2d(2 * width), nn.ReLU(inplace=True),
+            nn.Conv2d(2 * width, 4 * width, 3, stride=2, padding=1), nn.BatchNorm2d(4 * width), nn.ReLU(inplace=True),
+            nn.AdaptiveAvgPool2d(1),
+            nn.Flatten(),
+        )
+        self.head = nn.Linear(4 * width, 1)
+
+    # Occupied logit per crop
+    def forward(self, x):
+        return self.head(self.features(x)).squeeze(1)
+
+
+# Fold each BatchNorm into the conv before it, for inference only
+def _fuse_batchnorm(layers):
+    fused = []
+    for layer in layers:
+        if isinstance(layer, nn.BatchNorm2d) and fused and isinstance(fused[-1], nn.Conv2d):
+            fused[-1] = fuse_conv_bn_eval(fused[-1], layer)
+        else:
+            fused.append(layer)
+    return nn.Sequential(*fused)
+
+
+class SpotClassifier:
+    def __init__(self, weights_path="spot_classifier.pt", threshold=0.5):
+        checkpoint = torch.load(weights_path, map_location="cpu", weights_only=False)
+        self.size = checkpoint.get("size", CROP_SIZE)
+        self.model = SpotNet(checkpoint.get("width", 8))
+        self.model.load_state_dict(checkpoint["state_dict"])
+        self.model.eval()
+        self.model.features = _fuse_batchnorm(self.model.features)
+        # The model is trained on pixels / 255; fold that into the first conv so
+        # predict() feeds it the uint8 batch as is
+        with torch.no_grad():
+            self.model.features[0].weight /= 255
+        self.threshold = threshold
+
+    """
+    Occupied probability for each crop of an (N, size, size, 3) uint8 batch.
+    """
+    def predict(self, crops):
+        if len(crops) == 0:
+            return np.zeros(0, dtype=np.float32)
+        with torch.inference_mode():
+            x = torch.from_numpy(np.ascontiguousarray(crops)).permute(0, 3, 1, 2).float()
+            return torch.sigmoid(self.model(x)).numpy()
+
+
+class SpotOccupancy:
+    """
+    Occupancy mode for fixed cameras with known spot polygons. detect()
+    returns (occupied, unoccupied, probabilities) with occupied/unoccupied
+    in the same format as LotDetector.detect.
+    """
+
+    def __init__(self, lots, weights_path="spot_classifier.pt", threshold=0.5, classifier=None):
+        from detection.lot_detector import LotDetector
+
+        self.natural_poly = LotDetector._load_lots(lots)
+        self.classifier = classifier or SpotClassifier(weights_path, threshold)
+        self.warper = SpotWarper([lot["bbox"] for lot in self.natural_poly], self.classifier.size)
+
+    def detect(self, frame):
+        probs = self.classifier.predict(self.warper.warp(frame))
+        occupied, unoccupied = [], []
+        for lot, p in zip(self.natural_poly, probs):
+            if p >= self.classifier.threshold:
+                occupied.append({
+                    "bbox": lot["bbox"],
+                    "conf": float(p),
+                    "cls": 2,
+                    "name": "vehicle",
+                    "spot_id": lot.get("spot_id"),
+                })
+            else:
+                unoccupied.append(lot)
+        return occupied, unoccupied, probs
@@ -0,0 +1,233 @@
+# ai_cv/evaluate_occupancy.py
+"""
+Spot occupancy evaluation over a CVAT-annotated parking dataset.
+
+Streams annotations.xml (as downloaded by build_lot_test_data.py), shards
+the images across worker processes that each load the detector once, and
+scores every spot as occupied/free against its label. Writes a JSON report
+with spot-level precision/recall/F1, per-stage timing and per-image counts,
+so model and matcher changes can be compared run to run.
+
+    python evaluate_occupancy.py tests/lot_test_data --model best.pt --output report.json
+    python evaluate_occupancy.py tests/lot_test_data --cache --matcher lot --limit 200
+
+With --cache the model runs once per image (see detection/detection_cache.py)
+and later runs only redo decoding and matching.
+"""
+import argparse
+import json
+import logging
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from functools import partial
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+from autotune import f1_score, match_spots, spot_iou_matrix
+from training.train_spot_classifier import iter_cvat_images
+
+logger = logging.getLogger("parkvision.evaluate")
+
+STAGES = ("decode", "detect", "match")
+
+
+def yolo_detector(model_path="best.pt", conf_thresh=0.05, iou_thresh=0.01, imgsz=None, profile=None):
+    from detection.detect import VehicleDetector
+    return VehicleDetector(model_path, conf_thresh=conf_thresh, iou_thresh=iou_thresh, imgsz=imgsz, profile=profile)
+
+
+def fast_matcher(detections, polygons):
+    boxes = np.array([d["xyxy"] for d in detections], dtype=np.float32).reshape(-1, 4)
+    return match_spots(spot_iou_matrix(boxes, polygons))
+
+
+def lot_matcher(detections, polygons):
+    # LotDetector's own matching, slower but exactly what the live pipeline runs
+    from detection.lot_detector import LotDetector
+    return LotDetector(detector=object(), tracker=object()).spot_occupancy(detections, polygons)
+
+
+MATCHERS = {"fast": fast_matcher, "lot": lot_matcher}
+
+# Per-process state set up once by _init_worker
+_worker = {}
+
+
+def _init_worker(make_detector, matcher, cache_dir, threads):
+    cv.setNumThreads(1)
+    if threads:
+        try:
+            import torch
+            torch.set_num_threads(threads)
+        except ImportError:
+            pass
+    detector = make_detector()
+    if cache_dir:
+        from detection.detection_cache import CachedDetector, DetectionCache
+        detector = CachedDetector(detector, DetectionCache(cache_dir), conf_floor=detector.conf_thresh)
+    _worker.update(detector=detector, matcher=MATCHERS[matcher])
+
+
+"""
+Score one shard of samples in a worker. Returns one row per image with its
+TP/FP/FN/TN spot counts and seconds spent in each stage.
+"""
+def evaluate_shard(samples):
+    detector, matcher = _worker["detector"], _worker["matcher"]
+    rows = []
+    for path, polygons, labels in samples:
+        start = time.perf_counter()
+        image = cv.imread(path)
+        decoded = time.perf_counter()
+        if image is None:
+            rows.append({"image": path, "error": "unreadable"})
+            continue
+        detections = detector.detect(image)
+        detected = time.perf_counter()
+        predicted = matcher(detections, polygons)
+        matched = time.perf_counter()
+
+        truth = np.asarray(labels, dtype=bool)
+        rows.append({
+            "image": path,
+            "spots": len(labels),
+            "detections": len(detections),
+            "tp": int((predicted & truth).sum()),
+            "fp": int((predicted & ~truth).sum()),
+            "fn": int((~predicted & truth).sum()),
+            "tn": int((~predicted & ~truth).sum()),
+            "decode": decoded - start,
+            "detect": detected - decoded,
+            "match": matched - detected,
+        })
+    return rows
+
+
+def _shards(samples, size):
+    shard = []
+    for sample in samples:
+        shard.append(sample)
+        if len(shard) == size:
+            yield shard
+            shard = []
+    if shard:
+        yield shard
+
+
+def _stage_summary(seconds):
+    seconds = np.asarray(seconds, dtype=np.float64) * 1000
+    if not len(seconds):
+        return {"total_s": 0.0, "mean_ms": None, "p50_ms": None, "p95_ms": None}
+    return {"total_s": round(float(seconds.sum()) / 1000, 3), "mean_ms": round(float(seconds.mean()), 3),
+            "p50_ms": round(float(np.percentile(seconds, 50)), 3), "p95_ms": round(float(np.percentile(seconds, 95)), 3)}
+
+
+def summarize(rows, wall_seconds, config=None):
+    scored = [r for r in rows if "error" not in r]
+    tp, fp, fn, tn = (sum(r[k] for r in scored) for k in ("tp", "fp", "fn", "tn"))
+    spots = tp + fp + fn + tn
+    return {
+        "config": config or {},
+        "images": len(scored),
+        "unreadable": [r["image"] for r in rows if "error" in r],
+        "spots": spots,
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+        "precision": tp / (tp + fp) if tp + fp else 1.0,
+        "recall": tp / (tp + fn) if tp + fn else 1.0,
+        "f1": f1_score(tp, fp, fn),
+        "accuracy": (tp + tn) / spots if spots else 1.0,
+        "wall_s": round(wall_seconds, 3),
+        "images_per_s": round(len(scored) / wall_seconds, 2) if wall_seconds > 0 else None,
+        "stages": {stage: _stage_summary([r[stage] for r in scored]) for stage in STAGES},
+        "per_image": sorted(({k: r[k] for k in ("image", "spots", "detections", "tp", "fp", "fn", "tn")}
+                             for r in scored), key=lambda r: r["image"]),
+    }
+
+
+"""
+Evaluate `samples` ([(image path, polygons, labels)], any iterable) with
+`workers` processes. `make_detector` is a picklable factory called once per
+worker. Shards are submitted as the samples are read, with a bounded
+number in flight, so a long annotation file is never held in full.
+"""
+def evaluate(samples, make_detector=yolo_detector, matcher="fast", workers=None, shard_size=16, cache_dir=None,
+             config=None):
+    workers = workers or os.cpu_count() or 1
+    threads = max(1, (os.cpu_count() or 1) // workers)
+    init = (make_detector, matcher, cache_dir, threads)
+    started = time.perf_counter()
+    rows = []
+    if workers == 1:
+        _init_worker(*init)
+        for shard in _shards(samples, shard_size):
+            rows.extend(evaluate_shard(shard))
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=init) as pool:
+            pending = set()
+            for shard in _shards(samples, shard_size):
+                if len(pending) >= 2 * workers:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        rows.extend(future.result())
+                pending.add(pool.submit(evaluate_shard, shard))
+            for future in pending:
+                rows.extend(future.result())
+    report = summarize(rows, time.perf_counter() - started, config)
+    logger.info(f"{report['images']} images, {report['spots']} spots in {report['wall_s']:.1f}s "
+                f"({report['images_per_s']} images/s): precision {report['precision']:.3f}, "
+                f"recall {report['recall']:.3f}, F1 {report['f1']:.3f}")
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Spot occupancy precision/recall/F1 over a CVAT parking dataset")
+    parser.add_argument("dataset", help="Folder with annotations.xml and the images it names")
+    parser.add_argument("--model", default="best.pt")
+    parser.add_argument("--conf", type=float, default=0.05, help="Detector confidence threshold (LotDetector's default)")
+    parser.add_argument("--iou", type=float, default=0.01, help="Detector NMS IoU (LotDetector's default)")
+    parser.add_argument("--imgsz", type=int, help="Inference size (default: the size the model was trained at)")
+    parser.add_argument("--camera-profile", help="Take imgsz and thresholds from a camera profile instead")
+    parser.add_argument("--matcher", choices=tuple(MATCHERS), default="fast",
+                        help="fast: exact polygon intersection; lot: LotDetector's mask-based matching")
+    parser.add_argument("--partial", choices=("occupied", "free", "skip"), default="occupied",
+                        help="How partially free spots are scored")
+    parser.add_argument("--workers", type=int, default=os.cpu_count(), help="Worker processes")
+    parser.add_argument("--shard-size", type=int, default=16, help="Images per task sent to a worker")
+    parser.add_argument("--limit", type=int, help="Evaluate only the first N images")
+    parser.add_argument("--cache", nargs="?", const="", help="Cache detections (optionally in this folder)")
+    parser.add_argument("--output", help="Write the JSON report here (default: stdout)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    if not (Path(args.dataset) / "annotations.xml").exists():
+        parser.error(f"{args.dataset} has no annotations.xml, run build_lot_test_data.py first")
+
+    partial_occupied = {"occupied": True, "free": False, "skip": None}[args.partial]
+    samples = iter_cvat_images(args.dataset, partial_occupied)
+    if args.limit:
+        samples = (s for _, s in zip(range(args.limit), samples))
+    cache_dir = args.cache
+    if cache_dir == "":
+        from detection.detection_cache import DEFAULT_CACHE_DIR
+        cache_dir = DEFAULT_CACHE_DIR
+
+    make_detector = partial(yolo_detector, args.model, args.conf, args.iou, args.imgsz, args.camera_profile)
+    config = {"dataset": str(args.dataset), "model": args.model, "conf": args.conf, "iou": args.iou,
+              "imgsz": args.imgsz, "camera_profile": args.camera_profile, "matcher": args.matcher,
+              "partial": args.partial, "workers": args.workers, "cached": cache_dir is not None}
+    report = evaluate(samples, make_detector, args.matcher, args.workers, args.shard_size, cache_dir, config)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+        logger.info(f"Report written to {args.output}")
+    else:
+        print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+# ai_cv/recognition/stitching.py
+"""
+Join the sessions of independently analyzed video segments.
+
+Each segment worker runs its own tracker, so track ids are local to a
+segment. Consecutive segments both decode the overlap window before their
+boundary; tracks that cover the same boxes there are the same vehicle, and
+a session still open at the end of one segment continues in the next.
+"""
+from collections import Counter
+
+from recognition.tracker import VehicleTracker
+
+
+"""
+Match track ids of the previous segment's tail to the next segment's
+warm-up. Both are {track_id: {frame: bbox}}; returns {next_id: prev_id}.
+"""
+def match_tracks(tail, head, min_iou=0.5, min_votes=3):
+    votes = Counter()
+    for prev_id, prev_boxes in tail.items():
+        for next_id, next_boxes in head.items():
+            for frame in prev_boxes.keys() & next_boxes.keys():
+                if VehicleTracker._iou(prev_boxes[frame], next_boxes[frame]) >= min_iou:
+                    votes[(prev_id, next_id)] += 1
+
+    matches = {}
+    used = set()
+    for (prev_id, next_id), count in votes.most_common():
+        if count < min_votes:
+            break
+        if next_id in matches or prev_id in used:
+            continue
+        matches[next_id] = prev_id
+        used.add(prev_id)
+    return matches
+
+
+def _finish(sess):
+    sess["duration"] = sess["end_time"] - sess["start_time"]
+    return sess
+
+
+"""
+Stitch segment results (in segment order) into one list of sessions with
+ids unique across the recording. Each result holds:
+
+    boundary  absolute time of the first frame the segment owns
+    sessions  SessionManager sessions with local track ids, plus "open"
+              for those still active when the segment ended
+    head      {track_id: {frame: bbox}} seen before `boundary`
+    tail      {track_id: {frame: bbox}} seen in the next segment's warm-up
+
+Sessions that ended before `boundary` belong to the previous segment and
+are dropped. Sessions of the last segment stay "open" if the vehicle was
+still there when the recording ended.
+"""
+def stitch_sessions(results, min_iou=0.5, min_votes=3):
+    stitched = []
+    carried = {}  # local track id in the previous segment -> its open stitched session
+    next_id = 1
+    prev = None
+
+    for k, result in enumerate(results):
+        matches = match_tracks(prev["tail"], result["head"], min_iou, min_votes) if prev else {}
+        taken = set()
+        carried_next = {}
+        for sess in sorted(result["sessions"], key=lambda s: s["start_time"]):
+            if k > 0 and sess["end_time"] < result["boundary"]:
+                continue
+            owner = carried.get(matches.get(sess["track_id"]))
+            if owner is not None and sess["start_time"] < result["boundary"] and owner["track_id"] not in taken:
+                owner.update(end_time=max(owner["end_time"], sess["end_time"]), bbox=sess["bbox"], open=sess["open"])
+                taken.add(owner["track_id"])
+                entry = owner
+            else:
+                entry = dict(sess, track_id=next_id, segment=k)
+                next_id += 1
+                stitched.append(entry)
+            if sess["open"]:
+                carried_next[sess["track_id"]] = entry
+
+        # Open sessions the next segment did not pick up ended at the boundary
+        for owner in carried.values():
+            if owner["track_id"] not in taken:
+                owner["open"] = False
+        carried = carried_next
+        prev = result
+
+    return [_finish(s) for s in stitched]
@@ -37,10 +37,12 @@ class VehicleTracker:
         for t in tracks:
             if hasattr(t, "to_ltrb"):
                 x1, y1, x2, y2 = t.to_ltrb()
+                # det_conf is None for tracks that were not matched this frame
+                det_conf = getattr(t, "det_conf", None)
                 out.append({
                     "track_id": int(t.track_id),
                     "bbox": [x1, y1, x2, y2],
-                    "conf": float(getattr(t, "det_conf", 1.0)),
+                    "conf": float(det_conf) if det_conf is not None else 1.0,
                     "cls": detections[0]["cls"],
                     "name": detections[0]["name"],
                 })
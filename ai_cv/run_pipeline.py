@@ -1,58 +1,161 @@
 # ai_cv/run_pipeline.py
 
 import cv2 as cv
-import time
+from functools import partial
 from detection.detect import VehicleDetector
 from recognition.tracker import VehicleTracker
 from recognition.session_logic import SessionManager
+from utilities.events import EventStream, PipelineEvents
+from utilities.ffmpeg_capture import open_ffmpeg
+from utilities.frame_reader import FrameReader, open_capture
+from utilities.metrics import JsonMetricsLogger, registry, serve_metrics
+from utilities.profiler import install_signal_handler
+from utilities.sinks import AnnotatedOutput, MjpegSink, VideoFileSink
+from utilities.visualize import OverlayRenderer
 
-def draw(frame, tracks):
-    for t in tracks:
-        x1, y1, x2, y2 = map(int, t["bbox"])
-        tid = t["track_id"]
-        name = t["name"]
-        conf = t["conf"]
-        cv.rectangle(frame, (x1, y1), (x2, y2), (0,255,0), 2)
-        cv.putText(frame, f"{name}-{tid}:{conf:.2f}", (x1, y1-10), cv.FONT_HERSHEY_SIMPLEX, 0.5, (255,255,255), 1)
-
-def main(video_path):
-    detector = VehicleDetector()
+# Returns render(frame, tracks) drawing into a renderer created for the first frame's size
+def make_renderer(scale=1.0):
+    renderer = None
+
+    def render(frame, tracks):
+        nonlocal renderer
+        if renderer is None:
+            renderer = OverlayRenderer(frame.shape, scale=scale)
+        return renderer.render(frame, tracks=tracks)
+
+    return render
+
+def main(video_path, camera="0", metrics_port=None, metrics_host="127.0.0.1", log_interval=30.0, profile_dir=None,
+         profile_seconds=10.0, profile_token=None,
+         headless=False, output_path=None, mjpeg_port=None, render_fps=5.0, render_scale=1.0, detector=None,
+         camera_profile=None, drop_frames=None, realtime=False, max_retries=None, ffmpeg=None,
+         events_target=None, events_format="ndjson", events_flush=0.2):
+    detector = detector or VehicleDetector(profile=camera_profile)
     tracker = VehicleTracker()
     sess_mgr = SessionManager()
 
-    cap = cv.VideoCapture(video_path)
-    while True:
-        ret, frame = cap.read()
-        if not ret:
-            break
+    metrics = registry.camera(camera)
+    if profile_dir:
+        # kill -USR1 <pid> writes a profile of the next profile_seconds
+        install_signal_handler(profile_dir, profile_seconds)
+    if metrics_port:
+        serve_metrics(metrics_port, host=metrics_host, profile_dir=profile_dir, profile_token=profile_token)
+    reporter = None
+    if log_interval > 0:
+        reporter = JsonMetricsLogger(log_interval)
+        reporter.start()
+
+    # Annotated output is opt-in and rendered off the inference thread
+    sinks = []
+    if output_path:
+        sinks.append(VideoFileSink(output_path, fps=render_fps))
+    if mjpeg_port:
+        sinks.append(MjpegSink(mjpeg_port))
+    output = AnnotatedOutput(sinks, render_fn=make_renderer(render_scale), fps=render_fps, metrics=metrics) if sinks else None
+    show = None if headless else make_renderer()
+    # Track and session events, batched and written off the inference thread
+    events = (EventStream(events_target, events_format, events_flush, header={"camera": camera}, metrics=metrics)
+              if events_target else None)
+    pipeline_events = PipelineEvents(events) if events else None
 
-        start = time.time()
-        dets = detector.detect(frame)
-        stop = time.time()
-        print(f"Detection duration: {stop-start}s")
+    # Decoded on its own thread; for live sources only the newest frame is kept
+    # ffmpeg (a dict of FFmpegCapture options) scales and thins out frames in the decoder instead of OpenCV
+    open_fn = partial(open_ffmpeg, **ffmpeg) if ffmpeg is not None else open_capture
+    reader = FrameReader(video_path, drop=drop_frames, realtime=realtime, metrics=metrics, max_retries=max_retries,
+                         open_fn=open_fn)
+    try:
+        for item in reader:
+            frame = item.image
 
-        start = time.time()
-        tracks = tracker.update(dets)
-        stop = time.time()
-        print(f"Tracking duration: {stop-start}s")
+            with metrics.stage("detect"):
+                dets = detector.detect(frame)
 
-        start = time.time()
-        completed = sess_mgr.update(tracks, timestamp=time.time())
-        stop = time.time()
-        print(f"Session logic duration: {stop-start}s")
+            with metrics.stage("track"):
+                tracks = tracker.update(dets)
 
-        for c in completed:
-            print("Vehicle left:", c)
+            with metrics.stage("session"):
+                completed = sess_mgr.update(tracks, timestamp=item.timestamp)
 
-        draw(frame, tracks)
-        cv.imshow("Frame", frame)
-        if cv.waitKey(1) & 0xFF == ord("q"):
-            break
+            if pipeline_events:
+                pipeline_events.update_tracks(tracks, item.timestamp)
+                pipeline_events.sessions(completed)
+            else:
+                for c in completed:
+                    print("Vehicle left:", c)
 
-    cap.release()
-    cv.destroyAllWindows()
+            if output:
+                output.publish(frame, tracks)
+            metrics.frame_done()
+
+            if headless:
+                continue
+            with metrics.stage("render"):
+                # Drawn into the renderer's own buffer, the published frame stays untouched
+                cv.imshow("Frame", show(frame, tracks))
+                key = cv.waitKey(1)
+            if key & 0xFF == ord("q"):
+                break
+    finally:
+        reader.close()
+        if output:
+            output.close()
+        if events:
+            pipeline_events.close()
+            events.close()
+        if not headless:
+            cv.destroyAllWindows()
+        if reporter:
+            reporter.stop()
+            reporter.emit()
 
 if __name__ == "__main__":
-    import sys
-    video_path = sys.argv[1] if len(sys.argv) > 1 else 0
-    main(video_path)
\ No newline at end of file
+    import argparse
+    import logging
+    import os
+
+    parser = argparse.ArgumentParser(description="Run detection, tracking and session logic on a video or camera")
+    parser.add_argument("video_path", nargs="?", default="0", help="Video file or camera index")
+    parser.add_argument("--camera", help="Camera name used in metrics (default: video_path)")
+    parser.add_argument("--metrics-port", type=int, help="Serve Prometheus metrics at :PORT/metrics")
+    parser.add_argument("--metrics-host", default="127.0.0.1", help="Interface for the metrics port (0.0.0.0 for remote scrapes)")
+    parser.add_argument("--log-interval", type=float, default=30.0, help="Seconds between JSON metrics log lines (0 disables)")
+    parser.add_argument("--profile-dir", help="Enable on-demand profiling (SIGUSR1 or POST /debug/profile) into this directory")
+    parser.add_argument("--profile-seconds", type=float, default=10.0, help="How long a SIGUSR1 profile samples for")
+    parser.add_argument("--profile-token", default=os.environ.get("PARKVISION_PROFILE_TOKEN"),
+                        help="Bearer token for POST /debug/profile (default: $PARKVISION_PROFILE_TOKEN)")
+    parser.add_argument("--headless", action="store_true", help="No window and no per-frame drawing")
+    parser.add_argument("--output", help="Write annotated frames to this video file (e.g. out.mp4)")
+    parser.add_argument("--mjpeg-port", type=int, help="Serve annotated frames as an MJPEG stream on this port")
+    parser.add_argument("--render-fps", type=float, default=5.0, help="Max rate of annotated output frames")
+    parser.add_argument("--render-scale", type=float, default=1.0, help="Downscale annotated output frames (e.g. 0.5 for a preview)")
+    parser.add_argument("--camera-profile", help="Tuned detector settings (autotune.py): a profile JSON or a camera name")
+    parser.add_argument("--drop-frames", choices=("auto", "on", "off"), default="auto",
+                        help="Skip to the newest frame when processing falls behind (auto: on for cameras and streams)")
+    parser.add_argument("--realtime", action="store_true", help="Feed a video file at its frame rate, like a camera")
+    parser.add_argument("--max-retries", type=int, help="Give up after this many failed reconnects in a row (default: never)")
+    parser.add_argument("--events", help="Write track and session events to a file, - (stdout) or unix:/path/to.sock")
+    parser.add_argument("--events-format", choices=("ndjson", "binary"), default="ndjson")
+    parser.add_argument("--events-flush", type=float, default=0.2, help="Seconds between event batch writes")
+    parser.add_argument("--decoder", choices=("opencv", "ffmpeg"), default="opencv", help="Decode with OpenCV or an ffmpeg subprocess")
+    parser.add_argument("--decode-width", type=int, help="ffmpeg: scale frames to this width while decoding")
+    parser.add_argument("--decode-height", type=int, help="ffmpeg: scale frames to this height while decoding")
+    parser.add_argument("--decode-fps", type=float, help="ffmpeg: output this many frames per second")
+    parser.add_argument("--keyframes-only", action="store_true", help="ffmpeg: decode keyframes only")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+    ffmpeg = None
+    if args.decoder == "ffmpeg":
+        ffmpeg = dict(width=args.decode_width, height=args.decode_height, fps=args.decode_fps,
+                      keyframes_only=args.keyframes_only)
+    elif args.decode_width or args.decode_height or args.decode_fps or args.keyframes_only:
+        parser.error("--decode-width/--decode-height/--decode-fps/--keyframes-only need --decoder ffmpeg")
+    video_path = int(args.video_path) if args.video_path.isdigit() else args.video_path
+    main(video_path, camera=args.camera or args.video_path, metrics_port=args.metrics_port, metrics_host=args.metrics_host,
+         log_interval=args.log_interval, profile_dir=args.profile_dir, profile_seconds=args.profile_seconds,
+         profile_token=args.profile_token,
+         headless=args.headless, output_path=args.output, mjpeg_port=args.mjpeg_port, render_fps=args.render_fps,
+         render_scale=args.render_scale, camera_profile=args.camera_profile,
+         drop_frames={"auto": None, "on": True, "off": False}[args.drop_frames], realtime=args.realtime,
+         max_retries=args.max_retries, ffmpeg=ffmpeg, events_target=args.events, events_format=args.events_format,
+         events_flush=args.events_flush)
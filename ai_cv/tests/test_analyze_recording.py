@@ -0,0 +1,75 @@
+# ai_cv/tests/test_analyze_recording.py
+
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import analyze_recording
+from recognition.stitching import match_tracks
+from utilities.segments import plan_segments, scan_keyframes
+
+START = 1_700_000_000.0
+FPS = 10
+# (x, first frame, last frame) of each white "car"
+CARS = [(10, 0, 299), (60, 40, 200), (110, 120, 180), (160, 90, 130)]
+
+
+class BoxDetector:
+    """Detects the white rectangles drawn by write_lot_video."""
+
+    def detect(self, frame):
+        gray = cv.cvtColor(frame, cv.COLOR_BGR2GRAY)
+        _, binary = cv.threshold(gray, 128, 255, cv.THRESH_BINARY)
+        contours, _ = cv.findContours(binary, cv.RETR_EXTERNAL, cv.CHAIN_APPROX_SIMPLE)
+        dets = []
+        for c in contours:
+            x, y, w, h = cv.boundingRect(c)
+            dets.append({"xyxy": [x, y, x + w, y + h], "conf": 0.9, "cls": 2, "name": "car"})
+        return dets
+
+
+def write_lot_video(path, frames=300):
+    writer = cv.VideoWriter(str(path), cv.VideoWriter_fourcc(*"mp4v"), FPS, (240, 120))
+    for i in range(frames):
+        frame = np.zeros((120, 240, 3), dtype=np.uint8)
+        for x, first, last in CARS:
+            if first <= i <= last:
+                cv.rectangle(frame, (x, 30), (x + 30, 80), (255, 255, 255), -1)
+        writer.write(frame)
+    writer.release()
+
+
+def test_plan_segments_snaps_to_keyframes():
+    segments = plan_segments(1000, 4, 50, keyframes=range(0, 1000, 60))
+    assert [s.start for s in segments] == [0, 240, 480, 720]
+    assert [s.warmup for s in segments] == [0, 180, 420, 660]
+    assert [s.end for s in segments] == [240, 480, 720, 1000]
+    assert [s.tail for s in segments] == [180, 420, 660, 1000]
+    # Boundaries that snap onto the same keyframe collapse into one segment
+    assert len(plan_segments(100, 8, 10, keyframes=[0, 50])) == 2
+
+
+def test_match_tracks_by_overlap():
+    tail = {1: {f: [0, 0, 10, 10] for f in range(5)}, 2: {f: [50, 0, 60, 10] for f in range(5)}}
+    head = {7: {f: [50, 1, 60, 11] for f in range(5)}, 8: {f: [0, 0, 10, 10] for f in range(2)}}
+    assert match_tracks(tail, head) == {7: 2}
+
+
+def test_parallel_matches_sequential(tmp_path):
+    video = tmp_path / "lot.mp4"
+    write_lot_video(video)
+    frames, keyframes = scan_keyframes(str(video))
+    assert frames == 300
+
+    def run(workers, segments):
+        sessions = analyze_recording.analyze(str(video), START, workers=workers, segments=segments,
+                                             overlap=3.0, make_detector=BoxDetector)
+        return sorted((round(s["start_time"] - START, 1), round(s["end_time"] - START, 1), s["open"]) for s in sessions)
+
+    expected = [(0.0, 29.9, True), (4.0, 20.0, False), (9.0, 13.0, False), (12.0, 18.0, False)]
+    assert run(1, 1) == expected
+    assert run(2, 3) == expected
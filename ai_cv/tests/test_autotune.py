@@ -0,0 +1,96 @@
+# ai_cv/tests/test_autotune.py
+
+import sys
+import time
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from autotune import autotune, nms
+from detection.camera_profile import CameraProfile
+from detection.detection_cache import DetectionCache
+
+# Four spots in a row; 0 and 2 are taken
+SPOTS = [[[x, 10], [x + 50, 10], [x + 50, 90], [x, 90]] for x in (10, 70, 130, 190)]
+LABELS = [1, 0, 1, 0]
+
+
+class StubDetector:
+    """
+    Below 512px it misses the car in spot 2. At every size it sees a faint
+    false car in spot 3, and a duplicate of the car in spot 0 that leans
+    into spot 1, overlapping the real box by IoU ~0.47. Bigger is slower.
+    """
+
+    calls = 0
+
+    def __init__(self, imgsz):
+        self.imgsz = imgsz
+        self.model_path = "stub-weights"
+        self.conf_thresh = 0.01
+        self.iou_thresh = 0.5
+
+    def detect(self, frame):
+        StubDetector.calls += 1
+        time.sleep(self.imgsz / 200000)
+        dets = [
+            {"xyxy": [12, 12, 58, 88], "conf": 0.9, "cls": 0, "name": "car"},
+            {"xyxy": [12, 12, 110, 88], "conf": 0.6, "cls": 0, "name": "car"},
+            {"xyxy": [192, 12, 238, 88], "conf": 0.03, "cls": 0, "name": "car"},
+        ]
+        if self.imgsz >= 512:
+            dets.append({"xyxy": [132, 12, 178, 88], "conf": 0.7, "cls": 0, "name": "car"})
+        dets = [d for d in dets if d["conf"] >= self.conf_thresh]
+        boxes = np.array([d["xyxy"] for d in dets], dtype=np.float32)
+        keep = nms(boxes, np.array([d["conf"] for d in dets]), np.zeros(len(dets)), self.iou_thresh)
+        return [dets[i] for i in keep]
+
+
+def samples(n=3):
+    return [(np.full((100, 250, 3), i, dtype=np.uint8), SPOTS, LABELS) for i in range(n)]
+
+
+def test_nms_suppresses_overlaps_within_a_class_only():
+    boxes = np.array([[0, 0, 10, 10], [1, 0, 11, 10], [0, 0, 10, 10], [20, 20, 30, 30]], dtype=np.float32)
+    scores = np.array([0.5, 0.9, 0.8, 0.4])
+    classes = np.array([0, 0, 1, 0])
+    assert nms(boxes, scores, classes, 0.5).tolist() == [1, 2, 3]
+    assert nms(boxes, scores, classes, 0.9).tolist() == [1, 2, 0, 3]
+
+
+def test_autotune_picks_cheapest_setting_that_meets_target(tmp_path):
+    cache = DetectionCache(tmp_path / "cache")
+    grid = dict(imgszs=(320, 512, 640), confs=(0.01, 0.05, 0.5, 0.8), ious=(0.3, 0.7))
+    StubDetector.calls = 0
+    profile, rows = autotune("cam-1", samples(), model_path="stub-weights", target_f1=0.99, cache=cache,
+                             make_detector=StubDetector, **grid)
+    # 320 never sees spot 2; 512 does, once the faint box and the duplicate are filtered out
+    assert (profile.imgsz, profile.conf_thresh, profile.iou_thresh) == (512, 0.5, 0.3)
+    assert profile.f1 == 1.0 and profile.meets_target
+    assert len(rows) == 3 * 4 * 2
+    # 4 timing runs per size, and one inference per frame per size for the whole sweep
+    assert StubDetector.calls == 3 * 4 + 3 * 3
+
+    # Rerunning hits the cache for every frame
+    StubDetector.calls = 0
+    autotune("cam-1", samples(), model_path="stub-weights", target_f1=0.99, cache=cache,
+             make_detector=StubDetector, **grid)
+    assert StubDetector.calls == 3 * 4
+
+    profile, _ = autotune("cam-1", samples(), model_path="stub-weights", target_f1=0.99, cache=cache,
+                          make_detector=StubDetector, imgszs=(320,), confs=grid["confs"], ious=grid["ious"])
+    assert not profile.meets_target and profile.f1 < 0.99
+
+
+def test_profile_round_trip_and_vehicle_detector_applies_it(tmp_path):
+    from detection.detect import VehicleDetector
+
+    profile = CameraProfile(camera="rtsp://10.0.0.5/north", imgsz=416, conf_thresh=0.2, iou_thresh=0.3, f1=0.97)
+    path = profile.save(profile_dir=tmp_path)
+    assert path.name == "rtsp_10.0.0.5_north.json"
+    assert CameraProfile.load(path) == CameraProfile.load("rtsp://10.0.0.5/north", profile_dir=tmp_path)
+
+    detector = VehicleDetector("yolo11n.yaml", profile=path)
+    assert (detector.imgsz, detector.conf_thresh, detector.iou_thresh) == (416, 0.2, 0.3)
@@ -0,0 +1,46 @@
+# ai_cv/tests/test_benchmarks.py
+
+import sys
+import json
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from benchmarks.run_benchmarks import compare, main
+from benchmarks.scenes import StubDetector, synthetic_scene
+
+
+def test_stub_detector_replays_scene():
+    lots, scene = synthetic_scene(frames=3, rows=1, cols=4, seed=1)
+    assert len(lots) == 4
+    det = StubDetector(scene)
+    assert [det.detect(None) for _ in range(4)] == scene + scene[:1]
+
+
+def test_benchmark_reports_stages(tmp_path):
+    out = tmp_path / "result.json"
+    assert main(["--frames", "3", "--warmup", "1", "--output", str(out)]) == 0
+
+    result = json.loads(out.read_text())
+    for stage in ("detect", "track", "session", "lot_match"):
+        stats = result["stages"][stage]
+        assert stats["count"] == 3
+        assert stats["p50_ms"] <= stats["p95_ms"] <= stats["p99_ms"]
+
+    # Compared against itself nothing regresses
+    assert main(["--frames", "3", "--warmup", "1", "--baseline", str(out), "--tolerance", "100"]) == 0
+
+
+def test_compare_flags_slower_stages():
+    baseline = {"stages": {
+        "track": {"count": 10, "p50_ms": 10.0, "p95_ms": 12.0, "p99_ms": 14.0},
+        "session": {"count": 10, "p50_ms": 0.01, "p95_ms": 0.01, "p99_ms": 0.01},
+    }}
+    result = {"stages": {
+        "track": {"count": 10, "p50_ms": 10.5, "p95_ms": 20.0, "p99_ms": 14.0},
+        # 3x slower but far below the absolute threshold
+        "session": {"count": 10, "p50_ms": 0.03, "p95_ms": 0.03, "p99_ms": 0.03},
+    }}
+    regressions = compare(result, baseline, tolerance=0.2)
+    assert [(r["stage"], r["metric"]) for r in regressions] == [("track", "p95_ms")]
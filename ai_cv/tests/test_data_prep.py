@@ -0,0 +1,163 @@
+# ai_cv/tests/test_data_prep.py
+
+import sys
+import json
+import zipfile
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import pytest
+from training.data_prep import (ImageCache, attach_image_cache, build_image_cache, fetch_datasets, mirror_name,
+                                resize_long_side, yolo_image_files)
+
+DATASETS = {
+    "A": {"dataset": "someone/dataset-a", "yaml": "data.yaml"},
+    "B": {"dataset": "someone/dataset-b", "yaml": None},
+}
+
+
+def make_zip(path, files):
+    with zipfile.ZipFile(path, "w") as zf:
+        for name, content in files.items():
+            zf.writestr(name, content)
+    return path
+
+
+def image(seed, shape=(90, 160, 3)):
+    return np.random.default_rng(seed).integers(0, 256, shape, dtype=np.uint8)
+
+
+def test_fetch_from_mirror_resumes_verifies_and_skips_finished(tmp_path):
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    a = make_zip(mirror / mirror_name("someone/dataset-a"), {"data.yaml": "train: images\n", "images/x.txt": "a" * 5000})
+    make_zip(mirror / mirror_name("someone/dataset-b"), {"readme.txt": "b"})
+    checksums = tmp_path / "checksums.json"
+    checksums.write_text(json.dumps({"someone/dataset-a": None, "someone/dataset-b": None}))
+
+    # A copy interrupted halfway is continued, not restarted
+    datasets = tmp_path / "datasets"
+    (datasets / ".downloads").mkdir(parents=True)
+    half = a.read_bytes()[:a.stat().st_size // 2]
+    (datasets / ".downloads" / (a.name + ".part")).write_bytes(half)
+
+    paths = fetch_datasets(datasets, DATASETS, mirror=mirror, workers=2, checksums=checksums, pin=True)
+    assert (paths["A"] / "images" / "x.txt").read_text() == "a" * 5000
+    assert (paths["B"] / "readme.txt").read_text() == "b"
+    pinned = json.loads(checksums.read_text())
+    assert set(pinned) == {"someone/dataset-a", "someone/dataset-b"} and all(pinned.values())
+    assert not list((datasets / ".downloads").iterdir())
+
+    # Finished datasets are skipped, even with the mirror gone
+    for archive in mirror.iterdir():
+        archive.unlink()
+    assert fetch_datasets(datasets, DATASETS, mirror=mirror, checksums=checksums) == paths
+
+
+def test_fetch_rejects_archives_that_are_not_pinned_or_do_not_match(tmp_path):
+    mirror = tmp_path / "mirror"
+    mirror.mkdir()
+    make_zip(mirror / mirror_name("someone/dataset-a"), {"data.yaml": "tampered"})
+    b = make_zip(mirror / mirror_name("someone/dataset-b"), {"readme.txt": "b"})
+    datasets = tmp_path / "datasets"
+    checksums = tmp_path / "checksums.json"
+    checksums.write_text(json.dumps({"someone/dataset-a": "0" * 64, "someone/dataset-b": None}))
+
+    with pytest.raises(RuntimeError) as error:
+        fetch_datasets(datasets, DATASETS, mirror=mirror, checksums=checksums)
+    assert "A: checksum mismatch" in str(error.value) and "B: no pinned checksum" in str(error.value)
+    assert not (datasets / "A").exists() and not (datasets / "B").exists()
+    assert not list((datasets / ".downloads").iterdir())
+
+    # Pinning never overrides a sum that is already there
+    from training.data_prep import sha256_file
+    digest = sha256_file(b)
+    with pytest.raises(RuntimeError, match="A: checksum mismatch"):
+        fetch_datasets(datasets, DATASETS, mirror=mirror, checksums=checksums, pin=True)
+    assert json.loads(checksums.read_text())["someone/dataset-b"] == digest
+    assert (datasets / "B" / ".complete").exists()
+
+
+def test_committed_manifest_covers_every_dataset():
+    from training.data_prep import CHECKSUMS, DATASETS as ALL
+
+    assert set(json.loads(CHECKSUMS.read_text())) == {spec["dataset"] for spec in ALL.values()}
+
+
+def test_image_cache_dedups_resizes_and_only_decodes_new_images(tmp_path):
+    images = tmp_path / "images"
+    images.mkdir()
+    for i in range(3):
+        cv.imwrite(str(images / f"{i}.png"), image(i))
+    # The same picture shipped again under another name
+    cv.imwrite(str(images / "copy_of_0.png"), image(0))
+    (images / "broken.png").write_bytes(b"not an image")
+
+    cache = build_image_cache(sorted(images.iterdir()), tmp_path / "cache", imgsz=64)
+    assert len(cache) == 3
+    cached, hw0 = cache.get(images / "1.png")
+    assert hw0 == (90, 160) and cached.shape == (36, 64, 3)
+    assert np.array_equal(cached, resize_long_side(image(1), 64))
+    assert np.array_equal(cache.get(images / "copy_of_0.png")[0], cache.get(images / "0.png")[0])
+    assert cache.get(images / "broken.png") is None
+
+    cv.imwrite(str(images / "3.png"), image(3, (50, 40, 3)))
+    size = (tmp_path / "cache" / "images.u8").stat().st_size
+    cache = build_image_cache(sorted(images.iterdir()), tmp_path / "cache", imgsz=64)
+    assert len(cache) == 4
+    assert (tmp_path / "cache" / "images.u8").stat().st_size == size + 64 * 52 * 3
+    # Reopening reads the same pixels back
+    assert np.array_equal(ImageCache(tmp_path / "cache").get(images / "3.png")[0], resize_long_side(image(3, (50, 40, 3)), 64))
+
+
+def test_yolo_dataset_reads_images_from_cache(tmp_path):
+    from ultralytics.data.dataset import YOLODataset
+
+    (tmp_path / "images").mkdir()
+    (tmp_path / "labels").mkdir()
+    for i in range(3):
+        cv.imwrite(str(tmp_path / "images" / f"{i}.png"), image(i))
+        (tmp_path / "labels" / f"{i}.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+    (tmp_path / "data.yaml").write_text("path: .\ntrain: images\nval: images\nnames:\n  0: vehicle\n")
+    files = yolo_image_files(tmp_path / "data.yaml", splits=("train",))
+    assert [f.name for f in files] == ["0.png", "1.png", "2.png"]
+
+    dataset = YOLODataset(img_path=str(tmp_path / "images"), imgsz=64, augment=False,
+                          data={"names": {0: "vehicle"}, "channels": 3}, task="detect")
+    expected = dataset.load_image(1)[0]
+    attach_image_cache(dataset, build_image_cache(files, tmp_path / "cache", imgsz=64))
+    # Served from the cache, so the JPEG/PNG is no longer needed
+    (tmp_path / "images" / "1.png").unlink()
+    loaded, hw0, hw = dataset.load_image(1)
+    assert np.array_equal(loaded, expected) and hw0 == (90, 160) and hw == (36, 64)
+    assert loaded.flags.writeable
+    assert tuple(dataset[1]["img"].shape) == (3, 64, 64)
+
+
+def test_augmenting_dataset_fills_the_mosaic_buffer_from_cache(tmp_path):
+    from ultralytics.cfg import get_cfg
+    from ultralytics.data.build import build_yolo_dataset
+
+    (tmp_path / "images").mkdir()
+    (tmp_path / "labels").mkdir()
+    for i in range(6):
+        cv.imwrite(str(tmp_path / "images" / f"{i}.png"), image(i))
+        (tmp_path / "labels" / f"{i}.txt").write_text("0 0.5 0.5 0.2 0.2\n")
+    (tmp_path / "data.yaml").write_text("path: .\ntrain: images\nval: images\nnames:\n  0: vehicle\n")
+    files = yolo_image_files(tmp_path / "data.yaml", splits=("train",))
+
+    cfg = get_cfg(overrides={"imgsz": 64, "cache": False, "workers": 0})
+    dataset = build_yolo_dataset(cfg, str(tmp_path / "images"), 2, {"names": {0: "vehicle"}, "channels": 3},
+                                 mode="train")
+    assert dataset.augment and dataset.cache != "ram"
+    attach_image_cache(dataset, build_image_cache(files, tmp_path / "cache", imgsz=64))
+    # Mosaic picks its other three images from the buffer the first load fills
+    assert tuple(dataset[0]["img"].shape) == (3, 64, 64)
+    assert 0 in dataset.buffer and dataset.ims[0] is not None
+    for i in range(len(dataset)):
+        dataset[i]
+    assert len(dataset.buffer) <= dataset.max_buffer_length
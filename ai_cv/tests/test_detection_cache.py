@@ -0,0 +1,109 @@
+# ai_cv/tests/test_detection_cache.py
+
+import sys
+import json
+from pathlib import Path
+from types import SimpleNamespace
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from detection.detection_cache import CachedDetector, DetectionCache
+
+
+class CountingDetector:
+    """Stands in for VehicleDetector: one detection per confidence step, counting model runs."""
+
+    def __init__(self, model_path, conf_thresh=0.4, iou_thresh=0.5, imgsz=None):
+        self.model_path = str(model_path)
+        self.conf_thresh = conf_thresh
+        self.iou_thresh = iou_thresh
+        self.imgsz = imgsz
+        self.calls = 0
+
+    def detect(self, frame):
+        self.calls += 1
+        return [{"xyxy": [0, 0, 10, 10], "conf": c, "cls": 2, "name": "car"}
+                for c in (0.02, 0.2, 0.5, 0.9) if c >= self.conf_thresh]
+
+
+def frame(value):
+    return np.full((32, 32, 3), value, dtype=np.uint8)
+
+
+def weights(tmp_path, content=b"weights-v1"):
+    path = tmp_path / "best.pt"
+    path.write_bytes(content)
+    return path
+
+
+def test_repeated_images_and_threshold_sweep_hit_cache(tmp_path):
+    model = CountingDetector(weights(tmp_path))
+    detector = CachedDetector(model, DetectionCache(tmp_path / "cache"))
+
+    assert [d["conf"] for d in detector.detect(frame(1))] == [0.5, 0.9]
+    assert [d["conf"] for d in detector.detect(frame(1))] == [0.5, 0.9]
+    assert model.calls == 1
+    # A sweep over thresholds re-filters the cached low-threshold result
+    assert [len(detector.detect(frame(1), conf=c)) for c in (0.01, 0.1, 0.3, 0.95)] == [4, 3, 2, 0]
+    assert model.calls == 1
+    assert model.conf_thresh == 0.4
+
+    # Survives a restart
+    again = CachedDetector(model, DetectionCache(tmp_path / "cache"))
+    again.detect(frame(1))
+    assert model.calls == 1
+
+
+def test_key_covers_image_model_and_inference_settings(tmp_path):
+    cache = DetectionCache(tmp_path / "cache")
+    model = CountingDetector(weights(tmp_path))
+    detector = CachedDetector(model, cache)
+    detector.detect(frame(1))
+    detector.detect(frame(2))
+    assert model.calls == 2
+
+    model.iou_thresh = 0.7
+    detector.detect(frame(1))
+    model.imgsz = 1280
+    detector.detect(frame(1))
+    assert model.calls == 4
+
+    image = tmp_path / "lot.jpg"
+    image.write_bytes(b"not really a jpeg")
+    detector.detect(str(image))
+    detector.detect(image)
+    assert model.calls == 5
+
+    retrained = CountingDetector(weights(tmp_path, b"weights-v2"))
+    CachedDetector(retrained, cache).detect(frame(1))
+    assert retrained.calls == 1
+
+
+def test_lru_eviction_respects_size_cap(tmp_path):
+    entry = [{"xyxy": [0, 0, 1, 1], "conf": 0.5, "cls": 2, "name": "car"}]
+    # Room for three entries
+    cap = 3 * len(json.dumps(entry))
+    cache = DetectionCache(tmp_path / "cache", max_bytes=cap)
+    for key in ("a1", "b2", "c3"):
+        cache.put(key, entry)
+    assert cache.get("a1") == entry
+    cache.put("d4", entry)
+
+    assert cache.size_bytes <= cap
+    # b2 was least recently used
+    assert cache.get("b2") is None
+    assert cache.get("a1") == entry
+    assert len(list((tmp_path / "cache").glob("*/*.json"))) == len(cache)
+
+
+def test_vehicle_detector_leaves_imgsz_to_the_weights_unless_set():
+    from detection.detect import VehicleDetector
+
+    calls = []
+    for imgsz in (None, 416):
+        detector = VehicleDetector("yolo11n.yaml", imgsz=imgsz)
+        detector.model.predict = lambda frame, **kwargs: calls.append(kwargs) or [SimpleNamespace(boxes=[], names={})]
+        detector.detect(frame(0))
+    assert "imgsz" not in calls[0] and calls[1]["imgsz"] == 416
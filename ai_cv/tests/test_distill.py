@@ -0,0 +1,92 @@
+# ai_cv/tests/test_distill.py
+
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import torch
+from training.distill import (VEHICLE_ALIASES, _model_arg, occupancy_accuracy, pareto_front, prunable_pairs,
+                              prune_checkpoint, prune_model, student_config, train_student)
+from training.merge_datasets import merge_datasets
+from training.train_spot_classifier import load_cvat_dataset
+from test_merge_datasets import make_source
+
+SPOTS = [[[10, 10], [60, 10], [60, 90], [10, 90]], [[70, 10], [120, 10], [120, 90], [70, 90]]]
+
+
+def detection_model(nc=1):
+    from ultralytics.nn.tasks import DetectionModel
+    return DetectionModel("yolo11n.yaml", nc=nc, verbose=False).eval()
+
+
+def test_pruning_removes_only_channels_that_carry_nothing():
+    torch.manual_seed(0)
+    model = detection_model()
+    # Silence the channels pruning will drop, so the output must not change
+    for producer, _, _ in prunable_pairs(model):
+        n = producer.bn.num_features
+        gamma = torch.rand(n) + 0.5
+        gamma[torch.randperm(n)[:n - max(8, round(n * 0.5))]] = 0
+        producer.bn.weight.data = gamma
+        producer.bn.bias.data[gamma == 0] = 0
+    x = torch.rand(1, 3, 96, 96)
+    with torch.no_grad():
+        expected = model(x)[0]
+    before = sum(p.numel() for p in model.parameters())
+    prune_model(model, ratio=0.5)
+    with torch.no_grad():
+        pruned = model(x)[0]
+    assert sum(p.numel() for p in model.parameters()) < 0.9 * before
+    assert torch.allclose(pruned, expected, atol=1e-5)
+
+
+def test_distill_prune_and_finetune_keep_architecture(tmp_path):
+    source = make_source(tmp_path / "a", {0: "bus", 1: "Car"}, [[0, 1], [1], [1, 1]], [[0]])
+    data = merge_datasets({"a": source}, tmp_path / "merged", aliases=VEHICLE_ALIASES, taxonomy=("vehicle",))
+    common = dict(epochs=1, imgsz=64, batch=2, device="cpu", workers=0, project=str(tmp_path / "runs"), verbose=False)
+
+    teacher = train_student("yolo11n.yaml", data, name="teacher", **common)
+    student = train_student(student_config(tmp_path / "student.yaml", width=0.125, nc=1), data, teacher=teacher,
+                            name="student", **common)
+    pruned, before, after = prune_checkpoint(student, tmp_path / "pruned.pt", ratio=0.5)
+    assert after < before
+    tuned = train_student(pruned, data, teacher=teacher, keep_model=True, name="tuned", **common)
+
+    from ultralytics.nn.tasks import load_checkpoint
+    assert sum(p.numel() for p in load_checkpoint(tuned)[0].parameters()) == after
+
+    # Benchmarked without @IMGSZ, a student runs at the size it was trained at
+    from detection.detect import VehicleDetector
+    assert _model_arg(str(tuned)) == (str(tuned), None)
+    assert VehicleDetector(str(tuned)).model.overrides["imgsz"] == 64
+
+
+class SpotDetector:
+    # Reports a car on the first spot only
+    def detect(self, frame):
+        return [{"xyxy": [12, 12, 58, 88], "conf": 0.9, "cls": 0, "name": "vehicle"}]
+
+
+def test_occupancy_accuracy_against_cvat_labels(tmp_path):
+    cv.imwrite(str(tmp_path / "lot.jpg"), np.zeros((100, 130, 3), dtype=np.uint8))
+    polygons = "".join(
+        f'<polygon label="{label}" points="{";".join(f"{x},{y}" for x, y in spot)}"/>'
+        for spot, label in zip(SPOTS, ["not_free_parking_space", "not_free_parking_space"]))
+    (tmp_path / "annotations.xml").write_text(f'<annotations><image name="lot.jpg">{polygons}</image></annotations>')
+
+    accuracy, latency = occupancy_accuracy(SpotDetector(), load_cvat_dataset(tmp_path))
+    assert accuracy == 0.5 and latency >= 0
+
+
+def test_pareto_front_marks_models_nothing_beats():
+    rows = pareto_front([
+        {"model": "teacher", "latency_ms": 90, "accuracy": 0.97},
+        {"model": "student", "latency_ms": 20, "accuracy": 0.95},
+        {"model": "pruned", "latency_ms": 25, "accuracy": 0.94},
+        {"model": "tiny", "latency_ms": 8, "accuracy": 0.80},
+    ])
+    assert [r["model"] for r in rows if r["pareto"]] == ["teacher", "student", "tiny"]
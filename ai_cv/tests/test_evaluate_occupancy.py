@@ -0,0 +1,80 @@
+# ai_cv/tests/test_evaluate_occupancy.py
+
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import json
+
+import cv2 as cv
+import numpy as np
+from evaluate_occupancy import evaluate, main
+from training.train_spot_classifier import iter_cvat_images, load_cvat_dataset
+
+# Three spots in a row; the middle one is partially free
+SPOTS = [[[x, 10], [x + 50, 10], [x + 50, 90], [x, 90]] for x in (10, 70, 130)]
+LABELS = ["not_free_parking_space", "partially_free_parking_space", "free_parking_space"]
+
+
+class SpotDetector:
+    # Reports a car on the first two spots, whatever the image
+    conf_thresh = 0.05
+    iou_thresh = 0.01
+    model_path = "spot-detector"
+
+    def detect(self, frame):
+        return [{"xyxy": [12, 12, 58, 88], "conf": 0.9, "cls": 0, "name": "car"},
+                {"xyxy": [72, 12, 118, 88], "conf": 0.8, "cls": 0, "name": "car"}]
+
+
+def make_dataset(root, images=5):
+    root.mkdir(parents=True, exist_ok=True)
+    entries = []
+    for i in range(images):
+        cv.imwrite(str(root / f"{i}.png"), np.full((100, 200, 3), i, dtype=np.uint8))
+        polygons = "".join(f'<polygon label="{label}" points="{";".join(f"{x},{y}" for x, y in spot)}"/>'
+                           for spot, label in zip(SPOTS, LABELS))
+        entries.append(f'<image id="{i}" name="{i}.png">{polygons}</image>')
+    (root / "annotations.xml").write_text(f"<annotations><meta/>{''.join(entries)}</annotations>")
+    return root
+
+
+def test_annotation_labels_for_partially_free_spots(tmp_path):
+    root = make_dataset(tmp_path / "lot", images=2)
+    samples = iter_cvat_images(root)
+    # Streamed: nothing is parsed until the first image is asked for
+    assert next(samples) == (str(root / "0.png"), SPOTS, [1, 1, 0])
+    assert [labels for _, _, labels in load_cvat_dataset(root, partial_occupied=False)] == [[1, 0, 0]] * 2
+    assert [polygons for _, polygons, _ in load_cvat_dataset(root, partial_occupied=None)] == [[SPOTS[0], SPOTS[2]]] * 2
+
+
+def test_parallel_evaluation_matches_serial_and_both_matchers(tmp_path):
+    root = make_dataset(tmp_path / "lot", images=7)
+    samples = list(iter_cvat_images(root)) + [(str(root / "missing.png"), [SPOTS[0]], [1])]
+
+    serial = evaluate(samples, SpotDetector, workers=1)
+    assert (serial["images"], serial["spots"]) == (7, 21)
+    assert (serial["tp"], serial["fp"], serial["fn"], serial["tn"]) == (14, 0, 0, 7)
+    assert serial["f1"] == 1.0 and serial["unreadable"] == [str(root / "missing.png")]
+    assert set(serial["stages"]) == {"decode", "detect", "match"}
+
+    parallel = evaluate(samples, SpotDetector, workers=3, shard_size=2, matcher="lot", cache_dir=tmp_path / "cache")
+    for key in ("images", "tp", "fp", "fn", "tn", "per_image"):
+        assert parallel[key] == serial[key]
+
+    # Counting the partial spot as free turns its match into a false positive
+    strict = evaluate(iter_cvat_images(root, partial_occupied=False), SpotDetector, workers=2)
+    assert (strict["tp"], strict["fp"], strict["precision"]) == (7, 7, 0.5)
+
+
+def test_cli_writes_report(tmp_path, monkeypatch):
+    import evaluate_occupancy
+
+    root = make_dataset(tmp_path / "lot", images=3)
+    monkeypatch.setattr(evaluate_occupancy, "yolo_detector", lambda *args: SpotDetector())
+    out = tmp_path / "report.json"
+    assert main([str(root), "--workers", "1", "--limit", "2", "--output", str(out)]) == 0
+    report = json.loads(out.read_text())
+    assert report["images"] == 2 and report["config"]["matcher"] == "fast"
@@ -0,0 +1,164 @@
+# ai_cv/tests/test_events.py
+
+import sys
+import socket
+import threading
+import time
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from utilities.events import EventDecoder, EventStream, PipelineEvents, read_events, tail_events
+
+EVENTS = [
+    {"type": "track_start", "ts": 100.0, "track_id": 7, "cls": 2, "name": "car", "bbox": [10.5, 20.0, 60.25, 80.0]},
+    {"type": "spot", "ts": 100.5, "spot_index": 3, "spot_id": 41, "occupied": True, "track_id": 7},
+    {"type": "spot", "ts": 101.0, "spot_index": 4, "spot_id": None, "occupied": False, "track_id": None},
+    {"type": "track_end", "ts": 130.0, "track_id": 7, "cls": 2, "name": "car", "bbox": [12.0, 20.0, 62.0, 80.0]},
+    {"type": "session", "ts": 130.0, "track_id": 7, "start_time": 100.0, "end_time": 130.0, "duration": 30.0,
+     "cls": 2, "name": "car", "bbox": [12.0, 20.0, 62.0, 80.0]},
+]
+
+
+@pytest.mark.parametrize("fmt", ["ndjson", "binary"])
+def test_round_trip_through_a_followed_file(tmp_path, fmt):
+    path = tmp_path / f"events.{fmt}"
+    stream = EventStream(str(path), fmt, flush_interval=0.05, header={"camera": "north", "lot_id": 3})
+    received = []
+    tail = threading.Thread(target=lambda: received.extend(tail_events(path, poll=0.01, idle_timeout=1.0)))
+    tail.start()
+
+    sent = time.perf_counter()
+    stream.emit(EVENTS[0])
+    while len(received) < 2 and time.perf_counter() - sent < 2:
+        time.sleep(0.005)
+    # Flushed on the next tick and picked up by the tail, well under a second
+    assert len(received) == 2 and time.perf_counter() - sent < 0.5
+    for event in EVENTS[1:]:
+        stream.emit(event)
+    stream.close()
+    tail.join()
+
+    header, events = received[0], received[1:]
+    assert header["type"] == "stream" and (header["camera"], header["lot_id"]) == ("north", 3)
+    assert events == EVENTS
+    with open(path, "rb") as f:
+        assert list(read_events(f)) == received
+
+
+def test_binary_is_compact_and_decodes_in_pieces():
+    from utilities.events import _pack
+
+    data = b"PVEV\x01" + b"".join(_pack(e) for e in EVENTS)
+    assert len(_pack(EVENTS[1])) == 26
+    decoder = EventDecoder()
+    events = []
+    for i in range(0, len(data), 3):
+        events.extend(decoder.feed(data[i:i + 3]))
+    assert events == EVENTS and decoder.format == "binary"
+
+
+class ListOutput:
+    def __init__(self):
+        self.writes = []
+
+    def open(self, preamble):
+        pass
+
+    def write(self, data):
+        self.writes.append(data)
+
+    def close(self):
+        pass
+
+
+def test_batches_go_out_on_the_timer_or_when_full():
+    from utilities.metrics import MetricsRegistry
+
+    output = ListOutput()
+    metrics = MetricsRegistry().camera("events")
+    stream = EventStream(output, flush_interval=10, max_batch=3, metrics=metrics)
+    stream.emit(EVENTS[1])
+    stream.emit(EVENTS[2])
+    time.sleep(0.1)
+    assert output.writes == [] and metrics.queues["events"] == 2
+    stream.emit(EVENTS[1])
+    deadline = time.time() + 2
+    while not output.writes and time.time() < deadline:
+        time.sleep(0.01)
+    # One write for the whole batch
+    assert len(output.writes) == 1 and output.writes[0].count(b"\n") == 3
+    stream.emit(EVENTS[2])
+    stream.close()
+    assert len(output.writes) == 2 and stream.written == 4 and metrics.queues["events"] == 0
+
+
+def test_pipeline_events_from_tracks_spots_and_sessions():
+    output = ListOutput()
+    stream = EventStream(output)
+    events = PipelineEvents(stream, track_timeout=1.0)
+    car = {"track_id": 5, "bbox": [0, 0, 10, 10], "cls": 2, "name": "car"}
+    lots = [{"bbox": [[0, 0], [10, 0], [10, 10], [0, 10]], "spot_id": 11},
+            {"bbox": [[20, 0], [30, 0], [30, 10], [20, 10]], "spot_id": 12}]
+    taken = [{"bbox": lots[0]["bbox"], "track_id": 5, "spot_id": 11}]
+
+    events.update_tracks([car], 0.0)
+    events.update_spots(lots, taken, 0.0)
+    # A missed frame doesn't end the track, and unchanged spots say nothing
+    events.update_tracks([], 0.5)
+    events.update_tracks([car], 0.8)
+    events.update_spots(lots, taken, 0.8)
+    events.update_tracks([], 2.0)
+    events.update_spots(lots, [], 2.0)
+    events.sessions([{"track_id": 5, "start_time": 0.0, "end_time": 0.8, "duration": 0.8, "bbox": car["bbox"],
+                      "cls": 2, "name": "car"}])
+    stream.close()
+
+    decoder = EventDecoder()
+    out = [e for chunk in output.writes for e in decoder.feed(chunk)]
+    assert [(e["type"], e["ts"]) for e in out] == [
+        ("track_start", 0.0), ("spot", 0.0), ("spot", 0.0), ("track_end", 0.8), ("spot", 2.0), ("session", 0.8)]
+    assert [(e["spot_id"], e["occupied"], e["track_id"]) for e in out if e["type"] == "spot"] == [
+        (11, True, 5), (12, False, None), (11, False, None)]
+
+
+def listen(path):
+    server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    server.bind(path)
+    server.listen(1)
+    received = []
+
+    def accept():
+        conn, _ = server.accept()
+        decoder = EventDecoder()
+        with conn:
+            while True:
+                data = conn.recv(4096)
+                if not data:
+                    return
+                received.extend(decoder.feed(data))
+
+    thread = threading.Thread(target=accept, daemon=True)
+    thread.start()
+    return server, thread, received
+
+
+def test_unix_socket_keeps_events_until_a_consumer_listens(tmp_path):
+    path = str(tmp_path / "events.sock")
+    stream = EventStream(f"unix:{path}", "binary", flush_interval=0.02, header={"camera": "gate"})
+    stream.emit(EVENTS[1])
+    time.sleep(0.1)
+    assert stream.written == 0
+
+    server, thread, received = listen(path)
+    deadline = time.time() + 2
+    while stream.written < 1 and time.time() < deadline:
+        time.sleep(0.01)
+    stream.emit(EVENTS[2])
+    stream.close()
+    thread.join(timeout=2)
+    server.close()
+    assert received[0]["type"] == "stream" and received[0]["camera"] == "gate"
+    assert received[1:] == EVENTS[1:3]
@@ -0,0 +1,78 @@
+# ai_cv/tests/test_ffmpeg_capture.py
+
+import subprocess
+import sys
+from functools import partial
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import pytest
+from utilities.ffmpeg_capture import FFMPEG, FFmpegCapture, ffmpeg_available, ffmpeg_command, open_ffmpeg
+from utilities.frame_reader import FrameReader
+
+needs_ffmpeg = pytest.mark.skipif(not ffmpeg_available(), reason="needs ffmpeg (or PARKVISION_FFMPEG)")
+
+
+def encode_test_video(path, frames=50, gop=10, size="320x240"):
+    # Moving test pattern with a keyframe every `gop` frames
+    subprocess.run([FFMPEG, "-v", "error", "-y", "-f", "lavfi", "-i", f"testsrc=size={size}:rate=25",
+                    "-frames:v", str(frames), "-c:v", "mpeg4", "-g", str(gop), str(path)], check=True)
+    return str(path)
+
+
+def test_command_applies_scaling_rate_and_keyframe_skipping_in_the_decoder():
+    cmd = ffmpeg_command("rtsp://cam/1", width=640, fps=2, pix_fmt="gray")
+    assert cmd[cmd.index("-vf") + 1] == "fps=2,scale=640:-2"
+    assert cmd[cmd.index("-pix_fmt") + 1] == "gray" and cmd[-1] == "pipe:1"
+    assert "-rw_timeout" in cmd and "-skip_frame" not in cmd
+
+    cmd = ffmpeg_command("day.mp4", keyframes_only=True)
+    # Decoder options go before the input they apply to
+    assert cmd.index("-skip_frame") < cmd.index("-i") and "-vf" not in cmd
+    with pytest.raises(ValueError):
+        ffmpeg_command("day.mp4", fps=2, keyframes_only=True)
+
+
+@needs_ffmpeg
+def test_scaled_frames_decode_into_the_callers_buffer(tmp_path):
+    video = encode_test_video(tmp_path / "in.avi")
+    cap = FFmpegCapture(video, width=160)
+    assert cap.isOpened() and cap.shape == (120, 160, 3) and cap.get(cv.CAP_PROP_FPS) == 25
+    buffer = np.empty(cap.shape, dtype=np.uint8)
+    frames = 0
+    reference = cv.VideoCapture(video)
+    while True:
+        ok, image = cap.read(buffer)
+        if not ok:
+            break
+        assert image is buffer
+        _, full = reference.read()
+        assert np.abs(cv.resize(full, (160, 120), interpolation=cv.INTER_AREA).astype(int) - image).mean() < 10
+        frames += 1
+    cap.release()
+    reference.release()
+    assert frames == 50
+
+
+@needs_ffmpeg
+def test_keyframes_only_and_reduced_rate(tmp_path):
+    video = encode_test_video(tmp_path / "in.avi", frames=50, gop=10)
+    with FrameReader(video, open_fn=partial(open_ffmpeg, keyframes_only=True, pix_fmt="gray")) as reader:
+        frames = list(reader)
+    assert len(frames) == 5 and frames[0].image.shape == (240, 320)
+
+    with FrameReader(video, open_fn=partial(open_ffmpeg, fps=5, height=60)) as reader:
+        frames = list(reader)
+    # 2 seconds at 5 fps
+    assert len(frames) == 10 and frames[0].image.shape == (60, 80, 3)
+
+
+@needs_ffmpeg
+def test_unopenable_source_reports_closed(tmp_path):
+    cap = FFmpegCapture(str(tmp_path / "missing.mp4"), timeout=5)
+    assert not cap.isOpened() and cap.read() == (False, None)
+    cap.release()
@@ -0,0 +1,106 @@
+# ai_cv/tests/test_frame_reader.py
+
+import sys
+import threading
+import time
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+from utilities.frame_reader import FrameReader, is_live
+from utilities.metrics import MetricsRegistry
+from utilities.sinks import MjpegSink
+
+
+def write_video(path, frames=20, fps=10, size=(160, 120)):
+    writer = cv.VideoWriter(str(path), cv.VideoWriter_fourcc(*"mp4v"), fps, size)
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), i * 10 % 255, dtype=np.uint8))
+    writer.release()
+
+
+def test_file_without_dropping_yields_every_frame_in_order(tmp_path):
+    video = tmp_path / "in.mp4"
+    write_video(video)
+    assert not is_live(str(video)) and is_live("0") and is_live("rtsp://cam/1")
+    with FrameReader(str(video)) as reader:
+        frames = list(reader)
+        assert [f.index for f in frames] == list(range(20))
+        assert reader.dropped == 0 and reader.read(timeout=1) is None
+
+
+def test_slow_consumer_only_sees_the_newest_frames(tmp_path):
+    video = tmp_path / "in.mp4"
+    write_video(video, frames=30, fps=100)
+    metrics = MetricsRegistry().camera("slow")
+    with FrameReader(str(video), drop=True, realtime=True, metrics=metrics) as reader:
+        frames = []
+        for frame in reader:
+            frames.append(frame)
+            # Ten times slower than the source
+            time.sleep(0.1)
+        assert len(frames) < 10
+        assert [f.index for f in frames] == sorted(f.index for f in frames)
+        assert len(frames) + reader.dropped == reader.decoded == 30
+        assert metrics.dropped == reader.dropped
+        # Dropped frames' buffers are decoded into again, never the ones handed out
+        assert len({id(f.image) for f in frames}) == len(frames)
+        for f in frames:
+            assert abs(f.image.mean() - f.index * 10 % 255) < 5
+
+
+def serve(port, stop):
+    sink = MjpegSink(port, host="127.0.0.1")
+
+    def feed():
+        i = 0
+        while not stop.is_set():
+            sink.write(np.full((48, 64, 3), i % 255, dtype=np.uint8))
+            i += 1
+            time.sleep(0.02)
+
+    threading.Thread(target=feed, daemon=True).start()
+    return sink
+
+
+def test_reconnects_to_a_local_stream_after_it_drops():
+    stop = threading.Event()
+    sink = serve(0, stop)
+    port = sink.port
+    with FrameReader(f"http://127.0.0.1:{port}/", backoff=0.1, timeout=2) as reader:
+        assert reader.read(timeout=5) is not None
+        stop.set()
+        sink.close()
+        # The stream is gone; it keeps retrying until the server is back
+        time.sleep(0.5)
+        stop = threading.Event()
+        sink = serve(port, stop)
+        try:
+            before = reader.decoded
+            deadline = time.time() + 10
+            while reader.decoded <= before and time.time() < deadline:
+                reader.read(timeout=1)
+            assert reader.decoded > before and reader.reconnects >= 1
+        finally:
+            stop.set()
+            sink.close()
+
+
+class DeadCapture:
+    def isOpened(self):
+        return False
+
+    def release(self):
+        pass
+
+
+def test_gives_up_after_max_retries():
+    opened = []
+    reader = FrameReader("rtsp://nowhere/stream", backoff=0.01, max_retries=3,
+                         open_fn=lambda source, timeout: opened.append(source) or DeadCapture())
+    assert reader.read(timeout=5) is None
+    reader.close()
+    assert len(opened) == 4 and reader.reconnects == 3
@@ -0,0 +1,91 @@
+# ai_cv/tests/test_layout_client.py
+
+import sys
+import struct
+import threading
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from detection.layout_client import LayoutClient, LotLayout
+
+
+def encode_layout(version, polygons):
+    ids = np.arange(1, len(polygons) + 1, dtype="<i4")
+    offsets = np.cumsum([0] + [len(p) for p in polygons]).astype("<u4")
+    vertices = np.concatenate([np.asarray(p, dtype="<f4") for p in polygons])
+    header = struct.pack("<4sHHII", b"PVLY", 1, 0, version, len(polygons))
+    return header + ids.tobytes() + offsets.tobytes() + vertices.tobytes()
+
+
+class LayoutServer:
+    def __init__(self, body, etag):
+        self.body, self.etag, self.requests = body, etag, []
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                server.requests.append(self.headers.get("If-None-Match"))
+                if self.headers.get("If-None-Match") == server.etag:
+                    self.send_response(304)
+                    self.send_header("ETag", server.etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("ETag", server.etag)
+                self.send_header("Content-Length", str(len(server.body)))
+                self.end_headers()
+                self.wfile.write(server.body)
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = HTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_port}"
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+
+SQUARE = [[0, 0], [10, 0], [10, 10], [0, 10]]
+TRIANGLE = [[20, 0], [30, 0], [25, 8]]
+
+
+def test_layout_decodes_polygons():
+    layout = LotLayout(encode_layout(3, [SQUARE, TRIANGLE]))
+    assert layout.version == 3
+    assert len(layout) == 2
+    assert layout.polygon(1).tolist() == TRIANGLE
+    assert layout.natural_poly()[0] == {"bbox": SQUARE, "conf": 0, "spot_id": 1}
+
+
+def test_layout_client_revalidates_and_caches(tmp_path):
+    server = LayoutServer(encode_layout(1, [SQUARE]), '"v1"')
+    try:
+        client = LayoutClient(server.url, cache_dir=tmp_path)
+        first = client.get(7)
+        assert first.version == 1
+        # Second lookup in the same process does not hit the server
+        assert client.get(7) is first
+        assert server.requests == [None]
+
+        # A new process revalidates against the disk copy and gets a 304
+        restarted = LayoutClient(server.url, cache_dir=tmp_path)
+        assert restarted.get(7).polygon(0).tolist() == SQUARE
+        assert server.requests == [None, '"v1"']
+
+        server.body, server.etag = encode_layout(2, [SQUARE, TRIANGLE]), '"v2"'
+        refreshed = restarted.refresh(7)
+        assert refreshed.version == 2
+        assert len(refreshed) == 2
+    finally:
+        server.stop()
+
+    # Backend down: the last downloaded layout is still served
+    offline = LayoutClient(server.url, cache_dir=tmp_path, timeout=1)
+    assert offline.get(7).version == 2
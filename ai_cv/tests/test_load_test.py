@@ -0,0 +1,88 @@
+# ai_cv/tests/test_load_test.py
+
+import sys
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from benchmarks import load_test
+from benchmarks.scenes import SyntheticCamera, render_frame, synthetic_deployment, synthetic_layout
+from test_layout_client import encode_layout
+
+
+def test_layout_and_deployment_sizes():
+    lots = synthetic_layout(50)
+    assert len(lots) == 50
+    xs = [p[0] for lot in lots for p in lot["points"]]
+    assert 0 <= min(xs) and max(xs) <= 1280
+    assert [len(l) for l in synthetic_deployment(103, 10)] == [11, 11, 11] + [10] * 7
+
+
+def test_camera_arrivals_departures_and_misses():
+    lots = synthetic_layout(40)
+    cam = SyntheticCamera(lots, fps=10, occupancy=0.5, mean_stay=5, moving=0, miss_rate=0, occluders=0, seed=3)
+    counts = [len(cam.next()) for _ in range(600)]
+    assert cam.arrivals > 20 and cam.departures > 20
+    # Occupancy hovers around the target; parked and maneuvering cars are all detected
+    assert 10 < np.mean(counts) < 30
+
+    hidden = SyntheticCamera(lots, fps=10, occupancy=1.0, moving=0, miss_rate=0.5, occluders=0, seed=3)
+    assert np.mean([len(hidden.next()) for _ in range(50)]) < 30
+
+
+def test_render_frame_draws_boxes():
+    frame = render_frame([{"xyxy": [10, 10, 20, 20]}], width=64, height=32)
+    assert frame.shape == (32, 64, 3)
+    assert tuple(frame[15, 15]) == (40, 40, 160)
+    assert tuple(frame[0, 0]) == (90, 90, 90)
+
+
+def test_cv_components_report_ceiling(tmp_path):
+    out = tmp_path / "result.json"
+    assert load_test.main(["--component", "pipeline", "--cameras", "2", "--spots", "8", "--duration", "1",
+                           "--output", str(out)]) == 0
+    result = json.loads(out.read_text())
+    assert result["camera_frames"] == 20
+    assert result["max_cameras"] > 0
+
+
+def test_ingest_sweep_against_fake_backend():
+    posts = []
+    layout = encode_layout(1, [[[0, 0], [1, 0], [1, 1]]] * 5)
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(layout)))
+            self.end_headers()
+            self.wfile.write(layout)
+
+        def do_POST(self):
+            posts.append(json.loads(self.rfile.read(int(self.headers["Content-Length"]))))
+            body = b'{"accepted": 1, "rejected": []}'
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass
+
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=httpd.serve_forever, daemon=True).start()
+    try:
+        args = ["--component", "ingest", "--api", f"http://127.0.0.1:{httpd.server_port}", "--lot-id", "1",
+                "--rate", "20", "--duration", "0.5"]
+        assert load_test.main(args) == 0
+    finally:
+        httpd.shutdown()
+        httpd.server_close()
+
+    assert len(posts) == 10
+    ids = {s["parking_spot_id"] for p in posts for s in p["statuses"]}
+    assert ids <= {1, 2, 3, 4, 5}
@@ -0,0 +1,69 @@
+# ai_cv/tests/test_merge_datasets.py
+
+import sys
+import json
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import yaml
+from training.merge_datasets import TAXONOMY, class_map, merge_datasets
+
+
+def make_source(root, names, labels, val_labels, yaml_layout="images/{split}"):
+    # A YOLO dataset with one image per entry of labels / val_labels
+    for split, entries in (("train", labels), ("val", val_labels)):
+        image_dir = root / yaml_layout.format(split=split)
+        label_dir = Path(str(image_dir).replace("images", "labels"))
+        image_dir.mkdir(parents=True)
+        label_dir.mkdir(parents=True)
+        for i, boxes in enumerate(entries):
+            cv.imwrite(str(image_dir / f"img{i}.jpg"), np.full((32, 48, 3), 40 * i, dtype=np.uint8))
+            (label_dir / f"img{i}.txt").write_text("".join(f"{c} 0.5 0.5 0.2 0.2\n" for c in boxes))
+    data = {"path": str(root), "train": yaml_layout.format(split="train"), "val": yaml_layout.format(split="val"),
+            "names": names}
+    (root / "data.yaml").write_text(yaml.safe_dump(data))
+    return root / "data.yaml"
+
+
+def test_class_map_normalizes_names_and_drops_unknown():
+    mapping, dropped = class_map(["Car", "Motor-bike", "three_wheel", "person", "Pickup"])
+    assert mapping == {0: TAXONOMY.index("car"), 1: TAXONOMY.index("motorcycle"),
+                       2: TAXONOMY.index("motorcycle"), 4: TAXONOMY.index("truck")}
+    assert dropped == ["person"]
+
+
+def test_merge_remaps_labels_weights_sources_and_loads_in_ultralytics(tmp_path):
+    from ultralytics.data.dataset import YOLODataset
+
+    a = make_source(tmp_path / "a", {0: "bus", 1: "Car"}, [[0, 1], [1], [1, 1]], [[0]])
+    b = make_source(tmp_path / "b", ["vehicle", "person"], [[0, 1], [0]], [[0], [1]], yaml_layout="{split}/images")
+    data_yaml = merge_datasets({"a": a, "b": b}, tmp_path / "merged", weights={"a": 0.5, "b": 2})
+
+    data = yaml.safe_load(Path(data_yaml).read_text())
+    assert data["names"] == dict(enumerate(TAXONOMY))
+    train = (tmp_path / "merged" / "train.txt").read_text().split()
+    # Half of a's three images (rounded), every one of b's twice
+    assert sum("/a/" in p for p in train) == 2 and sum("/b/" in p for p in train) == 4
+    assert len((tmp_path / "merged" / "val.txt").read_text().split()) == 3
+    assert len((tmp_path / "merged" / "val_b.txt").read_text().split()) == 2
+
+    # a: bus -> bus, Car -> car; b: vehicle -> car, person dropped
+    car, bus = TAXONOMY.index("car"), TAXONOMY.index("bus")
+    labels = tmp_path / "merged" / "labels"
+    assert [int(l.split()[0]) for l in (labels / "a" / "train" / "000000_img0.txt").read_text().splitlines()] == [bus, car]
+    assert [int(l.split()[0]) for l in (labels / "b" / "train" / "000000_img0.txt").read_text().splitlines()] == [car]
+    sources = json.loads((tmp_path / "merged" / "sources.json").read_text())
+    assert sources["b"]["dropped_boxes"] == 2 and sources["b"]["classes"] == {"vehicle": "car", "person": None}
+
+    dataset = YOLODataset(img_path=str(tmp_path / "merged" / "train.txt"), imgsz=64, augment=False,
+                          data={"names": data["names"], "channels": 3}, task="detect")
+    assert len(dataset) == 6
+    assert {int(c) for lb in dataset.labels for c in lb["cls"].ravel()} <= {car, bus}
+
+    # Merging again replaces the previous tree instead of adding to it
+    merge_datasets({"b": b}, tmp_path / "merged")
+    assert not (labels / "a").exists()
@@ -0,0 +1,78 @@
+# ai_cv/tests/test_metrics.py
+
+import sys
+import json
+import logging
+import time
+import urllib.request
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+from utilities.metrics import Histogram, JsonMetricsLogger, MetricsRegistry, serve_metrics
+
+
+def test_histogram_quantiles():
+    hist = Histogram(bounds=(0.001, 0.002, 0.004, 0.008))
+    for _ in range(90):
+        hist.observe(0.0015)
+    for _ in range(10):
+        hist.observe(0.006)
+    assert hist.count == 100
+    assert 0.001 <= hist.quantile(0.5) <= 0.002
+    assert 0.004 <= hist.quantile(0.99) <= 0.008
+    # Values past the last bucket report the last bound
+    hist.observe(1.0)
+    assert hist.quantile(1.0) == 0.008
+
+
+def test_prometheus_text_and_endpoint():
+    metrics = MetricsRegistry(buckets=(0.01, 0.1))
+    cam = metrics.camera("lot-1")
+    with cam.stage("detect"):
+        pass
+    cam.observe("track", 0.05)
+    cam.frame_done()
+    cam.drop()
+    cam.set_queue_depth("frames", 3)
+
+    text = metrics.render_prometheus()
+    assert 'parkvision_stage_seconds_bucket{camera="lot-1",stage="track",le="0.01"} 0' in text
+    assert 'parkvision_stage_seconds_bucket{camera="lot-1",stage="track",le="0.1"} 1' in text
+    assert 'parkvision_stage_seconds_count{camera="lot-1",stage="detect"} 1' in text
+    assert 'parkvision_frames_total{camera="lot-1"} 1' in text
+    assert 'parkvision_frames_dropped_total{camera="lot-1"} 1' in text
+    assert 'parkvision_queue_depth{camera="lot-1",queue="frames"} 3' in text
+
+    server = serve_metrics(0, host="127.0.0.1", metrics=metrics)
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{server.server_port}/metrics") as resp:
+            assert resp.headers["Content-Type"].startswith("text/plain")
+            assert resp.read().decode() == metrics.render_prometheus()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_json_log_line(caplog):
+    metrics = MetricsRegistry()
+    metrics.camera("cam").observe("detect", 0.02)
+    with caplog.at_level(logging.INFO, logger="parkvision.metrics"):
+        JsonMetricsLogger(metrics=metrics).emit()
+    line = json.loads(caplog.records[-1].getMessage())
+    assert line["metrics"]["cam"]["stages"]["detect"]["count"] == 1
+
+
+def test_instrumentation_overhead():
+    cam = MetricsRegistry().camera("overhead")
+    frames = 2000
+    start = time.perf_counter()
+    for _ in range(frames):
+        for stage in ("decode", "detect", "track", "match", "session", "render"):
+            with cam.stage(stage):
+                pass
+        cam.frame_done()
+    per_frame = (time.perf_counter() - start) / frames
+    # Well under 1% of a 30 fps frame budget
+    assert per_frame < 0.01 * (1 / 30) / 3
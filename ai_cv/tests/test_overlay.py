@@ -0,0 +1,67 @@
+# ai_cv/tests/test_overlay.py
+
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+from utilities.visualize import OverlayRenderer
+
+SPOTS = [
+    [[10, 10], [60, 10], [60, 60], [10, 60]],
+    [[80, 10], [130, 10], [130, 60], [80, 60]],
+]
+
+
+def blank():
+    return np.zeros((100, 160, 3), dtype=np.uint8)
+
+
+def test_spots_are_colored_by_occupancy():
+    renderer = OverlayRenderer((100, 160), SPOTS, alpha=1.0)
+    out = renderer.render(blank(), occupied=[1])
+    # Spot interiors get half the color, outlines the full color, the rest is untouched
+    assert tuple(out[35, 35]) == tuple(c // 2 for c in renderer.free_color)
+    assert tuple(out[35, 105]) == tuple(c // 2 for c in renderer.occupied_color)
+    assert tuple(out[10, 35]) == renderer.free_color
+    assert tuple(out[90, 150]) == (0, 0, 0)
+
+    out = renderer.render(blank(), occupied=np.array([True, False]))
+    assert tuple(out[35, 35]) == tuple(c // 2 for c in renderer.occupied_color)
+    assert tuple(out[35, 105]) == tuple(c // 2 for c in renderer.free_color)
+
+
+def test_buffers_are_reused():
+    renderer = OverlayRenderer((100, 160), SPOTS)
+    frame = blank()
+    track = {"bbox": [20, 20, 50, 50], "track_id": 3, "name": "car"}
+    first = renderer.render(frame, tracks=[track])
+    second = renderer.render(frame, tracks=[track])
+    assert first is second
+    assert not frame.any()
+
+    assert renderer.render(frame, inplace=True) is frame
+    assert frame.any()
+
+
+def test_preview_scale_and_layout_object():
+    class Layout:
+        def polygons(self):
+            return [np.array(p, dtype=np.float32) for p in SPOTS]
+
+    renderer = OverlayRenderer((100, 160), Layout(), scale=0.5, alpha=1.0)
+    out = renderer.render(blank())
+    assert out.shape == (50, 80, 3)
+    assert tuple(out[17, 17]) == tuple(c // 2 for c in renderer.free_color)
+
+
+def test_frame_size_change_reallocates():
+    renderer = OverlayRenderer((100, 160), SPOTS, alpha=1.0)
+    renderer.render(blank(), occupied=[1])
+    # A reconnected stream at another resolution
+    out = renderer.render(np.zeros((120, 200, 3), dtype=np.uint8))
+    assert out.shape == (120, 200, 3) and renderer.frame_shape == (120, 200)
+    assert tuple(out[35, 105]) == tuple(c // 2 for c in renderer.occupied_color)
+    assert renderer.render(blank()).shape == (100, 160, 3)
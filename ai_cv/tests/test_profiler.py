@@ -0,0 +1,130 @@
+# ai_cv/tests/test_profiler.py
+
+import sys
+import os
+import signal
+import threading
+import time
+import urllib.error
+import urllib.request
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import pytest
+from utilities import metrics, profiler
+from utilities.metrics import MetricsRegistry, serve_metrics
+
+
+def busy_detect(seconds):
+    end = time.perf_counter() + seconds
+    total = 0
+    while time.perf_counter() < end:
+        total += sum(range(200))
+    return total
+
+
+class FakePipeline:
+    def __init__(self):
+        self.cam = MetricsRegistry().camera("fake")
+        self.stop = threading.Event()
+        self.thread = threading.Thread(target=self.run, name="camera-fake", daemon=True)
+
+    def run(self):
+        while not self.stop.is_set():
+            with self.cam.stage("detect"):
+                busy_detect(0.01)
+            with self.cam.stage("session"):
+                time.sleep(0.001)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stop.set()
+        self.thread.join()
+
+
+def test_profile_attributes_samples_to_stages(tmp_path):
+    with FakePipeline():
+        profile = profiler.sample(0.5, interval=0.002, threads=["camera-fake"])
+
+    top = profile.top(5)
+    assert top["detect"]["samples"] > 0
+    assert any("busy_detect" in f["function"] for f in top["detect"]["functions"])
+    assert all(line.startswith("camera-fake;[") for line in profile.collapsed())
+
+    folded, table = profile.write(tmp_path, prefix="run")
+    assert Path(folded).read_text().strip()
+    assert "[detect]" in Path(table).read_text()
+    # Stage tracking is switched back off once sampling ends
+    assert not metrics._track_stages and not metrics.active_stages
+
+
+def test_only_one_profile_at_a_time():
+    done = threading.Event()
+    t = threading.Thread(target=lambda: (profiler.sample(0.3), done.set()))
+    t.start()
+    time.sleep(0.05)
+    with pytest.raises(profiler.ProfilerBusy):
+        profiler.sample(0.1)
+    t.join()
+    assert done.is_set()
+
+
+def test_profile_endpoint(tmp_path):
+    server = serve_metrics(0, host="127.0.0.1", profile_dir=str(tmp_path))
+    try:
+        with FakePipeline():
+            request = urllib.request.Request(f"http://127.0.0.1:{server.server_port}/debug/profile?seconds=0.3", method="POST")
+            with urllib.request.urlopen(request) as resp:
+                body = resp.read().decode()
+        assert "[detect]" in body
+        assert len(list(tmp_path.glob("*.folded"))) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def post_status(url, headers=None):
+    request = urllib.request.Request(url, method="POST", headers=headers or {})
+    try:
+        with urllib.request.urlopen(request) as resp:
+            return resp.status
+    except urllib.error.HTTPError as e:
+        return e.code
+
+
+def test_profile_endpoint_rejects_bad_requests(tmp_path):
+    server = serve_metrics(0, profile_dir=str(tmp_path), profile_token="s3cret")
+    url = f"http://127.0.0.1:{server.server_port}/debug/profile"
+    auth = {"Authorization": "Bearer s3cret"}
+    try:
+        assert post_status(f"{url}?seconds=0.1") == 403
+        assert post_status(f"{url}?seconds=0.1", {"Authorization": "Bearer wrong"}) == 403
+        for seconds in ("-5", "0", "nan", "inf", "ten"):
+            assert post_status(f"{url}?seconds={seconds}", auth) == 400
+        assert post_status(f"{url}?seconds=0.1", auth) == 200
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    # Anyone who can reach a public interface could profile the process
+    with pytest.raises(ValueError):
+        serve_metrics(0, host="0.0.0.0", profile_dir=str(tmp_path))
+
+
+@pytest.mark.skipif(not hasattr(signal, "SIGUSR1"), reason="needs SIGUSR1")
+def test_signal_triggers_profile(tmp_path):
+    previous = signal.getsignal(signal.SIGUSR1)
+    try:
+        assert profiler.install_signal_handler(str(tmp_path), duration=0.2)
+        os.kill(os.getpid(), signal.SIGUSR1)
+        deadline = time.time() + 5
+        while not list(tmp_path.glob("*.txt")) and time.time() < deadline:
+            time.sleep(0.05)
+        assert list(tmp_path.glob("*.txt"))
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
@@ -0,0 +1,81 @@
+# ai_cv/tests/test_spot_warp.py
+
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+from utilities.spot_warp import SpotWarper, patch_homographies
+
+# Skewed spots as seen by an oblique camera
+QUADS = [
+    [[40, 60], [110, 50], [130, 120], [30, 140]],
+    [[150, 40], [210, 45], [230, 110], [160, 120]],
+]
+
+
+def test_homographies_match_opencv():
+    square = np.float32([[0, 0], [24, 0], [24, 16], [0, 16]])
+    expected = [cv.getPerspectiveTransform(square, np.float32(q)) for q in QUADS]
+    np.testing.assert_allclose(patch_homographies(QUADS, 24, 16), expected, atol=1e-6)
+
+
+def test_warp_matches_per_spot_warp_perspective():
+    frame = np.random.default_rng(0).integers(0, 255, (180, 260, 3), dtype=np.uint8)
+    frame = cv.GaussianBlur(frame, (9, 9), 3)
+    warper = SpotWarper(QUADS, size=(16, 24))
+    patches = warper.warp(frame)
+    assert patches.shape == (2, 16, 24, 3)
+
+    square = np.float32([[0, 0], [24, 0], [24, 16], [0, 16]])
+    # Patches sample at pixel centres
+    centre = np.array([[1, 0, 0.5], [0, 1, 0.5], [0, 0, 1]])
+    for quad, patch in zip(QUADS, patches):
+        h = cv.getPerspectiveTransform(square, np.float32(quad)) @ centre
+        reference = cv.warpPerspective(frame, h, (24, 16), flags=cv.INTER_LINEAR | cv.WARP_INVERSE_MAP)
+        # Fixed-point maps only differ by rounding
+        assert np.abs(patch.astype(int) - reference.astype(int)).max() <= 2
+
+
+def test_buffers_and_grayscale():
+    frame = np.zeros((180, 260, 3), dtype=np.uint8)
+    cv.fillPoly(frame, [np.int32(QUADS[0])], (255, 255, 255))
+    warper = SpotWarper(QUADS, size=8)
+    first = warper.warp(frame)
+    assert warper.warp(frame) is first
+    # The filled quad rectifies to a full patch, the other spot stays dark
+    assert first[0, 1:-1, 1:-1].min() == 255 and first[1].max() == 0
+
+    out = warper.buffer()
+    assert warper.warp(frame, out=out) is out
+    np.testing.assert_array_equal(out, first)
+    gray = warper.warp(cv.cvtColor(frame, cv.COLOR_BGR2GRAY))
+    assert gray.shape == (2, 8, 8)
+
+
+def test_many_spots_and_polygon_masks():
+    rng = np.random.default_rng(1)
+    origins = rng.uniform(0, 600, (1500, 2))
+    quads = [[o, o + [20, 0], o + [20, 30], o + [0, 30]] for o in origins]
+    frame = rng.integers(0, 255, (640, 640, 3), dtype=np.uint8)
+    warper = SpotWarper(quads, size=32)
+    assert len(warper._maps) > 1
+    patches = warper.warp(frame)
+    # Spot 1200 lies in a later remap chunk
+    single = SpotWarper([quads[1200]], size=32).warp(frame)
+    np.testing.assert_array_equal(patches[1200], single[0])
+
+    # A pentagon's patch is masked to its outline
+    pentagon = [[0, 0], [40, 0], [40, 30], [20, 45], [0, 30]]
+    warper = SpotWarper([pentagon] + quads[:1], size=32)
+    mask = warper.masks[0]
+    assert mask.min() == 0 and mask.max() == 255
+    assert mask[16, 16] == 255
+    # The warped patch is blanked outside it, quads are left whole
+    white = np.full((100, 100, 3), 255, dtype=np.uint8)
+    patches = warper.warp(white)
+    np.testing.assert_array_equal(patches[0][mask == 0], 0)
+    assert patches[0][16, 16].min() == 255 and warper._masked == [0]
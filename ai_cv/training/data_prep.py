@@ -0,0 +1,465 @@
+"""
+Dataset preparation for detector training.
+
+fetch_datasets() downloads and unzips every dataset in parallel. It resumes
+interrupted copies from a mirror (Kaggle downloads restart from scratch)
+and verifies each archive against the sha256 pinned in
+dataset_checksums.json. build_image_cache() then decodes every training image once,
+deduplicated by content and resized the way ultralytics would resize it,
+into a single memory-mapped file. ImageCache reads it back, and
+cached_trainer() plugs it into YOLO.train so epochs stop decoding JPEGs.
+
+    python data_prep.py --workers 4                       # download from Kaggle
+    python data_prep.py --mirror /mnt/datasets --workers 4  # offline, from a directory of zips
+    python data_prep.py --image-cache datasets/image_cache --imgsz 640
+    python data_prep.py --mirror /mnt/datasets --pin          # record the sha256 of unpinned archives
+"""
+import argparse
+import hashlib
+import json
+import os
+import shutil
+import threading
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import cv2 as cv
+import numpy as np
+
+IMAGE_SUFFIXES = {".jpg", ".jpeg", ".png", ".bmp", ".webp", ".tif", ".tiff"}
+
+# name -> Kaggle dataset and the data yaml inside its extracted folder
+DATASETS = {
+    "VDalk": {
+        "dataset": "alkanerturan/vehicledetection",  # https://www.kaggle.com/datasets/alkanerturan/vehicledetection
+        "yaml": os.path.join("VehiclesDetectionDataset", "dataset.yaml"),
+    },
+    "yoloVD": {
+        "dataset": "nadinpethiyagoda/vehicle-dataset-for-yolo",  # https://www.kaggle.com/datasets/nadinpethiyagoda/vehicle-dataset-for-yolo
+        "yaml": None,  # ships without one, see yaml/yoloVD.yaml
+    },
+    "PKVD": {
+        "dataset": "pkdarabi/vehicle-detection-image-dataset",  # https://www.kaggle.com/datasets/pkdarabi/vehicle-detection-image-dataset
+        "yaml": os.path.join("No_Apply_Grayscale", "No_Apply_Grayscale", "Vehicles_Detection.v8i.yolov9", "data.yaml"),
+    },
+    "TVVD": {
+        "dataset": "farzadnekouei/top-view-vehicle-detection-image-dataset",  # https://www.kaggle.com/datasets/farzadnekouei/top-view-vehicle-detection-image-dataset
+        "yaml": os.path.join("Vehicle_Detection_Image_Dataset", "data.yaml"),
+    },
+    "TVDCVD": {
+        "dataset": "glebkuzntesov/top-view-drone-car-detection-dataset-12000-images",  # https://www.kaggle.com/datasets/glebkuzntesov/top-view-drone-car-detection-dataset-12000-images
+        "yaml": os.path.join("dataset", "dataset.yaml"),
+    },
+    "AVCD": {
+        "dataset": "braunge/aerial-view-car-detection-for-yolov5",  # https://www.kaggle.com/datasets/braunge/aerial-view-car-detection-for-yolov5
+        "yaml": "mydata128.yaml",
+    },
+}
+
+_CHUNK = 1 << 20
+
+# Committed with the code, so the first download is verified too
+CHECKSUMS = Path(__file__).resolve().with_name("dataset_checksums.json")
+
+
+def sha256_file(path):
+    h = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+
+# Zip name for a dataset in a mirror directory: owner__name.zip
+def mirror_name(dataset):
+    return dataset.replace("/", "__") + ".zip"
+
+
+"""
+Copy `src` to `dst`, continuing from a `.part` file left by an interrupted
+copy instead of starting over.
+"""
+def copy_resumable(src, dst):
+    dst = Path(dst)
+    part = dst.with_name(dst.name + ".part")
+    done = part.stat().st_size if part.exists() else 0
+    total = os.path.getsize(src)
+    if done > total:
+        part.unlink()
+        done = 0
+    with open(src, "rb") as fin, open(part, "ab") as fout:
+        fin.seek(done)
+        shutil.copyfileobj(fin, fout, _CHUNK)
+    os.replace(part, dst)
+    return dst
+
+
+def _kaggle_download(dataset, folder):
+    # Imported here: importing kaggle authenticates immediately
+    from kaggle import api
+    # Kaggle skips archives that are already complete and up to date, but an
+    # interrupted download starts over: the client cannot resume
+    api.dataset_download_files(dataset, path=str(folder), unzip=False, quiet=True)
+    return Path(folder) / (dataset.split("/")[-1] + ".zip")
+
+
+class ChecksumManifest:
+    """
+    Pinned sha256 of every dataset archive ({dataset: hex digest or null}).
+    An archive that is not pinned is rejected unless `pin` is set, which
+    records its digest in the manifest so it can be reviewed and committed.
+    """
+
+    def __init__(self, path=CHECKSUMS, pin=False):
+        self.path = Path(path)
+        self.pin = pin
+        self._lock = threading.Lock()
+        try:
+            self.sums = json.loads(self.path.read_text())
+        except (OSError, ValueError):
+            self.sums = {}
+
+    def verify(self, dataset, digest):
+        with self._lock:
+            expected = self.sums.get(dataset)
+            if expected is None and self.pin:
+                self.sums[dataset] = digest
+                self.path.parent.mkdir(parents=True, exist_ok=True)
+                tmp = self.path.with_name(self.path.name + ".tmp")
+                tmp.write_text(json.dumps(self.sums, indent=4, sort_keys=True) + "\n")
+                os.replace(tmp, self.path)
+                return
+        if expected is None:
+            raise ValueError(f"no pinned checksum for {dataset} in {self.path} (sha256 {digest}); "
+                             "check the archive and rerun with --pin")
+        if expected != digest:
+            raise ValueError(f"checksum mismatch for {dataset}: expected {expected}, got {digest}")
+
+
+"""
+Download, verify and extract one dataset into datasets_dir/name. Returns
+the extracted folder. A `.complete` marker holding the archive checksum
+makes a second call a no-op.
+"""
+def fetch_dataset(name, spec, datasets_dir, manifest, mirror=None, keep_archives=False):
+    target = Path(datasets_dir) / name
+    marker = target / ".complete"
+    if marker.exists():
+        return target
+
+    downloads = Path(datasets_dir) / ".downloads"
+    downloads.mkdir(parents=True, exist_ok=True)
+    if mirror:
+        source = Path(mirror) / mirror_name(spec["dataset"])
+        if not source.exists():
+            raise FileNotFoundError(f"{name}: {source} not in mirror")
+        archive = copy_resumable(source, downloads / source.name)
+    else:
+        archive = _kaggle_download(spec["dataset"], downloads)
+    digest = sha256_file(archive)
+    try:
+        manifest.verify(spec["dataset"], digest)
+    except ValueError:
+        # Fetching the same source again would give the same bytes; a rerun
+        # after the source is fixed starts from a clean download
+        archive.unlink()
+        raise
+
+    # Extract next to the target and rename, so a killed extraction never
+    # leaves a half-filled dataset folder behind
+    staging = Path(datasets_dir) / f".{name}.extracting"
+    shutil.rmtree(staging, ignore_errors=True)
+    with zipfile.ZipFile(archive) as zf:
+        zf.extractall(staging)
+    (staging / ".complete").write_text(digest)
+    shutil.rmtree(target, ignore_errors=True)
+    os.replace(staging, target)
+    if not keep_archives:
+        archive.unlink()
+    print(f"{name}: ready ({digest[:12]})")
+    return target
+
+
+"""
+Fetch every dataset in `datasets` with up to `workers` in flight. Returns
+{name: extracted folder}; failures are collected and raised together once
+the others have finished. Archives are verified against `checksums`;
+pin=True records the digest of archives it has no entry for.
+"""
+def fetch_datasets(datasets_dir, datasets=DATASETS, mirror=None, workers=4, keep_archives=False,
+                   checksums=CHECKSUMS, pin=False):
+    datasets_dir = Path(datasets_dir)
+    manifest = ChecksumManifest(checksums, pin=pin)
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        futures = {name: pool.submit(fetch_dataset, name, spec, datasets_dir, manifest, mirror, keep_archives)
+                   for name, spec in datasets.items()}
+    paths, errors = {}, []
+    for name, future in futures.items():
+        try:
+            paths[name] = future.result()
+        except Exception as e:
+            errors.append(f"{name}: {e}")
+    if errors:
+        raise RuntimeError("Failed to fetch datasets:\n" + "\n".join(errors))
+    return paths
+
+
+"""
+Image files listed by a YOLO data yaml, over its train/val/test entries.
+Each entry is a folder, an image list .txt, or a list of either.
+"""
+def yolo_image_files(yaml_path, splits=("train", "val", "test")):
+    import yaml
+
+    yaml_path = Path(yaml_path)
+    with open(yaml_path) as f:
+        data = yaml.safe_load(f)
+    root = Path(data.get("path") or yaml_path.parent)
+    if not root.is_absolute():
+        root = yaml_path.parent / root
+    files = []
+    for split in splits:
+        entries = data.get(split) or []
+        for entry in entries if isinstance(entries, list) else [entries]:
+            path = Path(entry) if Path(entry).is_absolute() else root / entry
+            if path.is_dir():
+                files.extend(p for p in sorted(path.rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES)
+            elif path.suffix == ".txt" and path.exists():
+                for line in path.read_text().splitlines():
+                    line = line.strip()
+                    if line:
+                        files.append(Path(line) if Path(line).is_absolute() else path.parent / line)
+    return files
+
+
+# Long side to imgsz, exactly as ultralytics BaseDataset.load_image does in rect mode
+def resize_long_side(image, imgsz):
+    h0, w0 = image.shape[:2]
+    r = imgsz / max(h0, w0)
+    if r != 1:
+        w, h = min(int(np.ceil(w0 * r)), imgsz), min(int(np.ceil(h0 * r)), imgsz)
+        image = cv.resize(image, (w, h), interpolation=cv.INTER_LINEAR)
+    return image
+
+
+def _decode(path, imgsz):
+    image = cv.imdecode(np.fromfile(path, dtype=np.uint8), cv.IMREAD_COLOR)
+    if image is None:
+        return None
+    return resize_long_side(image, imgsz), image.shape[:2]
+
+
+class ImageCache:
+    """
+    Read side of the cache built by build_image_cache().
+
+    Pixels live back to back in images.u8, opened as a read-only memmap so
+    every dataloader worker shares the page cache. index.npy holds one row
+    of (offset, height, width, original height, original width) per unique
+    image, and files.json maps every source path to its row.
+    """
+
+    def __init__(self, cache_dir):
+        self.cache_dir = Path(cache_dir)
+        meta = json.loads((self.cache_dir / "meta.json").read_text())
+        self.imgsz = meta["imgsz"]
+        self.index = np.load(self.cache_dir / "index.npy")
+        self.files = {path: entry["row"] for path, entry in meta["files"].items()}
+        self._data = None
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, path):
+        return os.path.realpath(path) in self.files
+
+    @property
+    def data(self):
+        # Opened lazily so forked dataloader workers each map it themselves
+        if self._data is None:
+            path = self.cache_dir / "images.u8"
+            # np.memmap refuses empty files
+            self._data = np.memmap(path, dtype=np.uint8, mode="r") if path.stat().st_size else np.zeros(0, np.uint8)
+        return self._data
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_data"] = None
+        return state
+
+    """
+    (image, (original h, original w)) for `path`, or None if it isn't cached.
+    The image is a read-only view into the memmap; copy it before editing.
+    """
+    def get(self, path):
+        row = self.files.get(os.path.realpath(path))
+        if row is None:
+            return None
+        offset, h, w, h0, w0 = (int(v) for v in self.index[row])
+        return self.data[offset:offset + h * w * 3].reshape(h, w, 3), (h0, w0)
+
+
+"""
+Decode every image in `image_files` once and append it, resized so its long
+side is `imgsz`, to the cache in `cache_dir`.
+
+Images are deduplicated by content hash, so the same picture shipped in
+two datasets is stored once. Rerunning with more files only decodes what
+is new. Files already seen at the same size and mtime aren't even reread.
+"""
+def build_image_cache(image_files, cache_dir, imgsz=640, workers=None):
+    cache_dir = Path(cache_dir)
+    cache_dir.mkdir(parents=True, exist_ok=True)
+    meta_path, index_path, data_path = cache_dir / "meta.json", cache_dir / "index.npy", cache_dir / "images.u8"
+    try:
+        meta = json.loads(meta_path.read_text())
+        index = np.load(index_path)
+    except (OSError, ValueError):
+        meta, index = None, None
+    if meta is None or meta["imgsz"] != imgsz:
+        meta, index = {"imgsz": imgsz, "files": {}, "hashes": {}}, np.zeros((0, 5), dtype=np.int64)
+        data_path.unlink(missing_ok=True)
+    # Drop rows past the last index write, e.g. from a build that was killed
+    end = int(index[-1, 0] + index[-1, 1] * index[-1, 2] * 3) if len(index) else 0
+    with open(data_path, "ab") as f:
+        f.truncate(end)
+
+    files, hashes = meta["files"], meta["hashes"]
+    known_files = dict(files)
+
+    def identify(path):
+        real = os.path.realpath(path)
+        stat = os.stat(real)
+        known = known_files.get(real)
+        if known and known["size"] == stat.st_size and known["mtime"] == stat.st_mtime_ns:
+            return real, known["hash"], stat
+        h = hashlib.blake2b(digest_size=20)
+        with open(real, "rb") as f:
+            for chunk in iter(lambda: f.read(_CHUNK), b""):
+                h.update(chunk)
+        return real, h.hexdigest(), stat
+
+    workers = workers or min(8, os.cpu_count() or 1)
+    added = skipped = 0
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        todo = {}
+        for real, digest, stat in pool.map(identify, image_files):
+            files[real] = {"hash": digest, "size": stat.st_size, "mtime": stat.st_mtime_ns,
+                           "row": hashes.get(digest)}
+            if digest not in hashes:
+                todo.setdefault(digest, real)
+
+        rows = []
+        with open(data_path, "ab") as out:
+            # Decoding and resizing release the GIL, so threads scale across cores
+            for digest, decoded in zip(todo, pool.map(lambda p: _decode(p, imgsz), todo.values())):
+                if decoded is None:
+                    skipped += 1
+                    continue
+                image, (h0, w0) = decoded
+                h, w = image.shape[:2]
+                rows.append((end, h, w, h0, w0))
+                out.write(np.ascontiguousarray(image).data)
+                end += h * w * 3
+                hashes[digest] = len(index) + len(rows) - 1
+                added += 1
+
+    if rows:
+        index = np.concatenate([index, np.asarray(rows, dtype=np.int64)])
+    for entry in files.values():
+        entry["row"] = hashes.get(entry["hash"])
+    meta["files"] = {path: entry for path, entry in files.items() if entry["row"] is not None}
+
+    # Index before meta: a meta that names a row always has it on disk
+    np.save(cache_dir / "index.tmp.npy", index)
+    os.replace(cache_dir / "index.tmp.npy", index_path)
+    tmp = meta_path.with_name("meta.json.tmp")
+    tmp.write_text(json.dumps(meta))
+    os.replace(tmp, meta_path)
+    print(f"image cache: {len(index)} images ({end / 1e6:.0f} MB), {added} added, "
+          f"{len(meta['files']) - len(index)} duplicates, {skipped} unreadable")
+    return ImageCache(cache_dir)
+
+
+"""
+Make `dataset` (an ultralytics YOLODataset) read images from `cache`
+instead of decoding them. Images missing from the cache, or cached at a
+different size, fall back to the dataset's own loader.
+"""
+def attach_image_cache(dataset, cache):
+    load_image = dataset.load_image
+
+    def cached_load_image(i, rect_mode=True, resize_short=False):
+        imgsz = max(dataset.imgsz) if isinstance(dataset.imgsz, (tuple, list)) else dataset.imgsz
+        if dataset.ims[i] is not None or resize_short or imgsz != cache.imgsz:
+            return load_image(i, rect_mode, resize_short)
+        hit = cache.get(dataset.im_files[i])
+        if hit is None:
+            return load_image(i, rect_mode, resize_short)
+        image, hw0 = hit
+        if rect_mode:
+            # Augmentations edit images in place
+            image = image.copy()
+        else:
+            shape = dataset.imgsz if isinstance(dataset.imgsz, (tuple, list)) else (imgsz, imgsz)
+            image = cv.resize(image, tuple(shape)[::-1], interpolation=cv.INTER_LINEAR)
+        if dataset.augment and dataset.cache != "ram":
+            # Mosaic and MixUp draw their extra images from the buffer, kept
+            # the way BaseDataset.load_image keeps it
+            dataset.ims[i], dataset.im_hw0[i], dataset.im_hw[i] = image, hw0, image.shape[:2]
+            dataset.buffer.append(i)
+            if 1 < len(dataset.buffer) >= dataset.max_buffer_length:
+                j = dataset.buffer.pop(0)
+                dataset.ims[j], dataset.im_hw0[j], dataset.im_hw[j] = None, None, None
+        return image, hw0, image.shape[:2]
+
+    dataset.load_image = cached_load_image
+    return dataset
+
+
+"""
+A DetectionTrainer subclass for YOLO.train(trainer=...) whose datasets read
+images from the cache in `cache_dir`.
+"""
+def cached_trainer(cache_dir):
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    cache = ImageCache(cache_dir)
+
+    class CachedDetectionTrainer(DetectionTrainer):
+        def build_dataset(self, img_path, mode="train", batch=None):
+            return attach_image_cache(super().build_dataset(img_path, mode, batch), cache)
+
+    return CachedDetectionTrainer
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download the training datasets and build the image cache")
+    parser.add_argument("--datasets-dir", default=os.path.join(os.getcwd(), "datasets"))
+    parser.add_argument("--mirror", help="Directory of owner__name.zip archives to use instead of Kaggle")
+    parser.add_argument("--workers", type=int, default=4, help="Datasets fetched at once")
+    parser.add_argument("--only", nargs="+", choices=sorted(DATASETS), help="Fetch just these datasets")
+    parser.add_argument("--keep-archives", action="store_true")
+    parser.add_argument("--pin", action="store_true",
+                        help=f"Record the sha256 of archives not yet pinned in {CHECKSUMS.name}")
+    parser.add_argument("--image-cache", help="Also build the decoded image cache in this folder")
+    parser.add_argument("--imgsz", type=int, default=640, help="Long side of cached images; match the training imgsz")
+    args = parser.parse_args(argv)
+
+    datasets = {name: DATASETS[name] for name in args.only} if args.only else DATASETS
+    paths = fetch_datasets(args.datasets_dir, datasets, mirror=args.mirror, workers=args.workers,
+                           keep_archives=args.keep_archives, pin=args.pin)
+    if args.image_cache:
+        image_files = []
+        for name, folder in paths.items():
+            if datasets[name]["yaml"]:
+                image_files.extend(yolo_image_files(folder / datasets[name]["yaml"]))
+            else:
+                image_files.extend(p for p in sorted(folder.rglob("*")) if p.suffix.lower() in IMAGE_SUFFIXES)
+        build_image_cache(image_files, args.image_cache, imgsz=args.imgsz)
+    return paths
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,339 @@
+"""
+Smaller, CPU-sized detectors distilled from best.pt.
+
+    student    Train a narrower/shallower YOLO11 at a lower imgsz, optionally
+               single class ("vehicle"), with ultralytics' feature
+               distillation from the teacher (distill_model=best.pt).
+    prune      Remove the lowest-|BN gamma| channels of every internal conv
+               pair (bottleneck and detect head branches), then fine-tune,
+               again distilling from the teacher if given.
+    benchmark  Latency against occupancy accuracy on lot test sets (CVAT
+               polygons, see build_lot_test_data.py), with the Pareto-optimal
+               models of each set marked.
+
+    python distill.py student --teacher best.pt --width 0.125 --imgsz 416 --single-class
+    python distill.py prune --weights runs/detect/train/weights/best.pt --ratio 0.3 --teacher best.pt
+    python distill.py benchmark --models best.pt student.pt@416 pruned.pt@416 --data ../tests/lot_test_data
+"""
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import torch
+import yaml
+from torch import nn
+from training.merge_datasets import ALIASES, default_sources, merge_datasets
+from training.train_spot_classifier import load_cvat_dataset
+
+# merge_datasets() class map for single-class students
+VEHICLE_ALIASES = {name: "vehicle" for name in ALIASES}
+
+
+"""
+Write a YOLO11 model yaml scaled by `depth` and `width` (yolo11n is 0.5 and
+0.25) with `nc` classes, and return its path.
+"""
+def student_config(path, width=0.125, depth=0.5, nc=1, base="yolo11n.yaml"):
+    from ultralytics.nn.tasks import yaml_model_load
+
+    cfg = yaml_model_load(base)
+    for key in ("scales", "scale", "yaml_file"):
+        cfg.pop(key, None)
+    cfg.update(nc=nc, depth_multiple=depth, width_multiple=width)
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w") as f:
+        yaml.safe_dump(cfg, f, sort_keys=False)
+    return path
+
+
+def _trainer(image_cache=None, keep_model=False):
+    from ultralytics.models.yolo.detect import DetectionTrainer
+
+    if image_cache:
+        from training.data_prep import cached_trainer
+        base = cached_trainer(image_cache)
+    else:
+        base = DetectionTrainer
+    if not keep_model:
+        return base if image_cache else None
+
+    class PrunedTrainer(base):
+        def get_model(self, cfg=None, weights=None, verbose=True):
+            # Rebuilding from the yaml would restore the pruned channels
+            if isinstance(weights, nn.Module):
+                return weights
+            return super().get_model(cfg, weights, verbose)
+
+    return PrunedTrainer
+
+
+"""
+Train `model` (a yaml or .pt) on `data`. With a `teacher` its detect head
+features are distilled into the student. Returns the best weights.
+"""
+def train_student(model, data, teacher=None, imgsz=416, epochs=100, batch=16, lr0=0.002, device=None,
+                  image_cache=None, keep_model=False, project=None, name=None, **kwargs):
+    from ultralytics import YOLO
+
+    args = dict(data=str(data), imgsz=imgsz, epochs=epochs, batch=batch, lr0=lr0, optimizer="AdamW",
+                patience=30, plots=False, project=project, name=name, **kwargs)
+    if teacher:
+        args["distill_model"] = str(teacher)
+    if device is not None:
+        args["device"] = device
+    yolo = YOLO(str(model))
+    yolo.train(trainer=_trainer(image_cache, keep_model), **args)
+    trainer = yolo.trainer
+    return str(trainer.best if trainer.best.exists() else trainer.last)
+
+
+def _prune_out(conv, keep):
+    # Keep output channels `keep` of an ultralytics Conv/DWConv (conv + bn)
+    conv.conv.weight = nn.Parameter(conv.conv.weight.data[keep].clone())
+    conv.conv.out_channels = len(keep)
+    if conv.conv.groups > 1:
+        conv.conv.groups = conv.conv.in_channels = len(keep)
+    bn = conv.bn
+    bn.weight = nn.Parameter(bn.weight.data[keep].clone())
+    bn.bias = nn.Parameter(bn.bias.data[keep].clone())
+    bn.running_mean = bn.running_mean[keep].clone()
+    bn.running_var = bn.running_var[keep].clone()
+    bn.num_features = len(keep)
+
+
+def _prune_in(conv2d, keep):
+    conv2d.weight = nn.Parameter(conv2d.weight.data[:, keep].clone())
+    conv2d.in_channels = len(keep)
+
+
+"""
+Conv chains whose middle channels are used by nothing else, so they can be
+dropped without touching the rest of the graph: (producer, [depthwise
+convs passing the channels through], consumer conv2d).
+"""
+def prunable_pairs(model):
+    from ultralytics.nn.modules.block import Bottleneck
+    from ultralytics.nn.modules.conv import Conv
+    from ultralytics.nn.modules.head import Detect
+
+    def blocks(module):
+        # Conv blocks and bare Conv2d layers in forward order
+        if isinstance(module, (Conv, nn.Conv2d)):
+            yield module
+        else:
+            for child in module.children():
+                yield from blocks(child)
+
+    pairs = []
+    for m in model.modules():
+        if isinstance(m, Bottleneck) and m.cv2.conv.groups == 1:
+            pairs.append((m.cv1, [], m.cv2.conv))
+        elif isinstance(m, Detect):
+            # Each head branch is a plain chain, e.g. Conv -> Conv -> Conv2d or
+            # DWConv -> Conv -> DWConv -> Conv -> Conv2d
+            for branch in list(m.cv2) + list(m.cv3):
+                producer, through = None, []
+                for block in blocks(branch):
+                    conv = block.conv if isinstance(block, Conv) else block
+                    if conv.groups > 1 and conv.groups == conv.in_channels == conv.out_channels:
+                        through.append(block)
+                        continue
+                    if producer is not None and conv.groups == 1:
+                        pairs.append((producer, through, conv))
+                    producer, through = (block if isinstance(block, Conv) else None), []
+    return pairs
+
+
+"""
+Structured pruning: in every prunable chain keep the `1 - ratio` share of
+channels with the largest |BN gamma| of the producing conv (at least
+`min_channels`). Returns the model, pruned in place.
+"""
+def prune_model(model, ratio=0.3, min_channels=8):
+    pairs = prunable_pairs(model)
+    with torch.no_grad():
+        for producer, through, consumer in pairs:
+            channels = producer.bn.num_features
+            keep_n = max(min(min_channels, channels), int(round(channels * (1 - ratio))))
+            if keep_n >= channels:
+                continue
+            keep = torch.argsort(producer.bn.weight.abs(), descending=True)[:keep_n].sort().values
+            _prune_out(producer, keep)
+            for dw in through:
+                _prune_out(dw, keep)
+            _prune_in(consumer, keep)
+    return model
+
+
+"""
+Load `weights`, prune it and save a checkpoint YOLO() and train_student()
+can load. Returns (path, parameters before, parameters after).
+"""
+def prune_checkpoint(weights, output, ratio=0.3, min_channels=8):
+    from ultralytics.nn.tasks import load_checkpoint
+
+    model, ckpt = load_checkpoint(weights)
+    before = sum(p.numel() for p in model.parameters())
+    prune_model(model.float(), ratio, min_channels)
+    after = sum(p.numel() for p in model.parameters())
+    ckpt = {k: v for k, v in (ckpt or {}).items() if k not in ("optimizer", "ema", "updates", "model")}
+    ckpt.update(model=model, epoch=-1)
+    Path(output).parent.mkdir(parents=True, exist_ok=True)
+    torch.save(ckpt, output)
+    return str(output), before, after
+
+
+"""
+Share of spots in `samples` (load_cvat_dataset() output) whose occupancy the
+detector gets right, matching detections to spots like LotDetector does.
+Returns (accuracy, seconds per image).
+"""
+def occupancy_accuracy(detector, samples, warmup=2):
+    from detection.lot_detector import LotDetector
+
+    matcher = LotDetector(detector=detector, tracker=object())
+    correct = total = 0
+    timings = []
+    images = [(cv.imread(path), polygons, labels) for path, polygons, labels in samples]
+    for image, _, _ in images[:warmup]:
+        if image is not None:
+            detector.detect(image)
+    for image, polygons, labels in images:
+        if image is None:
+            continue
+        start = time.perf_counter()
+        detections = detector.detect(image)
+        timings.append(time.perf_counter() - start)
+        predicted = matcher.spot_occupancy(detections, polygons)
+        correct += int((predicted == np.asarray(labels, dtype=bool)).sum())
+        total += len(labels)
+    return correct / max(1, total), float(np.median(timings)) if timings else float("nan")
+
+
+# Rows not beaten on both latency and accuracy by another row
+def pareto_front(rows):
+    for row in rows:
+        row["pareto"] = not any(
+            other is not row and other["latency_ms"] <= row["latency_ms"] and other["accuracy"] >= row["accuracy"]
+            and (other["latency_ms"] < row["latency_ms"] or other["accuracy"] > row["accuracy"])
+            for other in rows)
+    return rows
+
+
+"""
+Latency/accuracy table of `models` ([(weights, imgsz)]) on each lot test set
+in `datasets`. Returns {dataset: [row]}.
+"""
+def benchmark(models, datasets, conf_thresh=0.05, iou_thresh=0.01, limit=None):
+    from detection.detect import VehicleDetector
+
+    tables = {}
+    for data in datasets:
+        samples = load_cvat_dataset(data)[:limit]
+        rows = []
+        for weights, imgsz in models:
+            detector = VehicleDetector(weights, conf_thresh=conf_thresh, iou_thresh=iou_thresh, imgsz=imgsz)
+            if imgsz is None:
+                # The size the checkpoint was trained at, which predict falls back to
+                imgsz = detector.model.overrides.get("imgsz", 640)
+            accuracy, latency = occupancy_accuracy(detector, samples)
+            params = sum(p.numel() for p in detector.model.model.parameters())
+            rows.append({"model": str(weights), "imgsz": imgsz, "params": params,
+                         "latency_ms": latency * 1000, "accuracy": accuracy})
+        tables[str(data)] = pareto_front(rows)
+    return tables
+
+
+def format_table(tables):
+    lines = []
+    for data, rows in tables.items():
+        lines.append(f"{data}")
+        lines.append(f"{'model':<40} {'imgsz':>5} {'params':>9} {'latency ms':>10} {'accuracy':>8}  pareto")
+        for row in sorted(rows, key=lambda r: r["latency_ms"]):
+            lines.append(f"{row['model'][-40:]:<40} {row['imgsz']:>5} {row['params']:>9,} {row['latency_ms']:>10.1f} "
+                         f"{row['accuracy']:>8.3f}  {'*' if row['pareto'] else ''}")
+        lines.append("")
+    return "\n".join(lines)
+
+
+def _model_arg(value):
+    # weights[@imgsz]; without a size the model runs at the one it was trained at
+    weights, _, imgsz = value.partition("@")
+    return weights, int(imgsz) if imgsz else None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Distill and prune CPU-sized detectors, and pick them per camera")
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    train_args = argparse.ArgumentParser(add_help=False)
+    train_args.add_argument("--teacher", help="Teacher weights to distill from, e.g. best.pt")
+    train_args.add_argument("--data", help="Data yaml (default: the merged datasets, see merge_datasets.py)")
+    train_args.add_argument("--single-class", action="store_true", help="Train on one 'vehicle' class")
+    train_args.add_argument("--imgsz", type=int, default=416)
+    train_args.add_argument("--epochs", type=int, default=100)
+    train_args.add_argument("--batch", type=int, default=16)
+    train_args.add_argument("--device", help="e.g. 0 or cpu (default: ultralytics picks)")
+    train_args.add_argument("--image-cache", help="Image cache from data_prep.py --image-cache")
+    train_args.add_argument("--output", default=os.path.join(os.getcwd(), "students"))
+
+    student = sub.add_parser("student", parents=[train_args], help="Distill a narrower model")
+    student.add_argument("--width", type=float, default=0.125, help="Width multiple (yolo11n: 0.25)")
+    student.add_argument("--depth", type=float, default=0.5, help="Depth multiple (yolo11n: 0.5)")
+
+    prune = sub.add_parser("prune", parents=[train_args], help="Prune a trained model and fine-tune it")
+    prune.add_argument("--weights", required=True)
+    prune.add_argument("--ratio", type=float, default=0.3, help="Share of internal channels to remove")
+
+    bench = sub.add_parser("benchmark", help="Latency vs occupancy accuracy table")
+    bench.add_argument("--models", nargs="+", type=_model_arg, required=True, metavar="WEIGHTS[@IMGSZ]")
+    bench.add_argument("--data", nargs="+", default=[os.path.join(os.getcwd(), "..", "tests", "lot_test_data")],
+                       help="Lot test sets, e.g. one per camera")
+    bench.add_argument("--limit", type=int, help="Images per test set")
+    bench.add_argument("--output", help="Write the table as JSON")
+    args = parser.parse_args(argv)
+
+    if args.command == "benchmark":
+        tables = benchmark(args.models, args.data, limit=args.limit)
+        print(format_table(tables))
+        if args.output:
+            with open(args.output, "w") as f:
+                json.dump(tables, f, indent=4)
+        return tables
+
+    output = Path(args.output)
+    data = args.data
+    if data is None or args.single_class:
+        sources = default_sources(os.path.join(os.getcwd(), "datasets"), os.path.join(os.getcwd(), "yaml"))
+        if args.single_class:
+            data = merge_datasets(sources, output / "data_vehicle", aliases=VEHICLE_ALIASES, taxonomy=("vehicle",))
+        else:
+            data = merge_datasets(sources, os.path.join(os.getcwd(), "datasets", "merged"))
+    nc = len(yaml.safe_load(Path(data).read_text())["names"])
+    common = dict(teacher=args.teacher, imgsz=args.imgsz, epochs=args.epochs, batch=args.batch, device=args.device,
+                  image_cache=args.image_cache, project=str(output))
+
+    if args.command == "student":
+        name = f"student_w{args.width:g}_d{args.depth:g}_nc{nc}_{args.imgsz}"
+        cfg = student_config(output / f"{name}.yaml", width=args.width, depth=args.depth, nc=nc)
+        best = train_student(cfg, data, name=name, **common)
+    else:
+        name = f"{Path(args.weights).stem}_pruned{args.ratio:g}_{args.imgsz}"
+        pruned, before, after = prune_checkpoint(args.weights, output / f"{name}_untuned.pt", args.ratio)
+        print(f"Pruned {before:,} -> {after:,} parameters")
+        best = train_student(pruned, data, name=name, keep_model=True, **common)
+    print(f"Saved {best}")
+    return best
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,241 @@
+"""
+Merge the detector datasets into one YOLO dataset with one class map.
+
+Each source names its classes differently ("Car", "vehicle", "motorbike",
+"threewheel", ...). merge_datasets() maps every name onto TAXONOMY, rewrites
+the label files with the new class ids and links the images into one tree.
+It then writes a data.yaml that trains on all sources at once. The train
+list repeats or subsamples each source by its sampling weight. Validation
+keeps every source's full val split and also gets one list per source, so
+evaluate_sources() can report mAP for the merged set and each source in one
+run.
+
+    python merge_datasets.py --output datasets/merged --weights AVCD=0.5 TVDCVD=0.5
+"""
+import argparse
+import json
+import os
+import re
+import shutil
+import sys
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import numpy as np
+import yaml
+from training.data_prep import DATASETS, yolo_image_files
+
+TAXONOMY = ("car", "van", "truck", "bus", "motorcycle")
+
+# Normalized source class name -> TAXONOMY entry; anything else is dropped
+ALIASES = {
+    "car": "car", "cars": "car", "vehicle": "car", "vehicles": "car", "sedan": "car", "suv": "car",
+    "taxi": "car", "jeep": "car", "hatchback": "car",
+    "van": "van", "minivan": "van", "ambulance": "van",
+    "truck": "truck", "trucks": "truck", "pickup": "truck", "lorry": "truck", "trailer": "truck",
+    "bus": "bus", "buses": "bus", "minibus": "bus", "coach": "bus",
+    "motorcycle": "motorcycle", "motorbike": "motorcycle", "motorbikes": "motorcycle", "scooter": "motorcycle",
+    "threewheel": "motorcycle", "threewheeler": "motorcycle", "autorickshaw": "motorcycle", "tuktuk": "motorcycle",
+}
+
+
+def normalize(name):
+    return re.sub(r"[^a-z0-9]", "", str(name).lower())
+
+
+"""
+Source class id -> merged class id for a data yaml's `names`, plus the
+names that have no place in the taxonomy.
+"""
+def class_map(names, aliases=ALIASES, taxonomy=TAXONOMY):
+    if isinstance(names, list):
+        names = dict(enumerate(names))
+    mapping, dropped = {}, []
+    for idx, name in names.items():
+        target = aliases.get(normalize(name))
+        if target is None:
+            dropped.append(name)
+        else:
+            mapping[int(idx)] = taxonomy.index(target)
+    return mapping, dropped
+
+
+def _label_path(image_path):
+    parts = Path(image_path).parts
+    # Same rule as ultralytics: the last "images" folder becomes "labels"
+    i = len(parts) - 1 - parts[::-1].index("images") if "images" in parts else None
+    if i is None:
+        return Path(image_path).with_suffix(".txt")
+    return Path(*parts[:i], "labels", *parts[i + 1:]).with_suffix(".txt")
+
+
+def _remap_labels(src, dst, mapping):
+    kept = dropped = 0
+    lines = []
+    if src.exists():
+        for line in src.read_text().splitlines():
+            fields = line.split()
+            if not fields:
+                continue
+            cls = mapping.get(int(float(fields[0])))
+            if cls is None:
+                dropped += 1
+                continue
+            lines.append(" ".join([str(cls)] + fields[1:]))
+            kept += 1
+    dst.write_text("\n".join(lines) + ("\n" if lines else ""))
+    return kept, dropped
+
+
+def _link(src, dst):
+    try:
+        os.symlink(os.path.realpath(src), dst)
+    except OSError:
+        shutil.copy2(src, dst)
+
+
+"""
+Which entries of a source's train list make it into the merged list: every
+image floor(weight) times, plus a seeded random share for the fraction.
+"""
+def weighted_sample(count, weight, rng):
+    whole, frac = int(weight), weight - int(weight)
+    picks = np.tile(np.arange(count), whole)
+    extra = rng.choice(count, size=int(round(frac * count)), replace=False) if count else []
+    return np.sort(np.concatenate([picks, np.asarray(extra, dtype=int)])).astype(int)
+
+
+"""
+Merge `sources` ({name: data yaml path}) into `output`. `weights` maps
+source names to sampling weights (default 1.0). Returns the merged
+data.yaml path.
+"""
+def merge_datasets(sources, output, weights=None, aliases=ALIASES, taxonomy=TAXONOMY, seed=0):
+    output = Path(output).resolve()
+    weights = weights or {}
+    rng = np.random.default_rng(seed)
+    for sub in ("images", "labels"):
+        # Only links and rewritten labels live here
+        shutil.rmtree(output / sub, ignore_errors=True)
+    output.mkdir(parents=True, exist_ok=True)
+
+    train, val, summary = [], [], {}
+    for name, data_yaml in sources.items():
+        with open(data_yaml) as f:
+            names = yaml.safe_load(f).get("names", {})
+        names = dict(enumerate(names)) if isinstance(names, list) else {int(i): n for i, n in names.items()}
+        mapping, dropped_names = class_map(names, aliases, taxonomy)
+        stats = {"yaml": str(data_yaml), "weight": float(weights.get(name, 1.0)),
+                 "classes": {str(n): taxonomy[mapping[i]] if i in mapping else None for i, n in names.items()},
+                 "boxes": 0, "dropped_boxes": 0}
+        if dropped_names:
+            print(f"{name}: dropping classes {dropped_names}")
+        split_files = {}
+        for split in ("train", "val"):
+            images = yolo_image_files(data_yaml, splits=(split,))
+            if split == "val" and not images:
+                images = yolo_image_files(data_yaml, splits=("test",))
+            image_dir, label_dir = output / "images" / name / split, output / "labels" / name / split
+            image_dir.mkdir(parents=True)
+            label_dir.mkdir(parents=True)
+            linked = []
+            for i, image in enumerate(images):
+                # Numbered so files with the same name in different folders can't collide
+                dst = image_dir / f"{i:06d}_{image.name}"
+                _link(image, dst)
+                kept, dropped = _remap_labels(_label_path(image), label_dir / f"{dst.stem}.txt", mapping)
+                stats["boxes"] += kept
+                stats["dropped_boxes"] += dropped
+                linked.append(str(dst))
+            split_files[split] = linked
+            stats[f"{split}_images"] = len(linked)
+
+        picks = weighted_sample(len(split_files["train"]), stats["weight"], rng)
+        train.extend(split_files["train"][i] for i in picks)
+        stats["train_samples"] = len(picks)
+        val.extend(split_files["val"])
+        (output / f"val_{name}.txt").write_text("\n".join(split_files["val"]) + "\n")
+        _write_yaml(output / f"data_{name}.yaml", output, "train.txt", f"val_{name}.txt", taxonomy)
+        summary[name] = stats
+
+    (output / "train.txt").write_text("\n".join(train) + "\n")
+    (output / "val.txt").write_text("\n".join(val) + "\n")
+    data_yaml = _write_yaml(output / "data.yaml", output, "train.txt", "val.txt", taxonomy)
+    (output / "sources.json").write_text(json.dumps(summary, indent=4))
+    for name, stats in summary.items():
+        share = stats["train_samples"] / max(1, len(train))
+        print(f"{name:>8}: {stats['train_images']:6d} train images x{stats['weight']:g} = {share:5.1%} of samples, "
+              f"{stats['val_images']} val, {stats['dropped_boxes']} boxes dropped")
+    return data_yaml
+
+
+def _write_yaml(path, root, train, val, taxonomy):
+    with open(path, "w") as f:
+        yaml.safe_dump({"path": str(root), "train": train, "val": val,
+                        "names": dict(enumerate(taxonomy))}, f, sort_keys=False)
+    return path
+
+
+"""
+Validate `weights` on the merged val set and on each source's val set, and
+write one report (JSON plus a printed table) of box mAP per source and per
+class.
+"""
+def evaluate_sources(weights, data_yaml, output=None, imgsz=640, batch=16):
+    from ultralytics import YOLO
+
+    data_yaml = Path(data_yaml)
+    summary = json.loads((data_yaml.parent / "sources.json").read_text())
+    model = YOLO(weights)
+    report = {}
+    for name in ["all"] + list(summary):
+        split_yaml = data_yaml if name == "all" else data_yaml.parent / f"data_{name}.yaml"
+        metrics = model.val(data=str(split_yaml), imgsz=imgsz, batch=batch, plots=False, verbose=False)
+        box = metrics.box
+        report[name] = {
+            "map50": float(box.map50),
+            "map50_95": float(box.map),
+            "per_class": {model.names[int(c)]: float(m) for c, m in zip(metrics.ap_class_index, box.maps[metrics.ap_class_index])},
+        }
+    print(f"{'source':>8}  {'mAP50':>6}  {'mAP50-95':>8}")
+    for name, row in report.items():
+        print(f"{name:>8}  {row['map50']:6.3f}  {row['map50_95']:8.3f}")
+    output = Path(output) if output else data_yaml.parent / "eval_report.json"
+    output.write_text(json.dumps(report, indent=4))
+    return report
+
+
+# Data yaml of each dataset fetched by data_prep.py
+def default_sources(datasets_dir, yaml_dir):
+    return {name: Path(datasets_dir) / name / spec["yaml"] if spec["yaml"] else Path(yaml_dir) / f"{name}.yaml"
+            for name, spec in DATASETS.items()}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Merge the detector datasets into one class map and data.yaml")
+    parser.add_argument("--datasets-dir", default=os.path.join(os.getcwd(), "datasets"))
+    parser.add_argument("--yaml-dir", default=os.path.join(os.getcwd(), "yaml"))
+    parser.add_argument("--output", default=os.path.join(os.getcwd(), "datasets", "merged"))
+    parser.add_argument("--source", nargs="+", default=[], metavar="NAME=YAML",
+                        help="Use these data yamls instead of the data_prep.py datasets")
+    parser.add_argument("--weights", nargs="+", default=[], metavar="NAME=WEIGHT",
+                        help="Sampling weight per source; 2 repeats it twice per epoch, 0.5 uses half")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--evaluate", metavar="WEIGHTS", help="Only write the per-source eval report for these weights")
+    args = parser.parse_args(argv)
+
+    if args.evaluate:
+        return evaluate_sources(args.evaluate, Path(args.output) / "data.yaml")
+    sources = dict(s.split("=", 1) for s in args.source) if args.source else \
+        default_sources(args.datasets_dir, args.yaml_dir)
+    weights = {k: float(v) for k, v in (w.split("=", 1) for w in args.weights)}
+    unknown = set(weights) - set(sources)
+    if unknown:
+        parser.error(f"--weights for unknown sources: {sorted(unknown)}")
+    return merge_datasets(sources, args.output, weights, seed=args.seed)
+
+
+if __name__ == "__main__":
+    main()
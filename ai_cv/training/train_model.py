@@ -2,10 +2,16 @@ from ultralytics import YOLO
 import os
 import gc
 
-def train_over_dataset(weights, datapath, epochs=200, lr0=0.001, lrf=0.01, batch=8):
+def train_over_dataset(weights, datapath, epochs=200, lr0=0.001, lrf=0.01, batch=8, image_cache=None):
     gc.collect() # clean up memory
     model = YOLO(weights)
+    # With an image cache (data_prep.py --image-cache) epochs read pre-resized pixels instead of decoding JPEGs
+    trainer = None
+    if image_cache:
+        from data_prep import cached_trainer
+        trainer = cached_trainer(image_cache)
     res = model.train(
+        trainer=trainer,
         data=datapath, #change to train dataset
         epochs=epochs,
         device=0, # THIS PART MIGHT NOT WORK ON YOUR SYSTEM -- ENABLES GPU USAGE FOR TRAINING 
@@ -74,16 +80,22 @@ if __name__ == "__main__":
         "filepath": AVCD_path,
         "yamlpath": os.path.join(AVCD_path, 'mydata128.yaml')
     }
-    w5 = os.path.join("runs", "detect", "train7", 'weights', "last.pt" )  # starting weights using yolov5n pretrained weights
     weights = 'yolo11n.pt'  # starting weights using yolov5n pretrained weights
-    # Training over datasets sequentially to continuously train on the same model
-    # Adjust epochs as necessary accdoriing to dataset size and complexity
-    # Trained from smalles to largest dataset to gradually improve model performance
-    # Current traning pipeline introduces a high DGL_loss which could be due to catastrophic forgetting - needs investigation
-    w1 = train_over_dataset(weights, VDalkdict["yamlpath"], epochs=200, lr0=0.001, lrf=0.01) # May need more epochs here
-    w2 = train_over_dataset(w1, PKVDdict["yamlpath"], epochs=200, lr0=0.001, lrf=0.01) # Good as is
-    w3 = train_over_dataset(w2, TVVDdict["yamlpath"], epochs=100, lr0=0.0005, lrf=0.01, batch=8) #Change lr0 to 0.0003?
-    w4 = train_over_dataset(w3, AVCDdict["yamlpath"], epochs=150, lr0=0.0005, lrf=0.01, batch=8) # Good as is
-    w5 = train_over_dataset(w4, yoloVDdict["yamlpath"], epochs=230, lr0=0.0003, lrf=0.01) # Good as is
-    train_over_dataset(w5, TVDCVDdict["yamlpath"], epochs=300, lr0=0.0003, lrf=0.01) # Dataset is of size 12,000 images may need more epoch. Addtionally images in dataset are relitivly small thus a scale factor might be benifiical to reduce DFL loss
+    # One run over all six datasets merged into a single class map (merge_datasets.py), instead of
+    # fine-tuning on each in turn. The sequential runs restarted the optimizer six times and forgot
+    # earlier datasets, which showed up as a high DFL loss
+    # Sampling weights keep the 12,000 image TVDCVD set from drowning out the small ones
+    from merge_datasets import evaluate_sources, merge_datasets
+    sources = {
+        "VDalk": VDalkdict["yamlpath"],
+        "PKVD": PKVDdict["yamlpath"],
+        "TVVD": TVVDdict["yamlpath"],
+        "AVCD": AVCDdict["yamlpath"],
+        "yoloVD": yoloVDdict["yamlpath"],
+        "TVDCVD": TVDCVDdict["yamlpath"],
+    }
+    merged_yaml = merge_datasets(sources, os.path.join(os.getcwd(), "datasets", "merged"), weights={"TVDCVD": 0.5})
+    best = train_over_dataset(weights, str(merged_yaml), epochs=150, lr0=0.001, lrf=0.01)
+    # mAP on the merged val set and on each source's, in datasets/merged/eval_report.json
+    evaluate_sources(best, merged_yaml)
 
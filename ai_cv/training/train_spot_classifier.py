@@ -0,0 +1,168 @@
+import argparse
+import os
+import sys
+import xml.etree.ElementTree as ET
+from pathlib import Path
+
+# Add the parent folder (ai_cv) to the module search path
+sys.path.append(str(Path(__file__).resolve().parents[1]))
+
+import cv2 as cv
+import numpy as np
+import torch
+from torch import nn
+from detection.spot_classifier import CROP_SIZE, SpotNet
+from utilities.spot_warp import SpotWarper
+
+# Labels used by the Kaggle parking-space-detection-dataset (build_lot_test_data.py)
+FREE_LABELS = {"free_parking_space"}
+PARTIAL_LABELS = {"partially_free_parking_space"}
+
+
+"""
+Yield (image path, [polygon points], [occupied 0/1]) per annotated image in
+root/annotations.xml without building the whole XML tree. Partially free
+spots count as occupied, as free with partial_occupied=False, and are left
+out with None.
+"""
+def iter_cvat_images(root, partial_occupied=True):
+    root = Path(root)
+    for _, elem in ET.iterparse(root / "annotations.xml", events=("end",)):
+        if elem.tag != "image":
+            continue
+        polygons, labels = [], []
+        for polygon in elem.findall("polygon"):
+            label = polygon.attrib.get("label", "")
+            if label in PARTIAL_LABELS and partial_occupied is None:
+                continue
+            points = [[float(v) for v in p.split(",")] for p in polygon.attrib.get("points", "").split(";") if "," in p]
+            if len(points) < 3:
+                continue
+            polygons.append(points)
+            labels.append(0 if label in FREE_LABELS or (label in PARTIAL_LABELS and not partial_occupied) else 1)
+        if polygons:
+            yield str(root / elem.attrib["name"]), polygons, labels
+        # Drop the parsed image so memory stays flat over the whole file
+        elem.clear()
+
+
+def load_cvat_dataset(root, partial_occupied=True):
+    # Returns [(image path, [polygon points], [occupied 0/1])] from root/annotations.xml
+    return list(iter_cvat_images(root, partial_occupied))
+
+
+def extract_crops(samples, size=CROP_SIZE):
+    crops, labels, groups = [], [], []
+    for i, (image_path, polygons, occupied) in enumerate(samples):
+        image = cv.imread(image_path)
+        if image is None:
+            print(f"Skipping unreadable image {image_path}")
+            continue
+        crops.append(SpotWarper(polygons, size).warp(image))
+        labels.extend(occupied)
+        groups.extend([i] * len(occupied))
+    if not crops:
+        raise SystemExit("No crops extracted, is the dataset downloaded?")
+    return np.concatenate(crops), np.asarray(labels, dtype=np.float32), np.asarray(groups)
+
+
+def augment(x):
+    # Horizontal flips and brightness/contrast jitter, on a float batch
+    flip = torch.rand(len(x)) < 0.5
+    x[flip] = x[flip].flip(3)
+    gain = torch.empty(len(x), 1, 1, 1).uniform_(0.7, 1.3)
+    bias = torch.empty(len(x), 1, 1, 1).uniform_(-0.15, 0.15)
+    return (x * gain + bias).clamp_(0, 1)
+
+
+def train(crops, labels, groups=None, epochs=15, batch=256, lr=3e-3, width=8, val_split=0.2, seed=0):
+    torch.manual_seed(seed)
+    rng = np.random.default_rng(seed)
+
+    # Split by image so validation crops come from images the model never saw
+    groups = np.arange(len(labels)) if groups is None else groups
+    unique = rng.permutation(np.unique(groups))
+    val_groups = set(unique[:max(1, int(len(unique) * val_split))]) if len(unique) > 1 else set()
+    is_val = np.isin(groups, list(val_groups))
+
+    x = torch.from_numpy(crops).permute(0, 3, 1, 2).float() / 255
+    y = torch.from_numpy(labels)
+    x_train, y_train, x_val, y_val = x[~is_val], y[~is_val], x[is_val], y[is_val]
+    model = SpotNet(width)
+    optimizer = torch.optim.AdamW(model.parameters(), lr=lr, weight_decay=1e-4)
+    scheduler = torch.optim.lr_scheduler.OneCycleLR(optimizer, max_lr=lr, total_steps=epochs * max(1, -(-len(x_train) // batch)))
+    loss_fn = nn.BCEWithLogitsLoss()
+
+    for epoch in range(epochs):
+        model.train()
+        order = torch.randperm(len(x_train))
+        total = 0.0
+        for start in range(0, len(order), batch):
+            idx = order[start:start + batch]
+            loss = loss_fn(model(augment(x_train[idx].clone())), y_train[idx])
+            optimizer.zero_grad()
+            loss.backward()
+            optimizer.step()
+            scheduler.step()
+            total += loss.item() * len(idx)
+        calibrate_batchnorm(model, x_train)
+        val_acc = evaluate(model, x_val, y_val) if len(x_val) else float("nan")
+        print(f"epoch {epoch + 1}/{epochs} loss {total / len(x_train):.4f} val acc {val_acc:.3f}")
+
+    checkpoint = {
+        "state_dict": model.state_dict(),
+        "width": width,
+        "size": crops.shape[1],
+        "val_accuracy": val_acc,
+    }
+    return model, checkpoint
+
+
+def calibrate_batchnorm(model, x, samples=4096):
+    # Recompute BatchNorm running stats as an exact average over training crops;
+    # the momentum estimate lags badly when an epoch is only a few batches
+    bns = [m for m in model.modules() if isinstance(m, nn.BatchNorm2d)]
+    for bn in bns:
+        bn.reset_running_stats()
+        bn.momentum = None
+    model.train()
+    with torch.no_grad():
+        model(x[torch.randperm(len(x))[:samples]])
+    for bn in bns:
+        bn.momentum = 0.1
+
+
+def evaluate(model, x, y):
+    model.eval()
+    with torch.inference_mode():
+        pred = model(x) > 0
+    return float((pred == (y > 0.5)).float().mean())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Train the per-spot occupancy classifier")
+    parser.add_argument("--data", default=os.path.join(os.getcwd(), "tests", "lot_test_data"),
+                        help="Folder with annotations.xml and images (see build_lot_test_data.py)")
+    parser.add_argument("--output", default="spot_classifier.pt")
+    parser.add_argument("--epochs", type=int, default=15)
+    parser.add_argument("--batch", type=int, default=256)
+    parser.add_argument("--lr", type=float, default=3e-3)
+    parser.add_argument("--width", type=int, default=8, help="Channels of the first conv layer")
+    parser.add_argument("--size", type=int, default=CROP_SIZE, help="Crop size in pixels")
+    parser.add_argument("--partial", choices=("occupied", "free", "skip"), default="occupied",
+                        help="How to label partially free spaces")
+    args = parser.parse_args(argv)
+
+    partial = {"occupied": True, "free": False, "skip": None}[args.partial]
+    samples = load_cvat_dataset(args.data, partial)
+    crops, labels, groups = extract_crops(samples, args.size)
+    print(f"{len(crops)} crops from {len(samples)} images, {labels.mean():.0%} occupied")
+
+    _, checkpoint = train(crops, labels, groups, epochs=args.epochs, batch=args.batch, lr=args.lr, width=args.width)
+    torch.save(checkpoint, args.output)
+    print(f"Saved {args.output} (val acc {checkpoint['val_accuracy']:.3f})")
+    return checkpoint
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,420 @@
+# ai_cv/utilities/events.py
+"""
+Event stream output from the CV pipeline.
+
+Events are dicts with a "type" and a "ts" (unix time):
+
+    stream       first event of every stream: camera, lot_id, format version
+    spot         a spot changed: spot_index, spot_id (the backend ParkingSpot
+                 id, if the layout has one), occupied, track_id
+    track_start  a track appeared: track_id, cls, name, bbox
+    track_end    a track has not been seen for a while: same fields, last bbox
+    session      a SessionManager session completed: track_id, start_time,
+                 end_time, duration, cls, name, bbox
+
+EventStream batches events and writes them on a timer (and as soon as a
+batch fills), so the pipeline thread only appends to a list. Two encodings:
+
+    ndjson   one JSON object per line
+    binary   b"PVEV" + version byte, then records of a little-endian u32
+             body length and a body of kind (u8), ts (f64), a fixed struct
+             per kind and an optional UTF-8 tail (names, the stream header's
+             JSON). A spot transition takes 26 bytes.
+
+Outputs are a file, stdout ("-") or a Unix socket ("unix:/path") that a
+consumer listens on, such as the backend's serve_events
+(app/services/event_ingest.py, enabled with CV_EVENTS_SOCKET). The socket is
+reconnected when the consumer restarts, and every connection starts with
+the stream event again. EventDecoder reads either encoding incrementally,
+and tail_events follows a file as it grows.
+"""
+import json
+import logging
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+logger = logging.getLogger("parkvision.events")
+
+MAGIC = b"PVEV"
+VERSION = 1
+
+_LENGTH = struct.Struct("<I")
+_BODY = struct.Struct("<Bd")
+# Fixed part of each kind's body after (kind, ts); the tail is UTF-8
+_KINDS = {
+    "stream": (0, struct.Struct("<")),
+    "spot": (1, struct.Struct("<iiBi")),
+    "track_start": (2, struct.Struct("<ih4f")),
+    "track_end": (3, struct.Struct("<ih4f")),
+    "session": (4, struct.Struct("<idh4f")),
+}
+_NAMES = {code: (name, fixed) for name, (code, fixed) in _KINDS.items()}
+
+
+def _bbox(event):
+    bbox = event.get("bbox") or (0, 0, 0, 0)
+    return [float(v) for v in bbox]
+
+
+def _pack(event):
+    kind = event["type"]
+    code, fixed = _KINDS[kind]
+    if kind == "stream":
+        values, tail = (), {k: v for k, v in event.items() if k not in ("type", "ts")}
+        tail = json.dumps(tail, separators=(",", ":"))
+    elif kind == "spot":
+        values = (event.get("spot_index", -1), _id(event.get("spot_id")), bool(event["occupied"]),
+                  _id(event.get("track_id")))
+        tail = ""
+    elif kind == "session":
+        values = (event["track_id"], event["start_time"], event.get("cls", 0), *_bbox(event))
+        tail = event.get("name") or ""
+    else:
+        values = (event["track_id"], event.get("cls", 0), *_bbox(event))
+        tail = event.get("name") or ""
+    body = _BODY.pack(code, event["ts"]) + fixed.pack(*values) + tail.encode("utf-8")
+    return _LENGTH.pack(len(body)) + body
+
+
+def _id(value):
+    return -1 if value is None else int(value)
+
+
+def _unpack(body):
+    code, ts = _BODY.unpack_from(body)
+    kind, fixed = _NAMES[code]
+    values = fixed.unpack_from(body, _BODY.size)
+    tail = body[_BODY.size + fixed.size:].decode("utf-8")
+    event = {"type": kind, "ts": ts}
+    if kind == "stream":
+        event.update(json.loads(tail))
+    elif kind == "spot":
+        spot_index, spot_id, occupied, track_id = values
+        event.update(spot_index=spot_index, spot_id=None if spot_id < 0 else spot_id, occupied=bool(occupied),
+                     track_id=None if track_id < 0 else track_id)
+    elif kind == "session":
+        track_id, start_time, cls, *bbox = values
+        event.update(track_id=track_id, start_time=start_time, end_time=ts, duration=ts - start_time, cls=cls,
+                     name=tail, bbox=bbox)
+    else:
+        track_id, cls, *bbox = values
+        event.update(track_id=track_id, cls=cls, name=tail, bbox=bbox)
+    return event
+
+
+def _ndjson(event):
+    return (json.dumps(event, separators=(",", ":"), default=_plain) + "\n").encode("utf-8")
+
+
+def _plain(value):
+    # NumPy scalars and arrays from the detector/tracker
+    return value.tolist() if hasattr(value, "tolist") else str(value)
+
+
+ENCODERS = {"ndjson": _ndjson, "binary": _pack}
+
+
+class EventDecoder:
+    """
+    Incremental decoder for either encoding, told apart by the first bytes.
+    feed(data) returns the events completed by `data`; partial records are
+    kept for the next call.
+    """
+
+    def __init__(self):
+        self.format = None
+        self._buf = bytearray()
+
+    def feed(self, data):
+        self._buf += data
+        if self.format is None:
+            if len(self._buf) < len(MAGIC) + 1 and MAGIC.startswith(bytes(self._buf[:len(MAGIC)])):
+                return []
+            if self._buf.startswith(MAGIC):
+                if self._buf[len(MAGIC)] != VERSION:
+                    raise ValueError(f"Unsupported event stream version {self._buf[len(MAGIC)]}")
+                self.format = "binary"
+                del self._buf[:len(MAGIC) + 1]
+            else:
+                self.format = "ndjson"
+        return self._binary() if self.format == "binary" else self._lines()
+
+    def _lines(self):
+        end = self._buf.rfind(b"\n")
+        if end < 0:
+            return []
+        lines, self._buf = bytes(self._buf[:end]), self._buf[end + 1:]
+        return [json.loads(line) for line in lines.split(b"\n") if line.strip()]
+
+    def _binary(self):
+        events, pos = [], 0
+        while len(self._buf) - pos >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(self._buf, pos)
+            if len(self._buf) - pos - _LENGTH.size < length:
+                break
+            start = pos + _LENGTH.size
+            events.append(_unpack(bytes(self._buf[start:start + length])))
+            pos = start + length
+        del self._buf[:pos]
+        return events
+
+
+def read_events(stream, chunk_size=1 << 16):
+    # Events from a binary file object until EOF
+    decoder = EventDecoder()
+    while True:
+        data = stream.read(chunk_size)
+        if not data:
+            return
+        yield from decoder.feed(data)
+
+
+"""
+Follow an event file as the pipeline appends to it, like tail -f. Yields
+events as they are flushed; stops at EOF unless `follow`, and after
+`idle_timeout` seconds without new data if one is given.
+"""
+def tail_events(path, follow=True, poll=0.05, idle_timeout=None):
+    decoder = EventDecoder()
+    with open(path, "rb") as f:
+        idle_since = time.monotonic()
+        while True:
+            data = f.read(1 << 16)
+            if data:
+                idle_since = time.monotonic()
+                yield from decoder.feed(data)
+                continue
+            if not follow or (idle_timeout is not None and time.monotonic() - idle_since > idle_timeout):
+                return
+            time.sleep(poll)
+
+
+class FileOutput:
+    def __init__(self, path):
+        self.file = open(path, "wb")
+
+    def open(self, preamble):
+        self.write(preamble)
+
+    def write(self, data):
+        self.file.write(data)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class StdoutOutput(FileOutput):
+    """
+    Events own stdout: they go to a copy of its descriptor, and anything else
+    written to it meanwhile (ultralytics logs every prediction there) is
+    sent to stderr until close().
+    """
+
+    def __init__(self):
+        sys.stdout.flush()
+        self._saved = os.dup(1)
+        self.file = os.fdopen(os.dup(1), "wb")
+        os.dup2(2, 1)
+
+    def close(self):
+        self.file.close()
+        sys.stdout.flush()
+        os.dup2(self._saved, 1)
+        os.close(self._saved)
+
+
+class UnixSocketOutput:
+    """Connects to a listening consumer; reconnects (and resends the preamble) after it goes away."""
+
+    def __init__(self, path, timeout=2.0):
+        self.path = path
+        self.timeout = timeout
+        self.preamble = b""
+        self.sock = None
+
+    def open(self, preamble):
+        self.preamble = preamble
+
+    def write(self, data):
+        if self.sock is None:
+            sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            sock.settimeout(self.timeout)
+            try:
+                sock.connect(self.path)
+                sock.sendall(self.preamble)
+            except OSError:
+                sock.close()
+                raise
+            self.sock = sock
+        try:
+            self.sock.sendall(data)
+        except OSError:
+            self.sock.close()
+            self.sock = None
+            raise
+
+    def close(self):
+        if self.sock is not None:
+            self.sock.close()
+            self.sock = None
+
+
+def open_output(target):
+    # "-" for stdout, "unix:/path" for a Unix socket, anything else is a file path
+    target = str(target)
+    if target == "-":
+        return StdoutOutput()
+    if target.startswith("unix:"):
+        return UnixSocketOutput(target[len("unix:"):])
+    return FileOutput(target)
+
+
+class EventStream:
+    """
+    output: an output above, or a target for open_output.
+    header: extra fields of the stream event (e.g. camera, lot_id).
+    Batches go out every `flush_interval` seconds or when `max_batch` events
+    are waiting. If the output fails (no consumer on the socket yet), events
+    are kept and retried, up to `max_pending`; older ones are then dropped
+    and counted in `dropped`. With `metrics` (a CameraMetrics) the number of
+    waiting events is reported as the "events" queue depth.
+    """
+
+    def __init__(self, output, format="ndjson", flush_interval=0.2, max_batch=512, max_pending=100_000, header=None,
+                 metrics=None):
+        if format not in ENCODERS:
+            raise ValueError(f"Unknown event format {format}, use one of {', '.join(ENCODERS)}")
+        self.output = output if hasattr(output, "write") else open_output(output)
+        self.format = format
+        self.encode = ENCODERS[format]
+        self.flush_interval = flush_interval
+        self.max_batch = max_batch
+        self.max_pending = max_pending
+        self.metrics = metrics
+        self.written = 0
+        self.dropped = 0
+        self._pending = []
+        self._lock = threading.Lock()
+        self._wake = threading.Event()
+        self._closed = threading.Event()
+
+        stream = dict(type="stream", ts=time.time(), version=VERSION, pid=os.getpid(), **(header or {}))
+        preamble = (MAGIC + bytes([VERSION]) if format == "binary" else b"") + self.encode(stream)
+        self.output.open(preamble)
+        self._thread = threading.Thread(target=self._run, name="events", daemon=True)
+        self._thread.start()
+
+    def emit(self, event):
+        with self._lock:
+            self._pending.append(event)
+            if len(self._pending) > self.max_pending:
+                excess = len(self._pending) - self.max_pending
+                del self._pending[:excess]
+                self.dropped += excess
+            depth = len(self._pending)
+        if self.metrics is not None:
+            self.metrics.set_queue_depth("events", depth)
+        if depth >= self.max_batch:
+            self._wake.set()
+
+    def flush(self):
+        with self._lock:
+            batch, self._pending = self._pending, []
+        if not batch:
+            return True
+        data = b"".join(self.encode(event) for event in batch)
+        try:
+            self.output.write(data)
+        except OSError as e:
+            logger.debug(f"Event output unavailable ({e}), keeping {len(batch)} events")
+            with self._lock:
+                self._pending[:0] = batch
+                depth = len(self._pending)
+            if self.metrics is not None:
+                self.metrics.set_queue_depth("events", depth)
+            return False
+        self.written += len(batch)
+        if self.metrics is not None:
+            with self._lock:
+                depth = len(self._pending)
+            self.metrics.set_queue_depth("events", depth)
+        return True
+
+    def _run(self):
+        while not self._closed.is_set():
+            self._wake.wait(self.flush_interval)
+            self._wake.clear()
+            self.flush()
+
+    def close(self):
+        self._closed.set()
+        self._wake.set()
+        self._thread.join()
+        if not self.flush():
+            logger.warning(f"{len(self._pending)} events could not be written")
+        self.output.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class PipelineEvents:
+    """
+    Turns per-frame pipeline results into events: track births and deaths
+    from the tracker's output, spot transitions from LotDetector's
+    occupied/unoccupied lists, and completed SessionManager sessions. A
+    track ends after `track_timeout` seconds unseen, so a missed frame
+    doesn't end and restart it.
+    """
+
+    def __init__(self, stream, track_timeout=2.0):
+        self.stream = stream
+        self.track_timeout = track_timeout
+        self.tracks = {}
+        self.spots = {}
+
+    def update_tracks(self, tracks, timestamp):
+        for t in tracks:
+            tid = int(t["track_id"])
+            fields = {"track_id": tid, "cls": int(t.get("cls", 0)), "name": t.get("name", ""),
+                      "bbox": [float(v) for v in t["bbox"]]}
+            if tid not in self.tracks:
+                self.stream.emit({"type": "track_start", "ts": timestamp, **fields})
+            self.tracks[tid] = (timestamp, fields)
+        for tid, (last_seen, fields) in list(self.tracks.items()):
+            if timestamp - last_seen > self.track_timeout:
+                self.stream.emit({"type": "track_end", "ts": last_seen, **fields})
+                del self.tracks[tid]
+
+    """
+    `lots` is the list LotDetector matches against; `occupied` holds its
+    entries' bboxes (LotDetector output), which identifies the spots.
+    """
+    def update_spots(self, lots, occupied, timestamp):
+        taken = {id(spot["bbox"]): spot for spot in occupied}
+        for i, lot in enumerate(lots):
+            spot = taken.get(id(lot["bbox"]))
+            state = spot is not None
+            if self.spots.get(i) == state:
+                continue
+            self.spots[i] = state
+            self.stream.emit({"type": "spot", "ts": timestamp, "spot_index": i, "spot_id": lot.get("spot_id"),
+                              "occupied": state, "track_id": spot.get("track_id") if spot else None})
+
+    def sessions(self, completed):
+        for sess in completed:
+            self.stream.emit({"type": "session", "ts": sess["end_time"], **sess})
+
+    def close(self):
+        # Remaining tracks end with the stream
+        for tid, (last_seen, fields) in self.tracks.items():
+            self.stream.emit({"type": "track_end", "ts": last_seen, **fields})
+        self.tracks.clear()
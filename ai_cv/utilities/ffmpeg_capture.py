@@ -0,0 +1,178 @@
+# ai_cv/utilities/ffmpeg_capture.py
+"""
+Decode a video source with an ffmpeg subprocess instead of OpenCV.
+
+ffmpeg does the scaling, pixel format conversion and frame rate reduction
+while decoding and writes raw frames to a pipe, which are read straight
+into NumPy buffers. Downscaling a 1080p camera to the detector's size in
+the decoder saves the full-resolution BGR conversion and the copies around
+it. keyframes_only decodes nothing but keyframes, which is enough for a
+parking lot that changes over seconds.
+
+FFmpegCapture has the parts of the cv.VideoCapture interface FrameReader
+uses, so it plugs in as FrameReader's open_fn:
+
+    reader = FrameReader(url, open_fn=partial(open_ffmpeg, width=640, fps=2))
+
+Frames are in the decoded (scaled) size; lot polygons have to be in the
+same coordinates.
+"""
+import logging
+import os
+import re
+import shutil
+import subprocess
+import threading
+from collections import deque
+
+import cv2 as cv
+import numpy as np
+
+logger = logging.getLogger("parkvision.ffmpeg")
+
+FFMPEG = os.getenv("PARKVISION_FFMPEG", "ffmpeg")
+CHANNELS = {"bgr24": 3, "rgb24": 3, "gray": 1}
+
+
+def ffmpeg_available(ffmpeg=FFMPEG):
+    return shutil.which(ffmpeg) is not None
+
+
+"""
+The ffmpeg command line for `source`. width/height scale in the decoder
+(one of them alone keeps the aspect ratio), fps resamples to a fixed rate,
+keyframes_only skips every non-key frame before decoding it.
+"""
+def ffmpeg_command(source, width=None, height=None, fps=None, keyframes_only=False, pix_fmt="bgr24", hwaccel=None,
+                   timeout=10.0, ffmpeg=FFMPEG):
+    if pix_fmt not in CHANNELS:
+        raise ValueError(f"Unsupported pixel format {pix_fmt}, use one of {', '.join(CHANNELS)}")
+    if keyframes_only and fps:
+        # The fps filter would repeat keyframes to fill the rate
+        raise ValueError("keyframes_only and fps are alternatives, pick one")
+    source = str(source)
+    cmd = [ffmpeg, "-hide_banner", "-nostdin", "-nostats", "-loglevel", "info"]
+    if source.isdigit():
+        # Camera index, as for cv.VideoCapture
+        cmd += ["-f", "v4l2"]
+        source = f"/dev/video{source}"
+    elif "://" in source:
+        cmd += ["-rw_timeout", str(int(timeout * 1e6))]
+        if source.startswith("rtsp://"):
+            cmd += ["-rtsp_transport", "tcp"]
+    if hwaccel:
+        cmd += ["-hwaccel", hwaccel]
+    if keyframes_only:
+        cmd += ["-skip_frame", "nokey"]
+    cmd += ["-i", source, "-an", "-sn", "-dn"]
+
+    filters = []
+    if fps:
+        filters.append(f"fps={fps}")
+    if width or height:
+        # -2 keeps the aspect ratio at an even size
+        filters.append(f"scale={int(width or -2)}:{int(height or -2)}")
+    if filters:
+        cmd += ["-vf", ",".join(filters)]
+    if keyframes_only:
+        cmd += ["-vsync", "0"]
+    return cmd + ["-f", "rawvideo", "-pix_fmt", pix_fmt, "pipe:1"]
+
+
+class FFmpegCapture:
+    """
+    Reads raw frames from an ffmpeg subprocess. The output size and rate are
+    taken from ffmpeg's own description of its output stream, so they are
+    known without probing the source first. read(image) decodes into
+    `image` when it has the frame's shape, otherwise into a new array.
+    """
+
+    def __init__(self, source, width=None, height=None, fps=None, keyframes_only=False, pix_fmt="bgr24",
+                 hwaccel=None, timeout=10.0, ffmpeg=FFMPEG):
+        if not ffmpeg_available(ffmpeg):
+            raise RuntimeError(f"{ffmpeg} not found; install ffmpeg or set PARKVISION_FFMPEG")
+        self.source = source
+        self.keyframes_only = keyframes_only
+        self.timeout = timeout
+        self.channels = CHANNELS[pix_fmt]
+        self.width = self.height = None
+        self.fps = float(fps) if fps else 0.0
+        self.frames = 0
+        self._log = deque(maxlen=20)
+        self._header = threading.Event()
+        self.cmd = ffmpeg_command(source, width, height, fps, keyframes_only, pix_fmt, hwaccel, timeout, ffmpeg)
+        self.proc = subprocess.Popen(self.cmd, stdout=subprocess.PIPE, stderr=subprocess.PIPE, bufsize=0)
+        self._stderr = threading.Thread(target=self._read_stderr, name="ffmpeg-stderr", daemon=True)
+        self._stderr.start()
+
+    def _read_stderr(self):
+        # Parses the output stream's size and rate, then keeps draining so ffmpeg never blocks on it
+        in_output = False
+        for raw in iter(self.proc.stderr.readline, b""):
+            line = raw.decode("utf-8", "replace").rstrip()
+            self._log.append(line)
+            if line.startswith("Output #0"):
+                in_output = True
+            elif in_output and not self._header.is_set() and "Video: rawvideo" in line:
+                size = re.search(r", (\d+)x(\d+)\b", line)
+                rate = re.search(r", ([\d.]+) fps", line)
+                if size:
+                    self.width, self.height = int(size.group(1)), int(size.group(2))
+                    if rate and not self.fps and not self.keyframes_only:
+                        self.fps = float(rate.group(1))
+                    self._header.set()
+        self._header.set()
+
+    @property
+    def frame_bytes(self):
+        return self.width * self.height * self.channels
+
+    @property
+    def shape(self):
+        return (self.height, self.width, self.channels) if self.channels > 1 else (self.height, self.width)
+
+    def isOpened(self):
+        self._header.wait(self.timeout)
+        if self.width is None:
+            if self.proc.poll() is not None:
+                logger.warning(f"ffmpeg could not open {self.source}: {' | '.join(list(self._log)[-3:])}")
+            return False
+        return True
+
+    def read(self, image=None):
+        if not self.isOpened():
+            return False, None
+        if image is None or image.shape != self.shape or image.dtype != np.uint8 or not image.flags.c_contiguous:
+            image = np.empty(self.shape, dtype=np.uint8)
+        view = memoryview(image).cast("B")
+        filled = 0
+        while filled < self.frame_bytes:
+            n = self.proc.stdout.readinto(view[filled:])
+            if not n:
+                # End of stream, or ffmpeg died mid-frame
+                return False, None
+            filled += n
+        self.frames += 1
+        return True, image
+
+    def get(self, prop):
+        if prop == cv.CAP_PROP_FPS:
+            return self.fps
+        if prop == cv.CAP_PROP_FRAME_WIDTH:
+            return float(self.width or 0)
+        if prop == cv.CAP_PROP_FRAME_HEIGHT:
+            return float(self.height or 0)
+        return 0.0
+
+    def release(self):
+        if self.proc.poll() is None:
+            self.proc.kill()
+        self.proc.wait()
+        self.proc.stdout.close()
+        self._stderr.join(timeout=1)
+        self.proc.stderr.close()
+
+
+def open_ffmpeg(source, timeout=10.0, **options):
+    # FrameReader open_fn signature; options are FFmpegCapture's
+    return FFmpegCapture(source, timeout=timeout, **options)
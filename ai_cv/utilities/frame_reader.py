@@ -0,0 +1,183 @@
+# ai_cv/utilities/frame_reader.py
+"""
+Decode a video source on its own thread and hand out only the newest frame.
+
+cv.VideoCapture buffers frames, so a loop that falls behind a live camera
+keeps analyzing frames from seconds ago. FrameReader reads continuously and
+keeps one slot: a frame nobody took before the next one arrived is dropped
+and counted (CameraMetrics.drop). When a live stream fails to open or stops
+delivering frames, it reconnects with exponential backoff instead of ending.
+
+With drop=False it reads ahead by one frame and waits for the consumer, so
+every frame of a file is still processed in order.
+
+Frames handed out belong to the caller. The buffers of dropped frames are
+decoded into again (cap.read(image)), so skipping frames allocates nothing.
+"""
+import logging
+import threading
+import time
+from collections import namedtuple
+
+import cv2 as cv
+
+logger = logging.getLogger("parkvision.reader")
+
+# image, wall-clock time it was decoded, and its index in the source (counting dropped frames)
+Frame = namedtuple("Frame", "image timestamp index")
+
+
+def is_live(source):
+    # Camera indexes and stream URLs are live; anything else is a file
+    return isinstance(source, int) or (isinstance(source, str) and (source.isdigit() or "://" in source))
+
+
+def open_capture(source, timeout=10.0):
+    if isinstance(source, str) and "://" in source:
+        # Without timeouts a dead RTSP/HTTP server blocks open() and read() for a long time
+        ms = int(timeout * 1000)
+        return cv.VideoCapture(source, cv.CAP_FFMPEG, [cv.CAP_PROP_OPEN_TIMEOUT_MSEC, ms, cv.CAP_PROP_READ_TIMEOUT_MSEC, ms])
+    return cv.VideoCapture(int(source) if isinstance(source, str) and source.isdigit() else source)
+
+
+class FrameReader:
+    """
+    source: file path, camera index or stream URL.
+    drop: keep only the newest frame (default: for live sources).
+    reconnect: reopen the source when it fails (default: for live sources);
+        retries back off from `backoff` to `max_backoff` seconds and give up
+        after `max_retries` failed attempts in a row (None: never).
+    realtime: pace a file at its frame rate, like a camera would deliver it.
+    """
+
+    def __init__(self, source, drop=None, reconnect=None, realtime=False, metrics=None, backoff=0.5,
+                 max_backoff=30.0, max_retries=None, timeout=10.0, open_fn=open_capture):
+        live = is_live(source)
+        self.source = source
+        self.drop = live if drop is None else drop
+        self.reconnect = live if reconnect is None else reconnect
+        self.realtime = realtime
+        self.metrics = metrics
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.max_retries = max_retries
+        self.timeout = timeout
+        self.open_fn = open_fn
+
+        self.decoded = 0
+        self.dropped = 0
+        self.reconnects = 0
+        self.fps = None
+        self._slot = None
+        self._spare = []
+        self._index = 0
+        self._ended = False
+        self._closed = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._run, name="frame-reader", daemon=True)
+        self._thread.start()
+
+    def _open(self):
+        cap = self.open_fn(self.source, self.timeout)
+        if not cap.isOpened():
+            cap.release()
+            return None
+        self.fps = cap.get(cv.CAP_PROP_FPS) or None
+        return cap
+
+    def _put(self, frame):
+        with self._cond:
+            if not self.drop:
+                self._cond.wait_for(lambda: self._slot is None or self._closed.is_set())
+            elif self._slot is not None:
+                self.dropped += 1
+                if self.metrics is not None:
+                    self.metrics.drop()
+                # Nobody saw it, its buffer can take the next frame
+                self._spare.append(self._slot.image)
+            self._slot = frame
+            if self.metrics is not None:
+                self.metrics.set_queue_depth("frames", 1)
+            self._cond.notify_all()
+
+    def _read_until_failure(self, cap):
+        started, first = time.perf_counter(), self._index
+        while not self._closed.is_set():
+            with self._cond:
+                spare = self._spare.pop() if self._spare else None
+            start = time.perf_counter()
+            ok, image = cap.read(spare)
+            if not ok:
+                return
+            if self.metrics is not None:
+                self.metrics.observe("decode", time.perf_counter() - start)
+            if self.realtime and self.fps:
+                # Hold the frame until the moment it would have been captured
+                delay = started + (self._index - first) / self.fps - time.perf_counter()
+                if delay > 0 and self._closed.wait(delay):
+                    return
+            self._put(Frame(image, time.time(), self._index))
+            self._index += 1
+            self.decoded += 1
+
+    def _run(self):
+        failures = 0
+        try:
+            while not self._closed.is_set():
+                cap = self._open()
+                if cap is not None:
+                    decoded = self.decoded
+                    try:
+                        self._read_until_failure(cap)
+                    finally:
+                        cap.release()
+                    if self.decoded > decoded:
+                        failures = 0
+                if self._closed.is_set() or not self.reconnect:
+                    return
+                failures += 1
+                if self.max_retries is not None and failures > self.max_retries:
+                    logger.error(f"Giving up on {self.source} after {failures - 1} reconnect attempts")
+                    return
+                delay = min(self.max_backoff, self.backoff * 2 ** (failures - 1))
+                logger.warning(f"Lost {self.source}, reconnecting in {delay:.1f}s")
+                if self._closed.wait(delay):
+                    return
+                self.reconnects += 1
+        finally:
+            with self._cond:
+                self._ended = True
+                self._cond.notify_all()
+
+    """
+    Wait for a frame newer than the last one returned. Returns a Frame, or
+    None once the source has ended (or `timeout` seconds passed).
+    """
+    def read(self, timeout=None):
+        with self._cond:
+            if not self._cond.wait_for(lambda: self._slot is not None or self._ended, timeout):
+                return None
+            frame, self._slot = self._slot, None
+            if self.metrics is not None:
+                self.metrics.set_queue_depth("frames", 0)
+            self._cond.notify_all()
+            return frame
+
+    def __iter__(self):
+        while True:
+            frame = self.read()
+            if frame is None:
+                return
+            yield frame
+
+    def close(self):
+        self._closed.set()
+        with self._cond:
+            self._cond.notify_all()
+        self._thread.join()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -0,0 +1,327 @@
+# ai_cv/utilities/metrics.py
+"""
+Low-overhead pipeline metrics.
+
+Each camera gets a CameraMetrics with one fixed-bucket histogram per stage
+plus frame, drop and queue-depth counters. Recording is a bisect and a few
+integer adds, so it can stay on in production. The registry renders the
+Prometheus text format for a /metrics endpoint and a compact snapshot for a
+periodic JSON log line.
+"""
+import hmac
+import json
+import logging
+import math
+import threading
+import time
+from bisect import bisect_left
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+# Stage latency buckets in seconds: 10us doubling up to ~10s
+DEFAULT_BUCKETS = tuple(0.00001 * 2 ** i for i in range(21))
+
+logger = logging.getLogger("parkvision.metrics")
+
+
+class Histogram:
+    """Cumulative-bucket histogram (Prometheus semantics) with quantile estimates."""
+
+    __slots__ = ("bounds", "counts", "sum", "count", "_lock")
+
+    def __init__(self, bounds=DEFAULT_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)
+        self.sum = 0.0
+        self.count = 0
+        self._lock = threading.Lock()
+
+    def observe(self, value):
+        i = bisect_left(self.bounds, value)
+        with self._lock:
+            self.counts[i] += 1
+            self.sum += value
+            self.count += 1
+
+    def quantile(self, q):
+        with self._lock:
+            counts, total = list(self.counts), self.count
+        if total == 0:
+            return None
+        target = q * total
+        seen = 0
+        for i, c in enumerate(counts):
+            if c and seen + c >= target:
+                if i == len(self.bounds):
+                    return self.bounds[-1]
+                lower = self.bounds[i - 1] if i else 0.0
+                # Assume values are spread evenly inside the bucket
+                return lower + (self.bounds[i] - lower) * (target - seen) / c
+            seen += c
+        return self.bounds[-1]
+
+
+# Thread id -> stage currently running on it. Only maintained while a
+# profiler is sampling (see utilities/profiler.py), otherwise the timers
+# skip it entirely.
+active_stages = {}
+_track_stages = False
+
+
+def track_stages(enabled):
+    global _track_stages
+    _track_stages = enabled
+    if not enabled:
+        active_stages.clear()
+
+
+class _StageTimer:
+    __slots__ = ("hist", "name", "start", "_outer")
+
+    def __init__(self, hist, name):
+        self.hist = hist
+        self.name = name
+        self.start = 0.0
+        self._outer = None
+
+    def __enter__(self):
+        if _track_stages:
+            tid = threading.get_ident()
+            self._outer = active_stages.get(tid)
+            active_stages[tid] = self.name
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.hist.observe(time.perf_counter() - self.start)
+        if _track_stages:
+            tid = threading.get_ident()
+            if self._outer is None:
+                active_stages.pop(tid, None)
+            else:
+                active_stages[tid] = self._outer
+            self._outer = None
+        return False
+
+
+class CameraMetrics:
+    """
+    Metrics for one camera's pipeline. Stage timers are reused between
+    frames, so a CameraMetrics should be driven by one pipeline thread;
+    queue depths and drops may be reported from any thread.
+    """
+
+    def __init__(self, camera, buckets=DEFAULT_BUCKETS):
+        self.camera = camera
+        self.buckets = buckets
+        self.stages = {}
+        self._timers = {}
+        self.frames = 0
+        self.dropped = 0
+        self.fps = 0.0
+        self.queues = {}
+        self._window_start = time.perf_counter()
+        self._window_frames = 0
+
+    def histogram(self, stage):
+        hist = self.stages.get(stage)
+        if hist is None:
+            hist = self.stages[stage] = Histogram(self.buckets)
+        return hist
+
+    # with metrics.stage("detect"): ...
+    def stage(self, name):
+        timer = self._timers.get(name)
+        if timer is None:
+            timer = self._timers[name] = _StageTimer(self.histogram(name), name)
+        return timer
+
+    def observe(self, stage, seconds):
+        self.histogram(stage).observe(seconds)
+
+    def frame_done(self):
+        self.frames += 1
+        self._window_frames += 1
+        now = time.perf_counter()
+        elapsed = now - self._window_start
+        if elapsed >= 1.0:
+            self.fps = self._window_frames / elapsed
+            self._window_start = now
+            self._window_frames = 0
+
+    def drop(self, n=1):
+        self.dropped += n
+
+    def set_queue_depth(self, queue, depth):
+        self.queues[queue] = depth
+
+    def snapshot(self):
+        stages = {}
+        for name, hist in list(self.stages.items()):
+            if hist.count:
+                stages[name] = {
+                    "count": hist.count,
+                    "mean_ms": round(hist.sum / hist.count * 1000, 3),
+                    "p50_ms": round(hist.quantile(0.50) * 1000, 3),
+                    "p95_ms": round(hist.quantile(0.95) * 1000, 3),
+                    "p99_ms": round(hist.quantile(0.99) * 1000, 3),
+                }
+        return {
+            "fps": round(self.fps, 2),
+            "frames": self.frames,
+            "dropped": self.dropped,
+            "queues": dict(self.queues),
+            "stages": stages,
+        }
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def _labels(**labels):
+    return ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items())
+
+
+class MetricsRegistry:
+    def __init__(self, buckets=DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self._cameras = {}
+        self._lock = threading.Lock()
+
+    def camera(self, name):
+        name = str(name)
+        with self._lock:
+            metrics = self._cameras.get(name)
+            if metrics is None:
+                metrics = self._cameras[name] = CameraMetrics(name, self.buckets)
+            return metrics
+
+    def cameras(self):
+        with self._lock:
+            return list(self._cameras.values())
+
+    def render_prometheus(self):
+        cameras = self.cameras()
+        lines = [
+            "# HELP parkvision_stage_seconds Time spent in each pipeline stage per frame",
+            "# TYPE parkvision_stage_seconds histogram",
+        ]
+        for cam in cameras:
+            for stage, hist in list(cam.stages.items()):
+                with hist._lock:
+                    counts, total, hsum = list(hist.counts), hist.count, hist.sum
+                cumulative = 0
+                for bound, c in zip(hist.bounds, counts):
+                    cumulative += c
+                    lines.append(f'parkvision_stage_seconds_bucket{{{_labels(camera=cam.camera, stage=stage)},le="{bound:.6g}"}} {cumulative}')
+                lines.append(f'parkvision_stage_seconds_bucket{{{_labels(camera=cam.camera, stage=stage)},le="+Inf"}} {total}')
+                lines.append(f"parkvision_stage_seconds_sum{{{_labels(camera=cam.camera, stage=stage)}}} {hsum:.9g}")
+                lines.append(f"parkvision_stage_seconds_count{{{_labels(camera=cam.camera, stage=stage)}}} {total}")
+
+        lines += ["# HELP parkvision_frames_total Frames processed", "# TYPE parkvision_frames_total counter"]
+        lines += [f"parkvision_frames_total{{{_labels(camera=c.camera)}}} {c.frames}" for c in cameras]
+        lines += ["# HELP parkvision_frames_dropped_total Frames skipped or discarded",
+                  "# TYPE parkvision_frames_dropped_total counter"]
+        lines += [f"parkvision_frames_dropped_total{{{_labels(camera=c.camera)}}} {c.dropped}" for c in cameras]
+        lines += ["# HELP parkvision_fps Frames processed per second", "# TYPE parkvision_fps gauge"]
+        lines += [f"parkvision_fps{{{_labels(camera=c.camera)}}} {c.fps:.3f}" for c in cameras]
+        lines += ["# HELP parkvision_queue_depth Items waiting in a pipeline queue", "# TYPE parkvision_queue_depth gauge"]
+        for c in cameras:
+            for queue, depth in list(c.queues.items()):
+                lines.append(f"parkvision_queue_depth{{{_labels(camera=c.camera, queue=queue)}}} {depth}")
+        return "\n".join(lines) + "\n"
+
+    def snapshot(self):
+        return {c.camera: c.snapshot() for c in self.cameras()}
+
+
+# Process-wide registry used by the pipelines
+registry = MetricsRegistry()
+
+LOOPBACK_HOSTS = ("127.0.0.1", "localhost", "::1")
+
+
+"""
+Serve registry.render_prometheus() at /metrics from a daemon thread.
+With `profile_dir` set, POST /debug/profile?seconds=N also runs the
+sampling profiler and returns its per-stage table. Binds to loopback by
+default; the profile endpoint on any other interface needs `profile_token`,
+sent as "Authorization: Bearer <token>".
+Returns the server; call shutdown() on it to stop.
+"""
+def serve_metrics(port, host="127.0.0.1", metrics=None, profile_dir=None, profile_token=None):
+    metrics = metrics or registry
+    if profile_dir and not profile_token and host not in LOOPBACK_HOSTS:
+        raise ValueError(f"Profiling on {host} needs a profile token; bind to 127.0.0.1 or pass one")
+
+    class Handler(BaseHTTPRequestHandler):
+        def _send(self, status, body, content_type="text/plain; charset=utf-8"):
+            body = body.encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path.split("?")[0] != "/metrics":
+                self.send_error(404)
+                return
+            self._send(200, metrics.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+
+        def do_POST(self):
+            url = urlsplit(self.path)
+            if url.path != "/debug/profile" or not profile_dir:
+                self.send_error(404)
+                return
+            if profile_token:
+                auth = self.headers.get("Authorization", "")
+                if not hmac.compare_digest(auth.encode("utf-8"), f"Bearer {profile_token}".encode("utf-8")):
+                    self.send_error(403)
+                    return
+            from utilities.profiler import ProfilerBusy, profile_to_dir
+
+            try:
+                seconds = float(parse_qs(url.query).get("seconds", ["10"])[0])
+            except ValueError:
+                seconds = None
+            if seconds is None or not math.isfinite(seconds) or seconds <= 0:
+                self.send_error(400, "seconds must be a positive number")
+                return
+            seconds = min(seconds, 300.0)
+            try:
+                profile, folded, table = profile_to_dir(profile_dir, seconds)
+            except ProfilerBusy as e:
+                self.send_error(409, str(e))
+                return
+            self._send(200, f"{folded}\n{table}\n\n{profile.format_table()}")
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer((host, port), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, name="metrics-http", daemon=True).start()
+    return server
+
+
+class JsonMetricsLogger(threading.Thread):
+    """Emits one JSON line with every camera's snapshot each `interval` seconds."""
+
+    def __init__(self, interval=30.0, metrics=None, log=None):
+        super().__init__(name="metrics-log", daemon=True)
+        self.interval = interval
+        self.metrics = metrics or registry
+        self.log = log or logger
+        self._stopped = threading.Event()
+
+    def emit(self):
+        self.log.info(json.dumps({"ts": time.time(), "metrics": self.metrics.snapshot()}, separators=(",", ":")))
+
+    def run(self):
+        while not self._stopped.wait(self.interval):
+            self.emit()
+
+    def stop(self):
+        self._stopped.set()
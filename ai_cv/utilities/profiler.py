@@ -0,0 +1,160 @@
+# ai_cv/utilities/profiler.py
+"""
+On-demand sampling profiler for running pipelines.
+
+Nothing runs until a profile is requested (SIGUSR1 or POST /debug/profile
+on the metrics port). A profile samples the Python stack of every pipeline
+thread with sys._current_frames() for N seconds, tags each sample with the
+metrics stage the thread was in, and writes:
+
+    <prefix>.folded   collapsed stacks for flamegraph.pl / speedscope
+    <prefix>.txt      top-N functions by self samples for each stage
+"""
+import logging
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, defaultdict
+
+from utilities import metrics
+
+logger = logging.getLogger("parkvision.profiler")
+
+# Helper threads that are never interesting to sample
+IGNORED_THREADS = ("metrics-http", "metrics-log", "profiler")
+
+_running = threading.Lock()
+
+
+class ProfilerBusy(RuntimeError):
+    pass
+
+
+def _frame_label(code):
+    return f"{os.path.basename(code.co_filename)}:{code.co_name}:{code.co_firstlineno}"
+
+
+class Profile:
+    def __init__(self, samples, interval, duration):
+        # (thread name, stage, stack of code objects root first) -> sample count
+        self.samples = samples
+        self.interval = interval
+        self.duration = duration
+
+    @property
+    def total(self):
+        return sum(self.samples.values())
+
+    def collapsed(self):
+        merged = Counter()
+        for (thread, stage, stack), count in self.samples.items():
+            frames = ";".join(_frame_label(code) for code in stack)
+            merged[f"{thread};[{stage}];{frames}"] += count
+        return [f"{key} {count}" for key, count in merged.most_common()]
+
+    def top(self, n=15):
+        by_stage = defaultdict(lambda: [Counter(), Counter(), 0])
+        for (_, stage, stack), count in self.samples.items():
+            self_counts, total_counts, _ = entry = by_stage[stage]
+            entry[2] += count
+            if stack:
+                self_counts[_frame_label(stack[-1])] += count
+            for label in {_frame_label(code) for code in stack}:
+                total_counts[label] += count
+        return {
+            stage: {
+                "samples": samples,
+                "functions": [
+                    {"function": label, "self": count, "total": total_counts[label]}
+                    for label, count in self_counts.most_common(n)
+                ],
+            }
+            for stage, (self_counts, total_counts, samples) in sorted(by_stage.items(), key=lambda kv: -kv[1][2])
+        }
+
+    def format_table(self, n=15):
+        lines = [f"{self.total} samples over {self.duration:.1f}s ({self.interval * 1000:.1f}ms interval)"]
+        for stage, info in self.top(n).items():
+            lines.append("")
+            lines.append(f"[{stage}] {info['samples']} samples ({info['samples'] / max(1, self.total):.0%})")
+            lines.append(f"  {'self%':>6} {'total%':>7}  function")
+            for f in info["functions"]:
+                lines.append(f"  {f['self'] / info['samples']:>6.1%} {f['total'] / info['samples']:>7.1%}  {f['function']}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, out_dir, prefix=None, n=15):
+        os.makedirs(out_dir, exist_ok=True)
+        prefix = os.path.join(out_dir, prefix or time.strftime("profile-%Y%m%d-%H%M%S"))
+        with open(prefix + ".folded", "w") as f:
+            f.write("\n".join(self.collapsed()) + "\n")
+        with open(prefix + ".txt", "w") as f:
+            f.write(self.format_table(n))
+        return prefix + ".folded", prefix + ".txt"
+
+
+"""
+Sample all pipeline threads (or only those named in `threads`) for
+`duration` seconds. Raises ProfilerBusy if another profile is running.
+"""
+def sample(duration, interval=0.005, threads=None):
+    if not _running.acquire(blocking=False):
+        raise ProfilerBusy("A profile is already running")
+    me = threading.get_ident()
+    samples = Counter()
+    metrics.track_stages(True)
+    try:
+        start = time.perf_counter()
+        deadline = start + duration
+        while time.perf_counter() < deadline:
+            names = {t.ident: t.name for t in threading.enumerate()}
+            for tid, frame in sys._current_frames().items():
+                name = names.get(tid, str(tid))
+                if tid == me or name in IGNORED_THREADS or (threads and name not in threads):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame.f_code)
+                    frame = frame.f_back
+                stack.reverse()
+                samples[(name, metrics.active_stages.get(tid, "-"), tuple(stack))] += 1
+            time.sleep(interval)
+        return Profile(samples, interval, time.perf_counter() - start)
+    finally:
+        metrics.track_stages(False)
+        _running.release()
+
+
+def profile_to_dir(out_dir, duration=10.0, interval=0.005, n=15):
+    profile = sample(duration, interval)
+    folded, table = profile.write(out_dir, n=n)
+    logger.info(f"Profile written to {folded} and {table}")
+    return profile, folded, table
+
+
+"""
+Profile for `duration` seconds in the background whenever the process
+receives `signum` (SIGUSR1 by default): kill -USR1 <pid>
+"""
+def install_signal_handler(out_dir, duration=10.0, signum=None):
+    signum = signum or getattr(signal, "SIGUSR1", None)
+    if signum is None:
+        logger.warning("Signal-triggered profiling is not available on this platform")
+        return False
+    if threading.current_thread() is not threading.main_thread():
+        # signal.signal() only works there; the caller's entry point must install it
+        logger.warning("Signal-triggered profiling can only be installed from the main thread")
+        return False
+
+    def run():
+        try:
+            profile_to_dir(out_dir, duration)
+        except ProfilerBusy:
+            logger.info("Profile already running, ignoring signal")
+
+    def handler(signo, frame):
+        threading.Thread(target=run, name="profiler", daemon=True).start()
+
+    signal.signal(signum, handler)
+    return True
@@ -0,0 +1,74 @@
+# ai_cv/utilities/segments.py
+"""
+Split a recording into keyframe-aligned time segments for parallel workers.
+
+A segment owns frames [start, end) and is decoded from `warmup`, an earlier
+keyframe, so its tracker has settled by the time it reaches `start`. The
+frames [warmup, start) are also the tail of the previous segment, which is
+what lets tracks be matched across the boundary (see recognition.stitching).
+"""
+from dataclasses import dataclass
+import bisect
+
+import cv2 as cv
+
+
+@dataclass
+class Segment:
+    index: int
+    warmup: int  # first frame decoded (a keyframe)
+    start: int   # first frame this segment owns (a keyframe)
+    end: int     # one past the last frame it owns
+    tail: int    # frames from here on are also decoded by the next segment
+
+
+"""
+Demux the video without decoding it and return (frame_count, keyframe
+indexes). Returns an empty keyframe list if the backend can't report
+packet flags, in which case any frame is treated as a seek point.
+"""
+def scan_keyframes(video_path):
+    cap = cv.VideoCapture(video_path)
+    if not cap.isOpened():
+        raise ValueError(f"Could not open {video_path}")
+    try:
+        raw = cap.set(cv.CAP_PROP_FORMAT, -1)
+        keyframes = []
+        count = 0
+        while cap.grab():
+            if raw and cap.get(cv.CAP_PROP_LRF_HAS_KEY_FRAME) > 0:
+                keyframes.append(count)
+            count += 1
+        return count, keyframes
+    finally:
+        cap.release()
+
+
+def _snap(frame, keyframes):
+    if not keyframes:
+        return frame
+    i = bisect.bisect_right(keyframes, frame) - 1
+    return keyframes[max(i, 0)]
+
+
+"""
+Plan `count` segments over `frames` frames with `overlap` frames of warm-up
+before each boundary. Boundaries snap back to the nearest keyframe, so
+segments can come out uneven (or fewer) on sparse-keyframe video.
+"""
+def plan_segments(frames, count, overlap, keyframes=()):
+    keyframes = sorted(keyframes)
+    starts = []
+    for k in range(max(1, count)):
+        start = 0 if k == 0 else _snap(round(k * frames / count), keyframes)
+        if not starts or start > starts[-1]:
+            starts.append(start)
+
+    segments = []
+    for k, start in enumerate(starts):
+        end = starts[k + 1] if k + 1 < len(starts) else frames
+        warmup = 0 if k == 0 else _snap(max(0, start - overlap), keyframes)
+        segments.append(Segment(k, warmup, start, end, end))
+    for prev, seg in zip(segments, segments[1:]):
+        prev.tail = seg.warmup
+    return segments
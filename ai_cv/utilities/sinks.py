@@ -0,0 +1,234 @@
+# ai_cv/utilities/sinks.py
+"""
+Optional annotated output for headless pipelines.
+
+The inference loop hands its latest frame and results to AnnotatedOutput,
+which never blocks: a render thread wakes at most `fps` times a second,
+draws only the newest frame it was given and passes the image to each sink
+(an MP4 file, an MJPEG HTTP stream). Frames published in between are
+simply replaced.
+"""
+import logging
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import cv2 as cv
+import numpy as np
+
+logger = logging.getLogger("parkvision.sinks")
+
+
+class AnnotatedOutput:
+    """
+    draw_fn(canvas, results) draws onto a copy of the frame; alternatively
+    render_fn(frame, results) returns the image to output itself (e.g.
+    OverlayRenderer.render into its reusable buffer), which avoids the copy.
+    """
+
+    def __init__(self, sinks, draw_fn=None, fps=5.0, metrics=None, render_fn=None):
+        self.sinks = list(sinks)
+        self.draw_fn = draw_fn
+        self.render_fn = render_fn
+        self.period = 1.0 / fps if fps > 0 else 0.0
+        self.metrics = metrics
+        self.rendered = 0
+        self.skipped = 0
+        self._slot = None
+        self._lock = threading.Lock()
+        self._ready = threading.Event()
+        self._closed = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="render", daemon=True)
+        self._thread.start()
+
+    """
+    Offer the latest frame and its results for rendering. The frame must not
+    be modified afterwards; it is copied before anything is drawn on it.
+    """
+    def publish(self, frame, results):
+        with self._lock:
+            if self._slot is not None:
+                self.skipped += 1
+            self._slot = (frame, results)
+        if self.metrics is not None:
+            self.metrics.set_queue_depth("render", 1)
+        self._ready.set()
+
+    def _take(self):
+        with self._lock:
+            item, self._slot = self._slot, None
+            self._ready.clear()
+        if self.metrics is not None:
+            self.metrics.set_queue_depth("render", 0)
+        return item
+
+    def _run(self):
+        next_render = 0.0
+        while True:
+            self._ready.wait()
+            # Rate limit; newer frames keep replacing the slot meanwhile
+            delay = next_render - time.perf_counter()
+            if delay > 0 and self._closed.wait(delay):
+                return
+            item = self._take()
+            if item is None:
+                if self._closed.is_set():
+                    return
+                continue
+            self._render(*item)
+            next_render = time.perf_counter() + self.period
+            if self._closed.is_set():
+                return
+
+    def _render(self, frame, results):
+        start = time.perf_counter()
+        if self.render_fn is not None:
+            canvas = self.render_fn(frame, results)
+        else:
+            canvas = frame.copy()
+            self.draw_fn(canvas, results)
+        for sink in self.sinks:
+            try:
+                sink.write(canvas)
+            except Exception:
+                logger.exception(f"Annotated output sink {type(sink).__name__} failed")
+        self.rendered += 1
+        if self.metrics is not None:
+            self.metrics.observe("render", time.perf_counter() - start)
+
+    def close(self):
+        self._closed.set()
+        self._ready.set()
+        self._thread.join()
+        # A frame still waiting is never rendered
+        self._take()
+        for sink in self.sinks:
+            sink.close()
+
+
+class VideoFileSink:
+    """Writes annotated frames to a video file (MP4 by default), opened on the first frame."""
+
+    def __init__(self, path, fps=5.0, fourcc="mp4v"):
+        self.path = path
+        self.fps = fps
+        self.fourcc = fourcc
+        self.writer = None
+
+    def write(self, frame):
+        if self.writer is None:
+            h, w = frame.shape[:2]
+            self.writer = cv.VideoWriter(self.path, cv.VideoWriter_fourcc(*self.fourcc), self.fps, (w, h))
+            if not self.writer.isOpened():
+                raise RuntimeError(f"Could not open video writer for {self.path}")
+        self.writer.write(frame)
+
+    def close(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+class MjpegSink:
+    """
+    Serves annotated frames as an MJPEG stream at http://host:port/ (open it
+    in a browser or VLC) and the latest frame at /snapshot.jpg. Frames are
+    only JPEG-encoded while someone is watching.
+    """
+
+    BOUNDARY = b"frame"
+
+    def __init__(self, port, host="0.0.0.0", quality=75):
+        self.quality = quality
+        self.clients = 0
+        self._frame = None
+        self._jpeg = None
+        self._seq = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        sink = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                path = self.path.split("?")[0]
+                if path == "/snapshot.jpg":
+                    jpeg = sink.snapshot()
+                    if jpeg is None:
+                        self.send_error(503, "No frame yet")
+                        return
+                    self.send_response(200)
+                    self.send_header("Content-Type", "image/jpeg")
+                    self.send_header("Content-Length", str(len(jpeg)))
+                    self.end_headers()
+                    self.wfile.write(jpeg)
+                elif path in ("/", "/stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", f"multipart/x-mixed-replace; boundary={sink.BOUNDARY.decode()}")
+                    self.send_header("Cache-Control", "no-cache")
+                    self.end_headers()
+                    sink._stream(self.wfile)
+                else:
+                    self.send_error(404)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.port = self.server.server_port
+        threading.Thread(target=self.server.serve_forever, name="mjpeg-http", daemon=True).start()
+
+    def _encode(self, frame):
+        ok, buf = cv.imencode(".jpg", frame, [cv.IMWRITE_JPEG_QUALITY, self.quality])
+        return buf.tobytes() if ok else None
+
+    def write(self, frame):
+        with self._cond:
+            # Encoded later on an HTTP thread, while the caller may already be
+            # drawing the next frame into the same buffer (OverlayRenderer)
+            if self._frame is None or self._frame.shape != frame.shape:
+                self._frame = frame.copy()
+            else:
+                np.copyto(self._frame, frame)
+            self._jpeg = self._encode(frame) if self.clients else None
+            self._seq += 1
+            self._cond.notify_all()
+
+    def snapshot(self):
+        with self._cond:
+            if self._jpeg is None and self._frame is not None:
+                self._jpeg = self._encode(self._frame)
+            return self._jpeg
+
+    def _stream(self, out):
+        with self._cond:
+            self.clients += 1
+            seen = -1
+        try:
+            while True:
+                with self._cond:
+                    self._cond.wait_for(lambda: self._closed or (self._seq != seen and self._frame is not None), timeout=5)
+                    if self._closed:
+                        return
+                    if self._seq == seen:
+                        continue
+                    if self._jpeg is None:
+                        self._jpeg = self._encode(self._frame)
+                    jpeg, seen = self._jpeg, self._seq
+                # A slow client just misses the frames rendered while it was writing
+                out.write(b"--" + self.BOUNDARY + b"\r\nContent-Type: image/jpeg\r\n"
+                          + f"Content-Length: {len(jpeg)}\r\n\r\n".encode() + jpeg + b"\r\n")
+                out.flush()
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        finally:
+            with self._cond:
+                self.clients -= 1
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self.server.shutdown()
+        self.server.server_close()
@@ -0,0 +1,120 @@
+# ai_cv/utilities/spot_warp.py
+"""
+Perspective-rectified patches of every spot in one remap.
+
+Spots in oblique views are skewed quadrilaterals. SpotWarper solves every
+spot's homography once per layout and stores, for each pixel of each
+spot's fixed-size patch, where it samples the frame. Stacked, those lookup
+tables form one (N*H, W) remap, so warp() rectifies all spots into a
+preallocated (N, H, W, 3) array with a single cv.remap call and no
+per-frame geometry or allocation. Spots that are not quadrilaterals are
+rectified through their minimum-area rectangle, and the patch pixels outside
+the spot's own outline are zeroed so neighbouring spots do not leak in.
+"""
+import cv2 as cv
+import numpy as np
+
+# cv.remap maps must stay under SHRT_MAX rows
+_MAX_MAP_ROWS = 32000
+
+
+"""
+Corners of a spot polygon to rectify, in order: the polygon itself if it
+has four points, otherwise its minimum-area rectangle.
+"""
+def spot_quad(points):
+    pts = np.asarray(points, dtype=np.float32).reshape(-1, 2)
+    if len(pts) > 4 and np.allclose(pts[0], pts[-1]):
+        pts = pts[:-1]
+    if len(pts) != 4:
+        pts = cv.boxPoints(cv.minAreaRect(pts)).astype(np.float32)
+    return pts
+
+
+"""
+Homographies mapping the corners of a w x h patch onto each quad, solved
+for all quads at once. Returns an (N, 3, 3) array.
+"""
+def patch_homographies(quads, w, h):
+    quads = np.asarray(quads, dtype=np.float64).reshape(-1, 4, 2)
+    n = len(quads)
+    src = np.array([[0, 0], [w, 0], [w, h], [0, h]], dtype=np.float64)
+    a = np.zeros((n, 8, 8))
+    b = quads.reshape(n, 8)
+    for k, (x, y) in enumerate(src):
+        u, v = quads[:, k, 0], quads[:, k, 1]
+        a[:, 2 * k, 0:3] = (x, y, 1)
+        a[:, 2 * k, 6] = -x * u
+        a[:, 2 * k, 7] = -y * u
+        a[:, 2 * k + 1, 3:6] = (x, y, 1)
+        a[:, 2 * k + 1, 6] = -x * v
+        a[:, 2 * k + 1, 7] = -y * v
+    coeffs = np.linalg.solve(a, b[..., None])[..., 0]
+    return np.concatenate([coeffs, np.ones((n, 1))], axis=1).reshape(n, 3, 3)
+
+
+class SpotWarper:
+    def __init__(self, polygons, size=32, interpolation=cv.INTER_LINEAR):
+        if hasattr(polygons, "polygons"):
+            polygons = polygons.polygons()
+        self.h, self.w = (size, size) if np.isscalar(size) else size
+        self.interpolation = interpolation
+        polygons = [np.asarray(p, dtype=np.float32).reshape(-1, 2) for p in polygons]
+        self.spots = len(polygons)
+        quads = np.array([spot_quad(p) for p in polygons], dtype=np.float32).reshape(-1, 4, 2)
+        self.homographies = patch_homographies(quads, self.w, self.h) if self.spots else np.zeros((0, 3, 3))
+
+        # Sample at pixel centres of the patch
+        ys, xs = np.mgrid[0:self.h, 0:self.w] + 0.5
+        grid = np.stack([xs.ravel(), ys.ravel(), np.ones(xs.size)])
+        per_chunk = max(1, _MAX_MAP_ROWS // self.h)
+        self._maps = []
+        for start in range(0, self.spots, per_chunk):
+            stop = min(start + per_chunk, self.spots)
+            src = self.homographies[start:stop] @ grid
+            map_x = (src[:, 0] / src[:, 2]).astype(np.float32).reshape(-1, self.w)
+            map_y = (src[:, 1] / src[:, 2]).astype(np.float32).reshape(-1, self.w)
+            # Fixed-point maps make remap several times faster
+            self._maps.append((start, stop) + cv.convertMaps(map_x, map_y, cv.CV_16SC2))
+
+        self.masks = self._polygon_masks(polygons)
+        # Only non-quad spots have pixels to blank after each warp
+        self._masked = [i for i in range(self.spots) if not self.masks[i].all()]
+        self._outside = [self.masks[i] == 0 for i in self._masked]
+        self._out = None
+
+    def _polygon_masks(self, polygons):
+        # 255 where a patch pixel lies inside its spot polygon (all of it for quads)
+        masks = np.full((self.spots, self.h, self.w), 255, dtype=np.uint8)
+        for i, poly in enumerate(polygons):
+            if len(poly) == 4 or (len(poly) == 5 and np.allclose(poly[0], poly[-1])):
+                continue
+            inv = np.linalg.inv(self.homographies[i])
+            pts = cv.perspectiveTransform(poly.reshape(-1, 1, 2).astype(np.float64), inv)
+            masks[i] = 0
+            cv.fillPoly(masks[i], [np.rint(pts).astype(np.int32)], 255)
+        return masks
+
+    def buffer(self, channels=3):
+        return np.zeros((self.spots, self.h, self.w) + ((channels,) if channels else ()), dtype=np.uint8)
+
+    """
+    Rectify every spot of `frame` into `out`, a contiguous (N, H, W[, C])
+    uint8 array. By default that is an array owned by the warper, which the
+    next call overwrites. Pixels outside a spot's polygon are zero.
+    """
+    def warp(self, frame, out=None):
+        if out is None:
+            shape = (self.spots, self.h, self.w) + frame.shape[2:]
+            if self._out is None or self._out.shape != shape:
+                self._out = np.zeros(shape, dtype=np.uint8)
+            out = self._out
+        if not out.flags.c_contiguous:
+            raise ValueError("out must be C-contiguous")
+        rows = out.reshape((self.spots * self.h, self.w) + out.shape[3:])
+        for start, stop, m1, m2 in self._maps:
+            cv.remap(frame, m1, m2, self.interpolation, dst=rows[start * self.h:stop * self.h],
+                     borderMode=cv.BORDER_CONSTANT)
+        for i, outside in zip(self._masked, self._outside):
+            out[i][outside] = 0
+        return out
@@ -1,6 +1,7 @@
 # ai_cv/utilities.visualize.py
 
 import cv2 as cv
+import numpy as np
 
 def annotate_detections(image, detections, color=(0, 255, 0)):
     annotated = image.copy()
@@ -20,3 +21,140 @@ def annotate_tracks(image, tracks, color=(255, 0, 0)):
         cv.putText(annotated, label, (x1, y1 - 5), cv.FONT_HERSHEY_SIMPLEX, 0.5, color, 1)
     return annotated
 
+
+class OverlayRenderer:
+    """
+    Reusable annotation renderer whose per-frame cost does not grow with the
+    number of spots.
+
+    Lot polygons are rasterized once per layout into a label map (fill and
+    outline index per pixel). Occupancy changes recolor that map with a
+    single lookup. Each frame composites that static layer onto the frame
+    with one masked blend and then draws only the dynamic boxes, all into
+    preallocated buffers. With scale < 1 it renders a downscaled preview
+    instead of the full frame. A frame of another size (a reconnected
+    stream, a different decode size) reallocates the buffers and
+    rasterizes the layout again.
+    """
+
+    def __init__(self, frame_shape, polygons=(), scale=1.0, alpha=0.5,
+                 free_color=(0, 200, 0), occupied_color=(0, 0, 230),
+                 detection_color=(0, 255, 0), track_color=(255, 0, 0), font_scale=0.5):
+        self.scale = scale
+        self.alpha = alpha
+        self.free_color = free_color
+        self.occupied_color = occupied_color
+        self.detection_color = detection_color
+        self.track_color = track_color
+        self.font_scale = font_scale
+        self._allocate(frame_shape)
+        self.set_layout(polygons)
+
+    def _allocate(self, frame_shape):
+        h, w = frame_shape[:2]
+        self.frame_shape = (h, w)
+        self.size = (max(1, round(w * self.scale)), max(1, round(h * self.scale)))
+        shape = (self.size[1], self.size[0])
+        self._labels = np.zeros(shape, dtype=np.int32)
+        self._static = np.zeros(shape + (3,), dtype=np.uint8)
+        self._static_mask = np.zeros(shape, dtype=np.uint8)
+        self._blend = np.zeros(shape + (3,), dtype=np.uint8)
+        self._out = np.zeros(shape + (3,), dtype=np.uint8)
+
+    """
+    Rasterize lot polygons: a list of point lists, or a LotLayout.
+    """
+    def set_layout(self, polygons):
+        if hasattr(polygons, "polygons"):
+            polygons = polygons.polygons()
+        self._polygons = polygons
+        pts = [np.rint(np.asarray(p, dtype=np.float32).reshape(-1, 2) * self.scale).astype(np.int32) for p in polygons]
+        n = len(pts)
+        self.spots = n
+
+        self._labels.fill(0)
+        for i, poly in enumerate(pts):
+            cv.fillPoly(self._labels, [poly], i + 1)
+        for i, poly in enumerate(pts):
+            cv.polylines(self._labels, [poly], True, n + i + 1, 2)
+        np.greater(self._labels, 0, out=self._static_mask.view(bool))
+
+        self._lut = np.zeros((2 * n + 1, 3), dtype=np.uint8)
+        self._occupied = None
+        self.set_occupancy(np.zeros(n, dtype=bool))
+
+    """
+    Recolor spots; `occupied` is a boolean array over the layout's spots
+    or an iterable of occupied spot indexes. No-op if nothing changed.
+    """
+    def set_occupancy(self, occupied):
+        occupied = np.asarray(occupied)
+        if occupied.dtype != bool or occupied.shape != (self.spots,):
+            mask = np.zeros(self.spots, dtype=bool)
+            mask[occupied.astype(np.intp)] = True
+            occupied = mask
+        if self._occupied is not None and np.array_equal(occupied, self._occupied):
+            return
+        self._occupied = occupied.copy()
+
+        n = self.spots
+        colors = np.where(occupied[:, None], self.occupied_color, self.free_color).astype(np.uint8)
+        self._lut[1:n + 1] = colors // 2
+        self._lut[n + 1:] = colors
+        np.take(self._lut, self._labels, axis=0, out=self._static, mode="clip")
+
+    def _box(self, img, xyxy, label, color):
+        x1, y1, x2, y2 = (int(v * self.scale) for v in xyxy)
+        cv.rectangle(img, (x1, y1), (x2, y2), color, 2)
+        cv.putText(img, label, (x1, y1 - 5), cv.FONT_HERSHEY_SIMPLEX, self.font_scale, color, 1)
+
+    """
+    Annotate `frame` with the lot overlay plus detection and track boxes.
+
+    By default the result is written into an internal buffer that is reused
+    (and overwritten) by the next call; with inplace=True the frame itself is
+    modified. With scale < 1 the result is always the internal preview buffer.
+    """
+    def render(self, frame, detections=(), tracks=(), occupied=None, inplace=False):
+        if frame.shape[:2] != self.frame_shape:
+            current = self._occupied
+            self._allocate(frame.shape)
+            self.set_layout(self._polygons)
+            self.set_occupancy(current)
+        if occupied is not None:
+            self.set_occupancy(occupied)
+
+        if self.scale != 1.0:
+            target = cv.resize(frame, self.size, dst=self._out, interpolation=cv.INTER_AREA)
+        elif inplace:
+            target = frame
+        else:
+            np.copyto(self._out, frame)
+            target = self._out
+
+        if self.spots:
+            cv.addWeighted(target, 1 - self.alpha, self._static, self.alpha, 0, dst=self._blend)
+            cv.copyTo(self._blend, self._static_mask, target)
+        for d in detections:
+            self._box(target, d["xyxy"], f"{d['name']} {d['conf']:.2f}", self.detection_color)
+        for t in tracks:
+            self._box(target, t["bbox"], f"ID {t['track_id']} ({t['name']})", self.track_color)
+        return target
+
+
+"""
+render_fn for sinks.AnnotatedOutput on the lot path: results are
+(occupied spot indexes, tracks) and the lot's polygons are drawn through an
+OverlayRenderer created for the first frame.
+"""
+def lot_renderer(polygons, scale=1.0):
+    renderer = None
+
+    def render(frame, results):
+        nonlocal renderer
+        occupied, tracks = results
+        if renderer is None:
+            renderer = OverlayRenderer(frame.shape, polygons, scale=scale)
+        return renderer.render(frame, tracks=tracks, occupied=occupied)
+
+    return render
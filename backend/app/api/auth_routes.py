@@ -1,63 +1,114 @@
 # backend/app/api/auth_routes.py
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.utils.db import SessionLocal
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.config import ACCESS_TOKEN_TTL
+from app.utils.db import get_db
+from app.utils.security import get_current_claims
 from app.models.user import User
-from app.schemas.user import UserCreate, UserUpdate, UserRead, UserLogin
-from app.services.auth_service import hash_password, verify_password, add_user, authenticate_user
+from app.schemas.user import (
+    UserCreate, UserUpdate, UserRead, UserLogin, LoginResponse, TokenPair, TokenRefresh, TokenClaims
+)
+from app.services.auth_service import hash_password, add_user, authenticate_user, PasswordHasherBusy
+from app.services.token_service import REFRESH, TokenError, create_access_token, create_refresh_token, decode_token
 from datetime import datetime, timezone
 from typing import List
 
 router = APIRouter(prefix="/auth", tags=["Authentication"])
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+def _busy() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password operations, retry shortly",
+        headers={"Retry-After": "1"}
+    )
+
+# Users may change or delete their own account; admins may change any
+def _require_self_or_admin(claims: TokenClaims, user_id: int) -> None:
+    if not claims.adm and claims.sub != str(user_id):
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="Not allowed to modify another user"
+        )
+
+def _issue_tokens(user: User) -> dict:
+    return {
+        "access_token": create_access_token(user),
+        "refresh_token": create_refresh_token(user),
+        "token_type": "bearer",
+        "expires_in": ACCESS_TOKEN_TTL,
+    }
 
 # Register a new user
 @router.post("/register", response_model=UserRead, status_code=status.HTTP_201_CREATED)
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    existing_user = db.query(User).filter(User.username == user.username).first()
-    if existing_user:
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User).where(User.username == user.username))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Username already exists"
         )
-    
-    existing_email = db.query(User).filter(User.email == user.email).first()
-    if existing_email:
+
+    result = await db.execute(select(User).where(User.email == user.email))
+    if result.scalars().first():
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Email already exists"
         )
-    
-    new_user = add_user(db, user.username, user.email, user.password)
+
+    try:
+        new_user = await add_user(db, user.username, user.email, user.password)
+    except PasswordHasherBusy:
+        raise _busy()
     return new_user
 
-# Login user
-@router.post("/login", response_model=UserRead)
-def login(credentials: UserLogin, db: Session = Depends(get_db)):
-    user = authenticate_user(db, credentials.username, credentials.password)
+# Login user, the only place a password is checked; returns access/refresh tokens
+@router.post("/login", response_model=LoginResponse)
+async def login(credentials: UserLogin, db: AsyncSession = Depends(get_db)):
+    try:
+        user = await authenticate_user(db, credentials.username, credentials.password)
+    except PasswordHasherBusy:
+        raise _busy()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid username or password"
         )
-    
+
     user.last_login = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(user)
-    
-    return user
+    await db.commit()
+    await db.refresh(user)
+
+    return {**UserRead.model_validate(user).model_dump(), **_issue_tokens(user)}
+
+# Exchange a refresh token for a new token pair
+@router.post("/refresh", response_model=TokenPair)
+async def refresh(body: TokenRefresh, db: AsyncSession = Depends(get_db)):
+    try:
+        claims = decode_token(body.refresh_token, REFRESH)
+    except TokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e)
+        )
+    # Refresh is rare, so re-check that the user still exists
+    user = await db.get(User, int(claims["sub"]))
+    if not user:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="User not found"
+        )
+    return _issue_tokens(user)
+
+# Get the user behind the bearer token
+@router.get("/me", response_model=TokenClaims)
+async def me(claims: TokenClaims = Depends(get_current_claims)):
+    return claims
 
 # Get current user
-@router.get("/users/{user_id}", response_model=UserRead)
-def get_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+@router.get("/users/{user_id}", response_model=UserRead, dependencies=[Depends(get_current_claims)])
+async def get_user(user_id: int, db: AsyncSession = Depends(get_db)):
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -66,63 +117,70 @@ def get_user(user_id: int, db: Session = Depends(get_db)):
     return user
 
 # Get all users
-@router.get("/users", response_model=List[UserRead])
-def get_all_users(db: Session = Depends(get_db)):
-    users = db.query(User).all()
-    return users
+@router.get("/users", response_model=List[UserRead], dependencies=[Depends(get_current_claims)])
+async def get_all_users(db: AsyncSession = Depends(get_db)):
+    result = await db.execute(select(User))
+    return result.scalars().all()
 
 # Update user
 @router.put("/users/{user_id}", response_model=UserRead)
-def update_user(user_id: int, updates: UserUpdate, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def update_user(user_id: int, updates: UserUpdate, db: AsyncSession = Depends(get_db),
+                      claims: TokenClaims = Depends(get_current_claims)):
+    _require_self_or_admin(claims, user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
+
     if updates.username is not None:
-        existing = db.query(User).filter(
+        result = await db.execute(select(User).where(
             User.username == updates.username,
             User.id != user_id
-        ).first()
-        if existing:
+        ))
+        if result.scalars().first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Username already exists"
             )
         user.username = updates.username
-    
+
     if updates.email is not None:
-        existing = db.query(User).filter(
+        result = await db.execute(select(User).where(
             User.email == updates.email,
             User.id != user_id
-        ).first()
-        if existing:
+        ))
+        if result.scalars().first():
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Email already exists"
             )
         user.email = updates.email
-    
+
     if updates.password is not None:
-        user.password_hash = hash_password(updates.password)
-    
-    db.commit()
-    db.refresh(user)
+        try:
+            user.password_hash = await hash_password(updates.password)
+        except PasswordHasherBusy:
+            raise _busy()
+
+    await db.commit()
+    await db.refresh(user)
     return user
 
 
 # Delete user
 @router.delete("/users/{user_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_user(user_id: int, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def delete_user(user_id: int, db: AsyncSession = Depends(get_db),
+                      claims: TokenClaims = Depends(get_current_claims)):
+    _require_self_or_admin(claims, user_id)
+    user = await db.get(User, user_id)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail="User not found"
         )
-    
-    db.delete(user)
-    db.commit()
-    return
\ No newline at end of file
+
+    await db.delete(user)
+    await db.commit()
+    return
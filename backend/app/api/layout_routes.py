@@ -0,0 +1,114 @@
+# backend/app/api/layout_routes.py
+import json
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, status
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.config import LOT_CACHE_SIZE
+from app.utils.db import get_db
+from app.utils.http_cache import LRUCache, cache_headers, is_not_modified, make_etag, not_modified_response
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.schemas.layout import LayoutImportResult
+from app.services.layout_codec import LAYOUT_MEDIA_TYPE, encode_layout, rect_polygon
+from app.services.layout_import import (
+    CvatPolygonParser,
+    LayoutFormatError,
+    import_spots,
+    parse_layout_json,
+    spot_rows,
+)
+from app.services.live_updates import broadcaster
+from app.services.occupancy_store import occupancy_store
+from app.api.lot_routes import ALL_LOTS_KEY, lot_cache
+
+router = APIRouter(prefix="/lots", tags=["Lot Layouts"])
+
+# Encoded layouts keyed by (lot id, ETag); a layout change produces a new
+# ETag, so stale entries are never served and simply age out
+layout_cache = LRUCache(maxsize=LOT_CACHE_SIZE)
+
+
+def _layout_etag(lot: ParkingLot) -> str:
+    return make_etag("layout", lot.id, lot.created_at, lot.layout_version)
+
+
+# Bulk import spots from a CVAT XML export or a lot layout JSON body
+@router.post("/{lot_id}/spots/import", response_model=LayoutImportResult)
+async def import_layout(lot_id: int, request: Request, image: Optional[str] = None,
+                        db: AsyncSession = Depends(get_db)):
+    if await db.get(ParkingLot, lot_id) is None:
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+
+    content_type = request.headers.get("content-type", "").split(";")[0].strip()
+    try:
+        if content_type in ("application/xml", "text/xml"):
+            # Parse as the body arrives instead of buffering the whole export
+            parser = CvatPolygonParser(image)
+            async for chunk in request.stream():
+                parser.feed(chunk)
+            spots = [(None, pts) for pts in parser.close()]
+        elif content_type == "application/json":
+            try:
+                data = json.loads(await request.body())
+            except ValueError as e:
+                raise LayoutFormatError(f"Invalid JSON: {e}")
+            spots = parse_layout_json(data)
+        else:
+            raise HTTPException(
+                status_code=status.HTTP_415_UNSUPPORTED_MEDIA_TYPE,
+                detail="Send CVAT XML as application/xml or a layout as application/json"
+            )
+        rows = spot_rows(lot_id, spots)
+    except LayoutFormatError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+
+    inserted, updated, layout_version = await import_spots(db, lot_id, rows)
+    if inserted or updated:
+        # New spots change the lot's bitset layout, rebuild it on next read
+        occupancy_store.invalidate(lot_id)
+        lot_cache.invalidate(lot_id, ALL_LOTS_KEY)
+        if lot_id in broadcaster.hubs:
+            # Live clients get the new layout's snapshot now rather than on the next reading
+            lot = await occupancy_store.ensure_lot(db, lot_id)
+            broadcaster.publish(lot_id, {}, lot.version, lot.states)
+    return LayoutImportResult(
+        lot_id=lot_id,
+        imported=len(rows),
+        inserted=inserted,
+        updated=updated,
+        unchanged=len(rows) - inserted - updated,
+        layout_version=layout_version,
+    )
+
+# Get a lot's spot polygons in the packed binary layout format (see services/layout_codec.py)
+@router.get("/{lot_id}/layout")
+async def get_layout(lot_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    lot = await db.get(ParkingLot, lot_id)
+    if lot is None:
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+
+    etag = _layout_etag(lot)
+    if is_not_modified(request, etag, None):
+        response = not_modified_response(etag, None)
+        response.headers["X-Layout-Version"] = str(lot.layout_version)
+        return response
+
+    body = layout_cache.get((lot_id, etag))
+    if body is None:
+        result = await db.execute(
+            select(ParkingSpot.id, ParkingSpot.polygon, ParkingSpot.x, ParkingSpot.y,
+                   ParkingSpot.width, ParkingSpot.height)
+            .where(ParkingSpot.parking_lot_id == lot_id)
+            .order_by(ParkingSpot.id)
+        )
+        # Spots created before outlines were stored fall back to their rectangle
+        body = encode_layout(lot.layout_version, (
+            (spot_id, polygon if polygon is not None else rect_polygon(x, y, w, h))
+            for spot_id, polygon, x, y, w, h in result.all()
+        ))
+        layout_cache.set((lot_id, etag), body)
+
+    headers = cache_headers(etag, None)
+    headers["X-Layout-Version"] = str(lot.layout_version)
+    return Response(content=body, media_type=LAYOUT_MEDIA_TYPE, headers=headers)
@@ -0,0 +1,116 @@
+# backend/app/api/live_routes.py
+import asyncio
+from fastapi import APIRouter, Depends, HTTPException, Request, Response, WebSocket, WebSocketDisconnect, status
+from fastapi.responses import StreamingResponse
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.config import LIVE_KEEPALIVE
+from app.utils.db import AsyncSessionLocal, get_db
+from app.models.parking_lot import ParkingLot
+from app.schemas.spot_status import OccupancyUpdate, OccupancyIngestResult
+from app.schemas.spot_status import LotOccupancyRead
+from app.services.cv_integration import ingest_spot_statuses
+from app.services.live_updates import broadcaster
+from app.services.occupancy_store import occupancy_store
+from app.utils.http_cache import cache_headers, is_not_modified, make_etag, not_modified_response
+
+router = APIRouter(prefix="/lots", tags=["Live Occupancy"])
+
+# Session factory used outside of request dependencies (websocket/SSE)
+session_factory = AsyncSessionLocal
+
+async def _load_occupancy(lot_id: int):
+    lot = occupancy_store.get(lot_id)
+    if lot is None:
+        async with session_factory() as db:
+            lot = await occupancy_store.ensure_lot(db, lot_id)
+    return lot.states(), lot.version
+
+async def _lot_exists(lot_id: int) -> bool:
+    async with session_factory() as db:
+        return await db.get(ParkingLot, lot_id) is not None
+
+# Current occupancy of a lot, served from the in-memory store
+@router.get("/{lot_id}/occupancy", response_model=LotOccupancyRead)
+async def get_occupancy(lot_id: int, request: Request, response: Response):
+    lot = occupancy_store.get(lot_id)
+    if lot is None:
+        if not await _lot_exists(lot_id):
+            raise HTTPException(status_code=404, detail="Parking lot not found")
+        async with session_factory() as db:
+            lot = await occupancy_store.ensure_lot(db, lot_id)
+
+    etag = make_etag("occupancy", occupancy_store.epoch, lot_id, lot.version)
+    if is_not_modified(request, etag, None):
+        return not_modified_response(etag, None)
+    response.headers.update(cache_headers(etag, None))
+    return lot.summary()
+
+# Ingest spot statuses from the CV pipeline
+@router.post("/{lot_id}/occupancy", response_model=OccupancyIngestResult)
+async def post_occupancy(lot_id: int, update: OccupancyUpdate, db: AsyncSession = Depends(get_db)):
+    if await db.get(ParkingLot, lot_id) is None:
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+    rejected = await ingest_spot_statuses(db, lot_id, update.statuses)
+    return OccupancyIngestResult(accepted=len(update.statuses) - len(rejected), rejected=rejected)
+
+# Live spot occupancy over a WebSocket: a snapshot, then coalesced deltas
+@router.websocket("/{lot_id}/live")
+async def live_occupancy_ws(websocket: WebSocket, lot_id: int):
+    if not await _lot_exists(lot_id):
+        await websocket.close(code=status.WS_1008_POLICY_VIOLATION)
+        return
+    await websocket.accept()
+    sub = await broadcaster.subscribe(lot_id, _load_occupancy)
+
+    # Clients never send anything; reading only detects disconnects
+    async def drain():
+        try:
+            while True:
+                await websocket.receive_text()
+        except WebSocketDisconnect:
+            pass
+
+    reader = asyncio.ensure_future(drain())
+    dropped = False
+    try:
+        while not reader.done():
+            frame = await sub.next_frame(timeout=LIVE_KEEPALIVE)
+            if frame is not None:
+                await websocket.send_text(frame.text)
+            elif sub.closed.is_set():
+                # The hub gave up on us as a slow consumer
+                dropped = True
+                break
+    except WebSocketDisconnect:
+        pass
+    finally:
+        reader.cancel()
+        broadcaster.unsubscribe(lot_id, sub)
+    if dropped:
+        await websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+
+# Server-sent events fallback for clients without WebSocket support
+@router.get("/{lot_id}/live/sse")
+async def live_occupancy_sse(lot_id: int, request: Request):
+    if not await _lot_exists(lot_id):
+        raise HTTPException(status_code=404, detail="Parking lot not found")
+    sub = await broadcaster.subscribe(lot_id, _load_occupancy)
+
+    async def stream():
+        try:
+            while not await request.is_disconnected():
+                frame = await sub.next_frame(timeout=LIVE_KEEPALIVE)
+                if frame is not None:
+                    yield frame.sse
+                elif sub.closed.is_set():
+                    break
+                else:
+                    yield b": keepalive\n\n"
+        finally:
+            broadcaster.unsubscribe(lot_id, sub)
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
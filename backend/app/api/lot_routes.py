@@ -1,65 +1,102 @@
 # backend/app/api/lot_routes.py
-from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
-from app.utils.db import SessionLocal
+from fastapi import APIRouter, Depends, HTTPException, Request, status
+from pydantic import TypeAdapter
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.utils.config import LOT_CACHE_SIZE, LOT_CACHE_TTL
+from app.utils.db import get_db
+from app.utils.http_cache import (
+    CachedBody,
+    LRUCache,
+    cached_json_response,
+    is_not_modified,
+    make_etag,
+    not_modified_response,
+)
 from app.models.parking_lot import ParkingLot
 from app.schemas.parking_lot import ParkingLotCreate, ParkingLotUpdate, ParkingLotRead
+from app.services.live_updates import broadcaster
+from app.services.occupancy_store import occupancy_store
 from typing import List
 
 router = APIRouter(prefix="/lots", tags=["Parking Lots"])
 
-# Dependency to get DB session
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+# Serialized GET responses keyed by lot id, plus ALL_LOTS_KEY for the list
+lot_cache = LRUCache(maxsize=LOT_CACHE_SIZE, ttl=LOT_CACHE_TTL)
+ALL_LOTS_KEY = "all"
+
+_lot_list_adapter = TypeAdapter(List[ParkingLotRead])
 
 # Create a new parking lot
 @router.post("/", response_model=ParkingLotRead, status_code=status.HTTP_201_CREATED)
-def create_parking_lot(lot: ParkingLotCreate, db: Session = Depends(get_db)):
+async def create_parking_lot(lot: ParkingLotCreate, db: AsyncSession = Depends(get_db)):
     new_lot = ParkingLot(**lot.model_dump())
     db.add(new_lot)
-    db.commit()
-    db.refresh(new_lot)
+    await db.commit()
+    await db.refresh(new_lot)
+    lot_cache.invalidate(ALL_LOTS_KEY)
     return new_lot
 
 # Get all parking lots
 @router.get("/", response_model=List[ParkingLotRead])
-def get_all_parking_lots(db: Session = Depends(get_db)):
-    lots = db.query(ParkingLot).all()
-    return lots
+async def get_all_parking_lots(request: Request, db: AsyncSession = Depends(get_db)):
+    cached = lot_cache.get(ALL_LOTS_KEY)
+    if cached is None:
+        generation = lot_cache.generation(ALL_LOTS_KEY)
+        result = await db.execute(select(ParkingLot).order_by(ParkingLot.id))
+        lots = result.scalars().all()
+        etag = make_etag("lots", *((lot.id, lot.updated_at) for lot in lots))
+        last_modified = max((lot.updated_at for lot in lots if lot.updated_at), default=None)
+        if is_not_modified(request, etag, last_modified):
+            return not_modified_response(etag, last_modified)
+        body = _lot_list_adapter.dump_json(_lot_list_adapter.validate_python(lots, from_attributes=True))
+        cached = CachedBody(body, etag, last_modified)
+        lot_cache.set(ALL_LOTS_KEY, cached, generation)
+    return cached_json_response(request, cached)
 
 # Get parking lot by ID
 @router.get("/{lot_id}", response_model=ParkingLotRead)
-def get_parking_lot(lot_id: int, db: Session = Depends(get_db)):
-    lot = db.query(ParkingLot).filter(ParkingLot.id == lot_id).first()
-    if not lot:
-        raise HTTPException(status_code=404, detail="Parking lot not found")
-    return lot
+async def get_parking_lot(lot_id: int, request: Request, db: AsyncSession = Depends(get_db)):
+    cached = lot_cache.get(lot_id)
+    if cached is None:
+        # Taken before the read, so a concurrent update's invalidate makes set() a no-op
+        generation = lot_cache.generation(lot_id)
+        lot = await db.get(ParkingLot, lot_id)
+        if not lot:
+            raise HTTPException(status_code=404, detail="Parking lot not found")
+        etag = make_etag("lot", lot.id, lot.updated_at)
+        if is_not_modified(request, etag, lot.updated_at):
+            return not_modified_response(etag, lot.updated_at)
+        body = ParkingLotRead.model_validate(lot).model_dump_json().encode("utf-8")
+        cached = CachedBody(body, etag, lot.updated_at)
+        lot_cache.set(lot_id, cached, generation)
+    return cached_json_response(request, cached)
 
 # Update parking lot by ID
 @router.put("/{lot_id}", response_model=ParkingLotRead)
-def update_parking_lot(lot_id: int, updates: ParkingLotUpdate, db: Session = Depends(get_db)):
-    lot = db.query(ParkingLot).filter(ParkingLot.id == lot_id).first()
+async def update_parking_lot(lot_id: int, updates: ParkingLotUpdate, db: AsyncSession = Depends(get_db)):
+    lot = await db.get(ParkingLot, lot_id)
     if not lot:
         raise HTTPException(status_code=404, detail="Parking lot not found")
 
     for key, value in updates.model_dump(exclude_unset=True).items():
         setattr(lot, key, value)
 
-    db.commit()
-    db.refresh(lot)
+    await db.commit()
+    await db.refresh(lot)
+    lot_cache.invalidate(lot_id, ALL_LOTS_KEY)
     return lot
 
 # Delete parking lot by ID
 @router.delete("/{lot_id}", status_code=status.HTTP_204_NO_CONTENT)
-def delete_parking_lot(lot_id: int, db: Session = Depends(get_db)):
-    lot = db.query(ParkingLot).filter(ParkingLot.id == lot_id).first()
+async def delete_parking_lot(lot_id: int, db: AsyncSession = Depends(get_db)):
+    lot = await db.get(ParkingLot, lot_id)
     if not lot:
         raise HTTPException(status_code=404, detail="Parking lot not found")
 
-    db.delete(lot)
-    db.commit()
+    await db.delete(lot)
+    await db.commit()
+    lot_cache.invalidate(lot_id, ALL_LOTS_KEY)
+    occupancy_store.invalidate(lot_id)
+    broadcaster.close_lot(lot_id)
     return
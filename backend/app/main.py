@@ -1,22 +1,36 @@
 # backend/app/main.py
 from fastapi import FastAPI
-from app.utils.db import Base, engine
+from app.utils.db import Base, async_engine, AsyncSessionLocal
+from app.services.occupancy_store import occupancy_store
+from app.services.event_ingest import serve_events
+from app.utils.config import CV_EVENTS_SOCKET
 from app.models import user, parking_analytics, spot_status, vehicle, parking_lot, parking_spot
-from app.api import lot_routes, auth_routes
+from app.api import lot_routes, auth_routes, live_routes, layout_routes
 from contextlib import asynccontextmanager
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    Base.metadata.create_all(bind=engine)
+    async with async_engine.begin() as conn:
+        await conn.run_sync(Base.metadata.create_all)
+    # Live occupancy is served from memory, seed it from the latest statuses
+    async with AsyncSessionLocal() as db:
+        await occupancy_store.rebuild(db)
+    # Pipelines push spot transitions here instead of POSTing them
+    events_server = await serve_events(CV_EVENTS_SOCKET) if CV_EVENTS_SOCKET else None
     try:
         yield
     finally:
-        pass
+        if events_server:
+            # Not wait_closed(): connected pipelines would hold up shutdown
+            events_server.close()
+        await async_engine.dispose()
 
 app = FastAPI(title="ParkVision API", lifespan=lifespan)
 
 app.include_router(lot_routes.router)
 app.include_router(auth_routes.router)
+app.include_router(live_routes.router)
+app.include_router(layout_routes.router)
 
 @app.get("/")
 def root():
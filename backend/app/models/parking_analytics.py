@@ -9,7 +9,7 @@ class ParkingAnalytics(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     parking_lot_id = Column(Integer, ForeignKey("parking_lots.id"))
-    time_stamp = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    time_stamp = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     total_spaces = Column(Integer, nullable=False)
     occupied_spaces = Column(Integer, nullable=False)
     occupancy_rate = Column(Float)
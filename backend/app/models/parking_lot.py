@@ -15,9 +15,11 @@ class ParkingLot(Base):
     init_frame_path = Column(Text)
     video_path = Column(Text)
     video_start_time = Column(Float)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Bumped whenever the lot's spot geometry changes
+    layout_version = Column(Integer, nullable=False, default=0, server_default="0")
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     updated_at = Column(
-        DateTime,
+        DateTime(timezone=True),
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc)
     )
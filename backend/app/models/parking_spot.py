@@ -1,11 +1,14 @@
 # backend/app/models/parking_spot.py
-from sqlalchemy import Column, Integer, String, DateTime, ForeignKey
+from sqlalchemy import Column, Integer, String, DateTime, ForeignKey, LargeBinary, UniqueConstraint
 from datetime import datetime, timezone
 from app.utils.db import Base
 from sqlalchemy.orm import relationship
 
 class ParkingSpot(Base):
     __tablename__ = "parking_spots"
+    __table_args__ = (
+        UniqueConstraint("parking_lot_id", "spot_number", name="uq_parking_spots_lot_number"),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     parking_lot_id = Column(Integer, ForeignKey("parking_lots.id"))
@@ -14,7 +17,9 @@ class ParkingSpot(Base):
     y = Column(Integer, nullable=False)
     width = Column(Integer, nullable=False)
     height = Column(Integer, nullable=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    # Full outline as packed little-endian float32 x, y pairs (see services/layout_codec.py)
+    polygon = Column(LargeBinary)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     parking_lot = relationship("ParkingLot", back_populates="parking_spots")
     statuses = relationship("SpotStatus", back_populates="parking_spot")
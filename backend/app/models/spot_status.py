@@ -10,7 +10,7 @@ class SpotStatus(Base):
     id = Column(Integer, primary_key=True, index=True)
     parking_spot_id = Column(Integer, ForeignKey("parking_spots.id"))
     status = Column(String(20), nullable=False)
-    detected_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    detected_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
     detection_method = Column(String(50))
 
     parking_spot = relationship("ParkingSpot", back_populates="statuses")
\ No newline at end of file
@@ -12,7 +12,7 @@ class User(Base):
     email = Column(String(50), unique=True, nullable=False)
     password_hash = Column(Text, nullable=False)
     is_admin = Column(Boolean, default=False)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    last_login = Column(DateTime, nullable=True)
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    last_login = Column(DateTime(timezone=True), nullable=True)
 
     vehicles = relationship("Vehicle", back_populates="user")
\ No newline at end of file
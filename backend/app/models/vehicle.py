@@ -15,10 +15,10 @@ class Vehicle(Base):
     make = Column(String(50))
     model = Column(String(50))
     color = Column(String(30))
-    entry_time = Column(DateTime, default=lambda: datetime.now(timezone.utc))
-    exit_time = Column(DateTime, nullable=True)
+    entry_time = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
+    exit_time = Column(DateTime(timezone=True), nullable=True)
     is_parked = Column(Boolean, default=True)
-    created_at = Column(DateTime, default=lambda: datetime.now(timezone.utc))
+    created_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc))
 
     user = relationship("User", back_populates="vehicles")
     parking_spot = relationship("ParkingSpot", back_populates="vehicle")
\ No newline at end of file
@@ -0,0 +1,9 @@
+from pydantic import BaseModel
+
+class LayoutImportResult(BaseModel):
+    lot_id: int
+    imported: int
+    inserted: int
+    updated: int
+    unchanged: int
+    layout_version: int
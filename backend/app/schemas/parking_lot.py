@@ -25,6 +25,7 @@ class ParkingLotUpdate(BaseModel):
 
 class ParkingLotRead(ParkingLotBase):
     id: int
+    layout_version: int = 0
     created_at: datetime
     updated_at: datetime
 
@@ -0,0 +1,26 @@
+from pydantic import BaseModel
+from typing import List, Literal, Optional
+from datetime import datetime
+
+SpotState = Literal["occupied", "empty"]
+
+class SpotStatusUpdate(BaseModel):
+    parking_spot_id: int
+    status: SpotState
+    detected_at: Optional[datetime] = None
+    detection_method: Optional[str] = None
+
+class OccupancyUpdate(BaseModel):
+    statuses: List[SpotStatusUpdate]
+
+class OccupancyIngestResult(BaseModel):
+    accepted: int
+    rejected: List[int] = []
+
+class LotOccupancyRead(BaseModel):
+    lot_id: int
+    version: int
+    total_spots: int
+    occupied: int
+    free: int
+    free_spot_ids: List[int]
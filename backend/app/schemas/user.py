@@ -25,3 +25,23 @@ class UserRead(UserBase):
 class UserLogin(BaseModel):
     username: str
     password: str
+
+class TokenPair(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str = "bearer"
+    expires_in: int
+
+class LoginResponse(UserRead, TokenPair):
+    pass
+
+class TokenRefresh(BaseModel):
+    refresh_token: str
+
+class TokenClaims(BaseModel):
+    sub: str
+    name: str
+    adm: bool = False
+    type: str
+    iat: int
+    exp: int
@@ -1,33 +1,66 @@
+import asyncio
+import threading
 import bcrypt
-from sqlalchemy.orm import Session
+from concurrent.futures import ThreadPoolExecutor
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from app.models.user import User
+from app.utils.config import BCRYPT_ROUNDS, BCRYPT_WORKERS, BCRYPT_MAX_PENDING
 
-# Password hashing using bcrypt
-def hash_password(password: str) -> str:
-    salt = bcrypt.gensalt()
+# bcrypt releases the GIL, so a small dedicated pool gives real parallelism
+# without touching the threadpool that serves the rest of the app
+_bcrypt_pool = ThreadPoolExecutor(max_workers=BCRYPT_WORKERS, thread_name_prefix="bcrypt")
+_pending = 0
+_pending_lock = threading.Lock()
+
+class PasswordHasherBusy(Exception):
+    pass
+
+async def _run_bcrypt(fn, *args):
+    global _pending
+    with _pending_lock:
+        if _pending >= BCRYPT_MAX_PENDING:
+            raise PasswordHasherBusy()
+        _pending += 1
+    try:
+        return await asyncio.get_running_loop().run_in_executor(_bcrypt_pool, fn, *args)
+    finally:
+        with _pending_lock:
+            _pending -= 1
+
+def _hashpw(password: str) -> str:
+    salt = bcrypt.gensalt(rounds=BCRYPT_ROUNDS)
     hashed = bcrypt.hashpw(password.encode('utf-8'), salt)
     return hashed.decode('utf-8')
 
-# Check password against hash
-def verify_password(password: str, hashed_password: str) -> bool:
+def _checkpw(password: str, hashed_password: str) -> bool:
     return bcrypt.checkpw(password.encode('utf-8'), hashed_password.encode('utf-8'))
 
+# Password hashing using bcrypt
+async def hash_password(password: str) -> str:
+    return await _run_bcrypt(_hashpw, password)
+
+# Check password against hash
+async def verify_password(password: str, hashed_password: str) -> bool:
+    return await _run_bcrypt(_checkpw, password, hashed_password)
+
 # Add a new user to the database
-def add_user(db: Session, username: str, email: str, password: str) -> User:
-    hashed_pw = hash_password(password)
+async def add_user(db: AsyncSession, username: str, email: str, password: str) -> User:
+    hashed_pw = await hash_password(password)
     db_user = User(
         username=username,
         email=email,
         password_hash=hashed_pw
     )
     db.add(db_user)
-    db.commit()
-    db.refresh(db_user)
+    await db.commit()
+    await db.refresh(db_user)
     return db_user
 
 # Authenticate user by username and password
-def authenticate_user(db: Session, username: str, password: str) -> User | None:
-    user = db.query(User).filter(User.username == username).first()
-    if user and verify_password(password, user.password_hash):
+async def authenticate_user(db: AsyncSession, username: str, password: str) -> User | None:
+    result = await db.execute(select(User).where(User.username == username))
+    user = result.scalars().first()
+    if user and await verify_password(password, user.password_hash):
         return user
-    return None
\ No newline at end of file
+    return None
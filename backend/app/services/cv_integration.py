@@ -1 +1,45 @@
-# backend/app/services/cv_integration.py
\ No newline at end of file
+# backend/app/services/cv_integration.py
+from typing import List
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.parking_spot import ParkingSpot
+from app.models.spot_status import SpotStatus
+from app.schemas.spot_status import SpotStatusUpdate
+from app.services.live_updates import broadcaster
+from app.services.occupancy_store import occupancy_store
+
+# Store status readings from the CV pipeline and push them to live clients
+async def ingest_spot_statuses(db: AsyncSession, lot_id: int, statuses: List[SpotStatusUpdate]) -> List[int]:
+    requested = {s.parking_spot_id for s in statuses}
+    result = await db.execute(
+        select(ParkingSpot.id).where(
+            ParkingSpot.parking_lot_id == lot_id,
+            ParkingSpot.id.in_(requested)
+        )
+    )
+    valid = set(result.scalars().all())
+
+    rows = []
+    changes = {}
+    for s in statuses:
+        if s.parking_spot_id not in valid:
+            continue
+        row = {
+            "parking_spot_id": s.parking_spot_id,
+            "status": s.status,
+            "detection_method": s.detection_method,
+        }
+        if s.detected_at is not None:
+            row["detected_at"] = s.detected_at
+        rows.append(row)
+        changes[s.parking_spot_id] = s.status
+
+    if rows:
+        await db.execute(insert(SpotStatus), rows)
+        await db.commit()
+        # Loads a lot that was invalidated (layout import), so its live clients keep getting updates
+        lot = await occupancy_store.ensure_lot(db, lot_id)
+        changed = occupancy_store.apply(lot_id, changes)
+        broadcaster.publish(lot_id, changed, lot.version, lot.states)
+
+    return sorted(requested - valid)
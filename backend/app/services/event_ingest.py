@@ -0,0 +1,142 @@
+# backend/app/services/event_ingest.py
+import asyncio
+import json
+import logging
+import os
+import struct
+from datetime import datetime, timezone
+from typing import Callable, Dict, List, Optional
+from app.schemas.spot_status import SpotStatusUpdate
+from app.services.cv_integration import ingest_spot_statuses
+from app.utils.db import AsyncSessionLocal
+
+logger = logging.getLogger(__name__)
+
+# Event stream written by the CV pipeline (ai_cv/utilities/events.py). Binary
+# streams start with MAGIC + version and hold u32-length-prefixed records of
+# (kind u8, ts f64, fixed fields, UTF-8 tail); NDJSON streams are one object
+# per line. Only the stream header and spot transitions matter here.
+MAGIC = b"PVEV"
+VERSION = 1
+KIND_STREAM = 0
+KIND_SPOT = 1
+_LENGTH = struct.Struct("<I")
+_BODY = struct.Struct("<Bd")
+_SPOT = struct.Struct("<iiBi")
+
+
+class EventDecoder:
+    """Incremental decoder for either encoding; partial records wait for the next feed()."""
+
+    def __init__(self):
+        self.format: Optional[str] = None
+        self._buf = bytearray()
+
+    def feed(self, data: bytes) -> List[dict]:
+        self._buf += data
+        if self.format is None:
+            if len(self._buf) <= len(MAGIC) and MAGIC.startswith(bytes(self._buf)):
+                return []
+            if self._buf.startswith(MAGIC):
+                if self._buf[len(MAGIC)] != VERSION:
+                    raise ValueError(f"Unsupported event stream version {self._buf[len(MAGIC)]}")
+                self.format = "binary"
+                del self._buf[:len(MAGIC) + 1]
+            else:
+                self.format = "ndjson"
+        return self._binary() if self.format == "binary" else self._lines()
+
+    def _lines(self) -> List[dict]:
+        end = self._buf.rfind(b"\n")
+        if end < 0:
+            return []
+        lines, self._buf = bytes(self._buf[:end]), self._buf[end + 1:]
+        return [json.loads(line) for line in lines.split(b"\n") if line.strip()]
+
+    def _binary(self) -> List[dict]:
+        events, pos = [], 0
+        while len(self._buf) - pos >= _LENGTH.size:
+            (length,) = _LENGTH.unpack_from(self._buf, pos)
+            start = pos + _LENGTH.size
+            if len(self._buf) - start < length:
+                break
+            kind, ts = _BODY.unpack_from(self._buf, start)
+            if kind == KIND_STREAM:
+                header = json.loads(bytes(self._buf[start + _BODY.size:start + length]))
+                events.append({**header, "type": "stream", "ts": ts})
+            elif kind == KIND_SPOT:
+                spot_index, spot_id, occupied, _ = _SPOT.unpack_from(self._buf, start + _BODY.size)
+                events.append({"type": "spot", "ts": ts, "spot_index": spot_index,
+                               "spot_id": None if spot_id < 0 else spot_id, "occupied": bool(occupied)})
+            pos = start + length
+        del self._buf[:pos]
+        return events
+
+
+def spot_updates(events: List[dict], detection_method: str = "cv") -> List[SpotStatusUpdate]:
+    # Last transition per spot in the batch; spots without a backend id are skipped
+    latest: Dict[int, dict] = {}
+    for event in events:
+        if event.get("type") == "spot" and event.get("spot_id") is not None:
+            latest[event["spot_id"]] = event
+    return [
+        SpotStatusUpdate(
+            parking_spot_id=spot_id,
+            status="occupied" if event["occupied"] else "empty",
+            detected_at=datetime.fromtimestamp(event["ts"], tz=timezone.utc),
+            detection_method=detection_method,
+        )
+        for spot_id, event in latest.items()
+    ]
+
+
+class EventIngester:
+    """One pipeline connection: its lot comes from the stream header unless fixed."""
+
+    def __init__(self, lot_id: Optional[int] = None, session_factory: Callable = AsyncSessionLocal,
+                 detection_method: str = "cv"):
+        self.lot_id = lot_id
+        self.fixed_lot = lot_id is not None
+        self.session_factory = session_factory
+        self.detection_method = detection_method
+        self.ingested = 0
+
+    async def handle(self, events: List[dict]) -> None:
+        for event in events:
+            if event.get("type") == "stream" and not self.fixed_lot:
+                self.lot_id = event.get("lot_id")
+        updates = spot_updates(events, self.detection_method)
+        if not updates:
+            return
+        if self.lot_id is None:
+            logger.warning("Dropping %d spot events from a stream without a lot_id", len(updates))
+            return
+        async with self.session_factory() as db:
+            rejected = await ingest_spot_statuses(db, self.lot_id, updates)
+        if rejected:
+            logger.warning("Lot %s has no spots %s", self.lot_id, rejected)
+        self.ingested += len(updates) - len(rejected)
+
+
+async def serve_events(path: str, session_factory: Callable = AsyncSessionLocal, lot_id: Optional[int] = None):
+    """Listen on a Unix socket for pipeline event streams. Each read is one
+    batch as the pipeline flushed it and goes to the DB in one transaction."""
+
+    async def handle_connection(reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        decoder = EventDecoder()
+        ingester = EventIngester(lot_id, session_factory)
+        try:
+            while True:
+                data = await reader.read(1 << 16)
+                if not data:
+                    break
+                await ingester.handle(decoder.feed(data))
+        except Exception:
+            logger.exception("CV event stream failed")
+        finally:
+            writer.close()
+
+    if os.path.exists(path):
+        # Left over from a previous run
+        os.unlink(path)
+    return await asyncio.start_unix_server(handle_connection, path)
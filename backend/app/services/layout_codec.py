@@ -0,0 +1,70 @@
+# backend/app/services/layout_codec.py
+"""Binary lot layout served to CV workers.
+
+All values are little-endian:
+
+    header   magic b"PVLY", format (u16), reserved (u16), layout_version (u32), spot count n (u32)
+    ids      n x i32        ParkingSpot.id of each polygon
+    offsets  (n + 1) x u32  polygon i is vertices[offsets[i]:offsets[i + 1]]
+    vertices m x 2 x f32    x, y pairs
+
+Every section is 4-byte aligned, so a client can map each one straight
+into an array without parsing.
+"""
+import struct
+import sys
+from array import array
+from typing import Iterable, List, Sequence, Tuple
+
+LAYOUT_MAGIC = b"PVLY"
+LAYOUT_FORMAT = 1
+LAYOUT_MEDIA_TYPE = "application/vnd.parkvision.layout"
+_HEADER = struct.Struct("<4sHHII")
+
+
+def pack_polygon(points: Sequence[Sequence[float]]) -> bytes:
+    flat = array("f", (float(c) for p in points for c in p[:2]))
+    if sys.byteorder != "little":
+        flat.byteswap()
+    return flat.tobytes()
+
+
+def rect_polygon(x: int, y: int, width: int, height: int) -> bytes:
+    return pack_polygon([[x, y], [x + width, y], [x + width, y + height], [x, y + height]])
+
+
+# spots: (spot_id, packed polygon) pairs in the order workers should see them
+def encode_layout(layout_version: int, spots: Iterable[Tuple[int, bytes]]) -> bytes:
+    ids = array("i")
+    offsets = array("I", [0])
+    vertices: List[bytes] = []
+    for spot_id, polygon in spots:
+        ids.append(spot_id)
+        offsets.append(offsets[-1] + len(polygon) // 8)
+        vertices.append(polygon)
+    if sys.byteorder != "little":
+        ids.byteswap()
+        offsets.byteswap()
+    header = _HEADER.pack(LAYOUT_MAGIC, LAYOUT_FORMAT, 0, layout_version, len(ids))
+    return b"".join([header, ids.tobytes(), offsets.tobytes(), *vertices])
+
+
+def decode_layout(data: bytes) -> Tuple[int, List[Tuple[int, List[List[float]]]]]:
+    magic, fmt, _, layout_version, count = _HEADER.unpack_from(data)
+    if magic != LAYOUT_MAGIC or fmt != LAYOUT_FORMAT:
+        raise ValueError("Not a layout in a known format")
+    pos = _HEADER.size
+    ids = array("i", data[pos:pos + 4 * count])
+    pos += 4 * count
+    offsets = array("I", data[pos:pos + 4 * (count + 1)])
+    pos += 4 * (count + 1)
+    coords = array("f", data[pos:])
+    if sys.byteorder != "little":
+        for arr in (ids, offsets, coords):
+            arr.byteswap()
+    spots = []
+    for i, spot_id in enumerate(ids):
+        flat = coords[2 * offsets[i]:2 * offsets[i + 1]]
+        spots.append((spot_id, [[flat[j], flat[j + 1]] for j in range(0, len(flat), 2)]))
+    return layout_version, spots
+
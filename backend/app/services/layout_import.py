@@ -0,0 +1,200 @@
+# backend/app/services/layout_import.py
+import math
+import xml.etree.ElementTree as ET
+from typing import Iterable, List, Optional, Tuple
+from sqlalchemy import literal_column, or_, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.services.layout_codec import pack_polygon
+
+# Postgres caps a statement at 32767 bind parameters
+_ROWS_PER_STATEMENT = 4000
+# ParkingSpot.spot_number is String(20); x, y, width and height are int4
+_MAX_SPOT_NUMBER = 20
+_INT32_MIN, _INT32_MAX = -2**31, 2**31 - 1
+
+
+class LayoutFormatError(ValueError):
+    pass
+
+
+def _point(p, where: str) -> List[float]:
+    # Two finite numbers; bools and numeric strings are not coordinates
+    if (
+        not isinstance(p, (list, tuple))
+        or len(p) != 2
+        or not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in p)
+        or not all(math.isfinite(v) for v in p)
+    ):
+        raise LayoutFormatError(f"{where} has an invalid point {p!r}; expected [x, y]")
+    return [float(p[0]), float(p[1])]
+
+
+def _parse_points(points_str: str, where: str) -> List[List[float]]:
+    points = []
+    for p in points_str.split(";"):
+        if "," in p:
+            try:
+                coords = [float(v) for v in p.split(",")]
+            except ValueError:
+                raise LayoutFormatError(f"{where} has an invalid point {p!r}")
+            points.append(_point(coords, where))
+    return points
+
+
+class CvatPolygonParser:
+    """Incremental parser for CVAT "for images" XML annotations.
+
+    Feed it the document in chunks; polygons (and boxes, as four-point
+    polygons) of the selected image are collected as each <image> element
+    closes, and every element is cleared once seen so memory stays flat
+    however large the file is. `image` matches the image's id or name; by
+    default the first image is used.
+    """
+
+    def __init__(self, image: Optional[str] = None):
+        self.image = image
+        self.polygons: List[List[List[float]]] = []
+        self.found = False
+        self._parser = ET.XMLPullParser(events=("end",))
+
+    def _matches(self, elem) -> bool:
+        if self.image is None:
+            return not self.found
+        return self.image in (elem.attrib.get("id"), elem.attrib.get("name"))
+
+    def _drain(self) -> None:
+        try:
+            for _, elem in self._parser.read_events():
+                if elem.tag != "image":
+                    continue
+                if self._matches(elem):
+                    self.found = True
+                    where = f"Image {elem.attrib.get('name', elem.attrib.get('id'))!r}"
+                    for shape in elem:
+                        if shape.tag == "polygon":
+                            pts = _parse_points(shape.attrib.get("points", ""), where)
+                            if len(pts) >= 3:
+                                self.polygons.append(pts)
+                        elif shape.tag == "box":
+                            try:
+                                corners = [shape.attrib[k] for k in ("xtl", "ytl", "xbr", "ybr")]
+                            except KeyError as e:
+                                raise LayoutFormatError(f"{where} has a box without {e.args[0]}")
+                            (x1, y1), (x2, y2) = _parse_points(f"{corners[0]},{corners[1]};{corners[2]},{corners[3]}", where)
+                            self.polygons.append([[x1, y1], [x2, y1], [x2, y2], [x1, y2]])
+                elem.clear()
+        except ET.ParseError as e:
+            raise LayoutFormatError(f"Invalid CVAT XML: {e}")
+
+    def feed(self, chunk: bytes) -> None:
+        self._parser.feed(chunk)
+        self._drain()
+
+    def close(self) -> List[List[List[float]]]:
+        try:
+            self._parser.close()
+        except ET.ParseError as e:
+            raise LayoutFormatError(f"Invalid CVAT XML: {e}")
+        self._drain()
+        if not self.found:
+            raise LayoutFormatError(f"Image {self.image!r} not found in CVAT XML" if self.image else "No images in CVAT XML")
+        return self.polygons
+
+
+def parse_cvat_polygons(chunks: Iterable[bytes], image: Optional[str] = None) -> List[List[List[float]]]:
+    parser = CvatPolygonParser(image)
+    for chunk in chunks:
+        parser.feed(chunk)
+    return parser.close()
+
+
+# Lot JSON as consumed by LotDetector: [{"points": [[x, y], ...], "spot_number"?: ...}, ...]
+def parse_layout_json(data) -> List[Tuple[Optional[str], List[List[float]]]]:
+    if not isinstance(data, list):
+        raise LayoutFormatError("Layout JSON must be a list of {\"points\": ...} objects")
+    spots = []
+    for i, lot in enumerate(data):
+        try:
+            pts = lot["points"]
+        except (TypeError, KeyError):
+            raise LayoutFormatError(f"Entry {i} has no points")
+        if not isinstance(pts, list):
+            raise LayoutFormatError(f"Entry {i} points must be a list")
+        if pts and not isinstance(pts[0], (list, tuple)):
+            # Flat [x1, y1, x2, y2, ...] list
+            if len(pts) % 2:
+                raise LayoutFormatError(f"Entry {i} has an odd number of coordinates")
+            pts = [pts[j:j + 2] for j in range(0, len(pts), 2)]
+        pts = [_point(p, f"Entry {i}") for p in pts]
+        if len(pts) < 3:
+            raise LayoutFormatError(f"Entry {i} needs at least 3 points")
+        number = lot.get("spot_number")
+        spots.append((str(number) if number is not None else None, pts))
+    return spots
+
+
+# ParkingSpot rows (bounding rectangle plus packed outline); spots without a number are numbered by position
+# Raises LayoutFormatError for values the columns cannot hold, before anything reaches the database
+def spot_rows(lot_id: int, spots: Iterable[Tuple[Optional[str], List[List[float]]]]) -> List[dict]:
+    rows = {}
+    for i, (number, pts) in enumerate(spots, start=1):
+        xs = [p[0] for p in pts]
+        ys = [p[1] for p in pts]
+        x, y = math.floor(min(xs)), math.floor(min(ys))
+        spot_number = number if number is not None else str(i)
+        if len(spot_number) > _MAX_SPOT_NUMBER:
+            raise LayoutFormatError(f"Spot {i} has a spot_number longer than {_MAX_SPOT_NUMBER} characters")
+        row = {
+            "parking_lot_id": lot_id,
+            "spot_number": spot_number,
+            "x": x,
+            "y": y,
+            "width": max(1, math.ceil(max(xs)) - x),
+            "height": max(1, math.ceil(max(ys)) - y),
+            "polygon": pack_polygon(pts),
+        }
+        if not all(_INT32_MIN <= row[k] <= _INT32_MAX for k in ("x", "y", "width", "height")):
+            raise LayoutFormatError(f"Spot {i} has coordinates outside the 32-bit integer range")
+        # Last occurrence wins; ON CONFLICT cannot touch a row twice in one statement
+        rows[spot_number] = row
+    return list(rows.values())
+
+
+async def import_spots(db: AsyncSession, lot_id: int, rows: List[dict]) -> Tuple[int, int, int]:
+    """Upsert spots on (parking_lot_id, spot_number) with multi-row statements.
+
+    Returns (inserted, updated, layout_version). Rows whose geometry is
+    unchanged are left alone, so re-importing the same layout is a no-op
+    and does not bump the lot's layout version.
+    """
+    inserted = updated = 0
+    for start in range(0, len(rows), _ROWS_PER_STATEMENT):
+        stmt = pg_insert(ParkingSpot).values(rows[start:start + _ROWS_PER_STATEMENT])
+        geometry = ("x", "y", "width", "height", "polygon")
+        stmt = stmt.on_conflict_do_update(
+            constraint="uq_parking_spots_lot_number",
+            set_={col: stmt.excluded[col] for col in geometry},
+            where=or_(*(ParkingSpot.__table__.c[col].is_distinct_from(stmt.excluded[col]) for col in geometry)),
+        ).returning(literal_column("xmax = 0"))
+        result = await db.execute(stmt)
+        for (was_inserted,) in result.all():
+            if was_inserted:
+                inserted += 1
+            else:
+                updated += 1
+
+    if inserted or updated:
+        result = await db.execute(
+            update(ParkingLot)
+            .where(ParkingLot.id == lot_id)
+            .values(layout_version=ParkingLot.layout_version + 1)
+            .returning(ParkingLot.layout_version)
+        )
+    else:
+        result = await db.execute(select(ParkingLot.layout_version).where(ParkingLot.id == lot_id))
+    layout_version = result.scalar_one()
+    await db.commit()
+    return inserted, updated, layout_version
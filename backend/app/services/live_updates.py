@@ -0,0 +1,208 @@
+# backend/app/services/live_updates.py
+import asyncio
+import json
+from typing import Awaitable, Callable, Dict, Optional, Set, Tuple
+from app.utils.config import LIVE_MAX_HZ, LIVE_CLIENT_QUEUE, LIVE_MAX_DROPS
+
+
+class LiveFrame:
+    """A serialized message shared by every subscriber of a lot.
+
+    The JSON text is built once per update; the SSE encoding is derived
+    from it lazily, also at most once.
+    """
+    __slots__ = ("kind", "version", "text", "_sse")
+
+    def __init__(self, kind: str, version: int, payload: dict):
+        self.kind = kind
+        self.version = version
+        self.text = json.dumps(payload, separators=(",", ":"))
+        self._sse = None
+
+    @property
+    def sse(self) -> bytes:
+        if self._sse is None:
+            self._sse = f"event: {self.kind}\nid: {self.version}\ndata: {self.text}\n\n".encode("utf-8")
+        return self._sse
+
+
+class Subscriber:
+    def __init__(self, queue_size: int):
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.stale = False  # missed a delta, must be resynced with a snapshot
+        self.drops = 0
+        self.closed = asyncio.Event()
+
+    async def next_frame(self, timeout: Optional[float] = None) -> Optional[LiveFrame]:
+        """Wait for the next frame; None on timeout or when the hub dropped us."""
+        if self.closed.is_set() and self.queue.empty():
+            return None
+        getter = asyncio.ensure_future(self.queue.get())
+        closer = asyncio.ensure_future(self.closed.wait())
+        done, pending = await asyncio.wait({getter, closer}, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+        for task in pending:
+            task.cancel()
+        if getter in done:
+            return getter.result()
+        return None
+
+
+class LotHub:
+    """Fan-out point for one lot's spot occupancy.
+
+    Publishers merge spot changes into a pending delta. A single pump task
+    turns the pending delta into one LiveFrame at most max_hz times per
+    second and offers it to every subscriber without awaiting any of them.
+    Subscribers whose queue is full miss the delta and are resynced with a
+    snapshot once they catch up; persistent laggards are dropped.
+    """
+
+    def __init__(self, lot_id: int, max_hz: float = LIVE_MAX_HZ,
+                 queue_size: int = LIVE_CLIENT_QUEUE, max_drops: int = LIVE_MAX_DROPS):
+        self.lot_id = lot_id
+        self.interval = 1.0 / max_hz if max_hz > 0 else 0.0
+        self.queue_size = queue_size
+        self.max_drops = max_drops
+        self.version = 0
+        self.spots: Dict[int, str] = {}
+        self.loaded = False
+        self.subscribers: Set[Subscriber] = set()
+        self._pending: Dict[int, str] = {}
+        self._dirty = asyncio.Event()
+        self._pump: Optional[asyncio.Task] = None
+        self._snapshot: Optional[LiveFrame] = None
+
+    def load(self, spots: Dict[int, str], version: int = 0) -> None:
+        self.spots = dict(spots)
+        self.version = version
+        self.loaded = True
+        self._snapshot = None
+
+    def reload(self, spots: Dict[int, str], version: int = 0) -> None:
+        """Replace the state (after the lot was invalidated) and resync current subscribers."""
+        self.load(spots, version)
+        # Deltas against the old state are covered by the snapshot
+        self._pending = {}
+        for sub in list(self.subscribers):
+            sub.stale = True
+            self._offer(sub, self.snapshot())
+
+    def publish(self, changes: Dict[int, str], version: Optional[int] = None) -> None:
+        changed = {sid: status for sid, status in changes.items() if self.spots.get(sid) != status}
+        if not changed:
+            return
+        self.spots.update(changed)
+        self.version = version if version is not None else self.version + 1
+        self._snapshot = None
+        self._pending.update(changed)
+        self._dirty.set()
+
+    def snapshot(self) -> LiveFrame:
+        if self._snapshot is None:
+            self._snapshot = LiveFrame("snapshot", self.version, {
+                "type": "snapshot",
+                "lot_id": self.lot_id,
+                "version": self.version,
+                "spots": self.spots,
+            })
+        return self._snapshot
+
+    def subscribe(self) -> Subscriber:
+        sub = Subscriber(self.queue_size)
+        sub.queue.put_nowait(self.snapshot())
+        self.subscribers.add(sub)
+        if self._pump is None or self._pump.done():
+            self._pump = asyncio.ensure_future(self._run())
+        return sub
+
+    def unsubscribe(self, sub: Subscriber) -> None:
+        self.subscribers.discard(sub)
+        sub.closed.set()
+
+    def _offer(self, sub: Subscriber, delta: LiveFrame) -> None:
+        if sub.queue.full():
+            sub.stale = True
+            sub.drops += 1
+            if sub.drops > self.max_drops:
+                self.unsubscribe(sub)
+            return
+        # A client that missed deltas gets the full current state instead
+        sub.queue.put_nowait(self.snapshot() if sub.stale else delta)
+        sub.stale = False
+        sub.drops = 0
+
+    async def _run(self) -> None:
+        while self.subscribers:
+            await self._dirty.wait()
+            self._dirty.clear()
+            if not self._pending:
+                continue
+            delta = LiveFrame("delta", self.version, {
+                "type": "delta",
+                "lot_id": self.lot_id,
+                "version": self.version,
+                "spots": self._pending,
+            })
+            self._pending = {}
+            for sub in list(self.subscribers):
+                self._offer(sub, delta)
+            if self.interval:
+                await asyncio.sleep(self.interval)
+
+
+class LiveBroadcaster:
+    """Registry of per-lot hubs living on the API's event loop."""
+
+    def __init__(self):
+        self.hubs: Dict[int, LotHub] = {}
+
+    async def subscribe(self, lot_id: int, loader: Callable[[int], Awaitable[Tuple[Dict[int, str], int]]]) -> Subscriber:
+        hub = self.hubs.get(lot_id)
+        if hub is None:
+            hub = self.hubs[lot_id] = LotHub(lot_id)
+        if not hub.loaded:
+            spots, version = await loader(lot_id)
+            hub.reload(spots, version)
+        return hub.subscribe()
+
+    def unsubscribe(self, lot_id: int, sub: Subscriber) -> None:
+        hub = self.hubs.get(lot_id)
+        if hub is None:
+            return
+        hub.unsubscribe(sub)
+        if not hub.subscribers:
+            if hub._pump is not None:
+                hub._pump.cancel()
+            del self.hubs[lot_id]
+
+    def invalidate(self, lot_id: int) -> None:
+        # The lot's state was rebuilt elsewhere; the next publish or subscribe reloads it
+        hub = self.hubs.get(lot_id)
+        if hub is not None:
+            hub.loaded = False
+
+    def close_lot(self, lot_id: int) -> None:
+        # The lot is gone: drop its subscribers so their connections end
+        hub = self.hubs.pop(lot_id, None)
+        if hub is None:
+            return
+        for sub in list(hub.subscribers):
+            hub.unsubscribe(sub)
+        if hub._pump is not None:
+            hub._pump.cancel()
+
+    def publish(self, lot_id: int, changes: Dict[int, str], version: Optional[int] = None,
+                states: Optional[Callable[[], Dict[int, str]]] = None) -> None:
+        """Push changes to a watched lot. A hub whose lot was invalidated is
+        reloaded from `states()` instead and resyncs its subscribers."""
+        # Lots nobody is watching are loaded from the occupancy store on first subscribe
+        hub = self.hubs.get(lot_id)
+        if hub is None:
+            return
+        if hub.loaded:
+            hub.publish(changes, version)
+        elif states is not None:
+            hub.reload(states(), version)
+
+
+broadcaster = LiveBroadcaster()
@@ -0,0 +1,196 @@
+# backend/app/services/occupancy_store.py
+import secrets
+import threading
+from array import array
+from typing import Dict, Iterable, List, Optional
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from app.models.parking_spot import ParkingSpot
+from app.models.spot_status import SpotStatus
+from app.services.live_updates import broadcaster
+
+OCCUPIED = "occupied"
+EMPTY = "empty"
+
+
+class LotOccupancy:
+    """Occupancy of one lot as two bitsets over the lot's spots.
+
+    Bit i of `occupied` is set when spot_ids[i] is occupied; bit i of
+    `known` is set once any status has been seen for that spot. Both are
+    arrays of 64-bit words, so counting is O(spots / 64).
+    """
+    __slots__ = ("lot_id", "version", "spot_ids", "index", "occupied", "known")
+
+    def __init__(self, lot_id: int, spot_ids: Iterable[int]):
+        self.lot_id = lot_id
+        self.version = 0
+        self.spot_ids: List[int] = sorted(spot_ids)
+        self.index: Dict[int, int] = {sid: i for i, sid in enumerate(self.spot_ids)}
+        words = (len(self.spot_ids) + 63) // 64
+        self.occupied = array("Q", bytes(8 * words))
+        self.known = array("Q", bytes(8 * words))
+
+    def _slot(self, spot_id: int) -> int:
+        i = self.index.get(spot_id)
+        if i is None:
+            # Spot created after the lot was loaded
+            i = len(self.spot_ids)
+            self.spot_ids.append(spot_id)
+            self.index[spot_id] = i
+            if i >> 6 >= len(self.occupied):
+                self.occupied.append(0)
+                self.known.append(0)
+        return i
+
+    def _get(self, i: int) -> Optional[str]:
+        word, bit = i >> 6, 1 << (i & 63)
+        if not self.known[word] & bit:
+            return None
+        return OCCUPIED if self.occupied[word] & bit else EMPTY
+
+    def apply(self, changes: Dict[int, str]) -> Dict[int, str]:
+        changed = {}
+        for spot_id, status in changes.items():
+            i = self._slot(spot_id)
+            if self._get(i) == status:
+                continue
+            word, bit = i >> 6, 1 << (i & 63)
+            self.known[word] |= bit
+            if status == OCCUPIED:
+                self.occupied[word] |= bit
+            else:
+                self.occupied[word] &= ~bit
+            changed[spot_id] = status
+        if changed:
+            self.version += 1
+        return changed
+
+    def occupied_count(self) -> int:
+        return sum(w.bit_count() for w in self.occupied)
+
+    def known_count(self) -> int:
+        return sum(w.bit_count() for w in self.known)
+
+    def _ids_where(self, words: Iterable[int]) -> List[int]:
+        ids = []
+        for w_idx, w in enumerate(words):
+            base = w_idx << 6
+            while w:
+                low = w & -w
+                ids.append(self.spot_ids[base + low.bit_length() - 1])
+                w ^= low
+        return ids
+
+    def occupied_ids(self) -> List[int]:
+        return self._ids_where(self.occupied)
+
+    def free_ids(self) -> List[int]:
+        # Known and not occupied; unknown spots are reported as neither
+        return self._ids_where(k & ~o for k, o in zip(self.known, self.occupied))
+
+    def states(self) -> Dict[int, str]:
+        out = {}
+        for i, spot_id in enumerate(self.spot_ids):
+            state = self._get(i)
+            if state is not None:
+                out[spot_id] = state
+        return out
+
+    def summary(self) -> dict:
+        occupied = self.occupied_count()
+        return {
+            "lot_id": self.lot_id,
+            "version": self.version,
+            "total_spots": len(self.spot_ids),
+            "occupied": occupied,
+            "free": self.known_count() - occupied,
+            "free_spot_ids": self.free_ids(),
+        }
+
+
+# Latest status of every spot, for one lot or all of them
+async def load_latest_statuses(db: AsyncSession, lot_id: Optional[int] = None):
+    query = (
+        select(ParkingSpot.parking_lot_id, SpotStatus.parking_spot_id, SpotStatus.status)
+        .join(ParkingSpot, ParkingSpot.id == SpotStatus.parking_spot_id)
+        .distinct(SpotStatus.parking_spot_id)
+        .order_by(SpotStatus.parking_spot_id, SpotStatus.detected_at.desc(), SpotStatus.id.desc())
+    )
+    if lot_id is not None:
+        query = query.where(ParkingSpot.parking_lot_id == lot_id)
+    result = await db.execute(query)
+    return result.all()
+
+
+class OccupancyStore:
+    """Process-wide live occupancy, served without touching Postgres.
+
+    Built from the DB once at startup (or lazily per lot) and then kept
+    current by the CV ingestion path. `epoch` changes on every process
+    start so version numbers are never reused across restarts; a lot
+    rebuilt after invalidate() continues from its last version.
+    """
+
+    def __init__(self):
+        self.epoch = secrets.token_hex(4)
+        self.lots: Dict[int, LotOccupancy] = {}
+        self._retired: Dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    def clear(self) -> None:
+        with self._lock:
+            self.lots.clear()
+
+    def invalidate(self, lot_id: int) -> None:
+        with self._lock:
+            lot = self.lots.pop(lot_id, None)
+            if lot is not None:
+                self._retired[lot_id] = lot.version
+        # Live clients are resynced from the rebuilt lot
+        broadcaster.invalidate(lot_id)
+
+    def get(self, lot_id: int) -> Optional[LotOccupancy]:
+        return self.lots.get(lot_id)
+
+    def _build(self, spots_by_lot: Dict[int, List[int]], rows) -> Dict[int, LotOccupancy]:
+        lots = {lot_id: LotOccupancy(lot_id, ids) for lot_id, ids in spots_by_lot.items()}
+        for lot_id, lot in lots.items():
+            # Versions keep increasing, so ETags and live clients never see one reused
+            lot.version = self._retired.get(lot_id, -1) + 1
+        statuses: Dict[int, Dict[int, str]] = {}
+        for lot_id, spot_id, status in rows:
+            statuses.setdefault(lot_id, {})[spot_id] = status
+        for lot_id, changes in statuses.items():
+            lots[lot_id].apply(changes)
+        return lots
+
+    async def rebuild(self, db: AsyncSession) -> None:
+        result = await db.execute(select(ParkingSpot.parking_lot_id, ParkingSpot.id))
+        spots_by_lot: Dict[int, List[int]] = {}
+        for lot_id, spot_id in result.all():
+            spots_by_lot.setdefault(lot_id, []).append(spot_id)
+        lots = self._build(spots_by_lot, await load_latest_statuses(db))
+        with self._lock:
+            self.lots = lots
+
+    async def ensure_lot(self, db: AsyncSession, lot_id: int) -> LotOccupancy:
+        lot = self.lots.get(lot_id)
+        if lot is not None:
+            return lot
+        result = await db.execute(select(ParkingSpot.id).where(ParkingSpot.parking_lot_id == lot_id))
+        built = self._build({lot_id: result.scalars().all()}, await load_latest_statuses(db, lot_id))
+        with self._lock:
+            # Another request may have loaded it while we were querying
+            return self.lots.setdefault(lot_id, built[lot_id])
+
+    def apply(self, lot_id: int, changes: Dict[int, str]) -> Dict[int, str]:
+        with self._lock:
+            lot = self.lots.get(lot_id)
+            if lot is None:
+                # Not loaded yet; the next ensure_lot reads it from the DB
+                return dict(changes)
+            return lot.apply(changes)
+
+
+occupancy_store = OccupancyStore()
@@ -0,0 +1,81 @@
+# backend/app/services/token_service.py
+import base64
+import hashlib
+import hmac
+import json
+import secrets
+import time
+from typing import Optional
+from app.utils.config import JWT_SECRET, ACCESS_TOKEN_TTL, REFRESH_TOKEN_TTL
+
+# Compact HS256 JWS tokens (the JWT wire format), built on the stdlib so
+# verification is a single HMAC and a JSON parse
+_HEADER = base64.urlsafe_b64encode(json.dumps({"alg": "HS256", "typ": "JWT"}, separators=(",", ":")).encode()).rstrip(b"=")
+
+ACCESS = "access"
+REFRESH = "refresh"
+
+
+class TokenError(Exception):
+    pass
+
+
+def _b64encode(data: bytes) -> bytes:
+    return base64.urlsafe_b64encode(data).rstrip(b"=")
+
+
+def _b64decode(data: bytes) -> bytes:
+    return base64.urlsafe_b64decode(data + b"=" * (-len(data) % 4))
+
+
+def _sign(signing_input: bytes, secret: str) -> bytes:
+    return _b64encode(hmac.new(secret.encode("utf-8"), signing_input, hashlib.sha256).digest())
+
+
+def encode_token(claims: dict, secret: str = JWT_SECRET) -> str:
+    payload = _b64encode(json.dumps(claims, separators=(",", ":")).encode("utf-8"))
+    signing_input = _HEADER + b"." + payload
+    return (signing_input + b"." + _sign(signing_input, secret)).decode("ascii")
+
+
+def decode_token(token: str, expected_type: str, secret: str = JWT_SECRET, now: Optional[float] = None) -> dict:
+    try:
+        raw = token.encode("ascii")
+        signing_input, signature = raw.rsplit(b".", 1)
+        header, payload = signing_input.split(b".")
+    except (UnicodeEncodeError, ValueError):
+        raise TokenError("Malformed token")
+    if header != _HEADER:
+        raise TokenError("Unsupported token header")
+    if not hmac.compare_digest(signature, _sign(signing_input, secret)):
+        raise TokenError("Invalid token signature")
+    try:
+        claims = json.loads(_b64decode(payload))
+    except ValueError:
+        raise TokenError("Malformed token")
+    if claims.get("type") != expected_type:
+        raise TokenError("Wrong token type")
+    if claims.get("exp", 0) < (now if now is not None else time.time()):
+        raise TokenError("Token expired")
+    return claims
+
+
+def _claims(user, token_type: str, ttl: int) -> dict:
+    now = int(time.time())
+    return {
+        "sub": str(user.id),
+        "name": user.username,
+        "adm": bool(user.is_admin),
+        "type": token_type,
+        "iat": now,
+        "exp": now + ttl,
+        "jti": secrets.token_hex(8),
+    }
+
+
+def create_access_token(user) -> str:
+    return encode_token(_claims(user, ACCESS, ACCESS_TOKEN_TTL))
+
+
+def create_refresh_token(user) -> str:
+    return encode_token(_claims(user, REFRESH, REFRESH_TOKEN_TTL))
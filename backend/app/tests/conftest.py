@@ -2,9 +2,12 @@ import pytest
 import os
 from sqlalchemy import create_engine, text
 from sqlalchemy.orm import sessionmaker
-from app.utils.db import Base
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+from sqlalchemy.pool import NullPool
+from app.utils.db import Base, create_db_engine, get_db
 from app.main import app
-from app.api import lot_routes, auth_routes
+from app.api import lot_routes, live_routes, layout_routes
+from app.services.occupancy_store import occupancy_store
 from app.models.user import User
 from app.models.vehicle import Vehicle
 from app.models.parking_spot import ParkingSpot
@@ -22,6 +25,13 @@ TEST_DATABASE_URL = os.getenv(
 test_engine = create_engine(TEST_DATABASE_URL, echo=False)
 TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=test_engine)
 
+# TestClient runs each request on a fresh event loop, so pooled asyncpg
+# connections cannot be reused between requests
+test_async_engine = create_db_engine(TEST_DATABASE_URL, echo=False, poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(
+    test_async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False
+)
+
 @pytest.fixture(scope="session", autouse=True)
 def setup_test_database():
     Base.metadata.create_all(bind=test_engine)
@@ -43,6 +53,10 @@ def clean_test_db():
         
         conn.execute(text("SET session_replication_role = 'origin'"))
         conn.commit()
+    # Rows were removed behind the API's back, drop any cached responses
+    lot_routes.lot_cache.clear()
+    layout_routes.layout_cache.clear()
+    occupancy_store.clear()
     yield
 
 
@@ -59,17 +73,17 @@ def db_session():
 # Override the get_db dependency to use test database
 @pytest.fixture(scope="function")
 def override_get_db():
-    def _get_db():
-        db = TestingSessionLocal()
-        try:
+    async def _get_db():
+        async with TestingAsyncSessionLocal() as db:
             yield db
-        finally:
-            db.close()
-    
-    # Apply override for all route modules that expose get_db
-    app.dependency_overrides[lot_routes.get_db] = _get_db
-    app.dependency_overrides[auth_routes.get_db] = _get_db
+
+    # All route modules share the get_db dependency from app.utils.db
+    app.dependency_overrides[get_db] = _get_db
+    # Live routes open their own sessions outside of dependency injection
+    live_session_factory = live_routes.session_factory
+    live_routes.session_factory = TestingAsyncSessionLocal
     try:
         yield
     finally:
-        app.dependency_overrides.clear()
\ No newline at end of file
+        app.dependency_overrides.clear()
+        live_routes.session_factory = live_session_factory
\ No newline at end of file
@@ -20,6 +20,10 @@ test_login_data = {
     "password": "securepassword123"
 }
 
+def auth_headers(login=test_login_data):
+    tokens = client.post("/auth/login", json=login).json()
+    return {"Authorization": f"Bearer {tokens['access_token']}"}
+
 # Test that user registration works
 def test_register_user():
     response = client.post("/auth/register", json=test_user_data)
@@ -90,7 +94,7 @@ def test_get_user():
     register_response = client.post("/auth/register", json=test_user_data)
     user_id = register_response.json()["id"]
     
-    response = client.get(f"/auth/users/{user_id}")
+    response = client.get(f"/auth/users/{user_id}", headers=auth_headers())
     assert response.status_code == 200
     data = response.json()
     assert data["id"] == user_id
@@ -98,7 +102,8 @@ def test_get_user():
 
 # Test that getting nonexistent user returns 404
 def test_get_nonexistent_user():
-    response = client.get("/auth/users/99999")
+    client.post("/auth/register", json=test_user_data)
+    response = client.get("/auth/users/99999", headers=auth_headers())
     assert response.status_code == 404
     assert "User not found" in response.json()["detail"]
 
@@ -113,7 +118,7 @@ def test_get_all_users():
     }
     client.post("/auth/register", json=user_data_2)
     
-    response = client.get("/auth/users")
+    response = client.get("/auth/users", headers=auth_headers())
     assert response.status_code == 200
     data = response.json()
     assert len(data) >= 2
@@ -127,7 +132,7 @@ def test_update_user():
         "username": "updateduser",
         "email": "updated@example.com"
     }
-    response = client.put(f"/auth/users/{user_id}", json=updates)
+    response = client.put(f"/auth/users/{user_id}", json=updates, headers=auth_headers())
     assert response.status_code == 200
     data = response.json()
     assert data["username"] == "updateduser"
@@ -139,7 +144,7 @@ def test_update_user_password():
     user_id = register_response.json()["id"]
     
     updates = {"password": "newpassword123"}
-    response = client.put(f"/auth/users/{user_id}", json=updates)
+    response = client.put(f"/auth/users/{user_id}", json=updates, headers=auth_headers())
     assert response.status_code == 200
     
     login_data = {
@@ -154,8 +159,64 @@ def test_delete_user():
     register_response = client.post("/auth/register", json=test_user_data)
     user_id = register_response.json()["id"]
     
-    response = client.delete(f"/auth/users/{user_id}")
+    headers = auth_headers()
+    response = client.delete(f"/auth/users/{user_id}", headers=headers)
     assert response.status_code == 204
     
-    get_response = client.get(f"/auth/users/{user_id}")
+    get_response = client.get(f"/auth/users/{user_id}", headers=headers)
     assert get_response.status_code == 404
+
+# Test that login issues tokens that authenticate protected routes
+def test_login_returns_tokens():
+    client.post("/auth/register", json=test_user_data)
+
+    response = client.post("/auth/login", json=test_login_data)
+    data = response.json()
+    assert data["token_type"] == "bearer"
+    assert data["access_token"] and data["refresh_token"]
+
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {data['access_token']}"})
+    assert me.status_code == 200
+    assert me.json()["name"] == test_user_data["username"]
+
+# Test that protected routes reject missing, tampered and wrong-type tokens
+def test_me_rejects_bad_tokens():
+    assert client.get("/auth/me").status_code == 401
+
+    client.post("/auth/register", json=test_user_data)
+    tokens = client.post("/auth/login", json=test_login_data).json()
+
+    tampered = tokens["access_token"][:-2] + ("AA" if not tokens["access_token"].endswith("AA") else "BB")
+    assert client.get("/auth/me", headers={"Authorization": f"Bearer {tampered}"}).status_code == 401
+
+    refresh_as_access = {"Authorization": f"Bearer {tokens['refresh_token']}"}
+    assert client.get("/auth/me", headers=refresh_as_access).status_code == 401
+
+# Test that a refresh token can be exchanged for a new token pair
+def test_refresh_token():
+    client.post("/auth/register", json=test_user_data)
+    tokens = client.post("/auth/login", json=test_login_data).json()
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["refresh_token"]})
+    assert response.status_code == 200
+    new_tokens = response.json()
+    me = client.get("/auth/me", headers={"Authorization": f"Bearer {new_tokens['access_token']}"})
+    assert me.status_code == 200
+
+    response = client.post("/auth/refresh", json={"refresh_token": tokens["access_token"]})
+    assert response.status_code == 401
+
+# Test that user management needs a token and only touches the caller's own account
+def test_user_routes_require_auth():
+    user_id = client.post("/auth/register", json=test_user_data).json()["id"]
+    assert client.get("/auth/users").status_code == 401
+    assert client.get(f"/auth/users/{user_id}").status_code == 401
+    assert client.put(f"/auth/users/{user_id}", json={"username": "hijacked"}).status_code == 401
+    assert client.delete(f"/auth/users/{user_id}").status_code == 401
+
+    other = {"username": "other", "email": "other@example.com", "password": "password123"}
+    client.post("/auth/register", json=other)
+    headers = auth_headers({"username": "other", "password": "password123"})
+    assert client.get(f"/auth/users/{user_id}", headers=headers).status_code == 200
+    assert client.put(f"/auth/users/{user_id}", json={"username": "hijacked"}, headers=headers).status_code == 403
+    assert client.delete(f"/auth/users/{user_id}", headers=headers).status_code == 403
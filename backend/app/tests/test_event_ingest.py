@@ -0,0 +1,94 @@
+import asyncio
+import json
+import struct
+import pytest
+from app.api import live_routes
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.services.event_ingest import EventDecoder, serve_events
+from app.services.occupancy_store import occupancy_store
+
+@pytest.fixture(autouse=True)
+def use_test_db(override_get_db):
+    pass
+
+def create_lot_with_spots(db_session, count=3):
+    lot = ParkingLot(name="Event Lot", total_spaces=count)
+    db_session.add(lot)
+    db_session.flush()
+    spots = [
+        ParkingSpot(parking_lot_id=lot.id, spot_number=str(i), x=0, y=0, width=10, height=10)
+        for i in range(count)
+    ]
+    db_session.add_all(spots)
+    db_session.commit()
+    return lot.id, [s.id for s in spots]
+
+# Records as ai_cv/utilities/events.py writes them
+def binary_record(kind, ts, fixed=b"", tail=b""):
+    body = struct.pack("<Bd", kind, ts) + fixed + tail
+    return struct.pack("<I", len(body)) + body
+
+def binary_spot(ts, index, spot_id, occupied):
+    return binary_record(1, ts, struct.pack("<iiBi", index, spot_id, occupied, -1))
+
+def ndjson(*events):
+    return b"".join(json.dumps(e).encode() + b"\n" for e in events)
+
+# Test that both encodings decode the same, fed in arbitrary pieces
+def test_decoder_handles_both_formats_in_pieces():
+    header = binary_record(0, 1.0, tail=b'{"camera":"north","lot_id":4}')
+    track = binary_record(2, 2.0, struct.pack("<ih4f", 7, 2, 0, 0, 1, 1), b"car")
+    data = b"PVEV\x01" + header + track + binary_spot(3.0, 0, 12, True) + binary_spot(4.0, 1, -1, False)
+    decoder = EventDecoder()
+    events = [e for i in range(0, len(data), 5) for e in decoder.feed(data[i:i + 5])]
+    assert [e["type"] for e in events] == ["stream", "spot", "spot"]
+    assert events[0]["lot_id"] == 4
+    assert events[1] == {"type": "spot", "ts": 3.0, "spot_index": 0, "spot_id": 12, "occupied": True}
+    assert events[2]["spot_id"] is None
+
+    decoder = EventDecoder()
+    lines = ndjson({"type": "stream", "ts": 1.0, "lot_id": 4}, {"type": "spot", "ts": 3.0, "spot_id": 12, "occupied": True})
+    assert decoder.feed(lines[:10]) == []
+    assert [e["type"] for e in decoder.feed(lines[10:])] == ["stream", "spot"]
+
+# Test that spot transitions streamed over the socket reach the live occupancy store
+def test_socket_stream_updates_occupancy(db_session, tmp_path):
+    lot_id, spot_ids = create_lot_with_spots(db_session)
+    path = str(tmp_path / "events.sock")
+
+    async def wait_for(predicate):
+        for _ in range(200):
+            if predicate():
+                return True
+            await asyncio.sleep(0.01)
+        return False
+
+    async def scenario():
+        server = await serve_events(path, session_factory=live_routes.session_factory)
+        try:
+            async with live_routes.session_factory() as db:
+                await occupancy_store.ensure_lot(db, lot_id)
+
+            _, writer = await asyncio.open_unix_connection(path)
+            header = json.dumps({"camera": "north", "lot_id": lot_id}).encode()
+            writer.write(b"PVEV\x01" + binary_record(0, 1.0, tail=header))
+            # One flushed batch; the later transition of a spot wins
+            writer.write(binary_spot(2.0, 0, spot_ids[0], True) + binary_spot(2.5, 1, spot_ids[1], True)
+                         + binary_spot(3.0, 1, spot_ids[1], False) + binary_spot(3.0, 2, 999999, True))
+            await writer.drain()
+            assert await wait_for(lambda: occupancy_store.get(lot_id).states() ==
+                                  {spot_ids[0]: "occupied", spot_ids[1]: "empty"})
+            writer.close()
+
+            # NDJSON from another pipeline on the same lot
+            _, writer = await asyncio.open_unix_connection(path)
+            writer.write(ndjson({"type": "stream", "ts": 1.0, "lot_id": lot_id},
+                                {"type": "spot", "ts": 5.0, "spot_index": 2, "spot_id": spot_ids[2], "occupied": True}))
+            await writer.drain()
+            assert await wait_for(lambda: occupancy_store.get(lot_id).states().get(spot_ids[2]) == "occupied")
+            writer.close()
+        finally:
+            server.close()
+
+    asyncio.run(scenario())
@@ -0,0 +1,151 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.services.layout_codec import LAYOUT_MEDIA_TYPE, decode_layout, pack_polygon
+from app.services.layout_import import parse_cvat_polygons, spot_rows
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def use_test_db(override_get_db):
+    pass
+
+CVAT_XML = b"""<?xml version="1.0" encoding="utf-8"?>
+<annotations>
+  <version>1.1</version>
+  <image id="0" name="images/0.png" width="1280" height="720">
+    <polygon label="free_parking_space" points="10.0,20.0;60.5,20.0;60.5,120.2;10.0,120.2" />
+    <polygon label="not_free_parking_space" points="70.0,20.0;120.0,25.0;118.0,125.0;68.0,120.0" />
+  </image>
+  <image id="1" name="images/1.png" width="1280" height="720">
+    <polygon label="free_parking_space" points="1,1;5,1;5,5" />
+    <box label="free_parking_space" xtl="100" ytl="100" xbr="150" ybr="200" />
+  </image>
+</annotations>
+"""
+
+def create_lot():
+    response = client.post("/lots/", json={"name": "Import Lot", "total_spaces": 10})
+    return response.json()["id"]
+
+# Test that the CVAT parser gives the same result however the input is chunked
+def test_parse_cvat_chunked():
+    whole = parse_cvat_polygons([CVAT_XML])
+    chunked = parse_cvat_polygons(CVAT_XML[i:i + 7] for i in range(0, len(CVAT_XML), 7))
+    assert whole == chunked
+    assert len(whole) == 2
+
+    second = parse_cvat_polygons([CVAT_XML], image="images/1.png")
+    assert second[1] == [[100.0, 100.0], [150.0, 100.0], [150.0, 200.0], [100.0, 200.0]]
+
+# Test that polygons become bounding rectangles numbered by position
+def test_spot_rows_bounding_box():
+    pts = [[10.0, 20.0], [60.5, 20.0], [60.5, 120.2], [10.0, 120.2]]
+    rows = spot_rows(3, [(None, pts)])
+    assert rows == [{
+        "parking_lot_id": 3, "spot_number": "1", "x": 10, "y": 20, "width": 51, "height": 101,
+        "polygon": pack_polygon(pts),
+    }]
+
+# Test that importing CVAT XML twice is idempotent
+def test_import_cvat_idempotent():
+    lot_id = create_lot()
+    headers = {"Content-Type": "application/xml"}
+
+    response = client.post(f"/lots/{lot_id}/spots/import", content=CVAT_XML, headers=headers)
+    assert response.status_code == 200
+    assert response.json() == {
+        "lot_id": lot_id, "imported": 2, "inserted": 2, "updated": 0, "unchanged": 0, "layout_version": 1
+    }
+
+    response = client.post(f"/lots/{lot_id}/spots/import", content=CVAT_XML, headers=headers)
+    assert response.json() == {
+        "lot_id": lot_id, "imported": 2, "inserted": 0, "updated": 0, "unchanged": 2, "layout_version": 1
+    }
+
+    occupancy = client.get(f"/lots/{lot_id}/occupancy").json()
+    assert occupancy["total_spots"] == 2
+
+# Test that a large JSON layout is imported in bulk
+def test_import_json_layout():
+    lot_id = create_lot()
+    layout = [
+        {"points": [[i * 10, 0], [i * 10 + 8, 0], [i * 10 + 8, 20], [i * 10, 20]]}
+        for i in range(2000)
+    ]
+    response = client.post(f"/lots/{lot_id}/spots/import", json=layout)
+    assert response.status_code == 200
+    assert response.json()["inserted"] == 2000
+
+    layout[0]["points"] = [[0, 0], [9, 0], [9, 30], [0, 30]]
+    response = client.post(f"/lots/{lot_id}/spots/import", json=layout[:1])
+    assert response.json() == {
+        "lot_id": lot_id, "imported": 1, "inserted": 0, "updated": 1, "unchanged": 0, "layout_version": 2
+    }
+
+# Test that malformed layouts are rejected
+def test_import_invalid_layout():
+    lot_id = create_lot()
+    response = client.post(f"/lots/{lot_id}/spots/import", json=[{"points": [[0, 0]]}])
+    assert response.status_code == 422
+
+    response = client.post(f"/lots/{lot_id}/spots/import", content=b"<annotations><image", headers={"Content-Type": "application/xml"})
+    assert response.status_code == 422
+
+    # Points that are not pairs of finite numbers
+    for points in ("0,0;1,0;1,1", [[1], [2], [3]], [[0, 0], [1, "a"], [1, 1]], [[0, 0], [1, 0], [1, None]],
+                   [0, 0, 1, 0, 1], [[0, 0], [1, 0], [True, 1]]):
+        response = client.post(f"/lots/{lot_id}/spots/import", json=[{"points": points}])
+        assert response.status_code == 422, points
+    bad_xml = [
+        b'<annotations><image id="0"><box xtl="1" ytl="1" xbr="5" /></image></annotations>',
+        b'<annotations><image id="0"><polygon points="1,1;5,x;5,5" /></image></annotations>',
+        b'<annotations><image id="0"><polygon points="1,1;5,1,2;5,5" /></image></annotations>',
+        b'<annotations><image id="0"><box xtl="1" ytl="1" xbr="nan" ybr="5" /></image></annotations>',
+    ]
+    for xml in bad_xml:
+        response = client.post(f"/lots/{lot_id}/spots/import", content=xml, headers={"Content-Type": "application/xml"})
+        assert response.status_code == 422, xml
+
+    # Values the spot columns cannot hold: spot_number is String(20), coordinates are int4
+    for spot in ({"points": [[0, 0], [1, 0], [1, 1]], "spot_number": "x" * 21},
+                 {"points": [[0, 0], [1e12, 0], [1e12, 1]]},
+                 {"points": [[-3e9, 0], [1, 0], [1, 1]]}):
+        response = client.post(f"/lots/{lot_id}/spots/import", json=[spot])
+        assert response.status_code == 422, spot
+    xml = b'<annotations><image id="0"><box xtl="0" ytl="0" xbr="1e10" ybr="5" /></image></annotations>'
+    response = client.post(f"/lots/{lot_id}/spots/import", content=xml, headers={"Content-Type": "application/xml"})
+    assert response.status_code == 422
+
+    response = client.post(f"/lots/{lot_id}/spots/import", content=b"x", headers={"Content-Type": "text/plain"})
+    assert response.status_code == 415
+
+    response = client.post("/lots/99999/spots/import", json=[])
+    assert response.status_code == 404
+
+# Test that the binary layout carries each spot's outline and honours If-None-Match
+def test_get_layout_binary():
+    lot_id = create_lot()
+    client.post(f"/lots/{lot_id}/spots/import", content=CVAT_XML, headers={"Content-Type": "application/xml"})
+
+    response = client.get(f"/lots/{lot_id}/layout")
+    assert response.status_code == 200
+    assert response.headers["content-type"] == LAYOUT_MEDIA_TYPE
+    assert response.headers["x-layout-version"] == "1"
+    version, spots = decode_layout(response.content)
+    assert version == 1
+    assert len(spots) == 2
+    assert spots[1][1] == [[70.0, 20.0], [120.0, 25.0], [118.0, 125.0], [68.0, 120.0]]
+
+    etag = response.headers["etag"]
+    cached = client.get(f"/lots/{lot_id}/layout", headers={"If-None-Match": etag})
+    assert cached.status_code == 304
+    assert cached.content == b""
+
+    client.post(f"/lots/{lot_id}/spots/import", json=[{"points": [[0, 0], [5, 0], [5, 5]]}])
+    changed = client.get(f"/lots/{lot_id}/layout", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert decode_layout(changed.content)[0] == 2
+    assert client.get(f"/lots/{lot_id}").json()["layout_version"] == 2
+
+    assert client.get("/lots/99999/layout").status_code == 404
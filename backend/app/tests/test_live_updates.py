@@ -0,0 +1,150 @@
+import asyncio
+import json
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.services.live_updates import LotHub
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def use_test_db(override_get_db):
+    pass
+
+def create_lot_with_spots(db_session, count=3):
+    lot = ParkingLot(name="Live Lot", total_spaces=count)
+    db_session.add(lot)
+    db_session.flush()
+    spots = [
+        ParkingSpot(parking_lot_id=lot.id, spot_number=str(i), x=0, y=0, width=10, height=10)
+        for i in range(count)
+    ]
+    db_session.add_all(spots)
+    db_session.commit()
+    return lot.id, [s.id for s in spots]
+
+# Test that updates published between ticks are merged into one delta
+def test_hub_coalesces_updates():
+    async def scenario():
+        hub = LotHub(1, max_hz=10, queue_size=4)
+        hub.load({1: "empty", 2: "empty"})
+        sub = hub.subscribe()
+        snapshot = await sub.next_frame(timeout=1)
+        assert snapshot.kind == "snapshot"
+
+        hub.publish({1: "occupied"})
+        hub.publish({2: "occupied"})
+        hub.publish({1: "empty"})
+        delta = await sub.next_frame(timeout=1)
+        assert delta.kind == "delta"
+        assert json.loads(delta.text)["spots"] == {"1": "empty", "2": "occupied"}
+        assert delta.version == 3
+        hub.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+# Test that every subscriber receives the same serialized frame
+def test_hub_shares_serialization():
+    async def scenario():
+        hub = LotHub(1, max_hz=0, queue_size=4)
+        hub.load({})
+        subs = [hub.subscribe() for _ in range(5)]
+        for sub in subs:
+            await sub.next_frame(timeout=1)
+
+        hub.publish({7: "occupied"})
+        frames = [await sub.next_frame(timeout=1) for sub in subs]
+        assert all(frame is frames[0] for frame in frames)
+        for sub in subs:
+            hub.unsubscribe(sub)
+
+    asyncio.run(scenario())
+
+# Test that a slow consumer is resynced with a snapshot, then dropped
+def test_hub_slow_consumer():
+    async def scenario():
+        hub = LotHub(1, max_hz=0, queue_size=1, max_drops=2)
+        hub.load({1: "empty"})
+        slow = hub.subscribe()  # snapshot fills its only queue slot
+
+        hub.publish({1: "occupied"})
+        await asyncio.sleep(0)
+        await asyncio.sleep(0)
+        assert slow.stale
+        await slow.next_frame(timeout=1)
+
+        hub.publish({2: "occupied"})
+        resync = await slow.next_frame(timeout=1)
+        assert resync.kind == "snapshot"
+        assert json.loads(resync.text)["spots"] == {"1": "occupied", "2": "occupied"}
+
+        for i in range(3, 7):
+            hub.publish({i: "occupied"})
+            await asyncio.sleep(0)
+            await asyncio.sleep(0)
+        assert slow.closed.is_set()
+        assert slow not in hub.subscribers
+
+    asyncio.run(scenario())
+
+# Test that ingested statuses are returned in the websocket snapshot
+def test_live_websocket_snapshot(db_session):
+    lot_id, spot_ids = create_lot_with_spots(db_session)
+
+    response = client.post(f"/lots/{lot_id}/occupancy", json={"statuses": [
+        {"parking_spot_id": spot_ids[0], "status": "occupied"},
+        {"parking_spot_id": spot_ids[1], "status": "empty"},
+        {"parking_spot_id": 999999, "status": "occupied"},
+    ]})
+    assert response.status_code == 200
+    assert response.json() == {"accepted": 2, "rejected": [999999]}
+
+    with client.websocket_connect(f"/lots/{lot_id}/live") as ws:
+        message = json.loads(ws.receive_text())
+    assert message["type"] == "snapshot"
+    assert message["spots"] == {str(spot_ids[0]): "occupied", str(spot_ids[1]): "empty"}
+
+# Test that occupancy for a missing lot returns 404
+def test_post_occupancy_missing_lot():
+    response = client.post("/lots/99999/occupancy", json={"statuses": []})
+    assert response.status_code == 404
+
+# Test that live clients keep getting updates, with increasing versions, after the lot is invalidated
+def test_hub_resyncs_after_invalidate(db_session):
+    from app.api import live_routes
+    from app.schemas.spot_status import SpotStatusUpdate
+    from app.services.cv_integration import ingest_spot_statuses
+    from app.services.live_updates import broadcaster
+    from app.services.occupancy_store import occupancy_store
+
+    lot_id, spot_ids = create_lot_with_spots(db_session)
+
+    async def ingest(spot_id, status):
+        async with live_routes.session_factory() as db:
+            await ingest_spot_statuses(db, lot_id, [SpotStatusUpdate(parking_spot_id=spot_id, status=status)])
+
+    async def scenario():
+        sub = await broadcaster.subscribe(lot_id, live_routes._load_occupancy)
+        try:
+            first = await sub.next_frame(timeout=1)
+            await ingest(spot_ids[0], "occupied")
+            delta = await sub.next_frame(timeout=1)
+            assert delta.kind == "delta" and delta.version > first.version
+
+            # e.g. a layout import; the next reading rebuilds the lot and resyncs the client
+            occupancy_store.invalidate(lot_id)
+            await ingest(spot_ids[1], "occupied")
+            resync = await sub.next_frame(timeout=1)
+            assert resync.kind == "snapshot" and resync.version > delta.version
+            assert json.loads(resync.text)["spots"] == {str(spot_ids[0]): "occupied", str(spot_ids[1]): "occupied"}
+
+            await ingest(spot_ids[1], "empty")
+            delta = await sub.next_frame(timeout=1)
+            assert delta.kind == "delta" and delta.version > resync.version
+            assert occupancy_store.get(lot_id).version == delta.version
+        finally:
+            broadcaster.unsubscribe(lot_id, sub)
+
+    asyncio.run(scenario())
@@ -0,0 +1,92 @@
+import pytest
+from fastapi.testclient import TestClient
+from app.main import app
+from app.models.parking_lot import ParkingLot
+from app.models.parking_spot import ParkingSpot
+from app.models.spot_status import SpotStatus
+from app.services.occupancy_store import LotOccupancy, occupancy_store
+
+client = TestClient(app)
+
+@pytest.fixture(autouse=True)
+def use_test_db(override_get_db):
+    pass
+
+# Test that the bitset tracks occupancy across 64-bit word boundaries
+def test_lot_occupancy_bitset():
+    lot = LotOccupancy(1, range(100, 230))
+    assert len(lot.occupied) == 3
+
+    changed = lot.apply({100: "occupied", 163: "occupied", 164: "empty", 229: "occupied"})
+    assert changed == {100: "occupied", 163: "occupied", 164: "empty", 229: "occupied"}
+    assert lot.version == 1
+    assert lot.occupied_count() == 3
+    assert lot.occupied_ids() == [100, 163, 229]
+    assert lot.free_ids() == [164]
+
+    # Re-applying the same state is not a change
+    assert lot.apply({163: "occupied"}) == {}
+    assert lot.version == 1
+
+    lot.apply({163: "empty"})
+    assert lot.version == 2
+    summary = lot.summary()
+    assert summary["occupied"] == 2
+    assert summary["free"] == 2
+    assert summary["free_spot_ids"] == [163, 164]
+
+# Test that a spot created after the lot was loaded is added on first update
+def test_lot_occupancy_new_spot():
+    lot = LotOccupancy(1, range(64))
+    lot.apply({500: "occupied"})
+    assert len(lot.spot_ids) == 65
+    assert len(lot.occupied) == 2
+    assert lot.states() == {500: "occupied"}
+
+# Test that the store rebuilds from the latest status rows and then serves reads from memory
+def test_occupancy_endpoint(db_session):
+    lot = ParkingLot(name="Store Lot", total_spaces=2)
+    db_session.add(lot)
+    db_session.flush()
+    spots = [ParkingSpot(parking_lot_id=lot.id, spot_number=str(i), x=0, y=0, width=1, height=1) for i in range(2)]
+    db_session.add_all(spots)
+    db_session.flush()
+    db_session.add_all([
+        SpotStatus(parking_spot_id=spots[0].id, status="empty"),
+        SpotStatus(parking_spot_id=spots[1].id, status="occupied"),
+    ])
+    db_session.commit()
+    db_session.add(SpotStatus(parking_spot_id=spots[0].id, status="occupied"))
+    db_session.commit()
+
+    response = client.get(f"/lots/{lot.id}/occupancy")
+    assert response.status_code == 200
+    data = response.json()
+    assert data["total_spots"] == 2
+    assert data["occupied"] == 2
+    assert data["free_spot_ids"] == []
+    etag = response.headers["etag"]
+    assert client.get(f"/lots/{lot.id}/occupancy", headers={"If-None-Match": etag}).status_code == 304
+
+    client.post(f"/lots/{lot.id}/occupancy", json={"statuses": [
+        {"parking_spot_id": spots[1].id, "status": "empty"},
+    ]})
+    assert occupancy_store.get(lot.id).version == 2
+    response = client.get(f"/lots/{lot.id}/occupancy", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.json()["free_spot_ids"] == [spots[1].id]
+
+# Test that occupancy for a missing lot returns 404
+def test_occupancy_missing_lot():
+    response = client.get("/lots/99999/occupancy")
+    assert response.status_code == 404
+
+# Test that a deleted lot stops being served from memory
+def test_occupancy_of_deleted_lot():
+    lot_id = client.post("/lots/", json={"name": "Gone Lot", "total_spaces": 1}).json()["id"]
+    assert client.get(f"/lots/{lot_id}/occupancy").status_code == 200
+    assert occupancy_store.get(lot_id) is not None
+
+    assert client.delete(f"/lots/{lot_id}").status_code == 204
+    assert occupancy_store.get(lot_id) is None
+    assert client.get(f"/lots/{lot_id}/occupancy").status_code == 404
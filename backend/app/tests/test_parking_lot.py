@@ -1,5 +1,6 @@
 import pytest
 from fastapi.testclient import TestClient
+from app.api import lot_routes
 from app.main import app
 
 # Create client - will use test database via dependency override
@@ -72,3 +73,74 @@ def test_delete_parking_lot():
 
     get_resp = client.get(f"/lots/{lot_id}")
     assert get_resp.status_code == 404
+
+# Test that an unchanged lot returns 304 for a matching If-None-Match
+def test_get_parking_lot_etag_not_modified():
+    create_resp = client.post("/lots/", json=test_lot_data)
+    lot_id = create_resp.json()["id"]
+
+    response = client.get(f"/lots/{lot_id}")
+    assert response.status_code == 200
+    etag = response.headers["etag"]
+    assert "last-modified" in response.headers
+
+    cached_resp = client.get(f"/lots/{lot_id}", headers={"If-None-Match": etag})
+    assert cached_resp.status_code == 304
+    assert cached_resp.headers["etag"] == etag
+    assert cached_resp.content == b""
+
+    modified_resp = client.get(f"/lots/{lot_id}", headers={"If-Modified-Since": response.headers["last-modified"]})
+    assert modified_resp.status_code == 304
+
+# Test that updating a lot changes its ETag and refreshes the cached body
+def test_update_parking_lot_changes_etag():
+    create_resp = client.post("/lots/", json=test_lot_data)
+    lot_id = create_resp.json()["id"]
+    etag = client.get(f"/lots/{lot_id}").headers["etag"]
+    list_etag = client.get("/lots/").headers["etag"]
+
+    client.put(f"/lots/{lot_id}", json={"description": "Changed"})
+
+    response = client.get(f"/lots/{lot_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    assert response.json()["description"] == "Changed"
+
+    list_resp = client.get("/lots/", headers={"If-None-Match": list_etag})
+    assert list_resp.status_code == 200
+    assert list_resp.json()[0]["description"] == "Changed"
+
+# Test that the lot list is revalidated after a create and a delete
+def test_get_all_parking_lots_etag():
+    client.post("/lots/", json=test_lot_data)
+    response = client.get("/lots/")
+    etag = response.headers["etag"]
+    assert client.get("/lots/", headers={"If-None-Match": etag}).status_code == 304
+
+    create_resp = client.post("/lots/", json=test_lot_data)
+    response = client.get("/lots/", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert len(response.json()) == 2
+
+    client.delete(f"/lots/{create_resp.json()['id']}")
+    response = client.get("/lots/")
+    assert len(response.json()) == 1
+
+# Test that a read racing an update does not cache the row it read before the update
+def test_stale_cache_fill_is_dropped(monkeypatch):
+    lot_id = client.post("/lots/", json=test_lot_data).json()["id"]
+    make_etag = lot_routes.make_etag
+
+    def update_commits_meanwhile(*parts):
+        lot_routes.lot_cache.invalidate(lot_id, lot_routes.ALL_LOTS_KEY)
+        return make_etag(*parts)
+
+    monkeypatch.setattr(lot_routes, "make_etag", update_commits_meanwhile)
+    assert client.get(f"/lots/{lot_id}").status_code == 200
+    assert client.get("/lots/").status_code == 200
+    assert lot_routes.lot_cache.get(lot_id) is None
+    assert lot_routes.lot_cache.get(lot_routes.ALL_LOTS_KEY) is None
+
+    monkeypatch.setattr(lot_routes, "make_etag", make_etag)
+    client.get(f"/lots/{lot_id}")
+    assert lot_routes.lot_cache.get(lot_id) is not None
@@ -1 +1,77 @@
-# backend/app/utils/config.py
\ No newline at end of file
+# backend/app/utils/config.py
+import logging
+import os
+import secrets
+from dotenv import load_dotenv
+
+load_dotenv()
+
+
+def _env_bool(name: str, default: bool) -> bool:
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() in ("1", "true", "yes", "on")
+
+
+def _env_int(name: str, default: int) -> int:
+    value = os.getenv(name)
+    return int(value) if value else default
+
+
+DATABASE_URL = os.getenv(
+    "DATABASE_URL",
+    "postgresql://parkvision:parkvision@db:5432/parkvision"
+)
+if not DATABASE_URL:
+    raise ValueError("DATABASE_URL environment variable is not set")
+
+# SQL logging is very noisy under load, so it is opt-in
+DB_ECHO = _env_bool("DB_ECHO", False)
+
+# Connection pool tuning (per worker process)
+DB_POOL_SIZE = _env_int("DB_POOL_SIZE", 10)
+DB_MAX_OVERFLOW = _env_int("DB_MAX_OVERFLOW", 20)
+DB_POOL_TIMEOUT = _env_int("DB_POOL_TIMEOUT", 30)
+DB_POOL_RECYCLE = _env_int("DB_POOL_RECYCLE", 1800)
+DB_POOL_PRE_PING = _env_bool("DB_POOL_PRE_PING", True)
+
+# asyncpg prepared statement cache; set to 0 when running behind pgbouncer
+DB_STATEMENT_CACHE_SIZE = _env_int("DB_STATEMENT_CACHE_SIZE", 500)
+
+# In-process cache of serialized lot responses. The TTL bounds how long
+# another worker process can serve a lot after it was changed elsewhere.
+LOT_CACHE_SIZE = _env_int("LOT_CACHE_SIZE", 1024)
+LOT_CACHE_TTL = _env_int("LOT_CACHE_TTL", 30)
+
+# Live occupancy push: max messages per second per lot, per-client queue
+# depth, and how many consecutive missed messages before a client is dropped
+LIVE_MAX_HZ = float(os.getenv("LIVE_MAX_HZ", "2"))
+LIVE_CLIENT_QUEUE = _env_int("LIVE_CLIENT_QUEUE", 4)
+LIVE_MAX_DROPS = _env_int("LIVE_MAX_DROPS", 20)
+LIVE_KEEPALIVE = _env_int("LIVE_KEEPALIVE", 15)
+
+# Unix socket the CV pipeline streams spot events to (run_pipeline.py
+# --events unix:...); unset disables the listener
+CV_EVENTS_SOCKET = os.getenv("CV_EVENTS_SOCKET")
+
+# Signing key for access/refresh tokens. Set it explicitly in production;
+# the random fallback invalidates tokens on restart and differs per worker,
+# so it is refused outright when WEB_CONCURRENCY asks for several workers.
+JWT_SECRET = os.getenv("JWT_SECRET")
+if not JWT_SECRET:
+    if _env_int("WEB_CONCURRENCY", 1) > 1:
+        raise ValueError("JWT_SECRET must be set when running more than one worker")
+    logging.getLogger(__name__).warning(
+        "JWT_SECRET is not set; using a random per-process key. Tokens will not survive a restart "
+        "and are rejected by any other worker process"
+    )
+    JWT_SECRET = secrets.token_urlsafe(32)
+ACCESS_TOKEN_TTL = _env_int("ACCESS_TOKEN_TTL", 900)
+REFRESH_TOKEN_TTL = _env_int("REFRESH_TOKEN_TTL", 7 * 24 * 3600)
+
+# bcrypt runs in its own bounded pool so login bursts cannot starve the
+# threadpool used by the rest of the app
+BCRYPT_ROUNDS = _env_int("BCRYPT_ROUNDS", 12)
+BCRYPT_WORKERS = _env_int("BCRYPT_WORKERS", max(1, (os.cpu_count() or 1)))
+BCRYPT_MAX_PENDING = _env_int("BCRYPT_MAX_PENDING", 64)
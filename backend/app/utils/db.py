@@ -1,21 +1,59 @@
 # backend/app/utils/db.py
 from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import declarative_base
 from sqlalchemy.orm import sessionmaker
-import os
-from dotenv import load_dotenv
+from app.utils.config import (
+    DATABASE_URL,
+    DB_ECHO,
+    DB_POOL_SIZE,
+    DB_MAX_OVERFLOW,
+    DB_POOL_TIMEOUT,
+    DB_POOL_RECYCLE,
+    DB_POOL_PRE_PING,
+    DB_STATEMENT_CACHE_SIZE,
+)
 
-load_dotenv()
+_SYNC_PREFIXES = ("postgresql+psycopg2://", "postgresql+psycopg://", "postgresql://", "postgres://")
 
-import os
+# Rewrite a plain postgres URL so it uses the asyncpg driver
+def make_async_url(url: str) -> str:
+    for prefix in _SYNC_PREFIXES:
+        if url.startswith(prefix):
+            return "postgresql+asyncpg://" + url[len(prefix):]
+    return url
 
-DATABASE_URL = os.getenv(
-    "DATABASE_URL",
-    "postgresql://parkvision:parkvision@db:5432/parkvision"
-)
-if not DATABASE_URL:
-    raise ValueError("DATABASE_URL environment variable is not set")
+# Build an async engine with the pool settings from config
+def create_db_engine(url: str, **overrides):
+    async_url = make_async_url(url)
+    options = {
+        "echo": DB_ECHO,
+        "pool_pre_ping": DB_POOL_PRE_PING,
+        "pool_size": DB_POOL_SIZE,
+        "max_overflow": DB_MAX_OVERFLOW,
+        "pool_timeout": DB_POOL_TIMEOUT,
+        "pool_recycle": DB_POOL_RECYCLE,
+    }
+    if async_url.startswith("postgresql+asyncpg://"):
+        options["connect_args"] = {"prepared_statement_cache_size": DB_STATEMENT_CACHE_SIZE}
+    options.update(overrides)
+    # Pool sizing arguments are invalid for NullPool/StaticPool
+    if "poolclass" in overrides:
+        for key in ("pool_size", "max_overflow", "pool_timeout", "pool_recycle"):
+            options.pop(key, None)
+    return create_async_engine(async_url, **options)
 
-engine = create_engine(DATABASE_URL, echo=True)
+# Sync engine, kept for schema management and one-off scripts
+engine = create_engine(DATABASE_URL, echo=DB_ECHO, pool_pre_ping=DB_POOL_PRE_PING)
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-Base = declarative_base()
\ No newline at end of file
+
+# Async engine used by the API
+async_engine = create_db_engine(DATABASE_URL)
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+Base = declarative_base()
+
+# Dependency to get DB session
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -0,0 +1,134 @@
+# backend/app/utils/http_cache.py
+import hashlib
+import itertools
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Any, NamedTuple, Optional
+from fastapi import Request, Response
+
+
+class CachedBody(NamedTuple):
+    body: bytes
+    etag: str
+    last_modified: Optional[datetime]
+
+
+class LRUCache:
+    """Bounded, thread-safe LRU map with an optional per-entry TTL.
+
+    Every invalidate() bumps the key's generation. A reader that loads a
+    value takes generation(key) first and passes it to set(), which drops
+    the value if the key was invalidated in the meantime; otherwise a read
+    racing an update could cache the old row after the update evicted it.
+    """
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 0.0):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+        self._counter = itertools.count(1)
+        self._generations: dict = {}
+        self._cleared = 0
+
+    def generation(self, key) -> int:
+        with self._lock:
+            return max(self._generations.get(key, 0), self._cleared)
+
+    def get(self, key) -> Any:
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            value, expires = item
+            if expires and expires < time.monotonic():
+                del self._data[key]
+                return None
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, generation: Optional[int] = None) -> None:
+        expires = time.monotonic() + self.ttl if self.ttl > 0 else 0.0
+        with self._lock:
+            if generation is not None and generation != max(self._generations.get(key, 0), self._cleared):
+                return
+            self._data[key] = (value, expires)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def invalidate(self, *keys) -> None:
+        with self._lock:
+            for key in keys:
+                self._data.pop(key, None)
+                self._generations[key] = next(self._counter)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self._generations.clear()
+            self._cleared = next(self._counter)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# Strong validator built from whatever identifies a representation's version
+def make_etag(*parts) -> str:
+    digest = hashlib.sha1("|".join(str(p) for p in parts).encode("utf-8")).hexdigest()
+    return f'"{digest[:32]}"'
+
+
+def _as_utc(dt: datetime) -> datetime:
+    if dt.tzinfo is None:
+        return dt.replace(tzinfo=timezone.utc)
+    return dt.astimezone(timezone.utc)
+
+
+def http_date(dt: datetime) -> str:
+    return format_datetime(_as_utc(dt), usegmt=True)
+
+
+def cache_headers(etag: str, last_modified: Optional[datetime]) -> dict:
+    headers = {"ETag": etag, "Cache-Control": "no-cache"}
+    if last_modified is not None:
+        headers["Last-Modified"] = http_date(last_modified)
+    return headers
+
+
+# Evaluate If-None-Match / If-Modified-Since (RFC 9110 section 13.2.2)
+def is_not_modified(request: Request, etag: str, last_modified: Optional[datetime]) -> bool:
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match is not None:
+        if if_none_match.strip() == "*":
+            return True
+        candidates = [tag.strip() for tag in if_none_match.split(",")]
+        # Weak comparison, so W/"x" from a proxy still matches "x"
+        return any(tag.removeprefix("W/") == etag for tag in candidates)
+
+    if_modified_since = request.headers.get("if-modified-since")
+    if if_modified_since and last_modified is not None:
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+        except (TypeError, ValueError):
+            return False
+        # HTTP dates only carry whole seconds
+        return _as_utc(last_modified).replace(microsecond=0) <= _as_utc(since)
+    return False
+
+
+def not_modified_response(etag: str, last_modified: Optional[datetime]) -> Response:
+    return Response(status_code=304, headers=cache_headers(etag, last_modified))
+
+
+def cached_json_response(request: Request, cached: CachedBody) -> Response:
+    if is_not_modified(request, cached.etag, cached.last_modified):
+        return not_modified_response(cached.etag, cached.last_modified)
+    return Response(
+        content=cached.body,
+        media_type="application/json",
+        headers=cache_headers(cached.etag, cached.last_modified),
+    )
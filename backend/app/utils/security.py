@@ -0,0 +1,26 @@
+# backend/app/utils/security.py
+from fastapi import Depends, HTTPException, status
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+from app.schemas.user import TokenClaims
+from app.services.token_service import ACCESS, TokenError, decode_token
+
+_bearer = HTTPBearer(auto_error=False)
+
+# Dependency for protected routes: verifies the bearer access token without a DB hit.
+# Async so it runs inline on the event loop instead of hopping to the threadpool
+async def get_current_claims(credentials: HTTPAuthorizationCredentials = Depends(_bearer)) -> TokenClaims:
+    if credentials is None:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Not authenticated",
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    try:
+        claims = decode_token(credentials.credentials, ACCESS)
+    except TokenError as e:
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail=str(e),
+            headers={"WWW-Authenticate": "Bearer"},
+        )
+    return TokenClaims(**claims)
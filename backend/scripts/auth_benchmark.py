@@ -0,0 +1,116 @@
+# backend/scripts/auth_benchmark.py
+"""
+Auth throughput benchmark.
+
+Compares what one authenticated request costs with a password check
+(bcrypt, through the bounded pool) versus a signed access token:
+
+    python scripts/auth_benchmark.py --logins 64 --concurrency 16
+    python scripts/auth_benchmark.py --base-url http://localhost:8000   # also measure over HTTP
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+
+from app.schemas.user import TokenClaims
+from app.services.auth_service import _checkpw, _hashpw, verify_password
+from app.services.token_service import ACCESS, create_access_token, decode_token
+from app.utils.config import BCRYPT_ROUNDS, BCRYPT_WORKERS
+
+
+class _User:
+    id = 1
+    username = "bench"
+    is_admin = False
+
+
+async def bench_bcrypt(logins, concurrency):
+    hashed = _hashpw("benchmark-password")
+    sem = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with sem:
+            return await verify_password("benchmark-password", hashed)
+
+    start = time.perf_counter()
+    results = await asyncio.gather(*(one() for _ in range(logins)))
+    elapsed = time.perf_counter() - start
+    assert all(results)
+
+    start = time.perf_counter()
+    _checkpw("benchmark-password", hashed)
+    single = time.perf_counter() - start
+    return {"ops": logins, "ops_per_s": logins / elapsed, "single_check_ms": single * 1000}
+
+
+def bench_tokens(iterations):
+    token = create_access_token(_User())
+    start = time.perf_counter()
+    for _ in range(iterations):
+        TokenClaims(**decode_token(token, ACCESS))
+    elapsed = time.perf_counter() - start
+    return {"ops": iterations, "ops_per_s": iterations / elapsed, "verify_us": elapsed / iterations * 1e6}
+
+
+async def bench_http(base_url, requests, concurrency):
+    import httpx
+
+    name = f"bench_{uuid.uuid4().hex[:8]}"
+    creds = {"username": name, "password": "benchmark-password"}
+    sem = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=60) as client:
+        resp = await client.post("/auth/register", json={**creds, "email": f"{name}@example.com"})
+        resp.raise_for_status()
+
+        async def timed(fn):
+            async def one():
+                async with sem:
+                    (await fn()).raise_for_status()
+            start = time.perf_counter()
+            await asyncio.gather(*(one() for _ in range(requests)))
+            return requests / (time.perf_counter() - start)
+
+        login_rps = await timed(lambda: client.post("/auth/login", json=creds))
+        token = (await client.post("/auth/login", json=creds)).json()["access_token"]
+        headers = {"Authorization": f"Bearer {token}"}
+        token_rps = await timed(lambda: client.get("/auth/me", headers=headers))
+        await client.delete(f"/auth/users/{resp.json()['id']}", headers=headers)
+    return {"password_login_rps": login_rps, "token_request_rps": token_rps}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark password vs token authentication")
+    parser.add_argument("--logins", type=int, default=64, help="bcrypt verifications to run")
+    parser.add_argument("--concurrency", type=int, default=16)
+    parser.add_argument("--token-iterations", type=int, default=100000)
+    parser.add_argument("--base-url", help="Also benchmark a running server over HTTP")
+    parser.add_argument("--http-requests", type=int, default=200)
+    parser.add_argument("--output", help="Write the result as JSON to this file")
+    args = parser.parse_args()
+
+    result = {
+        "bcrypt_rounds": BCRYPT_ROUNDS,
+        "bcrypt_workers": BCRYPT_WORKERS,
+        "bcrypt": asyncio.run(bench_bcrypt(args.logins, args.concurrency)),
+        "token": bench_tokens(args.token_iterations),
+    }
+    if args.base_url:
+        result["http"] = asyncio.run(bench_http(args.base_url, args.http_requests, args.concurrency))
+
+    b, t = result["bcrypt"], result["token"]
+    print(f"bcrypt ({BCRYPT_ROUNDS} rounds, {BCRYPT_WORKERS} workers): "
+          f"{b['ops_per_s']:.1f} checks/s, {b['single_check_ms']:.1f}ms per check")
+    print(f"access token: {t['ops_per_s']:.0f} verifications/s, {t['verify_us']:.1f}us per verification")
+    if "http" in result:
+        h = result["http"]
+        print(f"HTTP: {h['password_login_rps']:.1f} logins/s vs {h['token_request_rps']:.1f} token requests/s")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()
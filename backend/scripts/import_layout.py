@@ -0,0 +1,64 @@
+# backend/scripts/import_layout.py
+"""
+Bulk import a lot's spot layout into ParkingSpot.
+
+    PYTHONPATH=. python scripts/import_layout.py --lot-id 1 annotations.xml --image 0
+    PYTHONPATH=. python scripts/import_layout.py --lot-id 1 lot_1.json
+
+CVAT XML is streamed through an incremental parser; JSON uses the
+[{"points": ...}] format read by LotDetector. Re-running is idempotent.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from app.models import user, parking_analytics, spot_status, vehicle, parking_lot, parking_spot  # register mappers
+from app.models.parking_lot import ParkingLot
+from app.services.layout_import import parse_cvat_polygons, parse_layout_json, spot_rows, import_spots
+from app.utils.db import AsyncSessionLocal, async_engine
+
+
+def read_chunks(path, size=1 << 16):
+    with open(path, "rb") as f:
+        while True:
+            chunk = f.read(size)
+            if not chunk:
+                return
+            yield chunk
+
+
+def load_spots(path, image):
+    if path.endswith(".xml"):
+        return [(None, pts) for pts in parse_cvat_polygons(read_chunks(path), image)]
+    with open(path, "r") as f:
+        return parse_layout_json(json.load(f))
+
+
+async def run(args):
+    start = time.perf_counter()
+    rows = spot_rows(args.lot_id, load_spots(args.path, args.image))
+    parsed = time.perf_counter()
+    try:
+        async with AsyncSessionLocal() as db:
+            if await db.get(ParkingLot, args.lot_id) is None:
+                raise SystemExit(f"Parking lot {args.lot_id} not found")
+            inserted, updated, layout_version = await import_spots(db, args.lot_id, rows)
+    finally:
+        await async_engine.dispose()
+    done = time.perf_counter()
+    print(f"Imported {len(rows)} spots into lot {args.lot_id}: {inserted} inserted, {updated} updated "
+          f"(layout version {layout_version})")
+    print(f"Parse {parsed - start:.3f}s, insert {done - parsed:.3f}s")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Bulk import parking spots from CVAT XML or lot JSON")
+    parser.add_argument("--lot-id", type=int, required=True)
+    parser.add_argument("--image", help="CVAT image id or name (default: first image)")
+    parser.add_argument("path")
+    asyncio.run(run(parser.parse_args()))
+
+
+if __name__ == "__main__":
+    main()
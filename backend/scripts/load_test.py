@@ -0,0 +1,151 @@
+# backend/scripts/load_test.py
+"""
+Simple HTTP load generator for the ParkVision API.
+
+Run it against a server backed by a local Postgres, save the result, then
+run it again after a change and pass the first result as --baseline:
+
+    python scripts/load_test.py --seed-lots 20 --output before.json
+    python scripts/load_test.py --output after.json --baseline before.json
+"""
+import argparse
+import asyncio
+import json
+import statistics
+import time
+
+import httpx
+
+DEFAULT_PATHS = ["/lots/", "/lots/{lot_id}", "/auth/users"]
+
+
+def percentile(values, pct):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[k]
+
+
+async def seed_lots(client, count):
+    lot_ids = []
+    for i in range(count):
+        resp = await client.post("/lots/", json={
+            "name": f"Load Test Lot {i}",
+            "address": "Load test",
+            "total_spaces": 100,
+        })
+        resp.raise_for_status()
+        lot_ids.append(resp.json()["id"])
+    return lot_ids
+
+
+async def worker(client, paths, lot_ids, queue, latencies, errors):
+    while True:
+        try:
+            i = queue.get_nowait()
+        except asyncio.QueueEmpty:
+            return
+        path = paths[i % len(paths)]
+        if "{lot_id}" in path:
+            path = path.format(lot_id=lot_ids[i % len(lot_ids)])
+        start = time.perf_counter()
+        try:
+            resp = await client.get(path)
+            if resp.status_code >= 400:
+                errors.append(resp.status_code)
+        except httpx.HTTPError as e:
+            errors.append(type(e).__name__)
+        latencies.append(time.perf_counter() - start)
+
+
+async def run(args):
+    limits = httpx.Limits(max_connections=args.concurrency, max_keepalive_connections=args.concurrency)
+    headers = {"Authorization": f"Bearer {args.token}"} if args.token else None
+    async with httpx.AsyncClient(base_url=args.base_url, limits=limits, timeout=args.timeout, headers=headers) as client:
+        lot_ids = await seed_lots(client, args.seed_lots) if args.seed_lots else []
+        if not lot_ids:
+            resp = await client.get("/lots/")
+            resp.raise_for_status()
+            lot_ids = [lot["id"] for lot in resp.json()]
+        paths = args.path or DEFAULT_PATHS
+        if not lot_ids:
+            paths = [p for p in paths if "{lot_id}" not in p]
+        if not args.token:
+            # /auth/users* need a bearer token
+            paths = [p for p in paths if not p.startswith("/auth/users")]
+
+        # Warm up connections and the server's pool before measuring
+        for p in paths:
+            await client.get(p.format(lot_id=lot_ids[0]) if "{lot_id}" in p else p)
+
+        queue = asyncio.Queue()
+        for i in range(args.requests):
+            queue.put_nowait(i)
+
+        latencies, errors = [], []
+        start = time.perf_counter()
+        await asyncio.gather(*(
+            worker(client, paths, lot_ids, queue, latencies, errors)
+            for _ in range(args.concurrency)
+        ))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "base_url": args.base_url,
+        "paths": paths,
+        "requests": len(latencies),
+        "concurrency": args.concurrency,
+        "errors": len(errors),
+        "elapsed_s": elapsed,
+        "rps": len(latencies) / elapsed if elapsed else 0.0,
+        "latency_ms": {
+            "mean": statistics.fmean(latencies) * 1000 if latencies else 0.0,
+            "p50": percentile(latencies, 50) * 1000,
+            "p95": percentile(latencies, 95) * 1000,
+            "p99": percentile(latencies, 99) * 1000,
+        },
+    }
+
+
+def print_report(result, baseline=None):
+    lat = result["latency_ms"]
+    print(f"{result['requests']} requests, concurrency {result['concurrency']}, errors {result['errors']}")
+    print(f"Throughput: {result['rps']:.1f} req/s")
+    print(f"Latency: mean {lat['mean']:.2f}ms  p50 {lat['p50']:.2f}ms  p95 {lat['p95']:.2f}ms  p99 {lat['p99']:.2f}ms")
+    if baseline:
+        base_rps = baseline["rps"]
+        change = (result["rps"] - base_rps) / base_rps * 100 if base_rps else 0.0
+        print(f"Baseline: {base_rps:.1f} req/s -> {result['rps']:.1f} req/s ({change:+.1f}%)")
+        for key in ("p50", "p95", "p99"):
+            print(f"  {key}: {baseline['latency_ms'][key]:.2f}ms -> {lat[key]:.2f}ms")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load test the ParkVision API")
+    parser.add_argument("--base-url", default="http://localhost:8000")
+    parser.add_argument("--path", action="append", help="GET path to hit, may be repeated; {lot_id} is substituted")
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--token", help="Bearer access token, needed for /auth/users")
+    parser.add_argument("--seed-lots", type=int, default=0, help="Create this many lots before the run")
+    parser.add_argument("--output", help="Write the result as JSON to this file")
+    parser.add_argument("--baseline", help="JSON result of an earlier run to compare against")
+    args = parser.parse_args()
+
+    result = asyncio.run(run(args))
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)
+    print_report(result, baseline)
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(result, f, indent=4)
+
+
+if __name__ == "__main__":
+    main()